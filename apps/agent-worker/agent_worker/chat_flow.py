@@ -4,12 +4,14 @@ import os
 from dataclasses import dataclass
 
 from agent_worker.config import ChatConfig
-from agent_worker.utils.facts_format import compute_facts_snapshot_id
 from agent_worker.llm import BaseLLM, JsonOnlyLLMWrapper, build_llm_from_env
-from agent_worker.memory_client import MemoryClient
+from agent_worker.llm.budget import PromptBudget
+from agent_worker.llm.cache import with_response_cache_from_env
+from agent_worker.llm.instrumentation import LLMCallRecord, collect_llm_calls
+from agent_worker.memory_client import MemoryClient, get_shared_memory_client
 from agent_worker.memory_gate import MemoryGate
 from agent_worker.persona import PersonaRegistry
-from agent_worker.responder import FALLBACK_REPLY, Responder
+from agent_worker.responder import FALLBACK_REPLY, SUMMARY_MESSAGE_KIND, Responder
 from agent_worker.router import (
     NoActionDecision,
     RetractDecision,
@@ -18,13 +20,10 @@ from agent_worker.router import (
 from agent_worker.run import execute_decision
 from agent_worker.trace import TraceCollector
 from agent_worker.utils.facts import fetch_active_facts, fetch_active_facts_via_api
-
+from agent_worker.utils.facts_format import compute_facts_snapshot_id
 
 PERSONA_REGISTRY = PersonaRegistry.load_default()
 
-# Maximum number of messages to keep in context (after filtering user/assistant only)
-# Default: 40 messages (more robust than MAX_TURNS * 2 for non-strict alternation)
-MAX_MESSAGES = int(os.getenv("CHAT_MAX_MESSAGES", "40"))
 
 @dataclass(frozen=True)
 class ChatResult:
@@ -52,6 +51,18 @@ def _coerce_llm(llm: object | None) -> BaseLLM:
     raise ValueError("LLM must implement generate(prompt)")
 
 
+def _record_llm_calls(trace: TraceCollector, records: list[LLMCallRecord]) -> None:
+    """每次 LLM 调用一条 llm.call trace：调用点、模型、延迟、token（~ 表示估算）、重试、缓存命中"""
+    for record in records:
+        approx = "~" if record.tokens_estimated else ""
+        trace.record(
+            "llm.call",
+            f"site={record.call_site} model={record.model} latency_ms={record.latency_ms:.0f} "
+            f"tokens={approx}{record.prompt_tokens}+{approx}{record.completion_tokens} "
+            f"retries={record.retries} cache_hit={record.cache_hit} ok={record.ok}",
+        )
+
+
 def chat_flow(
     user_message: str,
     persona_id: str | None,
@@ -67,7 +78,8 @@ def chat_flow(
     trace.record("chat_flow.start")
 
     llm = _coerce_llm(llm)
-    gate_llm = JsonOnlyLLMWrapper(llm)
+    # gate 调用是 temperature=0 的确定性 JSON 输出，可按需走响应缓存（LLM_CACHE_PATH）
+    gate_llm = with_response_cache_from_env(JsonOnlyLLMWrapper(llm))
     persona = PERSONA_REGISTRY.get(persona_id or config.persona_default)
 
     facts_list: list[dict] = []
@@ -82,15 +94,16 @@ def chat_flow(
             trace.record("memory.list_facts.sample", str(facts_list[0]) if len(facts_list) > 0 else "")
         facts_snapshot_id = compute_facts_snapshot_id(facts_list)
         trace.record("memory.list_facts.facts_snapshot_id", facts_snapshot_id)
-        memory_client_in_use = memory_client or (MemoryClient() if config.memory_enabled else None)
+        memory_client_in_use = memory_client or (get_shared_memory_client() if config.memory_enabled else None)
     elif config.memory_enabled:
-        memory_client_in_use = memory_client or MemoryClient()
+        memory_client_in_use = memory_client or get_shared_memory_client()
         try:
             trace.record("memory.list_facts.start")
             base_url = os.getenv("LONELYCAT_CORE_API_URL", "http://localhost:5173")
             facts_list = fetch_active_facts_via_api(
                 base_url,
                 conversation_id=conversation_id,
+                query=user_message,
             )
             trace.record("memory.list_facts.finish", f"count={len(facts_list)}")
             if facts_list:
@@ -108,59 +121,62 @@ def chat_flow(
     else:
         trace.record("memory.disabled")
 
-    responder = Responder(llm)
+    budget = PromptBudget.from_env()
+    responder = Responder(llm, budget=budget)
     gate = MemoryGate(gate_llm)
     had_error = False
 
-    # Apply context window limit if history messages are provided
+    # Filter to only user/assistant messages (system messages are handled separately in responder),
+    # keeping the rolling conversation summary (kind=summary) that replaces older messages.
+    # The context window itself is enforced by the responder's token budget (oldest dropped first).
     if history_messages is not None:
-        # Filter to only user/assistant messages (system messages are handled separately in responder)
-        # Then truncate by message count (more robust than MAX_TURNS * 2 for non-strict alternation)
-        user_assistant_messages = [
-            msg for msg in history_messages 
-            if msg.get("role") in ("user", "assistant")
+        history_messages = [
+            msg for msg in history_messages
+            if msg.get("role") in ("user", "assistant") or msg.get("kind") == SUMMARY_MESSAGE_KIND
         ]
-        if len(user_assistant_messages) > MAX_MESSAGES:
-            # Keep only the last MAX_MESSAGES user/assistant messages
-            history_messages = user_assistant_messages[-MAX_MESSAGES:]
-            trace.record("chat_flow.context_window_limited", f"kept {len(history_messages)} messages (max: {MAX_MESSAGES})")
-        else:
-            # Ensure only user/assistant messages are passed (filter out any system messages)
-            history_messages = user_assistant_messages
-
-    try:
-        if history_messages is not None:
-            # Use message-based reply with history
-            assistant_reply, _memory_hint = responder.reply_with_messages(
-                persona,
-                user_message,
-                history_messages,
-                facts_list,
-                trace=trace,
-            )
-        else:
-            # Use original prompt-based reply for backward compatibility
-            assistant_reply, _memory_hint = responder.reply(
-                persona,
-                user_message,
-                facts_list,
-                trace=trace,
-            )
-    except Exception as exc:
-        if trace:
-            trace.record("responder.error", str(exc))
-        assistant_reply = "Okay."
-        had_error = True
-    if not assistant_reply:
-        assistant_reply = FALLBACK_REPLY
-
-    try:
-        decision = gate.decide(user_message, facts_list, trace=trace)
-    except Exception as exc:
-        if trace:
-            trace.record("gate.error", str(exc))
-        decision = NoActionDecision()
-        had_error = True
+
+    with collect_llm_calls() as llm_calls:
+        try:
+            if history_messages is not None:
+                # Use message-based reply with history
+                assistant_reply, _memory_hint = responder.reply_with_messages(
+                    persona,
+                    user_message,
+                    history_messages,
+                    facts_list,
+                    trace=trace,
+                )
+                report = responder.last_budget_report
+                if report is not None and report.dropped_history:
+                    trace.record(
+                        "chat_flow.context_window_limited",
+                        f"kept {report.kept_history} messages "
+                        f"(dropped {report.dropped_history}, {report.total_tokens}/{report.budget_tokens} tokens)",
+                    )
+            else:
+                # Use original prompt-based reply for backward compatibility
+                assistant_reply, _memory_hint = responder.reply(
+                    persona,
+                    user_message,
+                    facts_list,
+                    trace=trace,
+                )
+        except Exception as exc:
+            if trace:
+                trace.record("responder.error", str(exc))
+            assistant_reply = "Okay."
+            had_error = True
+        if not assistant_reply:
+            assistant_reply = FALLBACK_REPLY
+
+        try:
+            decision = gate.decide(user_message, facts_list, trace=trace)
+        except Exception as exc:
+            if trace:
+                trace.record("gate.error", str(exc))
+            decision = NoActionDecision()
+            had_error = True
+    _record_llm_calls(trace, llm_calls)
 
     if had_error:
         decision = NoActionDecision()
@@ -1,10 +1,26 @@
-from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.admission import (
+    AdmissionController,
+    AdmissionLimits,
+    AdmissionTimeout,
+    get_admission_stats,
+)
+from agent_worker.llm.async_http import aclose_async_clients
+from agent_worker.llm.base import BaseLLM, agenerate_messages_with, agenerate_with
+from agent_worker.llm.budget import BudgetReport, PromptBudget
+from agent_worker.llm.cache import CachedLLM, LLMResponseCache
 from agent_worker.llm.factory import (
     build_gate_llm,
     build_gate_llm_from_env,
     build_llm,
     build_llm_from_env,
 )
+from agent_worker.llm.hedged import HedgedLLM, get_latency_stats
+from agent_worker.llm.instrumentation import (
+    LLMCallRecord,
+    collect_llm_calls,
+    get_llm_call_stats,
+    llm_call_site,
+)
 from agent_worker.llm.json_only import JsonOnlyLLMWrapper
 from agent_worker.llm.ollama import OllamaLLM
 from agent_worker.llm.openai import OpenAIChatLLM
@@ -12,7 +28,24 @@ from agent_worker.llm.qwen import QwenChatLLM
 from agent_worker.llm.stub import StubLLM
 
 __all__ = [
+    "AdmissionController",
+    "AdmissionLimits",
+    "AdmissionTimeout",
+    "get_admission_stats",
     "BaseLLM",
+    "agenerate_with",
+    "agenerate_messages_with",
+    "aclose_async_clients",
+    "BudgetReport",
+    "PromptBudget",
+    "CachedLLM",
+    "LLMResponseCache",
+    "HedgedLLM",
+    "get_latency_stats",
+    "LLMCallRecord",
+    "collect_llm_calls",
+    "get_llm_call_stats",
+    "llm_call_site",
     "JsonOnlyLLMWrapper",
     "build_llm",
     "build_llm_from_env",
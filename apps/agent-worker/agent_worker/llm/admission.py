@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from agent_worker.llm.budget import ApproxTokenEstimator
+from agent_worker.utils.env import env_float, env_int
+
+# 0 表示不限；准入控制默认关闭，见 with_admission_from_env
+DEFAULT_MAX_IN_FLIGHT = 0
+DEFAULT_QUEUE_TIMEOUT_S = 30.0
+# 单次 Retry-After 最多让整个 provider 暂停多久（防止异常头把进程卡死）
+DEFAULT_MAX_RETRY_AFTER_S = 60.0
+ASYNC_POLL_INTERVAL_S = 0.02
+
+_estimator = ApproxTokenEstimator()
+
+
+class AdmissionTimeout(RuntimeError):
+    """排队超过 deadline 仍未获准发出请求"""
+
+
+@dataclass(frozen=True)
+class AdmissionLimits:
+    """单个 provider 的准入限制；max_in_flight / requests_per_min / tokens_per_min 为 0 表示不限"""
+
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT
+    requests_per_min: float = 0.0
+    tokens_per_min: float = 0.0
+    queue_timeout_s: float = DEFAULT_QUEUE_TIMEOUT_S
+    max_retry_after_s: float = DEFAULT_MAX_RETRY_AFTER_S
+
+    @property
+    def limited(self) -> bool:
+        """是否配置了任何一项限制"""
+        return self.max_in_flight > 0 or self.requests_per_min > 0 or self.tokens_per_min > 0
+
+    @classmethod
+    def from_env(cls) -> AdmissionLimits:
+        return cls(
+            max_in_flight=env_int("LLM_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT),
+            requests_per_min=env_float("LLM_RPM", 0.0),
+            tokens_per_min=env_float("LLM_TPM", 0.0),
+            queue_timeout_s=env_float("LLM_QUEUE_TIMEOUT_S", DEFAULT_QUEUE_TIMEOUT_S),
+            max_retry_after_s=env_float("LLM_MAX_RETRY_AFTER_S", DEFAULT_MAX_RETRY_AFTER_S),
+        )
+
+
+class TokenBucket:
+    """按分钟速率连续补充的令牌桶；容量默认等于每分钟额度（与 provider 的分钟窗口一致）
+
+    非线程安全，由 AdmissionController 的锁保护。
+    """
+
+    def __init__(
+        self,
+        rate_per_min: float,
+        capacity: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate_per_s = rate_per_min / 60.0
+        self._capacity = capacity if capacity is not None else rate_per_min
+        self._tokens = self._capacity
+        self._clock = clock
+        self._updated = clock()
+
+    @property
+    def capacity(self) -> float:
+        return self._capacity
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, amount: float) -> float:
+        """距离可取出 amount 个令牌还需等待的秒数；0 表示立即可取"""
+        self._refill()
+        amount = min(amount, self._capacity)
+        if self._tokens >= amount:
+            return 0.0
+        if self._rate_per_s <= 0:
+            return math.inf
+        return (amount - self._tokens) / self._rate_per_s
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= min(amount, self._capacity)
+
+    def adjust(self, delta: float) -> None:
+        """按实际用量修正：delta > 0 表示多扣，delta < 0 表示退还；允许透支为负"""
+        self._refill()
+        self._tokens = min(self._capacity, self._tokens - delta)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate_per_s)
+        self._updated = now
+
+
+class AdmissionTicket:
+    """一次获准的请求；作为上下文管理器使用，退出时归还并发槽位"""
+
+    def __init__(self, controller: AdmissionController, estimated_tokens: int, queue_s: float) -> None:
+        self._controller = controller
+        self.estimated_tokens = estimated_tokens
+        self.queue_s = queue_s
+        self._actual_tokens: int | None = None
+        self._released = False
+
+    def settle(self, actual_tokens: int | None) -> None:
+        """记录 provider 返回的实际 token 用量，释放时据此修正 TPM 桶"""
+        if isinstance(actual_tokens, int) and actual_tokens >= 0:
+            self._actual_tokens = actual_tokens
+
+    def throttled(self, retry_after_s: float | None) -> None:
+        """provider 返回 429：让整个 provider 暂停 retry_after_s（未给出时只计数）"""
+        self._controller.penalize(retry_after_s)
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self.estimated_tokens, self._actual_tokens)
+
+    def __enter__(self) -> AdmissionTicket:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """进程内按 provider 共享的准入控制
+
+    - max_in_flight 限制同时在途的 HTTP 请求数（0 不限）；
+    - requests/min、tokens/min 两个令牌桶限制速率（token 先按 prompt 估算，响应后按 usage 修正）；
+    - 调用方在条件变量上排队（不保证 FIFO），超过 deadline 抛 AdmissionTimeout；
+    - 429 的 Retry-After 会让该 provider 的所有新请求暂停，而不是各自重试放大流量。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limits: AdmissionLimits | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._limits = limits or AdmissionLimits()
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._rpm = (
+            TokenBucket(self._limits.requests_per_min, clock=clock)
+            if self._limits.requests_per_min > 0
+            else None
+        )
+        self._tpm = (
+            TokenBucket(self._limits.tokens_per_min, clock=clock)
+            if self._limits.tokens_per_min > 0
+            else None
+        )
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._waiting = 0
+        # 指标
+        self._admitted = 0
+        self._throttled = 0
+        self._rejected = 0
+        self._retry_after_events = 0
+        self._queue_s_total = 0.0
+        self._queue_s_max = 0.0
+        self._tokens_estimated = 0
+        self._tokens_actual = 0
+
+    @property
+    def limits(self) -> AdmissionLimits:
+        return self._limits
+
+    def acquire(self, tokens: int = 0, timeout_s: float | None = None) -> AdmissionTicket:
+        """阻塞直到获准；timeout_s 默认取 limits.queue_timeout_s"""
+        timeout_s = self._limits.queue_timeout_s if timeout_s is None else timeout_s
+        start = self._clock()
+        deadline = start + max(0.0, timeout_s)
+        waited = False
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    now = self._clock()
+                    wait_s = self._wait_time(tokens, now)
+                    if wait_s <= 0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._reject(now - start)
+                    waited = True
+                    self._cond.wait(min(wait_s, remaining))
+            finally:
+                self._waiting -= 1
+            return self._admit(tokens, start, waited)
+
+    async def aacquire(self, tokens: int = 0, timeout_s: float | None = None) -> AdmissionTicket:
+        """acquire 的协程版本：排队时 await asyncio.sleep，不阻塞事件循环"""
+        timeout_s = self._limits.queue_timeout_s if timeout_s is None else timeout_s
+        start = self._clock()
+        deadline = start + max(0.0, timeout_s)
+        waited = False
+        with self._cond:
+            self._waiting += 1
+        try:
+            while True:
+                with self._cond:
+                    now = self._clock()
+                    wait_s = self._wait_time(tokens, now)
+                    if wait_s <= 0:
+                        return self._admit(tokens, start, waited)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._reject(now - start)
+                waited = True
+                # 槽位释放没有跨线程/协程的通知，按短间隔轮询
+                await asyncio.sleep(min(wait_s, remaining, ASYNC_POLL_INTERVAL_S))
+        finally:
+            with self._cond:
+                self._waiting -= 1
+
+    def _admit(self, tokens: int, start: float, waited: bool) -> AdmissionTicket:
+        # 调用方需持有 self._cond
+        if self._rpm is not None:
+            self._rpm.consume(1)
+        if self._tpm is not None:
+            self._tpm.consume(tokens)
+        self._in_flight += 1
+        queue_s = self._clock() - start
+        self._admitted += 1
+        if waited:
+            self._throttled += 1
+        self._queue_s_total += queue_s
+        self._queue_s_max = max(self._queue_s_max, queue_s)
+        self._tokens_estimated += tokens
+        return AdmissionTicket(self, tokens, queue_s)
+
+    def _reject(self, waited_s: float) -> None:
+        self._rejected += 1
+        raise AdmissionTimeout(f"llm admission timed out for {self.name} after {waited_s:.2f}s")
+
+    def penalize(self, retry_after_s: float | None) -> None:
+        with self._cond:
+            self._retry_after_events += 1
+            if retry_after_s is None or retry_after_s <= 0:
+                return
+            delay = min(retry_after_s, self._limits.max_retry_after_s)
+            self._blocked_until = max(self._blocked_until, self._clock() + delay)
+
+    def _release(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if actual_tokens is not None:
+                self._tokens_actual += actual_tokens
+                if self._tpm is not None:
+                    self._tpm.adjust(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        if 0 < self._limits.max_in_flight <= self._in_flight:
+            # 没有空闲槽位：等 release 的 notify（用较长的超时兜底）
+            return math.inf
+        wait_s = max(0.0, self._blocked_until - now)
+        if self._rpm is not None:
+            wait_s = max(wait_s, self._rpm.wait_time(1))
+        if self._tpm is not None:
+            wait_s = max(wait_s, self._tpm.wait_time(tokens))
+        return wait_s
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "provider": self.name,
+                "max_in_flight": self._limits.max_in_flight,
+                "requests_per_min": self._limits.requests_per_min,
+                "tokens_per_min": self._limits.tokens_per_min,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "admitted": self._admitted,
+                "throttled": self._throttled,
+                "rejected": self._rejected,
+                "retry_after_events": self._retry_after_events,
+                "queue_s_avg": (self._queue_s_total / self._admitted) if self._admitted else 0.0,
+                "queue_s_max": self._queue_s_max,
+                "tokens_estimated": self._tokens_estimated,
+                "tokens_actual": self._tokens_actual,
+            }
+
+
+def estimate_payload_tokens(payload: dict[str, Any]) -> int:
+    """按请求体里的 messages 估算 prompt token 数（用于 TPM 预扣）"""
+    messages = payload.get("messages")
+    if not isinstance(messages, list):
+        return 0
+    total = 0
+    for msg in messages:
+        if isinstance(msg, dict):
+            total += _estimator.count(str(msg.get("content", ""))) + 4
+    return total
+
+
+def usage_total_tokens(response: Any) -> int | None:
+    """从响应体取实际 token 用量：OpenAI 兼容的 usage.total_tokens，或 Ollama 的 eval 计数"""
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    usage = data.get("usage")
+    if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+        return usage["total_tokens"]
+    prompt_count = data.get("prompt_eval_count")
+    eval_count = data.get("eval_count")
+    if isinstance(prompt_count, int) or isinstance(eval_count, int):
+        return (prompt_count or 0) + (eval_count or 0)
+    return None
+
+
+def settle_response(ticket: AdmissionTicket | None, response: Any) -> None:
+    """HTTP 响应回来后更新准入状态：429 触发 Retry-After 暂停，成功则按 usage 修正 TPM"""
+    if ticket is None:
+        return
+    if response.status_code == 429:
+        ticket.throttled(parse_retry_after(response.headers.get("Retry-After")))
+    elif response.status_code < 400:
+        ticket.settle(usage_total_tokens(response))
+
+
+def parse_retry_after(value: str | None, *, now: float | None = None) -> float | None:
+    """解析 Retry-After 头：秒数或 HTTP-date；无法解析返回 None"""
+    if value is None:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    current = time.time() if now is None else now
+    return max(0.0, parsed.timestamp() - current)
+
+
+_controllers: dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_admission_controller(key: str, limits: AdmissionLimits | None = None) -> AdmissionController:
+    """同一进程内按 provider key 复用控制器（限制以第一次创建时为准）"""
+    with _controllers_lock:
+        controller = _controllers.get(key)
+        if controller is None:
+            controller = AdmissionController(key, limits or AdmissionLimits.from_env())
+            _controllers[key] = controller
+        return controller
+
+
+def get_admission_stats() -> list[dict[str, Any]]:
+    """当前进程内所有 provider 的排队/限流统计"""
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return [controller.stats() for controller in controllers]
+
+
+def with_admission_from_env(llm: Any, key: str) -> Any:
+    """给 HTTP provider 挂上进程共享的准入控制（默认关闭）
+
+    设置了 LLM_MAX_IN_FLIGHT / LLM_RPM / LLM_TPM 任一项时开启；LLM_ADMISSION=1 强制开启
+    （无限制时只在 provider 内共享 429 的 Retry-After 暂停），LLM_ADMISSION=0 强制关闭。
+    """
+    switch = os.getenv("LLM_ADMISSION", "").strip().lower()
+    if switch in ("0", "false", "no", "off"):
+        return llm
+    limits = AdmissionLimits.from_env()
+    if not limits.limited and switch not in ("1", "true", "yes", "on"):
+        return llm
+    attach = getattr(llm, "attach_admission", None)
+    if attach is not None:
+        attach(get_admission_controller(key, limits))
+    return llm
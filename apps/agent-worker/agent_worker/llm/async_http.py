@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import Any
+
+import httpx
+
+from agent_worker.utils.env import env_int
+
+DEFAULT_ASYNC_MAX_CONNECTIONS = 100
+DEFAULT_ASYNC_MAX_KEEPALIVE = 20
+
+# httpx.AsyncClient 绑定创建它的事件循环，因此按 loop 分组；同一 loop 内按 transport 复用
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[Any, httpx.AsyncClient]] = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def get_async_client(transport: Any = None) -> httpx.AsyncClient:
+    """当前事件循环内共享的 AsyncClient（连接池跨 provider、跨调用复用）
+
+    transport 不为 None（测试里的 MockTransport 等）时单独建一个 client。
+    超时由调用方按请求传入。
+    """
+    loop = asyncio.get_running_loop()
+    key = id(transport) if transport is not None else None
+    with _clients_lock:
+        per_loop = _clients.setdefault(loop, {})
+        client = per_loop.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                transport=transport,
+                limits=httpx.Limits(
+                    max_connections=env_int("LLM_ASYNC_MAX_CONNECTIONS", DEFAULT_ASYNC_MAX_CONNECTIONS),
+                    max_keepalive_connections=env_int(
+                        "LLM_ASYNC_MAX_KEEPALIVE", DEFAULT_ASYNC_MAX_KEEPALIVE
+                    ),
+                ),
+            )
+            per_loop[key] = client
+        return client
+
+
+async def aclose_async_clients() -> None:
+    """关闭当前事件循环上的共享 client（应用 shutdown 时调用）"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = list(_clients.pop(loop, {}).values())
+    for client in clients:
+        await client.aclose()
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
 from abc import ABC, abstractmethod
-from typing import Any
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, AsyncIterator, ContextManager
 
+from agent_worker.llm.admission import AdmissionController, AdmissionTicket, estimate_payload_tokens
+from agent_worker.llm.budget import TRUNCATION_MARKER
+from agent_worker.llm.instrumentation import ASYNC_METHODS, SYNC_METHODS, instrument_method
 
 DEFAULT_MAX_PROMPT_CHARS = 20000
 
@@ -11,6 +17,14 @@ class BaseLLM(ABC):
     def __init__(self, max_prompt_chars: int = DEFAULT_MAX_PROMPT_CHARS) -> None:
         self._max_prompt_chars = max_prompt_chars
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        # 每个子类自己定义的 generate*/agenerate* 都套上计时与用量记录（见 llm/instrumentation.py）
+        super().__init_subclass__(**kwargs)
+        for name in SYNC_METHODS + ASYNC_METHODS:
+            method = cls.__dict__.get(name)
+            if callable(method):
+                setattr(cls, name, instrument_method(method, name))
+
     @abstractmethod
     def generate(self, prompt: str) -> str:
         """
@@ -64,12 +78,74 @@ class BaseLLM(ABC):
         prompt = "\n\n".join(prompt_parts)
         return self.generate(prompt)
 
+    async def agenerate(self, prompt: str) -> str:
+        """generate 的协程版本
+
+        默认实现把同步 generate 放到线程里执行，保证所有子类都可以被 await；
+        HTTP provider 覆盖为基于共享 httpx.AsyncClient 的原生实现。
+        """
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def agenerate_messages(self, messages: list[dict[str, str]]) -> str:
+        """generate_messages 的协程版本（默认实现同 agenerate）"""
+        return await asyncio.to_thread(self.generate_messages, messages)
+
     def decide(self, prompt: str) -> str:
         return self.generate(prompt)
 
+    def attach_admission(self, controller: AdmissionController | None) -> None:
+        """挂上准入控制（见 llm/admission.py）；包装类转发给内层 LLM"""
+        inner = getattr(self, "_llm", None)
+        if isinstance(inner, BaseLLM):
+            inner.attach_admission(controller)
+            return
+        self._admission = controller
+
+    def _admit(self, payload: dict[str, Any]) -> ContextManager[AdmissionTicket | None]:
+        """HTTP provider 每次发请求前调用；未挂准入控制时不做任何限制"""
+        controller = getattr(self, "_admission", None)
+        if controller is None:
+            return nullcontext(None)
+        return controller.acquire(estimate_payload_tokens(payload))
+
+    @asynccontextmanager
+    async def _aadmit(self, payload: dict[str, Any]) -> AsyncIterator[AdmissionTicket | None]:
+        """_admit 的协程版本：排队时不阻塞事件循环"""
+        controller = getattr(self, "_admission", None)
+        if controller is None:
+            yield None
+            return
+        ticket = await controller.aacquire(estimate_payload_tokens(payload))
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
     def _trim_prompt(self, prompt: str) -> str:
         if self._max_prompt_chars <= 0:
             return prompt
         if len(prompt) <= self._max_prompt_chars:
             return prompt
-        return prompt[: self._max_prompt_chars]
+        # 保留首尾、截掉中间：头部是 system/persona，尾部通常是最新的用户消息
+        keep = self._max_prompt_chars - len(TRUNCATION_MARKER)
+        if keep <= 0:
+            return prompt[: self._max_prompt_chars]
+        head = keep - keep // 2
+        tail = keep // 2
+        return prompt[:head] + TRUNCATION_MARKER + (prompt[-tail:] if tail else "")
+
+
+async def agenerate_with(llm: Any, prompt: str) -> str:
+    """await 任意 LLM：有原生 agenerate 协程就用，否则把同步 generate 放到线程里（兼容鸭子类型的 LLM）"""
+    method = getattr(llm, "agenerate", None)
+    if inspect.iscoroutinefunction(method):
+        return await method(prompt)
+    return await asyncio.to_thread(llm.generate, prompt)
+
+
+async def agenerate_messages_with(llm: Any, messages: list[dict[str, str]]) -> str:
+    """agenerate_with 的 messages 版本"""
+    method = getattr(llm, "agenerate_messages", None)
+    if inspect.iscoroutinefunction(method):
+        return await method(messages)
+    return await asyncio.to_thread(llm.generate_messages, messages)
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Protocol
+
+from agent_worker.utils.env import env_float, env_int
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # type: ignore[assignment]
+
+
+# 每条 chat message 的结构开销（role/分隔符），与 OpenAI 的经验值一致
+MESSAGE_OVERHEAD_TOKENS = 4
+DEFAULT_MAX_PROMPT_TOKENS = 6000
+DEFAULT_FACTS_SHARE = 0.25
+DEFAULT_MAX_HISTORY_MESSAGES = 40
+TRUNCATION_MARKER = "\n...[truncated]...\n"
+
+# CJK 统一表意文字、扩展 A、兼容表意、假名、谚文、全角标点
+_CJK_RE = re.compile(
+    "[　-〿぀-ヿ㐀-䶿一-鿿"
+    "가-힯豈-﫿＀-￯]"
+)
+
+
+class TokenEstimator(Protocol):
+    def count(self, text: str) -> int:
+        ...
+
+
+class ApproxTokenEstimator:
+    """快速近似 token 计数：CJK 字符按 1 token/字，其余按 ~4 字符/token"""
+
+    def __init__(self, chars_per_token: float = 4.0) -> None:
+        self._chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        cjk = len(_CJK_RE.findall(text))
+        rest = len(text) - cjk
+        return cjk + math.ceil(rest / self._chars_per_token)
+
+
+class TiktokenEstimator:
+    """基于 tiktoken 的精确计数（可选依赖）"""
+
+    def __init__(self, encoding: str = "cl100k_base") -> None:
+        if tiktoken is None:
+            raise RuntimeError("tiktoken is not installed")
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text))
+
+
+def build_estimator(name: str | None = None) -> TokenEstimator:
+    """按名称构建 estimator："approx"（默认）或 "tiktoken[:encoding]"
+
+    名称缺省时读 LLM_TOKENIZER；tiktoken 不可用时退回近似计数。
+    """
+    name = (name if name is not None else os.getenv("LLM_TOKENIZER", "approx")).strip().lower()
+    if name.startswith("tiktoken"):
+        _, _, encoding = name.partition(":")
+        try:
+            return TiktokenEstimator(encoding or "cl100k_base")
+        except RuntimeError:
+            return ApproxTokenEstimator()
+    return ApproxTokenEstimator()
+
+
+@dataclass
+class BudgetReport:
+    """一次预算分配的结果统计（token 为估算值）"""
+
+    budget_tokens: int
+    system_tokens: int = 0
+    facts_tokens: int = 0
+    history_tokens: int = 0
+    current_tokens: int = 0
+    kept_facts: int = 0
+    dropped_facts: int = 0
+    kept_history: int = 0
+    dropped_history: int = 0
+    truncated_current: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.system_tokens + self.facts_tokens + self.history_tokens + self.current_tokens
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["total_tokens"] = self.total_tokens
+        return data
+
+    def to_trace(self) -> str:
+        return json.dumps(self.as_dict(), separators=(",", ":"))
+
+
+@dataclass
+class BudgetedPrompt:
+    facts: list[dict]
+    history: list[dict[str, str]]
+    current: str
+    report: BudgetReport
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    """按 token 在 system / facts / history / 当前消息之间分配预算
+
+    - system 与当前消息必保留；当前消息过长时截掉中间，保留首尾。
+    - facts 最多占 facts_share，按给定顺序装入，装不下的跳过。
+    - history 用剩余预算，从最新往最旧装，遇到装不下的即停止（丢最旧的）。
+    """
+
+    max_tokens: int = DEFAULT_MAX_PROMPT_TOKENS
+    facts_share: float = DEFAULT_FACTS_SHARE
+    max_history_messages: int | None = DEFAULT_MAX_HISTORY_MESSAGES
+    estimator: TokenEstimator = field(default_factory=ApproxTokenEstimator)
+
+    @classmethod
+    def from_env(cls) -> "PromptBudget":
+        return cls(
+            max_tokens=env_int("CHAT_MAX_PROMPT_TOKENS", DEFAULT_MAX_PROMPT_TOKENS),
+            facts_share=env_float("CHAT_FACTS_BUDGET_SHARE", DEFAULT_FACTS_SHARE),
+            max_history_messages=env_int("CHAT_MAX_MESSAGES", DEFAULT_MAX_HISTORY_MESSAGES),
+            estimator=build_estimator(),
+        )
+
+    def count_message(self, content: str) -> int:
+        return self.estimator.count(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def allocate(
+        self,
+        *,
+        system: str,
+        current: str,
+        facts: list[dict] | None = None,
+        history: list[dict[str, str]] | None = None,
+        render_facts: Callable[[list[dict]], str] | None = None,
+    ) -> BudgetedPrompt:
+        facts = list(facts or [])
+        history = list(history or [])
+        report = BudgetReport(budget_tokens=self.max_tokens)
+
+        report.system_tokens = self.count_message(system)
+        current_budget = max(self.max_tokens - report.system_tokens, 0)
+        report.current_tokens = self.count_message(current)
+        if report.current_tokens > current_budget:
+            current = self._truncate_middle(current, current_budget - MESSAGE_OVERHEAD_TOKENS)
+            report.current_tokens = self.count_message(current)
+            report.truncated_current = True
+        remaining = max(self.max_tokens - report.system_tokens - report.current_tokens, 0)
+
+        kept_facts = self._fit_facts(facts, min(remaining, int(self.max_tokens * self.facts_share)), render_facts)
+        if kept_facts and render_facts is not None:
+            report.facts_tokens = self.estimator.count(render_facts(kept_facts))
+        else:
+            report.facts_tokens = sum(self._fact_cost(f) for f in kept_facts)
+        report.kept_facts = len(kept_facts)
+        report.dropped_facts = len(facts) - len(kept_facts)
+        remaining = max(remaining - report.facts_tokens, 0)
+
+        kept_history: list[dict[str, str]] = []
+        for msg in reversed(history):
+            if self.max_history_messages is not None and len(kept_history) >= self.max_history_messages:
+                break
+            cost = self.count_message(msg.get("content", ""))
+            if cost > remaining:
+                break
+            kept_history.append(msg)
+            remaining -= cost
+            report.history_tokens += cost
+        kept_history.reverse()
+        report.kept_history = len(kept_history)
+        report.dropped_history = len(history) - len(kept_history)
+
+        return BudgetedPrompt(facts=kept_facts, history=kept_history, current=current, report=report)
+
+    def _fit_facts(
+        self,
+        facts: list[dict],
+        cap: int,
+        render_facts: Callable[[list[dict]], str] | None,
+    ) -> list[dict]:
+        kept: list[dict] = []
+        used = 0
+        for fact in facts:
+            cost = self._fact_cost(fact)
+            if used + cost > cap:
+                continue
+            kept.append(fact)
+            used += cost
+        # 逐条估算不含块头部说明；按实际渲染结果校正，超出则从末尾去掉
+        if render_facts is not None:
+            while kept and self.estimator.count(render_facts(kept)) > cap:
+                kept.pop()
+        return kept
+
+    def _fact_cost(self, fact: dict) -> int:
+        value = fact.get("value")
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+        return self.estimator.count(f"- {fact.get('key', '')}: {value}") + 1
+
+    def _truncate_middle(self, text: str, max_tokens: int) -> str:
+        """保留首尾、截掉中间，使估算 token 数不超过 max_tokens"""
+        if max_tokens <= 0:
+            return ""
+        if self.estimator.count(text) <= max_tokens:
+            return text
+        lo, hi = 0, len(text)
+        best = ""
+        while lo <= hi:
+            keep = (lo + hi) // 2
+            head = text[: keep - keep // 2]
+            tail = text[len(text) - keep // 2 :] if keep // 2 else ""
+            candidate = f"{head}{TRUNCATION_MARKER}{tail}"
+            if self.estimator.count(candidate) <= max_tokens:
+                best = candidate
+                lo = keep + 1
+            else:
+                hi = keep - 1
+        return best
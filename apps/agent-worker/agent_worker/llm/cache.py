@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from agent_worker.llm.base import BaseLLM, agenerate_messages_with, agenerate_with
+from agent_worker.llm.instrumentation import note_cache_hit
+from agent_worker.utils.env import env_float, env_int
+
+DEFAULT_CACHE_TTL_S = 24 * 3600.0
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+# 每写入多少条做一次过期清理 + LRU 淘汰（摊销 COUNT/DELETE 的成本）
+EVICT_EVERY_PUTS = 32
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+_CREATE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)"
+
+
+class LLMResponseCache:
+    """SQLite 持久化的 LLM 响应缓存（TTL + 容量上限的近似 LRU）
+
+    - 每个线程持有独立连接；WAL + busy_timeout，多进程可共享同一文件。
+    - 命中会刷新 accessed_at；超出 max_entries 时按 accessed_at 淘汰最旧条目。
+    - hits/misses/stores/evictions 为进程内计数，见 stats()。
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        ttl_s: float = DEFAULT_CACHE_TTL_S,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self._path = str(path)
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._puts_since_evict = 0
+        if self._path != ":memory:":
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_CREATE_TABLE_SQL)
+            conn.execute(_CREATE_INDEX_SQL)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._ttl_s > 0 and now - row[1] > self._ttl_s:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            row = None
+        with self._counter_lock:
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return row[0] if row is not None else None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+        except sqlite3.Error:
+            return
+        with self._counter_lock:
+            self._stores += 1
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= EVICT_EVERY_PUTS
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """删除过期条目，并把条目数压回 max_entries 以内；返回删除条数"""
+        removed = 0
+        try:
+            conn = self._conn()
+            if self._ttl_s > 0:
+                removed += conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self._ttl_s,)
+                ).rowcount
+            if self._max_entries > 0:
+                removed += conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self._max_entries,),
+                ).rowcount
+        except sqlite3.Error:
+            return removed
+        with self._counter_lock:
+            self._evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def stats(self) -> dict[str, Any]:
+        with self._counter_lock:
+            lookups = self._hits + self._misses
+            return {
+                "path": self._path,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stores": self._stores,
+                "evictions": self._evictions,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0,
+            }
+
+
+class CachedLLM(BaseLLM):
+    """给任意 BaseLLM 加一层确定性响应缓存
+
+    key = sha256(包装链 + model + base_url + 归一化后的 prompt/messages)。
+    只适合 temperature=0 的调用（gate、decision、JSON-only）；异常与空响应不缓存。
+    """
+
+    def __init__(self, llm: BaseLLM, cache: LLMResponseCache) -> None:
+        max_prompt_chars = getattr(llm, "_max_prompt_chars", 20000)
+        super().__init__(max_prompt_chars=max_prompt_chars)
+        self._llm = llm
+        self._cache = cache
+        self._identity = _llm_identity(llm)
+
+    @property
+    def cache(self) -> LLMResponseCache:
+        return self._cache
+
+    def generate(self, prompt: str) -> str:
+        key = self._key("prompt", _normalize_text(prompt))
+        cached = self._cache.get(key)
+        if cached is not None:
+            note_cache_hit()
+            return cached
+        raw = self._llm.generate(prompt)
+        if isinstance(raw, str) and raw:
+            self._cache.put(key, raw)
+        return raw
+
+    def generate_messages(self, messages: list[dict[str, str]]) -> str:
+        key = self._messages_key(messages)
+        cached = self._cache.get(key)
+        if cached is not None:
+            note_cache_hit()
+            return cached
+        raw = self._llm.generate_messages(messages)
+        if isinstance(raw, str) and raw:
+            self._cache.put(key, raw)
+        return raw
+
+    async def agenerate(self, prompt: str) -> str:
+        key = self._key("prompt", _normalize_text(prompt))
+        cached = self._cache.get(key)
+        if cached is not None:
+            note_cache_hit()
+            return cached
+        raw = await agenerate_with(self._llm, prompt)
+        if isinstance(raw, str) and raw:
+            self._cache.put(key, raw)
+        return raw
+
+    async def agenerate_messages(self, messages: list[dict[str, str]]) -> str:
+        key = self._messages_key(messages)
+        cached = self._cache.get(key)
+        if cached is not None:
+            note_cache_hit()
+            return cached
+        raw = await agenerate_messages_with(self._llm, messages)
+        if isinstance(raw, str) and raw:
+            self._cache.put(key, raw)
+        return raw
+
+    def _messages_key(self, messages: list[dict[str, str]]) -> str:
+        normalized = [
+            {"role": msg.get("role", "user"), "content": _normalize_text(msg.get("content", ""))}
+            for msg in messages
+        ]
+        return self._key("messages", normalized)
+
+    def _key(self, kind: str, body: Any) -> str:
+        material = json.dumps(
+            {"llm": self._identity, "kind": kind, "body": body},
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _normalize_text(text: Any) -> str:
+    if not isinstance(text, str):
+        text = str(text)
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def _llm_identity(llm: BaseLLM) -> dict[str, Any]:
+    """沿 _llm 链收集包装类名，以及最内层的 model/base_url"""
+    chain: list[str] = []
+    current: Any = llm
+    while current is not None:
+        chain.append(type(current).__name__)
+        inner = getattr(current, "_llm", None)
+        if inner is None or inner is current:
+            break
+        current = inner
+    return {
+        "chain": chain,
+        "model": getattr(current, "_model", None),
+        "base_url": getattr(current, "_base_url", None),
+    }
+
+
+_shared_caches: dict[str, LLMResponseCache] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def get_shared_cache(
+    path: str | Path,
+    *,
+    ttl_s: float = DEFAULT_CACHE_TTL_S,
+    max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+) -> LLMResponseCache:
+    """同一进程内按路径复用缓存实例（计数器也因此按进程汇总）"""
+    key = str(path)
+    with _shared_caches_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = LLMResponseCache(key, ttl_s=ttl_s, max_entries=max_entries)
+            _shared_caches[key] = cache
+        return cache
+
+
+def get_llm_cache_stats() -> list[dict[str, Any]]:
+    """当前进程内所有共享缓存的命中统计"""
+    with _shared_caches_lock:
+        caches = list(_shared_caches.values())
+    return [cache.stats() for cache in caches]
+
+
+def with_response_cache_from_env(llm: BaseLLM) -> BaseLLM:
+    """LLM_CACHE_PATH 设置时用 CachedLLM 包装，否则原样返回（默认关闭）"""
+    path = os.getenv("LLM_CACHE_PATH", "").strip()
+    if not path or isinstance(llm, CachedLLM):
+        return llm
+    cache = get_shared_cache(
+        path,
+        ttl_s=env_float("LLM_CACHE_TTL_S", DEFAULT_CACHE_TTL_S),
+        max_entries=env_int("LLM_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES),
+    )
+    return CachedLLM(llm, cache)
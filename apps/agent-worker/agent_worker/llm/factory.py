@@ -3,7 +3,10 @@ from __future__ import annotations
 import os
 from pathlib import Path
 
-from agent_worker.llm.base import BaseLLM, DEFAULT_MAX_PROMPT_CHARS
+from agent_worker.llm.admission import with_admission_from_env
+from agent_worker.llm.base import DEFAULT_MAX_PROMPT_CHARS, BaseLLM
+from agent_worker.llm.cache import with_response_cache_from_env
+from agent_worker.llm.hedged import HedgedLLM
 from agent_worker.llm.json_only import JsonOnlyLLMWrapper
 from agent_worker.llm.ollama import OllamaLLM
 from agent_worker.llm.openai import OpenAIChatLLM
@@ -11,16 +14,23 @@ from agent_worker.llm.qwen import QwenChatLLM
 from agent_worker.llm.stub import StubLLM
 from agent_worker.llm_config import LLMConfig
 
-
 DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
 DEFAULT_QWEN_MODEL = "qwen-plus"
 DEFAULT_OLLAMA_MODEL = "llama3:8b"
+# 让模型在两轮对话之间保持加载，Ollama 才能复用稳定前缀的 KV cache（LLM_KEEP_ALIVE 覆盖，空串表示用服务端默认）
+DEFAULT_OLLAMA_KEEP_ALIVE = "30m"
 
 
 def build_llm(config_path: str | Path | None = None) -> BaseLLM:
-    """构建 LLM 实例，优先从配置文件读取，环境变量覆盖配置文件"""
+    """构建 LLM 实例，优先从配置文件读取，环境变量覆盖配置文件
+
+    配置了后备 provider（LLM_FALLBACK_PROVIDERS 或 models.fallback）时返回 HedgedLLM。
+    """
     config = LLMConfig.load(config_path)
-    return _build_llm_from_config(config)
+    providers = _build_provider_chain(config, config_path)
+    if len(providers) == 1:
+        return providers[0]
+    return HedgedLLM(providers, latency_budget_s=config.latency_budget_s)
 
 
 def build_llm_from_env() -> BaseLLM:
@@ -30,8 +40,18 @@ def build_llm_from_env() -> BaseLLM:
 
 
 def build_gate_llm(config_path: str | Path | None = None) -> BaseLLM:
-    """构建用于 gate 的 LLM 实例（带 JSON 包装）"""
-    return JsonOnlyLLMWrapper(build_llm(config_path))
+    """构建用于 gate 的 LLM 实例（带 JSON 包装；设置 LLM_CACHE_PATH 时带响应缓存）"""
+    config = LLMConfig.load(config_path)
+    providers = [JsonOnlyLLMWrapper(llm) for llm in _build_provider_chain(config, config_path)]
+    if len(providers) == 1:
+        return with_response_cache_from_env(providers[0])
+    # 每个成员各自做 JSON 包装，解析失败（NO_ACTION）的响应不算有效，让对冲的另一路胜出
+    hedged = HedgedLLM(
+        providers,
+        latency_budget_s=config.latency_budget_s,
+        validator=_is_json_reply,
+    )
+    return with_response_cache_from_env(hedged)
 
 
 def build_gate_llm_from_env() -> BaseLLM:
@@ -39,6 +59,22 @@ def build_gate_llm_from_env() -> BaseLLM:
     return build_gate_llm()
 
 
+def _build_provider_chain(config: LLMConfig, config_path: str | Path | None) -> list[BaseLLM]:
+    """primary + 按顺序排列的后备 provider（与 primary 重复的跳过）"""
+    providers = [_build_llm_from_config(config)]
+    seen = {config.provider.lower()}
+    for name in config.fallback_providers:
+        if name in seen:
+            continue
+        seen.add(name)
+        providers.append(_build_llm_from_config(LLMConfig.for_provider(name, config, config_path)))
+    return providers
+
+
+def _is_json_reply(raw: object) -> bool:
+    return isinstance(raw, str) and raw.startswith("{")
+
+
 def _build_llm_from_config(config: LLMConfig) -> BaseLLM:
     """根据配置对象构建 LLM 实例"""
     provider = config.provider.lower()
@@ -51,7 +87,7 @@ def _build_llm_from_config(config: LLMConfig) -> BaseLLM:
         if not api_key:
             raise ValueError("openai provider requires api_key (set in config.yaml or OPENAI_API_KEY env)")
         base_url = config.base_url or "https://api.openai.com/v1"
-        return OpenAIChatLLM(
+        llm = OpenAIChatLLM(
             api_key=api_key,
             model=config.model or DEFAULT_OPENAI_MODEL,
             base_url=base_url,
@@ -59,14 +95,16 @@ def _build_llm_from_config(config: LLMConfig) -> BaseLLM:
             max_retries=config.max_retries,
             retry_backoff_s=config.retry_backoff_s,
             max_prompt_chars=config.max_prompt_chars,
+            prompt_cache_key=_env_optional_bool("LLM_PROMPT_CACHE_KEY"),
         )
+        return with_admission_from_env(llm, f"openai:{base_url}")
 
     if provider == "qwen":
         api_key = config.api_key
         if not api_key:
             raise ValueError("qwen provider requires api_key (set in config.yaml or QWEN_API_KEY env)")
         base_url = config.base_url or "https://dashscope.aliyuncs.com/compatible-mode/v1"
-        return QwenChatLLM(
+        llm = QwenChatLLM(
             api_key=api_key,
             model=config.model or DEFAULT_QWEN_MODEL,
             base_url=base_url,
@@ -74,37 +112,31 @@ def _build_llm_from_config(config: LLMConfig) -> BaseLLM:
             max_retries=config.max_retries,
             retry_backoff_s=config.retry_backoff_s,
             max_prompt_chars=config.max_prompt_chars,
+            prompt_cache_key=_env_optional_bool("LLM_PROMPT_CACHE_KEY"),
         )
+        return with_admission_from_env(llm, f"qwen:{base_url}")
 
     if provider == "ollama":
         base_url = config.base_url or "http://localhost:11434"
-        return OllamaLLM(
+        llm = OllamaLLM(
             model=config.model or DEFAULT_OLLAMA_MODEL,
             base_url=base_url,
             timeout_s=config.timeout_s,
             max_retries=config.max_retries,
             retry_backoff_s=config.retry_backoff_s,
             max_prompt_chars=config.max_prompt_chars,
+            keep_alive=os.getenv("LLM_KEEP_ALIVE", DEFAULT_OLLAMA_KEEP_ALIVE).strip() or None,
         )
+        return with_admission_from_env(llm, f"ollama:{base_url}")
 
     raise ValueError(f"Unsupported LLM provider: {provider}")
 
 
-def _env_int(name: str, default: int) -> int:
-    value = os.getenv(name)
-    if value is None or value == "":
-        return default
-    try:
-        return int(value)
-    except ValueError:
-        return default
-
-
-def _env_float(name: str, default: float) -> float:
-    value = os.getenv(name)
-    if value is None or value == "":
-        return default
-    try:
-        return float(value)
-    except ValueError:
-        return default
+def _env_optional_bool(name: str) -> bool | None:
+    """未设置时返回 None（由 provider 自行决定默认值）"""
+    value = os.getenv(name, "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return None
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable
+
+from agent_worker.llm.base import BaseLLM, agenerate_messages_with, agenerate_with
+from agent_worker.utils.env import env_int
+
+DEFAULT_LATENCY_BUDGET_S = 8.0
+DEFAULT_HEDGE_QUANTILE = 0.95
+DEFAULT_MIN_HEDGE_DELAY_S = 0.05
+# 样本不足时不信任分位数，hedge delay 退回 budget 的一半
+MIN_HISTOGRAM_SAMPLES = 20
+HISTOGRAM_WINDOW = 256
+DEFAULT_HEDGE_WORKERS = 32
+
+
+class LatencyHistogram:
+    """最近 window 次成功调用的延迟（滑动窗口），用于估计分位数"""
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, latency_s: float) -> None:
+        with self._lock:
+            self._samples.append(latency_s)
+
+    def quantile(self, q: float, min_samples: int = MIN_HISTOGRAM_SAMPLES) -> float | None:
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return {"count": 0, "p50": None, "p95": None, "p99": None}
+
+        def pick(q: float) -> float:
+            return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+        return {"count": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+_histograms: dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def get_latency_histogram(key: str) -> LatencyHistogram:
+    """同一进程内按 provider key 复用延迟直方图（factory 每次新建 LLM 也不丢样本）"""
+    with _histograms_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = LatencyHistogram()
+            _histograms[key] = histogram
+        return histogram
+
+
+def get_latency_stats() -> dict[str, dict[str, Any]]:
+    """当前进程内各 provider 的延迟分位数"""
+    with _histograms_lock:
+        items = list(_histograms.items())
+    return {key: histogram.snapshot() for key, histogram in items}
+
+
+def provider_key(llm: BaseLLM) -> str:
+    """沿 _llm 链找到最内层 provider，用 类名:model@base_url 标识"""
+    current: Any = llm
+    while True:
+        inner = getattr(current, "_llm", None)
+        if inner is None or inner is current:
+            break
+        current = inner
+    model = getattr(current, "_model", None) or "-"
+    base_url = getattr(current, "_base_url", None) or "-"
+    return f"{type(current).__name__}:{model}@{base_url}"
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=env_int("LLM_HEDGE_WORKERS", DEFAULT_HEDGE_WORKERS),
+                thread_name_prefix="llm-hedge",
+            )
+        return _executor
+
+
+def _is_valid_reply(raw: Any) -> bool:
+    return isinstance(raw, str) and bool(raw.strip())
+
+
+class HedgedLLM(BaseLLM):
+    """按顺序排列的多个 provider 组成的对冲 LLM
+
+    - 先发给 primary；超过 hedge delay 仍未返回时，把同一请求发给下一个 provider；
+    - 取第一个有效响应，其余请求取消（同步调用：未开始的直接取消，已在途的结果丢弃；
+      agenerate：落败的 task 直接 cancel）；
+    - 某个 provider 出错或返回无效内容时立即尝试下一个；
+    - hedge delay = primary 延迟的 hedge_quantile 分位数，并保证
+      hedge delay + 下一个 provider 的 p50 不超过 latency_budget_s。
+    """
+
+    def __init__(
+        self,
+        providers: list[BaseLLM],
+        *,
+        latency_budget_s: float = DEFAULT_LATENCY_BUDGET_S,
+        hedge_quantile: float = DEFAULT_HEDGE_QUANTILE,
+        min_hedge_delay_s: float = DEFAULT_MIN_HEDGE_DELAY_S,
+        validator: Callable[[Any], bool] | None = None,
+        executor: ThreadPoolExecutor | None = None,
+    ) -> None:
+        if not providers:
+            raise ValueError("HedgedLLM requires at least one provider")
+        max_prompt_chars = getattr(providers[0], "_max_prompt_chars", 20000)
+        super().__init__(max_prompt_chars=max_prompt_chars)
+        self._providers = list(providers)
+        self._keys = [provider_key(p) for p in self._providers]
+        self._histograms = [get_latency_histogram(key) for key in self._keys]
+        self._latency_budget_s = latency_budget_s
+        self._hedge_quantile = hedge_quantile
+        self._min_hedge_delay_s = min_hedge_delay_s
+        self._validator = validator or _is_valid_reply
+        self._executor = executor
+        # 供 CachedLLM 等按身份区分（见 cache._llm_identity）
+        self._model = "|".join(self._keys)
+        self._base_url = None
+        self._stats_lock = threading.Lock()
+        self._calls = 0
+        self._hedges = 0
+        self._failovers = 0
+        self._wins = [0] * len(self._providers)
+
+    @property
+    def providers(self) -> list[BaseLLM]:
+        return list(self._providers)
+
+    def generate(self, prompt: str) -> str:
+        return self._run(lambda llm: llm.generate(prompt))
+
+    def generate_messages(self, messages: list[dict[str, str]]) -> str:
+        return self._run(lambda llm: llm.generate_messages(messages))
+
+    async def agenerate(self, prompt: str) -> str:
+        return await self._arun(lambda llm: agenerate_with(llm, prompt))
+
+    async def agenerate_messages(self, messages: list[dict[str, str]]) -> str:
+        return await self._arun(lambda llm: agenerate_messages_with(llm, messages))
+
+    def attach_admission(self, controller: Any) -> None:
+        # 准入控制按 provider 区分，由 factory 分别挂到每个成员上
+        return None
+
+    def hedge_delay(self, index: int) -> float:
+        """第 index 个 provider 发出后，等待多久再对冲到下一个"""
+        budget = self._latency_budget_s
+        observed = self._histograms[index].quantile(self._hedge_quantile)
+        delay = observed if observed is not None else budget / 2
+        if index + 1 < len(self._histograms):
+            next_p50 = self._histograms[index + 1].quantile(0.5)
+            if next_p50 is not None:
+                delay = min(delay, budget - next_p50)
+        delay = min(delay, budget)
+        return max(self._min_hedge_delay_s, delay)
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "calls": self._calls,
+                "hedges": self._hedges,
+                "failovers": self._failovers,
+                "wins": dict(zip(self._keys, self._wins)),
+                "hedge_delays_s": [self.hedge_delay(i) for i in range(len(self._providers))],
+            }
+
+    def _run(self, call: Callable[[BaseLLM], str]) -> str:
+        if len(self._providers) == 1:
+            return self._timed_call(0, call)
+        executor = self._executor or _shared_executor()
+        futures: dict[Future, int] = {}
+        launched = 0
+        last_error: BaseException | None = None
+
+        def launch() -> Future:
+            nonlocal launched
+            # 带上调用方的 contextvars：成员的用量/重试记到同一次调用上（见 llm/instrumentation.py）
+            context = contextvars.copy_context()
+            future = executor.submit(context.run, self._timed_call, launched, call)
+            futures[future] = launched
+            launched += 1
+            return future
+
+        with self._stats_lock:
+            self._calls += 1
+        pending = {launch()}
+        while True:
+            timeout = self.hedge_delay(launched - 1) if launched < len(self._providers) else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # hedge delay 到期仍无响应：对冲到下一个 provider
+                with self._stats_lock:
+                    self._hedges += 1
+                pending.add(launch())
+                continue
+            for future in sorted(done, key=lambda f: futures[f]):
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    last_error = exc
+                    continue
+                if self._validator(result):
+                    for loser in pending:
+                        loser.cancel()
+                    with self._stats_lock:
+                        self._wins[futures[future]] += 1
+                    return result
+                last_error = RuntimeError(
+                    f"invalid response from {self._keys[futures[future]]}"
+                )
+            if not pending:
+                if launched >= len(self._providers):
+                    break
+                # 全部在途请求都失败：不等 hedge delay，直接切到下一个
+                with self._stats_lock:
+                    self._failovers += 1
+                pending.add(launch())
+        if last_error is not None:
+            raise RuntimeError(f"all hedged llm providers failed: {last_error}") from last_error
+        raise RuntimeError("all hedged llm providers failed")
+
+    async def _arun(self, call: Callable[[BaseLLM], Awaitable[str]]) -> str:
+        """_run 的协程版本：各路请求是同一事件循环上的 task，落败者会被真正取消"""
+        if len(self._providers) == 1:
+            return await self._atimed_call(0, call)
+        tasks: dict[asyncio.Future, int] = {}
+        launched = 0
+        last_error: BaseException | None = None
+
+        def launch() -> asyncio.Future:
+            nonlocal launched
+            task = asyncio.ensure_future(self._atimed_call(launched, call))
+            tasks[task] = launched
+            launched += 1
+            return task
+
+        with self._stats_lock:
+            self._calls += 1
+        pending = {launch()}
+        try:
+            while True:
+                timeout = self.hedge_delay(launched - 1) if launched < len(self._providers) else None
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    with self._stats_lock:
+                        self._hedges += 1
+                    pending.add(launch())
+                    continue
+                for task in sorted(done, key=lambda t: tasks[t]):
+                    exc = task.exception()
+                    if exc is not None:
+                        last_error = exc
+                        continue
+                    result = task.result()
+                    if self._validator(result):
+                        with self._stats_lock:
+                            self._wins[tasks[task]] += 1
+                        return result
+                    last_error = RuntimeError(f"invalid response from {self._keys[tasks[task]]}")
+                if not pending:
+                    if launched >= len(self._providers):
+                        break
+                    with self._stats_lock:
+                        self._failovers += 1
+                    pending.add(launch())
+        finally:
+            for task in pending:
+                task.cancel()
+        if last_error is not None:
+            raise RuntimeError(f"all hedged llm providers failed: {last_error}") from last_error
+        raise RuntimeError("all hedged llm providers failed")
+
+    async def _atimed_call(self, index: int, call: Callable[[BaseLLM], Awaitable[str]]) -> str:
+        start = time.monotonic()
+        try:
+            result = await call(self._providers[index])
+        except asyncio.CancelledError:
+            # 被取消的落败者至少耗时这么久，作为下界样本记录，避免直方图只剩快样本
+            self._histograms[index].observe(time.monotonic() - start)
+            raise
+        if self._validator(result):
+            self._histograms[index].observe(time.monotonic() - start)
+        return result
+
+    def _timed_call(self, index: int, call: Callable[[BaseLLM], str]) -> str:
+        start = time.monotonic()
+        result = call(self._providers[index])
+        # 落败者完成后也记录延迟，避免直方图只看到“快的那一半”
+        if self._validator(result):
+            self._histograms[index].observe(time.monotonic() - start)
+        return result
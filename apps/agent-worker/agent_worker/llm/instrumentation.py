@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from agent_worker.llm.budget import ApproxTokenEstimator
+from agent_worker.llm.prompt_cache import current_prefix_hash
+from agent_worker.utils.env import env_int
+
+DEFAULT_CALL_WINDOW = 2048
+UNKNOWN_CALL_SITE = "unknown"
+# 被 BaseLLM.__init_subclass__ 自动包装的方法
+SYNC_METHODS = ("generate", "generate_messages")
+ASYNC_METHODS = ("agenerate", "agenerate_messages")
+
+_estimator = ApproxTokenEstimator()
+
+
+@dataclass
+class LLMCallRecord:
+    """一次逻辑 LLM 调用（最外层 generate*/agenerate*）的计时与用量"""
+
+    call_site: str
+    model: str | None
+    provider: str
+    method: str
+    latency_ms: float
+    prompt_tokens: int
+    completion_tokens: int
+    tokens_estimated: bool
+    retries: int
+    cache_hit: bool
+    ok: bool
+    error: str | None = None
+    prefix_hash: str | None = None
+    ts: float = field(default_factory=time.time)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _CallScope:
+    """调用进行中由 provider / 缓存层回报的用量；对冲时多路 provider 共用同一个 scope"""
+
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    retries: int = 0
+    cache_hit: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_scope: ContextVar[_CallScope | None] = ContextVar("llm_call_scope", default=None)
+_call_site: ContextVar[str | None] = ContextVar("llm_call_site", default=None)
+_collectors: ContextVar[tuple[list[LLMCallRecord], ...]] = ContextVar("llm_call_collectors", default=())
+
+_recent_lock = threading.Lock()
+_recent: deque[LLMCallRecord] | None = None
+_log_lock = threading.Lock()
+
+
+@contextmanager
+def llm_call_site(name: str) -> Iterator[None]:
+    """标记这段代码里发出的 LLM 调用属于哪个调用点（decision / responder / gate / summarize）"""
+    token = _call_site.set(name)
+    try:
+        yield
+    finally:
+        _call_site.reset(token)
+
+
+@contextmanager
+def collect_llm_calls() -> Iterator[list[LLMCallRecord]]:
+    """收集这段代码里完成的 LLM 调用记录（可嵌套；run step、chat trace 用）"""
+    records: list[LLMCallRecord] = []
+    token = _collectors.set(_collectors.get() + (records,))
+    try:
+        yield records
+    finally:
+        _collectors.reset(token)
+
+
+def note_usage(data: Any) -> None:
+    """provider 解析出响应体后调用：OpenAI 兼容的 usage.prompt/completion_tokens，或 Ollama 的 eval 计数"""
+    scope = _scope.get()
+    if scope is None or not isinstance(data, dict):
+        return
+    usage = data.get("usage")
+    if isinstance(usage, dict):
+        prompt, completion = usage.get("prompt_tokens"), usage.get("completion_tokens")
+    else:
+        prompt, completion = data.get("prompt_eval_count"), data.get("eval_count")
+    if not isinstance(prompt, int) and not isinstance(completion, int):
+        return
+    with scope.lock:
+        # 对冲的多路请求都会计费，累加
+        scope.prompt_tokens = (scope.prompt_tokens or 0) + (prompt if isinstance(prompt, int) else 0)
+        scope.completion_tokens = (scope.completion_tokens or 0) + (
+            completion if isinstance(completion, int) else 0
+        )
+
+
+def note_retry() -> None:
+    """provider 每次重试前调用"""
+    scope = _scope.get()
+    if scope is not None:
+        with scope.lock:
+            scope.retries += 1
+
+
+def note_cache_hit() -> None:
+    """响应缓存命中时调用"""
+    scope = _scope.get()
+    if scope is not None:
+        scope.cache_hit = True
+
+
+def instrument_method(fn: Callable[..., Any], method: str) -> Callable[..., Any]:
+    """包装 BaseLLM 子类的 generate*/agenerate*；已在调用中（包装链内层、对冲成员）时直接透传"""
+    if getattr(fn, "__llm_instrumented__", False):
+        return fn
+
+    if method in ASYNC_METHODS:
+
+        @functools.wraps(fn)
+        async def async_wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            if _scope.get() is not None:
+                return await fn(self, *args, **kwargs)
+            scope = _CallScope()
+            token = _scope.set(scope)
+            start = time.perf_counter()
+            result: Any = None
+            error: str | None = None
+            try:
+                result = await fn(self, *args, **kwargs)
+                return result
+            except BaseException as exc:
+                error = type(exc).__name__
+                raise
+            finally:
+                _scope.reset(token)
+                _finish(self, method, scope, _payload(args, kwargs), result, error, start)
+
+        wrapper: Callable[..., Any] = async_wrapper
+    else:
+
+        @functools.wraps(fn)
+        def sync_wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            if _scope.get() is not None:
+                return fn(self, *args, **kwargs)
+            scope = _CallScope()
+            token = _scope.set(scope)
+            start = time.perf_counter()
+            result: Any = None
+            error: str | None = None
+            try:
+                result = fn(self, *args, **kwargs)
+                return result
+            except BaseException as exc:
+                error = type(exc).__name__
+                raise
+            finally:
+                _scope.reset(token)
+                _finish(self, method, scope, _payload(args, kwargs), result, error, start)
+
+        wrapper = sync_wrapper
+    wrapper.__llm_instrumented__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def get_llm_call_stats() -> dict[str, dict[str, Any]]:
+    """进程内最近调用按调用点聚合：次数、错误、缓存命中、p50/p95 延迟与 token"""
+    with _recent_lock:
+        records = list(_recent or ())
+    return summarize_llm_calls(records)
+
+
+def recent_llm_calls(limit: int = 100) -> list[dict[str, Any]]:
+    with _recent_lock:
+        records = list(_recent or ())
+    return [record.as_dict() for record in records[-limit:]]
+
+
+def summarize_llm_calls(records: Iterable[LLMCallRecord | dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """按 call_site 聚合调用记录（也供 scripts/llm_call_report.py 读 JSONL 日志复用）"""
+    groups: dict[str, list[dict[str, Any]]] = {}
+    for record in records:
+        row = record.as_dict() if isinstance(record, LLMCallRecord) else record
+        groups.setdefault(row.get("call_site") or UNKNOWN_CALL_SITE, []).append(row)
+    summary: dict[str, dict[str, Any]] = {}
+    for site, rows in sorted(groups.items()):
+        latencies = [float(row.get("latency_ms", 0.0)) for row in rows]
+        prompt = [int(row.get("prompt_tokens", 0)) for row in rows]
+        completion = [int(row.get("completion_tokens", 0)) for row in rows]
+        totals = [p + c for p, c in zip(prompt, completion)]
+        summary[site] = {
+            "calls": len(rows),
+            "errors": sum(1 for row in rows if not row.get("ok", True)),
+            "cache_hits": sum(1 for row in rows if row.get("cache_hit")),
+            "retries": sum(int(row.get("retries", 0)) for row in rows),
+            "estimated": sum(1 for row in rows if row.get("tokens_estimated")),
+            "latency_ms_p50": round(_percentile(latencies, 0.5), 1),
+            "latency_ms_p95": round(_percentile(latencies, 0.95), 1),
+            "tokens_p50": _percentile(totals, 0.5),
+            "tokens_p95": _percentile(totals, 0.95),
+            "prompt_tokens": sum(prompt),
+            "completion_tokens": sum(completion),
+            "models": sorted({str(row.get("model")) for row in rows if row.get("model")}),
+        }
+    return summary
+
+
+def reset_llm_call_stats() -> None:
+    with _recent_lock:
+        if _recent is not None:
+            _recent.clear()
+
+
+def _percentile(values: list[Any], q: float) -> Any:
+    """nearest-rank 分位数；空列表返回 0"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _payload(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    if args:
+        return args[0]
+    return kwargs.get("prompt", kwargs.get("messages"))
+
+
+def _count_prompt_tokens(payload: Any) -> int:
+    if isinstance(payload, list):
+        return sum(
+            _estimator.count(str(msg.get("content", ""))) + 4 for msg in payload if isinstance(msg, dict)
+        )
+    return _estimator.count(str(payload or ""))
+
+
+def _describe(llm: Any) -> tuple[str | None, str]:
+    """沿 _llm 链取最内层的 model 与 provider 类名（HedgedLLM 的 _model 是 a|b 形式）"""
+    current = llm
+    while True:
+        if getattr(current, "_model", None) is not None:
+            break
+        inner = getattr(current, "_llm", None)
+        if inner is None or inner is current:
+            break
+        current = inner
+    return getattr(current, "_model", None), type(current).__name__
+
+
+def _finish(
+    llm: Any,
+    method: str,
+    scope: _CallScope,
+    payload: Any,
+    result: Any,
+    error: str | None,
+    start: float,
+) -> None:
+    latency_ms = (time.perf_counter() - start) * 1000.0
+    estimated = scope.prompt_tokens is None and scope.completion_tokens is None
+    if estimated:
+        prompt_tokens = _count_prompt_tokens(payload)
+        completion_tokens = _estimator.count(result) if isinstance(result, str) else 0
+    else:
+        prompt_tokens = scope.prompt_tokens or 0
+        completion_tokens = scope.completion_tokens or 0
+    model, provider = _describe(llm)
+    record = LLMCallRecord(
+        call_site=_call_site.get() or UNKNOWN_CALL_SITE,
+        model=model,
+        provider=provider,
+        method=method,
+        latency_ms=round(latency_ms, 2),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        tokens_estimated=estimated,
+        retries=scope.retries,
+        cache_hit=scope.cache_hit,
+        ok=error is None,
+        error=error,
+        prefix_hash=current_prefix_hash(),
+    )
+    _store(record)
+
+
+def _store(record: LLMCallRecord) -> None:
+    global _recent
+    with _recent_lock:
+        if _recent is None:
+            _recent = deque(maxlen=max(1, env_int("LLM_CALL_WINDOW", DEFAULT_CALL_WINDOW)))
+        _recent.append(record)
+    for records in _collectors.get():
+        records.append(record)
+    log_path = os.getenv("LLM_CALL_LOG")
+    if log_path:
+        _append_log(Path(log_path), record)
+
+
+def _append_log(path: Path, record: LLMCallRecord) -> None:
+    """LLM_CALL_LOG 设置时每次调用追加一行 JSON（scripts/llm_call_report.py 读取）"""
+    line = json.dumps(record.as_dict(), ensure_ascii=False)
+    try:
+        with _log_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+    except OSError:
+        return
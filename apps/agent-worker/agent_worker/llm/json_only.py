@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 import re
 
-from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.base import BaseLLM, agenerate_messages_with, agenerate_with
 
 JSON_ONLY_PREFIX = "You must reply with valid JSON only. Do not add extra text."
 JSON_ONLY_SUFFIX = "If unsure, reply with JSON: {\"action\": \"NO_ACTION\"}."
@@ -17,19 +17,11 @@ class JsonOnlyLLMWrapper(BaseLLM):
 
     def generate(self, prompt: str) -> str:
         prompt = self._wrap_prompt(prompt)
-        raw = self._llm.generate(prompt)
-        if raw is None:
-            return "NO_ACTION"
-        if not isinstance(raw, str):
-            raw = str(raw)
-        candidate = _extract_json_block(raw.strip())
-        if not candidate:
-            return "NO_ACTION"
-        try:
-            parsed = json.loads(candidate)
-        except json.JSONDecodeError:
-            return "NO_ACTION"
-        return json.dumps(parsed, ensure_ascii=False, separators=(",", ":"))
+        return _coerce_json(self._llm.generate(prompt))
+
+    async def agenerate(self, prompt: str) -> str:
+        prompt = self._wrap_prompt(prompt)
+        return _coerce_json(await agenerate_with(self._llm, prompt))
 
     def generate_messages(self, messages: list[dict[str, str]]) -> str:
         """Generate response from a list of messages, wrapping with JSON-only instructions.
@@ -42,7 +34,14 @@ class JsonOnlyLLMWrapper(BaseLLM):
         """
         if not messages:
             return "NO_ACTION"
-        
+        return _coerce_json(self._llm.generate_messages(self._wrap_messages(messages)))
+
+    async def agenerate_messages(self, messages: list[dict[str, str]]) -> str:
+        if not messages:
+            return "NO_ACTION"
+        return _coerce_json(await agenerate_messages_with(self._llm, self._wrap_messages(messages)))
+
+    def _wrap_messages(self, messages: list[dict[str, str]]) -> list[dict[str, str]]:
         wrapped_messages = []
         json_constraint_added = False
         
@@ -69,24 +68,28 @@ class JsonOnlyLLMWrapper(BaseLLM):
                 # After constraint is added, keep all messages as-is
                 wrapped_messages.append({"role": role, "content": content})
         
-        raw = self._llm.generate_messages(wrapped_messages)
-        if raw is None:
-            return "NO_ACTION"
-        if not isinstance(raw, str):
-            raw = str(raw)
-        candidate = _extract_json_block(raw.strip())
-        if not candidate:
-            return "NO_ACTION"
-        try:
-            parsed = json.loads(candidate)
-        except json.JSONDecodeError:
-            return "NO_ACTION"
-        return json.dumps(parsed, ensure_ascii=False, separators=(",", ":"))
+        return wrapped_messages
 
     def _wrap_prompt(self, prompt: str) -> str:
         return f"{JSON_ONLY_PREFIX}\n{prompt}\n{JSON_ONLY_SUFFIX}"
 
 
+def _coerce_json(raw: object) -> str:
+    """从模型输出中提取 JSON 并规范化；无法解析时返回 NO_ACTION"""
+    if raw is None:
+        return "NO_ACTION"
+    if not isinstance(raw, str):
+        raw = str(raw)
+    candidate = _extract_json_block(raw.strip())
+    if not candidate:
+        return "NO_ACTION"
+    try:
+        parsed = json.loads(candidate)
+    except json.JSONDecodeError:
+        return "NO_ACTION"
+    return json.dumps(parsed, ensure_ascii=False, separators=(",", ":"))
+
+
 def _extract_json_block(text: str) -> str | None:
     fence_match = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
     if fence_match:
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import time
 from typing import Any
 
 import httpx
 
+from agent_worker.llm.admission import (
+    DEFAULT_MAX_RETRY_AFTER_S,
+    parse_retry_after,
+    settle_response,
+)
+from agent_worker.llm.async_http import get_async_client
 from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.instrumentation import note_retry, note_usage
 
 
 class OllamaLLM(BaseLLM):
@@ -19,6 +27,7 @@ class OllamaLLM(BaseLLM):
         retry_backoff_s: float = 0.8,
         max_prompt_chars: int = 20000,
         transport: httpx.BaseTransport | None = None,
+        keep_alive: str | None = None,
     ) -> None:
         super().__init__(max_prompt_chars=max_prompt_chars)
         self._model = model
@@ -27,28 +36,46 @@ class OllamaLLM(BaseLLM):
         self._max_retries = max_retries
         self._retry_backoff_s = retry_backoff_s
         self._transport = transport
+        # 模型常驻期间 Ollama 会复用与上次请求相同前缀的 KV cache；None 时用服务端默认（5m）
+        self._keep_alive = keep_alive
 
     def generate(self, prompt: str) -> str:
         url = f"{self._base_url}/api/chat"
-        prompt = self._trim_prompt(prompt)
-        payload = {
-            "model": self._model,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": False,
-        }
-        data = self._post_with_retry(url, payload)
-        try:
-            return data["message"]["content"]
-        except (KeyError, IndexError, TypeError) as exc:
-            raise RuntimeError("ollama response missing expected content") from exc
+        data = self._post_with_retry(url, self._prompt_payload(prompt))
+        return self._extract_content(data)
 
     def generate_messages(self, messages: list[dict[str, str]]) -> str:
         """Generate response from a list of messages.
-        
+
         Ollama API natively supports messages format with roles: system, user, assistant.
         Messages are passed directly to the API without conversion.
         """
         url = f"{self._base_url}/api/chat"
+        data = self._post_with_retry(url, self._messages_payload(messages))
+        return self._extract_content(data)
+
+    async def agenerate(self, prompt: str) -> str:
+        url = f"{self._base_url}/api/chat"
+        data = await self._apost_with_retry(url, self._prompt_payload(prompt))
+        return self._extract_content(data)
+
+    async def agenerate_messages(self, messages: list[dict[str, str]]) -> str:
+        url = f"{self._base_url}/api/chat"
+        data = await self._apost_with_retry(url, self._messages_payload(messages))
+        return self._extract_content(data)
+
+    def _prompt_payload(self, prompt: str) -> dict[str, Any]:
+        prompt = self._trim_prompt(prompt)
+        payload: dict[str, Any] = {
+            "model": self._model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+        }
+        if self._keep_alive is not None:
+            payload["keep_alive"] = self._keep_alive
+        return payload
+
+    def _messages_payload(self, messages: list[dict[str, str]]) -> dict[str, Any]:
         # Ollama API natively supports messages format - pass directly
         # Validate and format messages (role must be system/user/assistant)
         formatted_messages = []
@@ -59,13 +86,16 @@ class OllamaLLM(BaseLLM):
             if role not in ("system", "user", "assistant"):
                 raise ValueError(f"Ollama API only accepts 'system', 'user', or 'assistant' roles, got '{role}'")
             formatted_messages.append({"role": role, "content": content})
-        
-        payload = {
+        payload: dict[str, Any] = {
             "model": self._model,
             "messages": formatted_messages,
             "stream": False,
         }
-        data = self._post_with_retry(url, payload)
+        if self._keep_alive is not None:
+            payload["keep_alive"] = self._keep_alive
+        return payload
+
+    def _extract_content(self, data: dict[str, Any]) -> str:
         try:
             return data["message"]["content"]
         except (KeyError, IndexError, TypeError) as exc:
@@ -75,14 +105,12 @@ class OllamaLLM(BaseLLM):
         attempt = 0
         while True:
             try:
-                with httpx.Client(
-                    timeout=self._timeout_s, transport=self._transport
-                ) as client:
-                    response = client.post(url, json=payload)
+                response = self._send(url, payload)
             except httpx.TimeoutException:
                 if attempt >= self._max_retries:
                     raise RuntimeError("ollama request timed out")
                 self._sleep_backoff(attempt)
+                note_retry()
                 attempt += 1
                 continue
             except httpx.HTTPError as exc:
@@ -93,24 +121,80 @@ class OllamaLLM(BaseLLM):
                     raise RuntimeError(
                         f"ollama request failed with status {response.status_code}"
                     )
-                self._sleep_backoff(attempt)
+                self._sleep_backoff(attempt, parse_retry_after(response.headers.get("Retry-After")))
+                note_retry()
                 attempt += 1
                 continue
 
-            if 400 <= response.status_code < 500:
-                hint = "check model name"
-                if response.status_code == 404:
-                    hint = "check model name or base url"
-                raise ValueError(
-                    f"ollama error status={response.status_code} hint={hint}"
-                )
+            return self._parse_response(response)
 
+    async def _apost_with_retry(self, url: str, payload: dict[str, Any]) -> dict[str, Any]:
+        attempt = 0
+        while True:
             try:
-                return response.json()
-            except ValueError as exc:
-                raise RuntimeError("ollama response was not valid JSON") from exc
+                response = await self._asend(url, payload)
+            except httpx.TimeoutException:
+                if attempt >= self._max_retries:
+                    raise RuntimeError("ollama request timed out")
+                await asyncio.sleep(self._backoff_delay(attempt))
+                note_retry()
+                attempt += 1
+                continue
+            except httpx.HTTPError as exc:
+                raise RuntimeError(f"ollama request failed: {exc}") from exc
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt >= self._max_retries:
+                    raise RuntimeError(
+                        f"ollama request failed with status {response.status_code}"
+                    )
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+                note_retry()
+                attempt += 1
+                continue
+
+            return self._parse_response(response)
+
+    def _parse_response(self, response: httpx.Response) -> dict[str, Any]:
+        if 400 <= response.status_code < 500:
+            hint = "check model name"
+            if response.status_code == 404:
+                hint = "check model name or base url"
+            raise ValueError(
+                f"ollama error status={response.status_code} hint={hint}"
+            )
+
+        try:
+            data = response.json()
+        except ValueError as exc:
+            raise RuntimeError("ollama response was not valid JSON") from exc
+        note_usage(data)
+        return data
+
+    def _send(self, url: str, payload: dict[str, Any]) -> httpx.Response:
+        with self._admit(payload) as ticket:
+            with httpx.Client(
+                timeout=self._timeout_s, transport=self._transport
+            ) as client:
+                response = client.post(url, json=payload)
+            settle_response(ticket, response)
+        return response
+
+    async def _asend(self, url: str, payload: dict[str, Any]) -> httpx.Response:
+        async with self._aadmit(payload) as ticket:
+            client = get_async_client(self._transport)
+            response = await client.post(url, json=payload, timeout=self._timeout_s)
+            settle_response(ticket, response)
+        return response
+
+    def _backoff_delay(self, attempt: int, retry_after_s: float | None = None) -> float:
+        # provider 给出 Retry-After 时以它为准，否则指数退避
+        if retry_after_s is not None:
+            return min(retry_after_s, DEFAULT_MAX_RETRY_AFTER_S)
+        return self._retry_backoff_s * (2**attempt)
 
-    def _sleep_backoff(self, attempt: int) -> None:
-        delay = self._retry_backoff_s * (2**attempt)
+    def _sleep_backoff(self, attempt: int, retry_after_s: float | None = None) -> None:
+        delay = self._backoff_delay(attempt, retry_after_s)
         if delay > 0:
             time.sleep(delay)
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import time
 from typing import Any
 
 import httpx
 
+from agent_worker.llm.admission import (
+    DEFAULT_MAX_RETRY_AFTER_S,
+    parse_retry_after,
+    settle_response,
+)
+from agent_worker.llm.async_http import get_async_client
 from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.instrumentation import note_retry, note_usage
+from agent_worker.llm.prompt_cache import current_prefix_hash
 
 
 class OpenAIChatLLM(BaseLLM):
@@ -20,6 +29,7 @@ class OpenAIChatLLM(BaseLLM):
         retry_backoff_s: float = 0.8,
         max_prompt_chars: int = 20000,
         transport: httpx.BaseTransport | None = None,
+        prompt_cache_key: bool | None = None,
     ) -> None:
         super().__init__(max_prompt_chars=max_prompt_chars)
         self._api_key = api_key
@@ -29,29 +39,49 @@ class OpenAIChatLLM(BaseLLM):
         self._max_retries = max_retries
         self._retry_backoff_s = retry_backoff_s
         self._transport = transport
+        # None 表示自动：只有 OpenAI 官方 API 确认支持 prompt_cache_key，兼容接口默认不发
+        if prompt_cache_key is None:
+            prompt_cache_key = "api.openai.com" in self._base_url
+        self._prompt_cache_key = prompt_cache_key
 
     def generate(self, prompt: str) -> str:
         url = f"{self._base_url}/chat/completions"
-        prompt = self._trim_prompt(prompt)
-        payload = {
-            "model": self._model,
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0,
-        }
-        headers = {"Authorization": f"Bearer {self._api_key}"}
-        data = self._post_with_retry(url, payload, headers=headers)
-        try:
-            return data["choices"][0]["message"]["content"]
-        except (KeyError, IndexError, TypeError) as exc:
-            raise RuntimeError("openai response missing expected content") from exc
+        data = self._post_with_retry(url, self._prompt_payload(prompt), headers=self._headers())
+        return self._extract_content(data)
 
     def generate_messages(self, messages: list[dict[str, str]]) -> str:
         """Generate response from a list of messages.
-        
+
         OpenAI API natively supports messages format with roles: system, user, assistant.
         Messages are passed directly to the API without conversion.
         """
         url = f"{self._base_url}/chat/completions"
+        data = self._post_with_retry(url, self._messages_payload(messages), headers=self._headers())
+        return self._extract_content(data)
+
+    async def agenerate(self, prompt: str) -> str:
+        url = f"{self._base_url}/chat/completions"
+        data = await self._apost_with_retry(url, self._prompt_payload(prompt), headers=self._headers())
+        return self._extract_content(data)
+
+    async def agenerate_messages(self, messages: list[dict[str, str]]) -> str:
+        url = f"{self._base_url}/chat/completions"
+        data = await self._apost_with_retry(url, self._messages_payload(messages), headers=self._headers())
+        return self._extract_content(data)
+
+    def _headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self._api_key}"}
+
+    def _prompt_payload(self, prompt: str) -> dict[str, Any]:
+        prompt = self._trim_prompt(prompt)
+        payload: dict[str, Any] = {
+            "model": self._model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0,
+        }
+        return self._with_cache_hint(payload)
+
+    def _messages_payload(self, messages: list[dict[str, str]]) -> dict[str, Any]:
         # OpenAI API natively supports messages format - pass directly
         # Validate and format messages (role must be system/user/assistant)
         formatted_messages = []
@@ -62,14 +92,21 @@ class OpenAIChatLLM(BaseLLM):
             if role not in ("system", "user", "assistant"):
                 raise ValueError(f"OpenAI API only accepts 'system', 'user', or 'assistant' roles, got '{role}'")
             formatted_messages.append({"role": role, "content": content})
-        
-        payload = {
+        payload: dict[str, Any] = {
             "model": self._model,
             "messages": formatted_messages,
             "temperature": 0,
         }
-        headers = {"Authorization": f"Bearer {self._api_key}"}
-        data = self._post_with_retry(url, payload, headers=headers)
+        return self._with_cache_hint(payload)
+
+    def _with_cache_hint(self, payload: dict[str, Any]) -> dict[str, Any]:
+        # 同一稳定前缀的请求带同一个 prompt_cache_key，provider 会把它们路由到同一份前缀缓存
+        prefix_hash = current_prefix_hash()
+        if self._prompt_cache_key and prefix_hash:
+            payload["prompt_cache_key"] = prefix_hash
+        return payload
+
+    def _extract_content(self, data: dict[str, Any]) -> str:
         try:
             return data["choices"][0]["message"]["content"]
         except (KeyError, IndexError, TypeError) as exc:
@@ -85,14 +122,12 @@ class OpenAIChatLLM(BaseLLM):
         attempt = 0
         while True:
             try:
-                with httpx.Client(
-                    timeout=self._timeout_s, transport=self._transport
-                ) as client:
-                    response = client.post(url, json=payload, headers=headers)
+                response = self._send(url, payload, headers=headers)
             except httpx.TimeoutException:
                 if attempt >= self._max_retries:
                     raise RuntimeError("openai request timed out")
                 self._sleep_backoff(attempt)
+                note_retry()
                 attempt += 1
                 continue
             except httpx.HTTPError as exc:
@@ -103,24 +138,99 @@ class OpenAIChatLLM(BaseLLM):
                     raise RuntimeError(
                         f"openai request failed with status {response.status_code}"
                     )
-                self._sleep_backoff(attempt)
+                self._sleep_backoff(attempt, parse_retry_after(response.headers.get("Retry-After")))
+                note_retry()
                 attempt += 1
                 continue
 
-            if 400 <= response.status_code < 500:
-                hint = "check api key"
-                if response.status_code == 404:
-                    hint = "check model name or base url"
-                raise ValueError(
-                    f"openai error status={response.status_code} hint={hint}"
-                )
+            return self._parse_response(response)
 
+    async def _apost_with_retry(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        *,
+        headers: dict[str, str],
+    ) -> dict[str, Any]:
+        attempt = 0
+        while True:
             try:
-                return response.json()
-            except ValueError as exc:
-                raise RuntimeError("openai response was not valid JSON") from exc
+                response = await self._asend(url, payload, headers=headers)
+            except httpx.TimeoutException:
+                if attempt >= self._max_retries:
+                    raise RuntimeError("openai request timed out")
+                await asyncio.sleep(self._backoff_delay(attempt))
+                note_retry()
+                attempt += 1
+                continue
+            except httpx.HTTPError as exc:
+                raise RuntimeError(f"openai request failed: {exc}") from exc
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt >= self._max_retries:
+                    raise RuntimeError(
+                        f"openai request failed with status {response.status_code}"
+                    )
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+                note_retry()
+                attempt += 1
+                continue
+
+            return self._parse_response(response)
+
+    def _parse_response(self, response: httpx.Response) -> dict[str, Any]:
+        if 400 <= response.status_code < 500:
+            hint = "check api key"
+            if response.status_code == 404:
+                hint = "check model name or base url"
+            raise ValueError(
+                f"openai error status={response.status_code} hint={hint}"
+            )
 
-    def _sleep_backoff(self, attempt: int) -> None:
-        delay = self._retry_backoff_s * (2**attempt)
+        try:
+            data = response.json()
+        except ValueError as exc:
+            raise RuntimeError("openai response was not valid JSON") from exc
+        note_usage(data)
+        return data
+
+    def _send(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        *,
+        headers: dict[str, str],
+    ) -> httpx.Response:
+        with self._admit(payload) as ticket:
+            with httpx.Client(
+                timeout=self._timeout_s, transport=self._transport
+            ) as client:
+                response = client.post(url, json=payload, headers=headers)
+            settle_response(ticket, response)
+        return response
+
+    async def _asend(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        *,
+        headers: dict[str, str],
+    ) -> httpx.Response:
+        async with self._aadmit(payload) as ticket:
+            client = get_async_client(self._transport)
+            response = await client.post(url, json=payload, headers=headers, timeout=self._timeout_s)
+            settle_response(ticket, response)
+        return response
+
+    def _backoff_delay(self, attempt: int, retry_after_s: float | None = None) -> float:
+        # provider 给出 Retry-After 时以它为准，否则指数退避
+        if retry_after_s is not None:
+            return min(retry_after_s, DEFAULT_MAX_RETRY_AFTER_S)
+        return self._retry_backoff_s * (2**attempt)
+
+    def _sleep_backoff(self, attempt: int, retry_after_s: float | None = None) -> None:
+        delay = self._backoff_delay(attempt, retry_after_s)
         if delay > 0:
             time.sleep(delay)
+
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+PREFIX_HASH_CHARS = 16
+
+_prefix_hash: ContextVar[str | None] = ContextVar("llm_prompt_prefix_hash", default=None)
+
+
+@dataclass(frozen=True)
+class PromptParts:
+    """稳定前缀（persona / 指令 / 按 snapshot 排序的 facts）+ 易变后缀（当前消息、近期 runs 等）
+
+    provider 侧的 prompt cache / KV cache 只能复用逐字相同的前缀，
+    因此拼 prompt 时把每轮都会变的内容全部放到前缀之后。
+    """
+
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+    @property
+    def prefix_hash(self) -> str:
+        return compute_prefix_hash(self.prefix)
+
+
+def compute_prefix_hash(prefix: str) -> str:
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:PREFIX_HASH_CHARS]
+
+
+@contextmanager
+def prompt_prefix(prefix_hash: str | None) -> Iterator[None]:
+    """声明这段代码里发出的 LLM 调用共享哪个稳定前缀；provider 据此带上缓存提示"""
+    token = _prefix_hash.set(prefix_hash)
+    try:
+        yield
+    finally:
+        _prefix_hash.reset(token)
+
+
+def current_prefix_hash() -> str | None:
+    return _prefix_hash.get()
@@ -24,3 +24,10 @@ class StubLLM(BaseLLM):
             if MEMORY_GATE_MARKER in content:
                 return "NO_ACTION"
         return json.dumps({"assistant_reply": "Okay.", "memory": "NO_ACTION"})
+
+    async def agenerate(self, prompt: str) -> str:
+        # 纯内存计算，直接在事件循环里执行，不占线程
+        return self.generate(prompt)
+
+    async def agenerate_messages(self, messages: list[dict[str, str]]) -> str:
+        return self.generate_messages(messages)
@@ -5,6 +5,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from agent_worker.utils.env import env_float, env_int
+
 try:
     import yaml
 except ImportError:
@@ -23,6 +25,9 @@ class LLMConfig:
     max_retries: int = 2
     retry_backoff_s: float = 0.8
     max_prompt_chars: int = 20000
+    # 对冲/降级用的后备 provider（按优先级），为空时只用 provider
+    fallback_providers: tuple[str, ...] = ()
+    latency_budget_s: float = 8.0
 
     @classmethod
     def from_config_file(cls, config_path: str | Path | None = None) -> LLMConfig | None:
@@ -63,6 +68,8 @@ class LLMConfig:
         max_retries = models_config.get("max_retries", 2)
         retry_backoff_s = models_config.get("retry_backoff_s", 0.8)
         max_prompt_chars = models_config.get("max_prompt_chars", 20000)
+        fallback_providers = _parse_providers(models_config.get("fallback"))
+        latency_budget_s = models_config.get("latency_budget_s", 8.0)
 
         return cls(
             provider=provider,
@@ -73,6 +80,8 @@ class LLMConfig:
             max_retries=max_retries,
             retry_backoff_s=retry_backoff_s,
             max_prompt_chars=max_prompt_chars,
+            fallback_providers=fallback_providers,
+            latency_budget_s=latency_budget_s,
         )
 
     @classmethod
@@ -99,10 +108,12 @@ class LLMConfig:
             if not base_url:
                 base_url = os.getenv("OLLAMA_BASE_URL") or "http://localhost:11434"
 
-        timeout_s = _env_float("LLM_TIMEOUT_S", 30.0)
-        max_retries = _env_int("LLM_MAX_RETRIES", 2)
-        retry_backoff_s = _env_float("LLM_RETRY_BACKOFF_S", 0.8)
-        max_prompt_chars = _env_int("LLM_MAX_PROMPT_CHARS", 20000)
+        timeout_s = env_float("LLM_TIMEOUT_S", 30.0)
+        max_retries = env_int("LLM_MAX_RETRIES", 2)
+        retry_backoff_s = env_float("LLM_RETRY_BACKOFF_S", 0.8)
+        max_prompt_chars = env_int("LLM_MAX_PROMPT_CHARS", 20000)
+        fallback_providers = _parse_providers(os.getenv("LLM_FALLBACK_PROVIDERS"))
+        latency_budget_s = env_float("LLM_LATENCY_BUDGET_S", 8.0)
 
         return cls(
             provider=provider,
@@ -113,6 +124,33 @@ class LLMConfig:
             max_retries=max_retries,
             retry_backoff_s=retry_backoff_s,
             max_prompt_chars=max_prompt_chars,
+            fallback_providers=fallback_providers,
+            latency_budget_s=latency_budget_s,
+        )
+
+    @classmethod
+    def for_provider(
+        cls,
+        provider: str,
+        base: LLMConfig,
+        config_path: str | Path | None = None,
+    ) -> LLMConfig:
+        """后备 provider 的配置：凭据/地址/模型取该 provider 自己的环境变量
+        （<PROVIDER>_API_KEY、<PROVIDER>_BASE_URL、<PROVIDER>_MODEL）或配置文件段，
+        超时、重试等通用参数沿用 base"""
+        provider = provider.lower()
+        section = _provider_section(provider, config_path)
+        prefix = provider.upper()
+        base_url = os.getenv(f"{prefix}_BASE_URL") or section.get("base_url") or _DEFAULT_BASE_URLS.get(provider)
+        return cls(
+            provider=provider,
+            model=os.getenv(f"{prefix}_MODEL") or section.get("model"),
+            base_url=base_url,
+            api_key=os.getenv(f"{prefix}_API_KEY") or section.get("api_key") or None,
+            timeout_s=base.timeout_s,
+            max_retries=base.max_retries,
+            retry_backoff_s=base.retry_backoff_s,
+            max_prompt_chars=base.max_prompt_chars,
         )
 
     @classmethod
@@ -139,27 +177,38 @@ class LLMConfig:
                 max_retries=env_config.max_retries if os.getenv("LLM_MAX_RETRIES") else file_config.max_retries,
                 retry_backoff_s=env_config.retry_backoff_s if os.getenv("LLM_RETRY_BACKOFF_S") else file_config.retry_backoff_s,
                 max_prompt_chars=env_config.max_prompt_chars if os.getenv("LLM_MAX_PROMPT_CHARS") else file_config.max_prompt_chars,
+                fallback_providers=env_config.fallback_providers or file_config.fallback_providers,
+                latency_budget_s=env_config.latency_budget_s if os.getenv("LLM_LATENCY_BUDGET_S") else file_config.latency_budget_s,
             )
 
         # 如果配置文件不存在，返回环境变量配置（默认 stub）
         return env_config
 
 
-def _env_int(name: str, default: int) -> int:
-    value = os.getenv(name)
-    if value is None or value == "":
-        return default
-    try:
-        return int(value)
-    except ValueError:
-        return default
+_DEFAULT_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "qwen": "https://dashscope.aliyuncs.com/compatible-mode/v1",
+    "ollama": "http://localhost:11434",
+}
+
+
+def _parse_providers(value: Any) -> tuple[str, ...]:
+    """"qwen,ollama" 或 ["qwen", "ollama"] -> ("qwen", "ollama")"""
+    if not value:
+        return ()
+    items = value.split(",") if isinstance(value, str) else list(value)
+    return tuple(str(item).strip().lower() for item in items if str(item).strip())
 
 
-def _env_float(name: str, default: float) -> float:
-    value = os.getenv(name)
-    if value is None or value == "":
-        return default
+def _provider_section(provider: str, config_path: str | Path | None) -> dict[str, Any]:
+    if yaml is None:
+        return {}
+    if config_path is None:
+        config_path = Path(__file__).parent.parent.parent.parent / "configs" / "config.yaml"
     try:
-        return float(value)
-    except ValueError:
-        return default
+        with open(config_path, "r", encoding="utf-8") as f:
+            config_data = yaml.safe_load(f) or {}
+    except Exception:
+        return {}
+    section = (config_data.get("models") or {}).get(provider)
+    return section if isinstance(section, dict) else {}
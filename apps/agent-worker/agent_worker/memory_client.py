@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import atexit
 import os
+import threading
 from typing import Any, Dict, List, Optional
 
 import httpx
@@ -9,31 +11,54 @@ from agent_worker.fact_agent import FactProposal
 
 
 class MemoryClient:
-    def __init__(self, base_url: str | None = None) -> None:
+    """core-api memory 服务的 HTTP 客户端
+
+    持有一个长连接池化的 httpx.Client（懒创建，线程安全），避免每次调用都重新建连。
+    用完可调用 close()，或使用 with 语句。
+    """
+
+    def __init__(self, base_url: str | None = None, timeout: float = 10.0) -> None:
         self._base_url = base_url or os.getenv("LONELYCAT_CORE_API_URL", "http://localhost:5173")
+        self._timeout = timeout
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
 
-    def propose(
-        self,
+    def _http(self) -> httpx.Client:
+        """获取共享的 httpx.Client（首次调用时创建）"""
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                client = self._client
+                if client is None:
+                    client = httpx.Client(timeout=self._timeout)
+                    self._client = client
+        return client
+
+    def close(self) -> None:
+        """关闭底层连接池"""
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def __enter__(self) -> "MemoryClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @staticmethod
+    def _proposal_request(
         proposal: FactProposal,
         source_note: str = "mvp-1",
         conversation_id: Optional[str] = None,
         excerpt: Optional[str] = None,
-    ) -> str:
-        """创建 Proposal
-        
-        Args:
-            proposal: FactProposal 对象
-            source_note: Source 备注
-            conversation_id: 对话 ID（用于 source_ref）
-            excerpt: 证据片段（用于 source_ref）
-            
-        Returns:
-            Proposal ID
-        """
+    ) -> Dict[str, Any]:
+        """构建 POST /memory/proposals 的请求体"""
         # 构建 key（从 subject.predicate 转换为 key）
         key = f"{proposal.subject}.{proposal.predicate}" if proposal.subject != "user" else proposal.predicate
         
-        payload = {
+        return {
             "payload": {
                 "key": key,
                 "value": proposal.object,
@@ -49,13 +74,33 @@ class MemoryClient:
             "confidence": proposal.confidence,
             "scope_hint": "global",
         }
+
+    def propose(
+        self,
+        proposal: FactProposal,
+        source_note: str = "mvp-1",
+        conversation_id: Optional[str] = None,
+        excerpt: Optional[str] = None,
+    ) -> str:
+        """创建 Proposal
+        
+        Args:
+            proposal: FactProposal 对象
+            source_note: Source 备注
+            conversation_id: 对话 ID（用于 source_ref）
+            excerpt: 证据片段（用于 source_ref）
+            
+        Returns:
+            Proposal ID
+        """
+        payload = self._proposal_request(proposal, source_note, conversation_id, excerpt)
         
         url = f"{self._base_url}/memory/proposals"
         
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url, json=payload)
-            response.raise_for_status()
-            data = response.json()
+        client = self._http()
+        response = client.post(url, json=payload)
+        response.raise_for_status()
+        data = response.json()
         
         proposal_data = data.get("proposal")
         proposal_id = proposal_data.get("id") if isinstance(proposal_data, dict) else None
@@ -63,6 +108,49 @@ class MemoryClient:
             raise ValueError("Missing proposal id in response")
         return proposal_id
 
+    def propose_batch(
+        self,
+        proposals: List[FactProposal],
+        source_note: str = "mvp-1",
+        conversation_id: Optional[str] = None,
+        excerpt: Optional[str] = None,
+    ) -> List[str]:
+        """批量创建 Proposal（单次请求，服务端单事务：要么全部创建，要么全部失败）
+        
+        Args:
+            proposals: FactProposal 列表
+            source_note: Source 备注
+            conversation_id: 对话 ID（用于 source_ref）
+            excerpt: 证据片段（用于 source_ref）
+            
+        Returns:
+            Proposal ID 列表（与输入顺序一致）
+        """
+        if not proposals:
+            return []
+        items = [
+            self._proposal_request(p, source_note, conversation_id, excerpt)
+            for p in proposals
+        ]
+        url = f"{self._base_url}/memory/proposals:batch"
+        
+        client = self._http()
+        response = client.post(url, json={"items": items})
+        response.raise_for_status()
+        data = response.json()
+        
+        results = data.get("items") if isinstance(data, dict) else None
+        if not isinstance(results, list) or len(results) != len(proposals):
+            raise ValueError(f"Unexpected response from memory proposals batch API: {data!r}")
+        proposal_ids: List[str] = []
+        for item in results:
+            proposal_data = item.get("proposal") if isinstance(item, dict) else None
+            proposal_id = proposal_data.get("id") if isinstance(proposal_data, dict) else None
+            if not proposal_id:
+                raise ValueError("Missing proposal id in response")
+            proposal_ids.append(proposal_id)
+        return proposal_ids
+
     def list_facts(
         self,
         scope: str = "global",
@@ -91,10 +179,10 @@ class MemoryClient:
         if session_id:
             params["session_id"] = session_id
         
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        client = self._http()
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
         
         if isinstance(data, list):
             return data
@@ -109,6 +197,73 @@ class MemoryClient:
             shape = f"type={type(data).__name__}"
         raise ValueError(f"Unexpected response from memory facts API ({shape}): {data!r}")
 
+    def list_scoped_facts(
+        self,
+        session_id: Optional[str] = None,
+        status: str = "active",
+    ) -> Dict[str, list[dict]]:
+        """单次请求获取 global + session scope 的 Fact
+        
+        Args:
+            session_id: Session ID（为空时只返回 global）
+            status: 状态过滤（active/revoked/archived/all）
+            
+        Returns:
+            {"global": [...], "session": [...]}
+        """
+        url = f"{self._base_url}/memory/facts/scoped"
+        params: Dict[str, Any] = {"status": status}
+        if session_id:
+            params["session_id"] = session_id
+        
+        client = self._http()
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        if not isinstance(data, dict) or not isinstance(data.get("global"), list):
+            raise ValueError(f"Unexpected response from memory scoped facts API: {data!r}")
+        session_facts = data.get("session")
+        return {
+            "global": data["global"],
+            "session": session_facts if isinstance(session_facts, list) else [],
+        }
+
+    def list_active_facts(
+        self,
+        conversation_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        query: Optional[str] = None,
+    ) -> list[dict]:
+        """GET /memory/facts/active：global + session 合并后的 active facts
+        
+        Args:
+            conversation_id: 对话 ID（带上 session scope）
+            limit: 最多返回条数
+            query: 当前用户消息；服务端据此按相关性挑选
+            
+        Returns:
+            Fact 列表
+        """
+        url = f"{self._base_url}/memory/facts/active"
+        params: Dict[str, Any] = {}
+        if conversation_id is not None:
+            params["conversation_id"] = conversation_id
+        if limit is not None:
+            params["limit"] = limit
+        if query:
+            params["q"] = query
+        
+        client = self._http()
+        response = client.get(url, params=params or None)
+        response.raise_for_status()
+        data = response.json()
+        
+        items = data.get("items") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            raise ValueError(f"Unexpected response from memory active facts API: {data!r}")
+        return [f for f in items if isinstance(f, dict)]
+
     def revoke(self, fact_id: str) -> None:
         """撤销 Fact
         
@@ -117,9 +272,9 @@ class MemoryClient:
         """
         url = f"{self._base_url}/memory/facts/{fact_id}/revoke"
         
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url)
-            response.raise_for_status()
+        client = self._http()
+        response = client.post(url)
+        response.raise_for_status()
 
     def archive(self, fact_id: str) -> None:
         """归档 Fact
@@ -129,9 +284,9 @@ class MemoryClient:
         """
         url = f"{self._base_url}/memory/facts/{fact_id}/archive"
         
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url)
-            response.raise_for_status()
+        client = self._http()
+        response = client.post(url)
+        response.raise_for_status()
 
     def reactivate(self, fact_id: str) -> None:
         """重新激活 Fact
@@ -141,9 +296,9 @@ class MemoryClient:
         """
         url = f"{self._base_url}/memory/facts/{fact_id}/reactivate"
         
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url)
-            response.raise_for_status()
+        client = self._http()
+        response = client.post(url)
+        response.raise_for_status()
 
     def accept_proposal(
         self,
@@ -176,10 +331,10 @@ class MemoryClient:
         if session_id:
             payload["session_id"] = session_id
         
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url, json=payload if payload else None)
-            response.raise_for_status()
-            return response.json()
+        client = self._http()
+        response = client.post(url, json=payload if payload else None)
+        response.raise_for_status()
+        return response.json()
 
     def reject_proposal(self, proposal_id: str, reason: str | None = None) -> dict:
         """拒绝 Proposal
@@ -194,7 +349,64 @@ class MemoryClient:
         url = f"{self._base_url}/memory/proposals/{proposal_id}/reject"
         payload = {"reason": reason}
         
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url, json=payload)
-            response.raise_for_status()
-            return response.json()
+        client = self._http()
+        response = client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def decide_proposals(self, decisions: List[Dict[str, Any]]) -> List[dict]:
+        """批量接受/拒绝 Proposal（单次请求，服务端单事务：任一失败则全部回滚）
+        
+        Args:
+            decisions: 决策列表，每项形如
+                {"proposal_id": ..., "action": "accept"|"reject", "strategy"/"scope"/
+                 "project_id"/"session_id"/"reason": 可选}
+            
+        Returns:
+            与输入顺序一致的结果列表
+        """
+        if not decisions:
+            return []
+        url = f"{self._base_url}/memory/proposals/decisions:batch"
+        
+        client = self._http()
+        response = client.post(url, json={"items": decisions})
+        response.raise_for_status()
+        data = response.json()
+        
+        results = data.get("items") if isinstance(data, dict) else None
+        if not isinstance(results, list):
+            raise ValueError(f"Unexpected response from memory decisions batch API: {data!r}")
+        return results
+
+
+_shared_clients: Dict[str, MemoryClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_memory_client(base_url: str | None = None) -> MemoryClient:
+    """进程内共享的 MemoryClient（按 base_url 复用连接池），供每轮对话/任务的热路径使用
+
+    不要对返回值调用 close()；进程退出时统一关闭。
+    """
+    key = (base_url or os.getenv("LONELYCAT_CORE_API_URL", "http://localhost:5173")).rstrip("/")
+    client = _shared_clients.get(key)
+    if client is None:
+        with _shared_clients_lock:
+            client = _shared_clients.get(key)
+            if client is None:
+                client = MemoryClient(base_url=key)
+                _shared_clients[key] = client
+    return client
+
+
+def close_shared_memory_clients() -> None:
+    """关闭所有共享 MemoryClient 的连接池"""
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_shared_memory_clients)
@@ -4,8 +4,11 @@ import json
 import re
 
 from agent_worker.llm import BaseLLM
+from agent_worker.llm.instrumentation import llm_call_site
+from agent_worker.llm.prompt_cache import PromptParts, prompt_prefix
 from agent_worker.router import Decision, NoActionDecision, parse_llm_output_with_error
 from agent_worker.trace import TraceCollector
+from agent_worker.utils.facts_format import order_facts_for_snapshot
 
 MEMORY_GATE_MARKER = "### MEMORY_GATE ###"
 MEMORY_POLICY = """Decide if the message implies a long-term, non-sensitive user fact.
@@ -19,19 +22,31 @@ Never include assistant_reply or extra keys.
 RETURN_GATE_JSON = "Return ONLY the JSON object."
 
 
-def build_prompt(
+def build_prompt_parts(
     policy_prompt: str,
     active_facts: list[dict],
     user_message: str,
-) -> str:
-    facts_json = json.dumps(active_facts, separators=(",", ":"))
-    return (
+) -> PromptParts:
+    """marker / policy / facts（按 snapshot 排序）为稳定前缀，当前消息放在后缀"""
+    facts_json = json.dumps(order_facts_for_snapshot(active_facts), separators=(",", ":"))
+    prefix = (
         f"{MEMORY_GATE_MARKER}\n"
         f"{policy_prompt}\n"
-        f"user_message: {user_message}\n"
         f"active_facts: {facts_json}\n"
+    )
+    suffix = (
+        f"user_message: {user_message}\n"
         f"{RETURN_GATE_JSON}\n"
     )
+    return PromptParts(prefix=prefix, suffix=suffix)
+
+
+def build_prompt(
+    policy_prompt: str,
+    active_facts: list[dict],
+    user_message: str,
+) -> str:
+    return build_prompt_parts(policy_prompt, active_facts, user_message).text
 
 
 def parse_gate_output(raw: str | None) -> Decision:
@@ -80,10 +95,13 @@ class MemoryGate:
         active_facts: list[dict],
         trace: TraceCollector | None = None,
     ) -> Decision:
-        prompt = build_prompt(MEMORY_POLICY, active_facts, user_message)
+        parts = build_prompt_parts(MEMORY_POLICY, active_facts, user_message)
+        prompt = parts.text
         if trace:
             trace.record("gate.prompt", prompt)
-        raw = self._llm.generate(prompt)
+            trace.record("gate.prefix_hash", parts.prefix_hash)
+        with llm_call_site("gate"), prompt_prefix(parts.prefix_hash):
+            raw = self._llm.generate(prompt)
         if trace:
             trace.record("gate.response", str(raw))
         decision, error = parse_gate_output_with_error(raw)
@@ -4,10 +4,13 @@ import json
 import re
 
 from agent_worker.llm import BaseLLM
+from agent_worker.llm.budget import BudgetReport, PromptBudget
+from agent_worker.llm.instrumentation import llm_call_site
+from agent_worker.llm.prompt_cache import PromptParts, compute_prefix_hash, prompt_prefix
+from agent_worker.persona import Persona
 from agent_worker.router import parse_llm_output
 from agent_worker.trace import TraceCollector
-from agent_worker.persona import Persona
-from agent_worker.utils.facts_format import format_facts_block
+from agent_worker.utils.facts_format import format_facts_block, order_facts_for_snapshot
 
 POLICY_PROMPT = """You are an assistant responding to the user.
 Use the active_facts as context when helpful.
@@ -15,6 +18,8 @@ Do not decide on memory actions here.
 Respond with helpful, concise text.
 """
 RETURN_TEXT_ONLY = "Return plain text. If you output JSON, include assistant_reply."
+# history 中 kind=summary 的 system 消息是对更早消息的滚动摘要，并入 system prompt
+SUMMARY_MESSAGE_KIND = "summary"
 FALLBACK_REPLY = "I'm sorry, I couldn't generate a response."
 
 
@@ -30,20 +35,46 @@ def _extract_json_block(text: str) -> str | None:
     return None
 
 
-def build_prompt(
+def build_prompt_parts(
     persona: Persona,
     policy_prompt: str,
     active_facts: list[dict],
     user_message: str,
-) -> str:
-    facts_json = json.dumps(active_facts, separators=(",", ":"))
-    return (
+) -> PromptParts:
+    """persona / policy / facts（按 snapshot 排序）为稳定前缀，当前消息放在后缀"""
+    facts_json = json.dumps(order_facts_for_snapshot(active_facts), separators=(",", ":"))
+    prefix = (
         f"{persona.system_prompt}\n\n"
         f"{policy_prompt}\n"
-        f"user_message: {user_message}\n"
         f"active_facts: {facts_json}\n"
+    )
+    suffix = (
+        f"user_message: {user_message}\n"
         f"{RETURN_TEXT_ONLY}\n"
     )
+    return PromptParts(prefix=prefix, suffix=suffix)
+
+
+def build_prompt(
+    persona: Persona,
+    policy_prompt: str,
+    active_facts: list[dict],
+    user_message: str,
+) -> str:
+    return build_prompt_parts(persona, policy_prompt, active_facts, user_message).text
+
+
+def format_summary_block(history_messages: list[dict[str, str]]) -> str:
+    """history 中滚动摘要（kind=summary）的 system prompt 片段；没有摘要时返回空串"""
+    summaries = [
+        msg.get("content", "")
+        for msg in history_messages
+        if msg.get("kind") == SUMMARY_MESSAGE_KIND and msg.get("content")
+    ]
+    if not summaries:
+        return ""
+    body = "\n".join(summaries)
+    return f"[CONVERSATION SUMMARY]\n{body}\n[/CONVERSATION SUMMARY]\n"
 
 
 def parse_responder_output(raw_text: str | None) -> tuple[str, str]:
@@ -75,8 +106,11 @@ def parse_responder_output(raw_text: str | None) -> tuple[str, str]:
 
 
 class Responder:
-    def __init__(self, llm: BaseLLM) -> None:
+    def __init__(self, llm: BaseLLM, budget: PromptBudget | None = None) -> None:
         self._llm = llm
+        # budget 为 None 时不做 token 预算（保持原有行为）
+        self._budget = budget
+        self.last_budget_report: BudgetReport | None = None
 
     def reply(
         self,
@@ -85,10 +119,23 @@ class Responder:
         active_facts: list[dict],
         trace: TraceCollector | None = None,
     ) -> tuple[str, str]:
-        prompt = build_prompt(persona, POLICY_PROMPT, active_facts, user_message)
+        if self._budget is not None:
+            budgeted = self._budget.allocate(
+                system=f"{persona.system_prompt}\n\n{POLICY_PROMPT}\n{RETURN_TEXT_ONLY}",
+                current=user_message,
+                facts=active_facts,
+                render_facts=lambda facts: json.dumps(facts, separators=(",", ":")),
+            )
+            active_facts = budgeted.facts
+            user_message = budgeted.current
+            self._record_budget(budgeted.report, trace)
+        parts = build_prompt_parts(persona, POLICY_PROMPT, active_facts, user_message)
+        prompt = parts.text
         if trace:
             trace.record("responder.prompt", prompt)
-        raw = self._llm.generate(prompt)
+            trace.record("responder.prefix_hash", parts.prefix_hash)
+        with llm_call_site("responder"), prompt_prefix(parts.prefix_hash):
+            raw = self._llm.generate(prompt)
         if trace:
             trace.record("responder.response", str(raw))
         if raw is not None and isinstance(raw, str):
@@ -119,32 +166,61 @@ class Responder:
         """
         # Build messages list
         messages: list[dict[str, str]] = []
-        
-        # Add system prompt with facts in system message (not user). History filtered below.
-        facts_block = format_facts_block(active_facts)
-        system_parts = [persona.system_prompt, "", POLICY_PROMPT]
+
+        # Filter out any system messages from history to avoid duplication;
+        # the rolling summary of older messages (kind=summary) goes into the system prompt.
+        summary_block = format_summary_block(history_messages)
+        history = [
+            {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+            for msg in history_messages
+            if msg.get("role", "user") != "system"
+        ]
+        base_parts = [persona.system_prompt, "", POLICY_PROMPT]
+        if summary_block:
+            base_parts.append(summary_block)
+
+        # Token budget: system/current 必保留，facts 限额，history 从最旧的开始丢
+        if self._budget is not None:
+            budgeted = self._budget.allocate(
+                system="\n".join(base_parts + [RETURN_TEXT_ONLY]),
+                current=f"user_message: {user_message}",
+                facts=active_facts,
+                history=history,
+                render_facts=format_facts_block,
+            )
+            active_facts = budgeted.facts
+            history = budgeted.history
+            current_user_content = budgeted.current
+            self._record_budget(budgeted.report, trace)
+        else:
+            current_user_content = f"user_message: {user_message}"
+
+        # Add system prompt with facts in system message (not user).
+        # Stable prefix first (persona / policy / facts in snapshot order) so provider prompt caches
+        # can reuse it across turns; the rolling summary changes more often and goes after it.
+        facts_block = format_facts_block(order_facts_for_snapshot(active_facts))
+        stable_parts = [persona.system_prompt, "", POLICY_PROMPT]
         if facts_block:
-            system_parts.append(facts_block)
+            stable_parts.append(facts_block)
+        prefix_hash = compute_prefix_hash("\n".join(stable_parts))
+        system_parts = list(stable_parts)
+        if summary_block:
+            system_parts.append(summary_block)
         system_parts.append(RETURN_TEXT_ONLY)
         system_content = "\n".join(system_parts)
         messages.append({"role": "system", "content": system_content})
-        
-        # Add history messages (filter out any system messages to avoid duplication)
-        for msg in history_messages:
-            role = msg.get("role", "user")
-            if role == "system":
-                continue
-            messages.append({"role": role, "content": msg.get("content", "")})
+        messages.extend(history)
         
         # Current user message: only user text (facts are in system message)
-        current_user_content = f"user_message: {user_message}"
         messages.append({"role": "user", "content": current_user_content})
         
         if trace:
             trace.record("responder.messages", json.dumps(messages, indent=2))
+            trace.record("responder.prefix_hash", prefix_hash)
         
         # Generate response using messages
-        raw = self._llm.generate_messages(messages)
+        with llm_call_site("responder"), prompt_prefix(prefix_hash):
+            raw = self._llm.generate_messages(messages)
         
         if trace:
             trace.record("responder.response", str(raw))
@@ -155,3 +231,8 @@ class Responder:
                 return FALLBACK_REPLY, "NO_ACTION"
         
         return parse_responder_output(raw)
+
+    def _record_budget(self, report: BudgetReport, trace: TraceCollector | None) -> None:
+        self.last_budget_report = report
+        if trace:
+            trace.record("responder.budget", report.to_trace())
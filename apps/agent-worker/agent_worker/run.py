@@ -6,6 +6,7 @@ from typing import Sequence
 
 from agent_worker.fact_agent import FactProposal
 from agent_worker.llm import BaseLLM, JsonOnlyLLMWrapper, build_gate_llm_from_env
+from agent_worker.llm.cache import with_response_cache_from_env
 from agent_worker.memory_client import MemoryClient
 from agent_worker.router import (
     NoActionDecision,
@@ -30,8 +31,8 @@ def _coerce_llm(llm: object | None) -> BaseLLM:
         return build_gate_llm_from_env()
     if hasattr(llm, "generate"):
         if isinstance(llm, BaseLLM):
-            return JsonOnlyLLMWrapper(llm)
-        return JsonOnlyLLMWrapper(llm)  # type: ignore[return-value]
+            return with_response_cache_from_env(JsonOnlyLLMWrapper(llm))
+        return with_response_cache_from_env(JsonOnlyLLMWrapper(llm))  # type: ignore[arg-type]
     raise ValueError("LLM must implement generate(prompt)")
 
 
@@ -2,12 +2,9 @@
 
 from __future__ import annotations
 
-import os
 from typing import Optional
 
-import httpx
-
-from agent_worker.memory_client import MemoryClient
+from agent_worker.memory_client import MemoryClient, get_shared_memory_client
 
 
 def fetch_active_facts_via_api(
@@ -15,28 +12,22 @@ def fetch_active_facts_via_api(
     *,
     conversation_id: Optional[str] = None,
     limit: Optional[int] = None,
+    query: Optional[str] = None,
 ) -> list[dict]:
     """
     Fetch active facts from core-api GET /memory/facts/active (single entry point).
     Worker and chat_flow use this instead of MemoryClient.list_facts for read path.
+    query: current user message; core-api then selects facts by relevance instead of returning all.
+    Goes through the process-wide pooled MemoryClient, so repeated turns reuse connections.
     """
-    url = f"{base_url.rstrip('/')}/memory/facts/active"
-    params: dict = {}
-    if conversation_id is not None:
-        params["conversation_id"] = conversation_id
-    if limit is not None:
-        params["limit"] = limit
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(url, params=params or None)
-            response.raise_for_status()
-            data = response.json()
+        return get_shared_memory_client(base_url).list_active_facts(
+            conversation_id=conversation_id,
+            limit=limit,
+            query=query,
+        )
     except Exception:
         return []
-    items = data.get("items")
-    if not isinstance(items, list):
-        return []
-    return [f for f in items if isinstance(f, dict)]
 
 
 def fetch_active_facts(
@@ -64,9 +55,9 @@ def fetch_active_facts(
     facts_by_key: dict[str, dict] = {}
     
     try:
-        # 1. 查询global scope facts（优先级最低）
-        global_facts = memory_client.list_facts(scope="global", status="active")
-        # 注意：list_facts已经按status="active"过滤，但这里再次检查确保
+        global_facts, session_facts = list_global_and_session_facts(memory_client, conversation_id)
+        
+        # 1. global scope facts（优先级最低）
         for fact in global_facts:
             # list_facts返回的facts可能已经过滤了status，但为了安全再次检查
             if fact.get("status") != "active":
@@ -75,40 +66,49 @@ def fetch_active_facts(
             if key:
                 facts_by_key[key] = fact
         
-        # 2. 查询project scope facts（优先级中等，暂未实现）
-        # project_facts = []
-        # if project_id:
-        #     try:
-        #         project_facts = memory_client.list_facts(
-        #             scope="project",
-        #             project_id=project_id,
-        #             status="active"
-        #         )
-        #         for fact in project_facts:
-        #             if fact.get("status") == "active":
-        #                 key = fact.get("key", "")
-        #                 if key:
-        #                     facts_by_key[key] = fact  # project覆盖global
-        #     except Exception:
-        #         pass
+        # 2. project scope facts（优先级中等，暂未实现）
         
-        # 3. 查询session scope facts（优先级最高）
-        session_facts = []
-        if conversation_id:
-            try:
-                session_facts = memory_client.list_facts(
-                    scope="session",
-                    session_id=conversation_id,
-                    status="active"
-                )
-                for fact in session_facts:
-                    if fact.get("status") == "active":
-                        key = fact.get("key", "")
-                        if key:
-                            facts_by_key[key] = fact  # session覆盖global和project
-            except Exception:
-                pass
+        # 3. session scope facts（优先级最高）
+        for fact in session_facts:
+            if fact.get("status") == "active":
+                key = fact.get("key", "")
+                if key:
+                    facts_by_key[key] = fact  # session覆盖global和project
         
         return list(facts_by_key.values())
     except Exception:
         return []
+
+
+def list_global_and_session_facts(
+    memory_client: MemoryClient,
+    conversation_id: Optional[str],
+) -> tuple[list[dict], list[dict]]:
+    """
+    获取 (global_facts, session_facts)。
+    
+    优先走 GET /memory/facts/scoped（一次请求拿到两个 scope）；客户端不支持或服务端
+    尚未提供该端点时，退回到按 scope 分两次调用 list_facts。
+    """
+    list_scoped = getattr(memory_client, "list_scoped_facts", None)
+    if callable(list_scoped):
+        try:
+            scoped = list_scoped(session_id=conversation_id, status="active")
+            if isinstance(scoped, dict) and isinstance(scoped.get("global"), list):
+                session_facts = scoped.get("session") if conversation_id else None
+                return scoped["global"], session_facts if isinstance(session_facts, list) else []
+        except Exception:
+            pass
+    
+    global_facts = memory_client.list_facts(scope="global", status="active")
+    session_facts: list[dict] = []
+    if conversation_id:
+        try:
+            session_facts = memory_client.list_facts(
+                scope="session",
+                session_id=conversation_id,
+                status="active"
+            )
+        except Exception:
+            pass
+    return global_facts, session_facts
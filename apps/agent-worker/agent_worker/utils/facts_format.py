@@ -46,6 +46,15 @@ def format_facts_block(active_facts: list[dict]) -> str:
     )
 
 
+def order_facts_for_snapshot(active_facts: list[dict]) -> list[dict]:
+    """Order facts the way compute_facts_snapshot_id does: by (id or ""), then key.
+
+    Prompt builders render facts in this order so the same snapshot always yields the
+    same prompt prefix (provider-side prompt/KV caches need byte-identical prefixes).
+    """
+    return sorted(active_facts, key=lambda f: (f.get("id") or "", f.get("key") or ""))
+
+
 def _canonical_value(value: Any) -> str:
     """Stable string for a fact value (for hashing)."""
     if isinstance(value, (dict, list)):
@@ -67,10 +76,7 @@ def compute_facts_snapshot_id(active_facts: list[dict]) -> str:
     Returns 64-char hex string (SHA-256).
     """
     active = [f for f in active_facts if f.get("status") == "active" and f.get("key")]
-    ordered = sorted(
-        active,
-        key=lambda f: (f.get("id") or "", f.get("key") or ""),
-    )
+    ordered = order_facts_for_snapshot(active)
     # Fixed field order per fact for stable JSON
     canonical_list = [
         {
@@ -1,4 +1,4 @@
-"""极简 MCP stdio 测试 server：一行一个 JSON，request_id，仅支持 tools/list、tools/call（Phase 2.2 v0.1）。"""
+"""极简 MCP stdio 测试 server：一行一个 JSON，request_id，仅支持 tools/list、tools/call（Phase 2.2 v0.1）；call 参数 notify_list_changed 时先推送 notifications/tools/list_changed。"""
 
 from __future__ import annotations
 
@@ -36,6 +36,9 @@ def main() -> None:
             sys.stdout.flush()
         elif method == "tools/call":
             args = params.get("arguments") or {}
+            if args.get("notify_list_changed"):
+                sys.stdout.write(json.dumps({"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}) + "\n")
+                sys.stdout.flush()
             delay = args.get("delay_sec")
             if isinstance(delay, (int, float)) and delay > 0:
                 time.sleep(delay)
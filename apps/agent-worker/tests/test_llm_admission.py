@@ -0,0 +1,175 @@
+import threading
+import time
+
+import httpx
+import pytest
+from agent_worker.llm.admission import (
+    AdmissionController,
+    AdmissionLimits,
+    AdmissionTimeout,
+    TokenBucket,
+    parse_retry_after,
+    with_admission_from_env,
+)
+from agent_worker.llm.json_only import JsonOnlyLLMWrapper
+from agent_worker.llm.openai import OpenAIChatLLM
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_per_minute() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.wait_time(1) == 0.0
+    # 超过容量的请求按容量计，不会永远等待
+    clock.now += 120
+    assert bucket.wait_time(1000) == 0.0
+
+
+def test_parse_retry_after_seconds_and_http_date() -> None:
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(" 0.5 ") == 0.5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    delay = parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480.0)
+    assert delay == pytest.approx(10.0)
+
+
+def test_max_in_flight_bounds_concurrency() -> None:
+    controller = AdmissionController("p", AdmissionLimits(max_in_flight=2))
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def call() -> None:
+        nonlocal active, peak
+        with controller.acquire():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = controller.stats()
+    assert peak == 2
+    assert stats["admitted"] == 8
+    assert stats["throttled"] > 0
+    assert stats["in_flight"] == 0
+    assert stats["queue_s_max"] > 0
+
+
+def test_rpm_bucket_rejects_after_deadline() -> None:
+    controller = AdmissionController("p", AdmissionLimits(requests_per_min=2))
+    controller.acquire(timeout_s=0.05).release()
+    controller.acquire(timeout_s=0.05).release()
+    with pytest.raises(AdmissionTimeout):
+        controller.acquire(timeout_s=0.05)
+    assert controller.stats()["rejected"] == 1
+
+
+def test_tpm_bucket_settles_actual_usage() -> None:
+    clock = FakeClock()
+    controller = AdmissionController("p", AdmissionLimits(tokens_per_min=100), clock=clock)
+    with controller.acquire(tokens=80) as ticket:
+        ticket.settle(20)
+    # 实际只用了 20，退还的额度允许再发一个 80 token 的请求
+    controller.acquire(tokens=80, timeout_s=0).release()
+    with pytest.raises(AdmissionTimeout):
+        controller.acquire(tokens=80, timeout_s=0)
+    assert controller.stats()["tokens_actual"] == 20
+
+
+def test_retry_after_pauses_whole_provider() -> None:
+    clock = FakeClock()
+    controller = AdmissionController("p", AdmissionLimits(), clock=clock)
+    with controller.acquire() as ticket:
+        ticket.throttled(5.0)
+    with pytest.raises(AdmissionTimeout):
+        controller.acquire(timeout_s=0)
+    clock.now += 5.0
+    controller.acquire(timeout_s=0).release()
+    assert controller.stats()["retry_after_events"] == 1
+
+
+def test_openai_honours_retry_after_and_admission(monkeypatch) -> None:
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(
+            200,
+            json={"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": 42}},
+        ),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    sleeps: list[float] = []
+    monkeypatch.setattr("agent_worker.llm.openai.time.sleep", sleeps.append)
+
+    llm = OpenAIChatLLM(
+        api_key="k",
+        model="m",
+        base_url="http://llm.local",
+        transport=httpx.MockTransport(handler),
+    )
+    controller = AdmissionController("openai:test", AdmissionLimits(max_in_flight=1))
+    # 包装类会把准入控制转发给内层 provider
+    JsonOnlyLLMWrapper(llm).attach_admission(controller)
+
+    assert llm.generate("hi") == "ok"
+    assert sleeps == [2.0]
+    stats = controller.stats()
+    assert stats["admitted"] == 2
+    assert stats["retry_after_events"] == 1
+    assert stats["tokens_actual"] == 42
+    assert stats["in_flight"] == 0
+
+
+def test_admission_is_opt_in(monkeypatch) -> None:
+    class Recorder:
+        def __init__(self) -> None:
+            self.controllers: list = []
+
+        def attach_admission(self, controller) -> None:
+            self.controllers.append(controller)
+
+    for name in ("LLM_ADMISSION", "LLM_MAX_IN_FLIGHT", "LLM_RPM", "LLM_TPM"):
+        monkeypatch.delenv(name, raising=False)
+    llm = Recorder()
+    with_admission_from_env(llm, "opt-in:none")
+    assert llm.controllers == []
+
+    monkeypatch.setenv("LLM_RPM", "60")
+    with_admission_from_env(llm, "opt-in:rpm")
+    limits = llm.controllers[-1].limits
+    assert (limits.requests_per_min, limits.max_in_flight) == (60.0, 0)
+
+    monkeypatch.setenv("LLM_ADMISSION", "0")
+    with_admission_from_env(llm, "opt-in:off")
+    assert len(llm.controllers) == 1
+
+
+def test_unlimited_controller_never_queues() -> None:
+    controller = AdmissionController("p", AdmissionLimits())
+    tickets = [controller.acquire(timeout_s=0) for _ in range(16)]
+    assert controller.stats()["in_flight"] == 16
+    for ticket in tickets:
+        ticket.release()
@@ -0,0 +1,156 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+from agent_worker.llm.admission import AdmissionController, AdmissionLimits
+from agent_worker.llm.async_http import aclose_async_clients, get_async_client
+from agent_worker.llm.base import BaseLLM, agenerate_with
+from agent_worker.llm.hedged import HedgedLLM
+from agent_worker.llm.json_only import JsonOnlyLLMWrapper
+from agent_worker.llm.ollama import OllamaLLM
+from agent_worker.llm.openai import OpenAIChatLLM
+from agent_worker.llm.stub import StubLLM
+
+
+def _openai(handler, **kwargs) -> OpenAIChatLLM:
+    return OpenAIChatLLM(
+        api_key="k",
+        model="m",
+        base_url="http://llm.local",
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+def test_openai_agenerate_retries_with_retry_after(monkeypatch) -> None:
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "1"}),
+        httpx.Response(200, json={"choices": [{"message": {"content": "hello"}}]}),
+    ]
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers["Authorization"])
+        return responses.pop(0)
+
+    sleeps: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    monkeypatch.setattr("agent_worker.llm.openai.asyncio.sleep", fake_sleep)
+    llm = _openai(handler)
+
+    assert asyncio.run(llm.agenerate("hi")) == "hello"
+    assert sleeps == [1.0]
+    assert seen == ["Bearer k", "Bearer k"]
+
+
+def test_ollama_agenerate_messages() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"message": {"content": "pong"}, "eval_count": 3})
+
+    llm = OllamaLLM(model="m", base_url="http://ollama.local", transport=httpx.MockTransport(handler))
+    reply = asyncio.run(llm.agenerate_messages([{"role": "user", "content": "ping"}]))
+    assert reply == "pong"
+
+    with pytest.raises(ValueError):
+        asyncio.run(llm.agenerate_messages([{"role": "tool", "content": "x"}]))
+
+
+def test_async_client_is_shared_per_loop() -> None:
+    async def main() -> None:
+        first = get_async_client()
+        assert get_async_client() is first
+        await aclose_async_clients()
+        assert get_async_client() is not first
+        await aclose_async_clients()
+
+    asyncio.run(main())
+
+
+def test_json_only_wraps_sync_only_llm_asynchronously() -> None:
+    class SyncOnly:
+        def generate(self, prompt: str) -> str:
+            return 'text {"action": "NO_ACTION"} text'
+
+    llm = JsonOnlyLLMWrapper(SyncOnly())
+    assert asyncio.run(llm.agenerate("x")) == '{"action":"NO_ACTION"}'
+    assert asyncio.run(agenerate_with(SyncOnly(), "x")).startswith("text")
+
+
+def test_async_admission_bounds_in_flight_requests() -> None:
+    active = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    llm = _openai(handler)
+    controller = AdmissionController(f"async-{uuid.uuid4().hex}", AdmissionLimits(max_in_flight=3))
+    llm.attach_admission(controller)
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(llm.agenerate("hi") for _ in range(12)))
+
+    assert asyncio.run(main()) == ["ok"] * 12
+    assert peak == 3
+    assert controller.stats()["admitted"] == 12
+
+
+def test_hedged_agenerate_cancels_loser() -> None:
+    class SlowAsync(BaseLLM):
+        def __init__(self) -> None:
+            super().__init__()
+            self._model = f"slow-{uuid.uuid4().hex[:8]}"
+            self.cancelled = False
+
+        def generate(self, prompt: str) -> str:
+            raise AssertionError("sync path not expected")
+
+        async def agenerate(self, prompt: str) -> str:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+            return "slow"
+
+    class FastAsync(StubLLM):
+        def __init__(self) -> None:
+            super().__init__()
+            self._model = f"fast-{uuid.uuid4().hex[:8]}"
+
+        async def agenerate(self, prompt: str) -> str:
+            return "fast"
+
+    slow = SlowAsync()
+    llm = HedgedLLM([slow, FastAsync()], latency_budget_s=0.1)
+
+    async def main() -> str:
+        result = await llm.agenerate("hi")
+        await asyncio.sleep(0)
+        return result
+
+    start = time.monotonic()
+    assert asyncio.run(main()) == "fast"
+    assert time.monotonic() - start < 1.0
+    assert slow.cancelled is True
+
+
+def test_hundred_concurrent_stub_calls() -> None:
+    llm = StubLLM()
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(llm.agenerate(f"msg {i}") for i in range(100)))
+
+    replies = asyncio.run(main())
+    assert len(replies) == 100
+    assert all("Okay." in reply for reply in replies)
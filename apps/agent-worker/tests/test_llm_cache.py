@@ -0,0 +1,112 @@
+import time
+
+import pytest
+from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.cache import (
+    CachedLLM,
+    LLMResponseCache,
+    with_response_cache_from_env,
+)
+from agent_worker.llm.json_only import JsonOnlyLLMWrapper
+
+
+class CountingLLM(BaseLLM):
+    def __init__(self, model: str = "m1", reply: str = '{"action":"NO_ACTION"}') -> None:
+        super().__init__()
+        self._model = model
+        self._base_url = "http://llm.local"
+        self._reply = reply
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return self._reply
+
+    def generate_messages(self, messages: list[dict[str, str]]) -> str:
+        self.calls += 1
+        return self._reply
+
+
+@pytest.fixture
+def cache(tmp_path) -> LLMResponseCache:
+    return LLMResponseCache(tmp_path / "llm_cache.db")
+
+
+def test_repeated_prompt_hits_cache(cache: LLMResponseCache) -> None:
+    inner = CountingLLM()
+    llm = CachedLLM(inner, cache)
+
+    assert llm.generate("ok") == inner._reply
+    assert llm.generate("ok  \r\n") == inner._reply
+
+    assert inner.calls == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_messages_key_includes_model(cache: LLMResponseCache) -> None:
+    messages = [{"role": "user", "content": "thanks"}]
+    first = CountingLLM(model="m1")
+    second = CountingLLM(model="m2")
+
+    CachedLLM(first, cache).generate_messages(messages)
+    CachedLLM(first, cache).generate_messages(messages)
+    CachedLLM(second, cache).generate_messages(messages)
+
+    assert first.calls == 1
+    assert second.calls == 1
+
+
+def test_empty_response_is_not_cached(cache: LLMResponseCache) -> None:
+    inner = CountingLLM(reply="")
+    llm = CachedLLM(inner, cache)
+
+    llm.generate("ok")
+    llm.generate("ok")
+
+    assert inner.calls == 2
+
+
+def test_ttl_expiry(tmp_path) -> None:
+    cache = LLMResponseCache(tmp_path / "ttl.db", ttl_s=0.05)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+
+def test_lru_bound_evicts_least_recently_used(tmp_path) -> None:
+    cache = LLMResponseCache(tmp_path / "lru.db", max_entries=2)
+    cache.put("a", "1")
+    time.sleep(0.01)
+    cache.put("b", "2")
+    time.sleep(0.01)
+    assert cache.get("a") == "1"  # a 比 b 更新
+    time.sleep(0.01)
+    cache.put("c", "3")
+
+    assert cache.evict() == 1
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+
+def test_cache_is_shared_across_instances(tmp_path) -> None:
+    path = tmp_path / "shared.db"
+    LLMResponseCache(path).put("k", "v")
+
+    assert LLMResponseCache(path).get("k") == "v"
+
+
+def test_env_opt_in(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    inner = JsonOnlyLLMWrapper(CountingLLM())
+
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    assert with_response_cache_from_env(inner) is inner
+
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "env.db"))
+    wrapped = with_response_cache_from_env(inner)
+    assert isinstance(wrapped, CachedLLM)
+    assert with_response_cache_from_env(wrapped) is wrapped
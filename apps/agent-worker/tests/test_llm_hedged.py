@@ -0,0 +1,125 @@
+import threading
+import time
+import uuid
+
+import pytest
+from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.factory import build_gate_llm_from_env, build_llm_from_env
+from agent_worker.llm.hedged import HedgedLLM, get_latency_histogram, provider_key
+from agent_worker.llm.json_only import JsonOnlyLLMWrapper
+from agent_worker.llm.ollama import OllamaLLM
+from agent_worker.llm.stub import StubLLM
+
+
+class FakeProvider(BaseLLM):
+    def __init__(self, reply="ok", delay_s: float = 0.0, error: Exception | None = None) -> None:
+        super().__init__()
+        # 每个实例独立的直方图 key，避免测试之间互相影响
+        self._model = f"fake-{uuid.uuid4().hex[:8]}"
+        self._base_url = "http://fake.local"
+        self._reply = reply
+        self._delay_s = delay_s
+        self._error = error
+        self.calls = 0
+        self.finished = threading.Event()
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        try:
+            if self._delay_s:
+                time.sleep(self._delay_s)
+            if self._error is not None:
+                raise self._error
+            return self._reply
+        finally:
+            self.finished.set()
+
+
+def test_fast_primary_is_not_hedged() -> None:
+    primary = FakeProvider("primary")
+    secondary = FakeProvider("secondary")
+    llm = HedgedLLM([primary, secondary], latency_budget_s=1.0)
+
+    assert llm.generate("hi") == "primary"
+    assert secondary.calls == 0
+    assert llm.stats()["hedges"] == 0
+
+
+def test_slow_primary_hedges_to_secondary() -> None:
+    primary = FakeProvider("primary", delay_s=0.5)
+    secondary = FakeProvider("secondary")
+    llm = HedgedLLM([primary, secondary], latency_budget_s=0.1)
+
+    start = time.monotonic()
+    assert llm.generate("hi") == "secondary"
+    assert time.monotonic() - start < 0.4
+    stats = llm.stats()
+    assert stats["hedges"] == 1
+    assert stats["wins"][provider_key(secondary)] == 1
+
+
+def test_failed_or_invalid_primary_fails_over_immediately() -> None:
+    secondary = FakeProvider("secondary")
+    llm = HedgedLLM([FakeProvider(error=RuntimeError("boom")), secondary], latency_budget_s=10.0)
+    start = time.monotonic()
+    assert llm.generate("hi") == "secondary"
+    assert time.monotonic() - start < 1.0
+    assert llm.stats()["failovers"] == 1
+
+    llm = HedgedLLM([FakeProvider("  "), FakeProvider("fallback")], latency_budget_s=10.0)
+    assert llm.generate("hi") == "fallback"
+
+
+def test_all_providers_failing_raises() -> None:
+    llm = HedgedLLM(
+        [FakeProvider(error=RuntimeError("a")), FakeProvider(error=RuntimeError("b"))],
+        latency_budget_s=1.0,
+    )
+    with pytest.raises(RuntimeError, match="all hedged llm providers failed"):
+        llm.generate("hi")
+
+
+def test_latency_histograms_drive_hedge_delay() -> None:
+    primary = FakeProvider()
+    secondary = FakeProvider()
+    llm = HedgedLLM([primary, secondary], latency_budget_s=2.0, min_hedge_delay_s=0.0)
+    assert llm.hedge_delay(0) == pytest.approx(1.0)  # 无样本时取 budget 的一半
+
+    for i in range(100):
+        get_latency_histogram(provider_key(primary)).observe(0.01 * (i + 1))
+    assert llm.hedge_delay(0) == pytest.approx(0.95, abs=0.011)
+
+    # 后备 provider 的 p50 要能落在 budget 内
+    for _ in range(50):
+        get_latency_histogram(provider_key(secondary)).observe(1.5)
+    assert llm.hedge_delay(0) == pytest.approx(0.5)
+
+
+def test_loser_latency_is_still_recorded() -> None:
+    primary = FakeProvider("primary", delay_s=0.2)
+    llm = HedgedLLM([primary, FakeProvider("secondary")], latency_budget_s=0.05)
+    assert llm.generate("hi") == "secondary"
+    assert primary.finished.wait(2.0)
+    time.sleep(0.05)
+    assert len(get_latency_histogram(provider_key(primary))) == 1
+
+
+def test_factory_builds_hedged_llm_from_env(monkeypatch) -> None:
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.setenv("LLM_FALLBACK_PROVIDERS", "ollama, stub")
+    monkeypatch.setenv("LLM_LATENCY_BUDGET_S", "3")
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+
+    llm = build_llm_from_env()
+    assert isinstance(llm, HedgedLLM)
+    assert [type(p) for p in llm.providers] == [StubLLM, OllamaLLM]
+
+    gate = build_gate_llm_from_env()
+    assert isinstance(gate, HedgedLLM)
+    assert all(isinstance(p, JsonOnlyLLMWrapper) for p in gate.providers)
+
+
+def test_factory_without_fallback_returns_single_provider(monkeypatch) -> None:
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.delenv("LLM_FALLBACK_PROVIDERS", raising=False)
+    assert isinstance(build_llm_from_env(), StubLLM)
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import uuid
+
+import httpx
+from agent_worker.chat_flow import chat_flow
+from agent_worker.config import ChatConfig
+from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.cache import CachedLLM, LLMResponseCache
+from agent_worker.llm.hedged import HedgedLLM
+from agent_worker.llm.instrumentation import (
+    collect_llm_calls,
+    get_llm_call_stats,
+    llm_call_site,
+    summarize_llm_calls,
+)
+from agent_worker.llm.json_only import JsonOnlyLLMWrapper
+from agent_worker.llm.ollama import OllamaLLM
+from agent_worker.llm.openai import OpenAIChatLLM
+from agent_worker.llm.stub import StubLLM
+
+
+def _openai(handler) -> OpenAIChatLLM:
+    return OpenAIChatLLM(
+        api_key="k",
+        model="gpt-test",
+        base_url="http://llm.local",
+        retry_backoff_s=0.0,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def test_provider_usage_and_retries_are_recorded() -> None:
+    responses = [
+        httpx.Response(500),
+        httpx.Response(
+            200,
+            json={
+                "choices": [{"message": {"content": "hi"}}],
+                "usage": {"prompt_tokens": 11, "completion_tokens": 2, "total_tokens": 13},
+            },
+        ),
+    ]
+    llm = _openai(lambda request: responses.pop(0))
+
+    with collect_llm_calls() as calls, llm_call_site("responder"):
+        assert llm.generate("hello") == "hi"
+
+    assert len(calls) == 1
+    record = calls[0]
+    assert record.call_site == "responder"
+    assert record.model == "gpt-test"
+    assert record.provider == "OpenAIChatLLM"
+    assert (record.prompt_tokens, record.completion_tokens) == (11, 2)
+    assert record.tokens_estimated is False
+    assert record.retries == 1
+    assert record.ok is True
+
+
+def test_wrapper_chain_records_one_call_with_estimated_tokens() -> None:
+    llm = JsonOnlyLLMWrapper(StubLLM())
+
+    with collect_llm_calls() as calls, llm_call_site("gate"):
+        llm.generate("remember that I like tea")
+
+    assert [record.call_site for record in calls] == ["gate"]
+    assert calls[0].tokens_estimated is True
+    assert calls[0].prompt_tokens > 0
+
+
+def test_cache_hit_is_flagged(tmp_path) -> None:
+    llm = CachedLLM(StubLLM(), LLMResponseCache(tmp_path / "cache.db"))
+
+    with collect_llm_calls() as calls:
+        llm.generate("same prompt")
+        llm.generate("same prompt")
+
+    assert [record.cache_hit for record in calls] == [False, True]
+
+
+def test_failed_call_is_recorded_and_reraised() -> None:
+    class Broken(BaseLLM):
+        def generate(self, prompt: str) -> str:
+            raise RuntimeError("boom")
+
+    with collect_llm_calls() as calls:
+        try:
+            Broken().generate("x")
+        except RuntimeError:
+            pass
+
+    assert calls[0].ok is False
+    assert calls[0].error == "RuntimeError"
+
+
+def test_async_ollama_usage_counts() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, json={"message": {"content": "pong"}, "prompt_eval_count": 7, "eval_count": 3}
+        )
+
+    llm = OllamaLLM(model="llama-test", base_url="http://ollama.local", transport=httpx.MockTransport(handler))
+
+    async def main():
+        with collect_llm_calls() as calls, llm_call_site("decision"):
+            await llm.agenerate("ping")
+        return calls
+
+    calls = asyncio.run(main())
+    assert len(calls) == 1
+    assert (calls[0].prompt_tokens, calls[0].completion_tokens) == (7, 3)
+    assert calls[0].method == "agenerate"
+
+
+def test_hedged_members_report_into_outer_call() -> None:
+    class Named(StubLLM):
+        def __init__(self) -> None:
+            super().__init__()
+            self._model = f"stub-{uuid.uuid4().hex[:8]}"
+
+    llm = HedgedLLM([Named(), Named()], latency_budget_s=1.0)
+
+    with collect_llm_calls() as calls, llm_call_site("responder"):
+        llm.generate("hello")
+
+    assert len(calls) == 1
+    assert calls[0].provider == "HedgedLLM"
+
+
+def test_summarize_llm_calls_groups_by_call_site() -> None:
+    rows = [
+        {"call_site": "gate", "latency_ms": float(ms), "prompt_tokens": 10, "completion_tokens": 5, "ok": True}
+        for ms in range(1, 101)
+    ]
+    rows.append({"call_site": "decision", "latency_ms": 40.0, "prompt_tokens": 1, "completion_tokens": 1, "ok": False})
+
+    summary = summarize_llm_calls(rows)
+    assert summary["gate"]["calls"] == 100
+    assert summary["gate"]["latency_ms_p50"] == 50.0
+    assert summary["gate"]["latency_ms_p95"] == 95.0
+    assert summary["gate"]["tokens_p95"] == 15
+    assert summary["decision"]["errors"] == 1
+
+
+def test_call_log_and_chat_trace(monkeypatch, tmp_path) -> None:
+    log_path = tmp_path / "calls.jsonl"
+    monkeypatch.setenv("LLM_CALL_LOG", str(log_path))
+    monkeypatch.delenv("LONELYCAT_TRACE", raising=False)
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+
+    result = chat_flow(
+        "hello",
+        persona_id=None,
+        llm=StubLLM(),
+        memory_client=None,
+        config=ChatConfig(memory_enabled=False),
+        active_facts=[],
+    )
+
+    sites = [json.loads(line)["call_site"] for line in log_path.read_text().splitlines()]
+    assert sites == ["responder", "gate"]
+    assert sum("llm.call" in line for line in result.trace_lines) == 2
+    assert get_llm_call_stats()["responder"]["calls"] >= 1
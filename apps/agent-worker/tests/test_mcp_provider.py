@@ -351,3 +351,41 @@ def test_mcp_servers_from_env_empty_cmd_skips_item_and_warns():
     assert "srv_ok2" in names
     assert "srv_empty" not in names
     assert mock_log.warning.call_count >= 1
+
+
+class NotifyingMockMCPClient(MockMCPClient):
+    """支持 set_notification_handler 的 mock client，notify() 模拟 server 推送。"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.handler = None
+        self.list_calls = 0
+
+    def set_notification_handler(self, handler):
+        self.handler = handler
+
+    def list_tools(self):
+        self.list_calls += 1
+        return super().list_tools()
+
+    def notify(self, method):
+        self.handler(method, {})
+
+
+def test_catalog_invalidated_by_mcp_tools_list_changed():
+    """MCP server 推送 notifications/tools/list_changed 时 catalog 索引失效，下次解析拿到新工具；其他通知不影响缓存。"""
+    from worker.tools.mcp_provider import MCPProvider
+
+    client = NotifyingMockMCPClient()
+    catalog = ToolCatalog(preferred_provider_order=["mcp_srv"], ttl_sec=60)
+    catalog.register_provider("mcp_srv", MCPProvider(server_name="srv", provider_id="mcp_srv", client=client))
+    assert catalog.get("mcp.srv.search") is not None
+    assert catalog.get("mcp.srv.search") is not None
+    assert client.list_calls == 1
+
+    client.tools = client.tools + [{"name": "write_file", "inputSchema": {"type": "object"}}]
+    client.notify("notifications/progress")
+    assert catalog.get("mcp.srv.write_file") is None
+    client.notify("notifications/tools/list_changed")
+    assert catalog.get("mcp.srv.write_file") is not None
+    assert client.list_calls == 2
@@ -108,3 +108,18 @@ def test_spawn_failed_raises():
         assert exc_info.value.code == "SpawnFailed"
     finally:
         client.close()
+
+
+def test_notification_dispatched_to_handler():
+    """无 id 的 server 通知（notifications/tools/list_changed）交给 set_notification_handler 的回调。"""
+    from worker.tools.mcp_stdio_client import MCPStdioClient
+
+    received = []
+    client = MCPStdioClient(cmd=_echo_server_cmd(), cwd=None, env=None)
+    client.set_notification_handler(lambda method, params: received.append((method, params)))
+    try:
+        client.call_tool("ping", {"notify_list_changed": True}, timeout_ms=5000)
+        # 通知先于 call 结果写出，reader 线程按序处理，返回时已分发
+        assert received == [("notifications/tools/list_changed", {})]
+    finally:
+        client.close()
@@ -21,6 +21,9 @@ class DummyClient:
     def get(self, url: str, params: dict | None = None) -> httpx.Response:
         return self._response
 
+    def close(self) -> None:
+        return None
+
 
 def _patch_httpx_client(monkeypatch: pytest.MonkeyPatch, payload, status_code: int = 200, method: str = "POST") -> None:
     if method == "POST":
@@ -121,6 +124,99 @@ def test_list_facts_handles_different_response_formats(monkeypatch: pytest.Monke
     assert facts[0]["id"] == "fact-1"
 
 
+def test_client_reuses_pooled_http_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    response = httpx.Response(
+        200,
+        json={"items": []},
+        request=httpx.Request("GET", "http://testserver/memory/facts"),
+    )
+    created: list[DummyClient] = []
+
+    def _client_factory(timeout: float | None = None) -> DummyClient:
+        client = DummyClient(response=response, timeout=timeout)
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(httpx, "Client", _client_factory)
+
+    client = MemoryClient(base_url="http://testserver")
+    client.list_facts(scope="global")
+    client.list_facts(scope="session", session_id="conv1")
+    client.revoke("fact-1")
+
+    assert len(created) == 1
+
+
+def test_propose_batch_returns_ids_in_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    payload = {
+        "items": [
+            {"status": "pending", "proposal": {"id": "p-1"}, "fact": None},
+            {"status": "pending", "proposal": {"id": "p-2"}, "fact": None},
+        ]
+    }
+    _patch_httpx_client(monkeypatch, payload)
+
+    client = MemoryClient(base_url="http://testserver")
+
+    assert client.propose_batch([_fake_proposal(), _fake_proposal()]) == ["p-1", "p-2"]
+    assert client.propose_batch([]) == []
+
+
+def test_list_scoped_facts_feeds_fetch_active_facts(monkeypatch: pytest.MonkeyPatch) -> None:
+    from agent_worker.utils.facts import fetch_active_facts
+
+    payload = {
+        "global": [{"id": "fact-1", "key": "likes", "value": "cats", "status": "active"}],
+        "session": [{"id": "fact-2", "key": "likes", "value": "dogs", "status": "active"}],
+    }
+    _patch_httpx_client(monkeypatch, payload, method="GET")
+
+    client = MemoryClient(base_url="http://testserver")
+
+    facts = fetch_active_facts(client, conversation_id="conv1")
+    assert [f["value"] for f in facts] == ["dogs"]
+
+
+def test_fetch_active_facts_via_api_reuses_shared_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    from agent_worker.memory_client import close_shared_memory_clients, get_shared_memory_client
+    from agent_worker.utils.facts import fetch_active_facts_via_api
+
+    response = httpx.Response(
+        200,
+        json={"items": [{"id": "fact-1", "key": "likes", "value": "cats"}, "bad"]},
+        request=httpx.Request("GET", "http://testserver/memory/facts/active"),
+    )
+    created: list[DummyClient] = []
+
+    def _client_factory(timeout: float | None = None) -> DummyClient:
+        client = DummyClient(response=response, timeout=timeout)
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(httpx, "Client", _client_factory)
+    close_shared_memory_clients()
+    try:
+        for _ in range(3):
+            facts = fetch_active_facts_via_api("http://testserver/", conversation_id="conv1", query="cats")
+            assert [f["id"] for f in facts] == ["fact-1"]
+        assert get_shared_memory_client("http://testserver") is get_shared_memory_client("http://testserver/")
+        assert len(created) == 1
+    finally:
+        close_shared_memory_clients()
+
+
+def test_fetch_active_facts_via_api_returns_empty_on_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    from agent_worker.memory_client import close_shared_memory_clients
+    from agent_worker.utils.facts import fetch_active_facts_via_api
+
+    _patch_httpx_client(monkeypatch, {"detail": "boom"}, status_code=500, method="GET")
+    close_shared_memory_clients()
+    try:
+        assert fetch_active_facts_via_api("http://testserver") == []
+    finally:
+        close_shared_memory_clients()
+
+
 def _fake_proposal() -> FactProposal:
     return FactProposal(
         subject="user",
@@ -0,0 +1,144 @@
+"""Tests for token-aware prompt budgeting (llm.budget) and responder integration."""
+
+import json
+
+from agent_worker.llm.base import BaseLLM
+from agent_worker.llm.budget import (
+    TRUNCATION_MARKER,
+    ApproxTokenEstimator,
+    PromptBudget,
+    build_estimator,
+)
+from agent_worker.persona import PersonaRegistry
+from agent_worker.responder import Responder
+from agent_worker.trace import TraceCollector, TraceLevel
+from agent_worker.utils.facts_format import format_facts_block
+
+
+class CaptureLLM(BaseLLM):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[dict[str, str]] = []
+
+    def generate(self, prompt: str) -> str:
+        return "Okay."
+
+    def generate_messages(self, messages: list[dict[str, str]]) -> str:
+        self.messages = list(messages)
+        return json.dumps({"assistant_reply": "Okay.", "memory": "NO_ACTION"})
+
+
+def _history(n: int, size: int = 200) -> list[dict[str, str]]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i} " + "x" * size}
+        for i in range(n)
+    ]
+
+
+def test_approx_estimator_counts_cjk_per_char():
+    est = ApproxTokenEstimator()
+    assert est.count("") == 0
+    assert est.count("你好世界") == 4
+    assert est.count("abcdefgh") == 2
+    assert est.count("你好abcd") == 3
+
+
+def test_build_estimator_falls_back_to_approx():
+    assert isinstance(build_estimator("approx"), ApproxTokenEstimator)
+    # tiktoken 未安装时也不应报错
+    assert build_estimator("tiktoken:cl100k_base").count("hello world") > 0
+
+
+def test_allocate_drops_oldest_history_first():
+    budget = PromptBudget(max_tokens=400, max_history_messages=None)
+    history = _history(20)
+    result = budget.allocate(system="sys", current="latest", history=history)
+
+    assert result.report.dropped_history > 0
+    assert result.history == history[-len(result.history):]
+    assert result.report.kept_history + result.report.dropped_history == 20
+    assert result.report.total_tokens <= 400
+
+
+def test_allocate_respects_history_message_cap():
+    budget = PromptBudget(max_tokens=100000, max_history_messages=5)
+    result = budget.allocate(system="sys", current="hi", history=_history(12, size=5))
+    assert len(result.history) == 5
+    assert result.history[-1]["content"].startswith("m11")
+
+
+def test_current_message_is_never_dropped():
+    budget = PromptBudget(max_tokens=120)
+    current = "start " + "y" * 4000 + " end"
+    result = budget.allocate(system="sys", current=current, history=_history(3))
+
+    assert result.report.truncated_current
+    assert result.current.startswith("start ")
+    assert result.current.endswith(" end")
+    assert TRUNCATION_MARKER in result.current
+    assert result.history == []
+    assert result.report.total_tokens <= 120
+
+
+def test_facts_limited_to_share():
+    budget = PromptBudget(max_tokens=1000, facts_share=0.2)
+    facts = [{"key": f"k{i}", "value": "v" * 40, "status": "active"} for i in range(50)]
+    result = budget.allocate(system="sys", current="hi", facts=facts, render_facts=format_facts_block)
+
+    assert 0 < result.report.kept_facts < 50
+    assert result.report.facts_tokens <= 200
+    assert result.facts == facts[: result.report.kept_facts]
+
+
+def test_responder_applies_budget_and_traces_report():
+    llm = CaptureLLM()
+    responder = Responder(llm, budget=PromptBudget(max_tokens=800))
+    persona = PersonaRegistry.load_default().default()
+    trace = TraceCollector(level=TraceLevel.FULL)
+
+    responder.reply_with_messages(
+        persona=persona,
+        user_message="最新的问题",
+        history_messages=_history(30),
+        active_facts=[{"key": "likes", "value": "cats", "status": "active"}],
+        trace=trace,
+    )
+
+    report = responder.last_budget_report
+    assert report is not None and report.dropped_history > 0
+    assert llm.messages[0]["role"] == "system"
+    assert "- likes: cats" in llm.messages[0]["content"]
+    assert llm.messages[-1] == {"role": "user", "content": "user_message: 最新的问题"}
+    assert len(llm.messages) == 2 + report.kept_history
+    assert any(event.stage == "responder.budget" for event in trace.events)
+
+
+def test_trim_prompt_keeps_head_and_tail():
+    llm = CaptureLLM()
+    llm._max_prompt_chars = 100
+    prompt = "HEAD" + "x" * 500 + "TAIL"
+    trimmed = llm._trim_prompt(prompt)
+
+    assert len(trimmed) <= 100
+    assert trimmed.startswith("HEAD")
+    assert trimmed.endswith("TAIL")
+
+
+def test_rolling_summary_goes_into_system_prompt():
+    llm = CaptureLLM()
+    responder = Responder(llm, budget=PromptBudget())
+    persona = PersonaRegistry.load_default().default()
+
+    responder.reply_with_messages(
+        persona=persona,
+        user_message="继续",
+        history_messages=[
+            {"role": "system", "kind": "summary", "content": "用户在规划旅行"},
+            {"role": "user", "content": "去哪里好"},
+        ],
+        active_facts=[],
+    )
+
+    assert "[CONVERSATION SUMMARY]" in llm.messages[0]["content"]
+    assert "用户在规划旅行" in llm.messages[0]["content"]
+    assert [m["role"] for m in llm.messages] == ["system", "user", "user"]
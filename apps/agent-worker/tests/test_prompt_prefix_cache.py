@@ -0,0 +1,108 @@
+import json
+
+import httpx
+from agent_worker.llm.instrumentation import collect_llm_calls
+from agent_worker.llm.ollama import OllamaLLM
+from agent_worker.llm.openai import OpenAIChatLLM
+from agent_worker.llm.prompt_cache import prompt_prefix
+from agent_worker.llm.stub import StubLLM
+from agent_worker.memory_gate import MEMORY_POLICY, MemoryGate
+from agent_worker.memory_gate import build_prompt_parts as build_gate_prompt_parts
+from agent_worker.persona import PersonaRegistry
+from agent_worker.responder import POLICY_PROMPT, Responder, build_prompt_parts
+from agent_worker.trace import TraceCollector, TraceLevel
+
+FACTS = [
+    {"id": "b", "key": "city", "value": "Paris", "status": "active"},
+    {"id": "a", "key": "name", "value": "Alice", "status": "active"},
+]
+
+
+def _persona():
+    return PersonaRegistry.load_default().default()
+
+
+def test_responder_prefix_is_stable_across_messages_and_fact_order() -> None:
+    first = build_prompt_parts(_persona(), POLICY_PROMPT, FACTS, "hello")
+    second = build_prompt_parts(_persona(), POLICY_PROMPT, list(reversed(FACTS)), "something else")
+
+    assert first.prefix == second.prefix
+    assert first.prefix_hash == second.prefix_hash
+    assert "hello" not in first.prefix
+    assert first.suffix.startswith("user_message: hello")
+    assert first.prefix.index('"id":"a"') < first.prefix.index('"id":"b"')
+
+
+def test_gate_prefix_changes_only_with_facts() -> None:
+    base = build_gate_prompt_parts(MEMORY_POLICY, FACTS, "hi")
+    other_message = build_gate_prompt_parts(MEMORY_POLICY, FACTS, "bye")
+    other_facts = build_gate_prompt_parts(MEMORY_POLICY, FACTS[:1], "hi")
+
+    assert base.prefix_hash == other_message.prefix_hash
+    assert base.prefix_hash != other_facts.prefix_hash
+
+
+def test_reply_with_messages_puts_summary_after_stable_prefix() -> None:
+    seen: list[list[dict]] = []
+
+    class Recording(StubLLM):
+        def generate_messages(self, messages):
+            seen.append(messages)
+            return super().generate_messages(messages)
+
+    trace = TraceCollector(level=TraceLevel.BASIC)
+    history = [{"role": "system", "kind": "summary", "content": "earlier chat"}]
+    with collect_llm_calls() as calls:
+        Responder(Recording()).reply_with_messages(_persona(), "hi", history, FACTS, trace=trace)
+
+    system = seen[0][0]["content"]
+    assert system.index("[KNOWN FACTS]") < system.index("[CONVERSATION SUMMARY]")
+    hashes = [e.detail for e in trace.events if e.stage == "responder.prefix_hash"]
+    assert len(hashes) == 1
+    assert calls[0].prefix_hash == hashes[0]
+
+
+def test_gate_passes_prefix_hash_to_llm_layer() -> None:
+    with collect_llm_calls() as calls:
+        MemoryGate(StubLLM()).decide("hi", FACTS)
+    expected = build_gate_prompt_parts(MEMORY_POLICY, FACTS, "hi").prefix_hash
+    assert calls[0].prefix_hash == expected
+
+
+def test_openai_sends_prompt_cache_key_only_when_enabled() -> None:
+    bodies: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    official = OpenAIChatLLM(
+        api_key="k", model="m", base_url="https://api.openai.com/v1", transport=httpx.MockTransport(handler)
+    )
+    compatible = OpenAIChatLLM(
+        api_key="k", model="m", base_url="http://vllm.local/v1", transport=httpx.MockTransport(handler)
+    )
+    with prompt_prefix("abc123"):
+        official.generate("hi")
+        compatible.generate("hi")
+    official.generate("no prefix")
+
+    assert bodies[0]["prompt_cache_key"] == "abc123"
+    assert "prompt_cache_key" not in bodies[1]
+    assert "prompt_cache_key" not in bodies[2]
+
+
+def test_ollama_sends_keep_alive() -> None:
+    bodies: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"message": {"content": "ok"}})
+
+    OllamaLLM(
+        model="m", base_url="http://ollama.local", keep_alive="30m", transport=httpx.MockTransport(handler)
+    ).generate_messages([{"role": "user", "content": "hi"}])
+    OllamaLLM(model="m", base_url="http://ollama.local", transport=httpx.MockTransport(handler)).generate("hi")
+
+    assert bodies[0]["keep_alive"] == "30m"
+    assert "keep_alive" not in bodies[1]
@@ -4,7 +4,6 @@ import re
 from unittest.mock import Mock
 
 import pytest
-
 from agent_worker.llm.stub import StubLLM
 from worker.db_models import MessageRole
 from worker.runner import TaskRunner
@@ -47,6 +46,9 @@ def test_summarize_output_has_trace_id_steps_and_trace_lines():
         assert "ok" in s
         assert "error_code" in s
         assert "meta" in s
+    llm_calls = result["steps"][-1]["meta"]["llm_calls"]
+    assert [c["call_site"] for c in llm_calls] == ["summarize"]
+    assert llm_calls[0]["latency_ms"] >= 0
     assert "trace_lines" in result
     assert any(f"trace_id={trace_id}" in line for line in result["trace_lines"])
 
@@ -108,3 +110,150 @@ def test_summarize_llm_failure_has_llm_generate_ok_false_and_error_code():
     assert llm_step["ok"] is False
     assert llm_step["error_code"] is not None
     assert llm_step["error_code"] == "RuntimeError"
+
+
+def test_rolling_summary_reads_only_after_checkpoint_and_advances_it(tmp_path):
+    """rolling=True：只读 checkpoint 之后的消息，合并旧摘要，保留最近 keep_recent 条并推进 checkpoint。"""
+    from datetime import UTC, datetime, timedelta
+
+    from app.db import Base, ConversationModel, ConversationSummaryModel, MessageModel
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'summary.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = datetime.now(UTC)
+    db.add(ConversationModel(id="c1", title="t", created_at=now, updated_at=now))
+    for i in range(12):
+        db.add(MessageModel(
+            id=f"m{i}",
+            conversation_id="c1",
+            role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+            content=f"msg {i}",
+            created_at=now + timedelta(seconds=i),
+        ))
+    db.commit()
+    checkpoint_at = db.query(MessageModel).filter(MessageModel.id == "m3").one().created_at
+    db.add(ConversationSummaryModel(
+        conversation_id="c1", summary="OLD SUMMARY", summarized_until=checkpoint_at, message_count=4,
+    ))
+    db.commit()
+
+    prompts = []
+    llm = Mock()
+    llm.generate = Mock(side_effect=lambda p: prompts.append(p) or "NEW SUMMARY")
+    runner = TaskRunner()
+    runner._build_memory_client = lambda: None
+    run = Mock(id="run-1")
+    run.input_json = {"conversation_id": "c1", "rolling": True, "keep_recent": 3, "max_messages": 20}
+
+    result = runner._handle_summarize_conversation(run, db, llm, lambda: True)
+
+    assert result["ok"] is True
+    assert result["message_count"] == 5  # m4..m8；m9..m11 保留原文
+    assert "OLD SUMMARY" in prompts[0]
+    assert "msg 4" in prompts[0] and "msg 8" in prompts[0]
+    assert "msg 3" not in prompts[0] and "msg 9" not in prompts[0]
+    row = db.query(ConversationSummaryModel).filter_by(conversation_id="c1").one()
+    assert row.summary == "NEW SUMMARY"
+    assert row.last_message_id == "m8"
+    assert row.message_count == 9
+    assert row.run_id == "run-1"
+    db.close()
+    engine.dispose()
+
+
+def test_rolling_summary_long_tail_never_skips_messages(tmp_path):
+    """未摘要尾部超过 60 条时，每次按正序合并最旧的一批，checkpoint 不越过未总结的消息，多次滚动后追平。"""
+    from datetime import UTC, datetime, timedelta
+
+    from app.db import Base, ConversationModel, ConversationSummaryModel, MessageModel
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'summary.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = datetime.now(UTC)
+    db.add(ConversationModel(id="c1", title="t", created_at=now, updated_at=now))
+    for i in range(80):
+        db.add(MessageModel(
+            id=f"m{i}",
+            conversation_id="c1",
+            role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+            content=f"msg {i}",
+            created_at=now + timedelta(seconds=i),
+        ))
+    db.commit()
+
+    summarized = []
+
+    def generate(prompt):
+        summarized.extend(int(n) for n in re.findall(r"msg (\d+)", prompt))
+        return f"SUMMARY {len(summarized)}"
+
+    llm = Mock()
+    llm.generate = Mock(side_effect=generate)
+    runner = TaskRunner()
+    runner._build_memory_client = lambda: None
+
+    counts = []
+    for n in range(3):
+        run = Mock(id=f"run-{n}")
+        run.input_json = {"conversation_id": "c1", "rolling": True, "keep_recent": 10, "max_messages": 50}
+        result = runner._handle_summarize_conversation(run, db, llm, lambda: True)
+        assert result["ok"] is True
+        counts.append(result["message_count"])
+
+    assert counts == [50, 20, 0]  # m0..m49，m50..m69，剩余 10 条保留原文
+    assert summarized == list(range(70))
+    row = db.query(ConversationSummaryModel).filter_by(conversation_id="c1").one()
+    assert row.last_message_id == "m69"
+    assert row.message_count == 70
+    db.close()
+    engine.dispose()
+
+
+def test_manual_summary_without_new_messages_returns_checkpoint(tmp_path):
+    """非 rolling 手动总结：checkpoint 之后没有新消息时返回已有摘要，而不是报 No messages found。"""
+    from datetime import UTC, datetime, timedelta
+
+    from app.db import Base, ConversationModel, ConversationSummaryModel, MessageModel
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'summary.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = datetime.now(UTC)
+    db.add(ConversationModel(id="c1", title="t", created_at=now, updated_at=now))
+    for i in range(4):
+        db.add(MessageModel(
+            id=f"m{i}",
+            conversation_id="c1",
+            role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+            content=f"msg {i}",
+            created_at=now + timedelta(seconds=i),
+        ))
+    db.commit()
+    checkpoint_at = db.query(MessageModel).filter(MessageModel.id == "m3").one().created_at
+    db.add(ConversationSummaryModel(
+        conversation_id="c1", summary="OLD SUMMARY", summarized_until=checkpoint_at, message_count=4,
+    ))
+    db.commit()
+
+    llm = Mock()
+    runner = TaskRunner()
+    runner._build_memory_client = lambda: None
+    run = Mock(id="run-1")
+    run.input_json = {"conversation_id": "c1"}
+
+    result = runner._handle_summarize_conversation(run, db, llm, lambda: True)
+
+    assert result["ok"] is True
+    assert result["summary"] == "OLD SUMMARY"
+    assert result["message_count"] == 0
+    llm.generate.assert_not_called()
+    db.close()
+    engine.dispose()
@@ -101,3 +101,113 @@ def test_preview_never_raises():
     assert _preview({"a": 1}, limit=5) in ('{"a":…', '{"a":1}')
     _preview(object())
     _preview({"x": object()}, limit=50)
+
+
+class _CountingProvider:
+    """list_tools 计数的最小 provider，可切换返回的工具或抛错。"""
+
+    def __init__(self, provider_id: str, names, raises=False):
+        self.provider_id = provider_id
+        self.names = list(names)
+        self.raises = raises
+        self.list_calls = 0
+
+    def list_tools(self):
+        self.list_calls += 1
+        if self.raises:
+            raise RuntimeError("provider down")
+        return [ToolMeta(name=n, input_schema={}, provider_id=self.provider_id) for n in self.names]
+
+    def invoke(self, tool_name, args, ctx, *, llm=None):
+        return {"tool": tool_name, "provider": self.provider_id}
+
+
+def test_catalog_index_built_once_until_invalidate():
+    """解析走索引：多次 get/list_tools 只遍历 provider 一次；invalidate 后重建并反映新工具。"""
+    p = _CountingProvider("p", ["a.one", "a.two"])
+    catalog = ToolCatalog(preferred_provider_order=["p"], ttl_sec=60)
+    catalog.register_provider("p", p)
+    for _ in range(5):
+        assert catalog.get("a.one").provider_id == "p"
+        assert catalog.get("missing") is None
+    assert [m.name for m in catalog.list_tools()] == ["a.one", "a.two"]
+    assert p.list_calls == 1
+    provider, meta = catalog.resolve("a.two")
+    assert provider is p and meta.name == "a.two"
+
+    p.names.append("a.three")
+    assert catalog.get("a.three") is None
+    catalog.invalidate()
+    assert catalog.get("a.three") is not None
+    assert p.list_calls == 2
+
+
+def test_catalog_ttl_and_registration_invalidate():
+    """ttl_sec<=0 每次重建；register_provider / set_preferred_provider_order 使索引失效。"""
+    p = _CountingProvider("p", ["x"])
+    uncached = ToolCatalog(preferred_provider_order=["p"], ttl_sec=0)
+    uncached.register_provider("p", p)
+    uncached.get("x")
+    uncached.get("x")
+    assert p.list_calls == 2
+
+    first = _CountingProvider("first", ["x"])
+    second = _CountingProvider("second", ["x"])
+    catalog = ToolCatalog(preferred_provider_order=["first", "second"], ttl_sec=60)
+    catalog.register_provider("first", first)
+    assert catalog.get("x").provider_id == "first"
+    catalog.register_provider("second", second)
+    catalog.set_preferred_provider_order(["second", "first"])
+    assert catalog.get("x").provider_id == "second"
+
+
+def test_catalog_provider_errors_propagate_and_are_not_cached():
+    """provider list_tools 抛错照常向上抛（不缓存）；排在前面的 provider 命中时不会调用到它。"""
+    good = _CountingProvider("good", ["ok.tool"])
+    bad = _CountingProvider("bad", ["bad.tool"], raises=True)
+    catalog = ToolCatalog(preferred_provider_order=["good", "bad"], ttl_sec=60)
+    catalog.register_provider("good", good)
+    catalog.register_provider("bad", bad)
+    assert catalog.get("ok.tool") is not None
+    assert bad.list_calls == 0
+    with pytest.raises(RuntimeError, match="provider down"):
+        catalog.get("bad.tool")
+    with pytest.raises(RuntimeError, match="provider down"):
+        catalog.list_tools()
+
+    bad.raises = False
+    assert catalog.get("bad.tool").provider_id == "bad"
+    catalog.get("bad.tool")
+    assert bad.list_calls == 3
+
+
+def test_catalog_empty_listing_is_partial(monkeypatch):
+    """空列表（如 MCP 不可用时降级为空）只缓存 PARTIAL_INDEX_TTL_SEC，恢复后能尽快解析到工具。"""
+    monkeypatch.setattr(ToolCatalog, "PARTIAL_INDEX_TTL_SEC", 0.0)
+    flaky = _CountingProvider("mcp_x", [])
+    builtin = _CountingProvider("builtin", ["web.search"])
+    catalog = ToolCatalog(preferred_provider_order=["mcp_x", "builtin"], ttl_sec=60)
+    catalog.register_provider("mcp_x", flaky)
+    catalog.register_provider("builtin", builtin)
+    assert catalog.get("web.search").provider_id == "builtin"
+    assert catalog.get("mcp.x.ping") is None
+
+    flaky.names = ["mcp.x.ping", "web.search"]
+    assert catalog.get("mcp.x.ping").provider_id == "mcp_x"
+    # builtin 的解析结果随 mcp_x 的空列表一起过期，恢复后同名工具按优先级改由 mcp_x 提供
+    assert catalog.get("web.search").provider_id == "mcp_x"
+    assert builtin.list_calls == 1
+
+
+def test_runtime_invoke_uses_catalog_index():
+    """ToolRuntime.invoke 经 catalog.resolve 取 provider，重复调用不再遍历 list_tools。"""
+    p = _CountingProvider("p", ["p.echo"])
+    catalog = ToolCatalog(preferred_provider_order=["p"], ttl_sec=60)
+    catalog.register_provider("p", p)
+    runtime = ToolRuntime(catalog=catalog)
+    run = Mock()
+    run.input_json = {}
+    ctx = TaskContext(run, "test")
+    for _ in range(3):
+        assert runtime.invoke(ctx, "p.echo", {}) == {"tool": "p.echo", "provider": "p"}
+    assert p.list_calls == 1
@@ -14,6 +14,6 @@ core_api_path = Path(__file__).parent.parent.parent / "core-api"
 if str(core_api_path) not in sys.path:
     sys.path.insert(0, str(core_api_path))
 
-from app.db import MessageModel, MessageRole
+from app.db import ConversationSummaryModel, MessageModel, MessageRole
 
-__all__ = ["MessageModel", "MessageRole"]
+__all__ = ["ConversationSummaryModel", "MessageModel", "MessageRole"]
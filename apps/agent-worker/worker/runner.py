@@ -5,6 +5,7 @@ import json
 import logging
 import os
 import time
+from datetime import UTC, datetime
 from typing import Any, Callable, Dict, List, Optional
 
 import httpx
@@ -14,8 +15,9 @@ logger = logging.getLogger(__name__)
 from sqlalchemy.orm import Session
 
 from agent_worker.llm import BaseLLM
+from agent_worker.llm.instrumentation import llm_call_site
 from worker.db import RunModel
-from worker.db_models import MessageModel, MessageRole
+from worker.db_models import ConversationSummaryModel, MessageModel, MessageRole
 from worker.task_context import TaskContext, run_task_with_steps
 from worker.tools import ToolRuntime
 from worker.tools.catalog import build_catalog_from_settings, get_default_catalog
@@ -46,13 +48,13 @@ class TaskRunner:
         pass
 
     def _build_memory_client(self):
-        """Build MemoryClient when memory is enabled (for facts in long tasks)."""
+        """Shared pooled MemoryClient when memory is enabled (for facts in long tasks)."""
         try:
             from agent_worker.config import ChatConfig
-            from agent_worker.memory_client import MemoryClient
+            from agent_worker.memory_client import get_shared_memory_client
             config = ChatConfig.from_env()
             if config.memory_enabled:
-                return MemoryClient()
+                return get_shared_memory_client()
         except Exception:
             pass
         return None
@@ -872,9 +874,16 @@ class TaskRunner:
         if not isinstance(max_messages, int) or max_messages < 1:
             raise ValueError("input_json['max_messages'] must be a positive integer")
         max_messages = max(10, min(50, max_messages))
+        rolling = bool(input_json.get("rolling"))
+        keep_recent = input_json.get("keep_recent", 10)
+        if not isinstance(keep_recent, int) or keep_recent < 0:
+            raise ValueError("input_json['keep_recent'] must be a non-negative integer")
 
         def body(ctx: TaskContext) -> None:
-            self._summarize_body(ctx, db, llm, conversation_id, max_messages)
+            self._summarize_body(
+                ctx, db, llm, conversation_id, max_messages,
+                rolling=rolling, keep_recent=keep_recent, run_id=getattr(run, "id", None),
+            )
 
         out = run_task_with_steps(run, "summarize_conversation", body)
         # Backward compat: top-level summary / message_count / conversation_id / facts_snapshot_*
@@ -894,21 +903,47 @@ class TaskRunner:
         llm: BaseLLM,
         conversation_id: str,
         max_messages: int,
+        rolling: bool = False,
+        keep_recent: int = 0,
+        run_id: Optional[str] = None,
     ) -> None:
-        """Business logic for summarize_conversation; uses ctx.step() and sets result/artifacts."""
+        """Business logic for summarize_conversation; uses ctx.step() and sets result/artifacts.
+
+        只读取上次 checkpoint（conversation_summaries.summarized_until）之后的消息，并把已有摘要
+        作为上下文合并。rolling=True（后台滚动摘要）时保留最近 keep_recent 条不总结，每次最多合并最旧的
+        max_messages 条，成功后推进 checkpoint；尾部较长时由后续滚动逐步追平。
+        """
+        checkpoint = self._load_summary_checkpoint(db, conversation_id)
         messages: List[Any] = []
-        with ctx.step("fetch_messages"):
-            messages = (
+        with ctx.step("fetch_messages") as meta:
+            query = (
                 db.query(MessageModel)
                 .filter(MessageModel.conversation_id == conversation_id)
                 .filter(MessageModel.role.in_([MessageRole.USER, MessageRole.ASSISTANT]))
-                .order_by(MessageModel.created_at.desc())
-                .limit(max_messages)
-                .all()
             )
-            messages = list(reversed(messages))
+            if checkpoint is not None:
+                query = query.filter(MessageModel.created_at > checkpoint.summarized_until)
+                meta["checkpoint"] = checkpoint.summarized_until.isoformat()
+            if rolling:
+                # 从 checkpoint 起按时间正序取最旧的未摘要消息，checkpoint 不会越过未总结的消息；
+                # 整个未摘要尾部的最近 keep_recent 条留给下一轮上下文原文，不进入摘要
+                pending = query.count()
+                take = min(max_messages, max(pending - keep_recent, 0))
+                messages = query.order_by(MessageModel.created_at.asc()).limit(take).all() if take else []
+                meta["pending_count"] = pending
+            else:
+                messages = query.order_by(MessageModel.created_at.desc()).limit(max_messages).all()
+                messages = list(reversed(messages))
+            meta["message_count"] = len(messages)
 
         if not messages:
+            if checkpoint is not None:
+                # checkpoint 之后没有新消息（滚动或手动触发都一样）：原摘要已覆盖全部消息，原样返回
+                ctx.result["summary"] = checkpoint.summary
+                ctx.result["message_count"] = 0
+                ctx.result["conversation_id"] = conversation_id
+                ctx.result["incremental"] = True
+                return
             raise ValueError(f"No messages found for conversation {conversation_id}")
 
         active_facts: List[dict] = []
@@ -941,34 +976,88 @@ class TaskRunner:
             meta["facts_snapshot_source"] = facts_snapshot_source
 
         prompt = ""
+        previous_summary = checkpoint.summary if checkpoint is not None else None
         with ctx.step("build_prompt"):
-            prompt = self._build_summary_prompt(messages, active_facts)
+            prompt = self._build_summary_prompt(messages, active_facts, previous_summary=previous_summary)
 
         summary = ""
         try:
             with ctx.step("llm_generate") as meta:
                 meta["model"] = getattr(llm, "_model", "stub")
-                summary = llm.generate(prompt)
+                with llm_call_site("summarize"):
+                    summary = llm.generate(prompt)
         except Exception:
             summary = ""
 
         summary_text = summary.strip() if summary else ""
+        if rolling and summary_text:
+            with ctx.step("save_checkpoint") as meta:
+                self._save_summary_checkpoint(db, conversation_id, summary_text, messages, run_id)
+                meta["summarized_until"] = messages[-1].created_at.isoformat()
         ctx.result["summary"] = summary_text
         ctx.result["message_count"] = len(messages)
         ctx.result["conversation_id"] = conversation_id
+        ctx.result["incremental"] = checkpoint is not None
         ctx.artifacts["summary"] = {"text": summary_text, "format": "markdown"}
         ctx.artifacts["facts"] = {"snapshot_id": facts_snapshot_id, "source": facts_snapshot_source}
     
+    def _load_summary_checkpoint(self, db: Session, conversation_id: str) -> Optional[ConversationSummaryModel]:
+        """读取对话的滚动摘要 checkpoint；不存在或无效时返回 None"""
+        try:
+            row = (
+                db.query(ConversationSummaryModel)
+                .filter(ConversationSummaryModel.conversation_id == conversation_id)
+                .first()
+            )
+        except Exception as e:
+            logger.warning("Failed to load summary checkpoint for %s: %s", conversation_id, e)
+            return None
+        if row is None or not isinstance(getattr(row, "summarized_until", None), datetime):
+            return None
+        return row
+
+    def _save_summary_checkpoint(
+        self,
+        db: Session,
+        conversation_id: str,
+        summary_text: str,
+        messages: List[Any],
+        run_id: Optional[str],
+    ) -> None:
+        """写入合并后的摘要并把 checkpoint 推进到本次最后一条消息"""
+        last = messages[-1]
+        row = (
+            db.query(ConversationSummaryModel)
+            .filter(ConversationSummaryModel.conversation_id == conversation_id)
+            .first()
+        )
+        if row is None:
+            row = ConversationSummaryModel(conversation_id=conversation_id, message_count=0)
+            db.add(row)
+        row.summary = summary_text
+        row.summarized_until = last.created_at
+        row.last_message_id = last.id
+        row.message_count = (row.message_count or 0) + len(messages)
+        row.run_id = run_id
+        row.updated_at = datetime.now(UTC)
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
     def _build_summary_prompt(
         self,
         messages: list[MessageModel],
         active_facts: Optional[List[dict]] = None,
+        previous_summary: Optional[str] = None,
     ) -> str:
         """构造总结 prompt（可选注入 active facts，与 chat 一致）。
         
         Args:
             messages: 消息列表（已按时间升序排序）
             active_facts: 可选，global + session 的 active facts，用于更准确的总结
+            previous_summary: 可选，上次 checkpoint 的摘要；提供时要求合并输出完整摘要
             
         Returns:
             Prompt 字符串
@@ -987,6 +1076,11 @@ class TaskRunner:
             role_name = "User" if msg.role == MessageRole.USER else "Assistant"
             formatted_messages.append(f"{i}. {role_name}: {msg.content}")
         messages_text = "\n".join(formatted_messages)
+        if previous_summary:
+            parts.append(
+                f"此前对话的摘要：\n{previous_summary}\n\n"
+                "以下是摘要之后的新消息。请把它们合并进摘要，输出更新后的完整摘要（不要只总结新消息）。\n"
+            )
         parts.append(
             "请用简洁的要点总结以下对话内容，突出：\n"
             "- 用户的主要目标\n"
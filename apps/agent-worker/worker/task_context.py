@@ -9,9 +9,11 @@ from __future__ import annotations
 import json
 import time
 import uuid
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
 from typing import Any, Callable, Dict, List, Optional
 
+from agent_worker.llm.instrumentation import collect_llm_calls
+
 # 输出大小超过此阈值时在 trace 中记录 task.output.too_large（不阻塞）
 OUTPUT_SIZE_WARN_THRESHOLD = 1024 * 1024  # 1 MiB
 
@@ -75,12 +77,17 @@ class TaskContext:
 
     @contextmanager
     def step(self, name: str):
-        """Record a step. Yields a dict for meta (handler can set keys). On exception appends failure, sets top-level error, re-raises."""
+        """Record a step. Yields a dict for meta (handler can set keys). On exception appends failure, sets top-level error, re-raises.
+
+        LLM calls made inside the step are recorded under meta["llm_calls"] (see agent_worker.llm.instrumentation).
+        """
         t0 = time.perf_counter()
         self.trace.record(f"{self.task_type}.{name}")
         step_meta: Dict[str, Any] = {}
         step_ok = True
         error_code: Optional[str] = None
+        stack = ExitStack()
+        llm_calls = stack.enter_context(collect_llm_calls())
         try:
             yield step_meta
         except Exception as e:
@@ -125,6 +132,9 @@ class TaskContext:
                 }
             raise
         finally:
+            stack.close()
+            if llm_calls:
+                step_meta["llm_calls"] = [record.as_dict() for record in llm_calls]
             duration_ms = max(0, int((time.perf_counter() - t0) * 1000))
             self._steps.append({
                 "name": name,
@@ -5,6 +5,7 @@ from __future__ import annotations
 from typing import Any, Dict
 
 from agent_worker.llm import BaseLLM
+from agent_worker.llm.instrumentation import llm_call_site
 
 
 def text_summarize_impl(llm: BaseLLM, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -14,5 +15,6 @@ def text_summarize_impl(llm: BaseLLM, args: Dict[str, Any]) -> Dict[str, Any]:
     if not text:
         return {"summary": "", "truncated": False}
     prompt = f"请用简洁的要点总结以下内容（不超过 {max_length} 字）：\n\n{text}"
-    summary = llm.generate(prompt)
+    with llm_call_site("summarize"):
+        summary = llm.generate(prompt)
     return {"summary": (summary or "").strip()[:max_length], "truncated": False}
@@ -8,8 +8,13 @@ import logging
 import os
 import re
 import shlex
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from worker.tools.provider import ToolProvider
 
 logger = logging.getLogger(__name__)
 
@@ -83,51 +88,128 @@ def _builtin_tool_meta(provider_id: str = "builtin") -> List[ToolMeta]:
 
 
 class ToolCatalog:
-    """多 provider 聚合：按 preferred_provider_order 解析工具，同名取第一个。"""
+    """多 provider 聚合：按 preferred_provider_order 解析工具，同名取第一个。
 
-    DEFAULT_PREFERRED_ORDER = ["builtin", "stub"]
+    解析带缓存：每个 provider 的 list_tools() 结果按 ttl_sec 缓存为 name -> ToolMeta，已解析的
+    name -> (provider, ToolMeta) 另存一份，命中时为单次 dict 查找。未命中时仍按优先级逐个 provider
+    查找并在找到后停止，provider.list_tools() 抛出的异常（如 SkillsListError）照常向上抛且不缓存。
+    空列表（如 MCP server 不可用时 MCPProvider 降级为空）视为不完整，只缓存 PARTIAL_INDEX_TTL_SEC。
+    缓存在 invalidate()、注册 provider 或调整优先级时清空；provider 若实现
+    set_change_listener(callback)（如 MCPProvider 收到 notifications/tools/list_changed），注册时自动订阅
+    invalidate。ttl_sec <= 0 关闭缓存，每次解析都重新遍历。
+    """
 
-    def __init__(self, preferred_provider_order: Optional[List[str]] = None) -> None:
+    DEFAULT_PREFERRED_ORDER = ["builtin", "stub"]
+    PARTIAL_INDEX_TTL_SEC = 5.0
+
+    def __init__(
+        self,
+        preferred_provider_order: Optional[List[str]] = None,
+        *,
+        ttl_sec: Optional[float] = None,
+    ) -> None:
         self._providers: Dict[str, Any] = {}  # provider_id -> ToolProvider
         self._preferred_provider_order: List[str] = (
             list(preferred_provider_order) if preferred_provider_order else list(self.DEFAULT_PREFERRED_ORDER)
         )
+        self._ttl_sec = _tool_catalog_ttl_sec() if ttl_sec is None else ttl_sec
+        # provider_id -> (expires_at, name -> ToolMeta)，保持 provider 返回顺序
+        self._listings: Dict[str, Tuple[float, Dict[str, ToolMeta]]] = {}
+        # name -> (expires_at, provider, ToolMeta)；expires_at 取查找途中各 listing 的最早过期时间
+        self._resolved: Dict[str, Tuple[float, Any, ToolMeta]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.RLock()
 
     def register_provider(self, provider_id: str, provider: ToolProvider) -> None:
         self._providers[provider_id] = provider
+        set_listener = getattr(provider, "set_change_listener", None)
+        if callable(set_listener):
+            set_listener(self.invalidate)
+        self.invalidate()
 
     def set_preferred_provider_order(self, order: List[str]) -> None:
         """配置 provider 优先级，同名工具时取顺序靠前的实现。"""
         self._preferred_provider_order = list(order)
+        self.invalidate()
 
     def get_provider(self, provider_id: str) -> Optional[ToolProvider]:
         return self._providers.get(provider_id)
 
+    def invalidate(self) -> None:
+        """清空缓存，下次解析时重新 list_tools；可在任意线程调用（如 MCP reader 线程）。"""
+        with self._lock:
+            self._generation += 1
+            self._listings = {}
+            self._resolved = {}
+
+    def resolve(self, name: str) -> Optional[Tuple[ToolProvider, ToolMeta]]:
+        """返回 (provider, ToolMeta)；provider 为 meta.provider_id 对应的已注册 provider（可能为 None）。"""
+        entry = self._resolved.get(name)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1], entry[2]
+        # 单飞：并发未命中只由一个线程调用 provider.list_tools()，其余等待后复用缓存
+        with self._build_lock:
+            entry = self._resolved.get(name)
+            if entry is not None and time.monotonic() < entry[0]:
+                return entry[1], entry[2]
+            generation = self._generation
+            expires_at = float("inf")
+            for pid in self._preferred_provider_order:
+                if not self._providers.get(pid):
+                    continue
+                listing_expires_at, tools = self._listing(pid, generation)
+                expires_at = min(expires_at, listing_expires_at)
+                meta = tools.get(name)
+                if meta is not None:
+                    provider = self._providers.get(meta.provider_id)
+                    self._store(generation, self._resolved, name, (expires_at, provider, meta))
+                    return provider, meta
+            return None
+
     def get(self, name: str) -> Optional[ToolMeta]:
         """按 preferred_provider_order 返回第一个提供该 name 的 ToolMeta。"""
-        for pid in self._preferred_provider_order:
-            provider = self._providers.get(pid)
-            if not provider:
-                continue
-            for meta in provider.list_tools():
-                if meta.name == name:
-                    return meta
-        return None
+        entry = self.resolve(name)
+        return entry[1] if entry else None
 
     def list_tools(self) -> List[ToolMeta]:
         """聚合所有 provider 的工具，同名只保留 preferred 顺序下第一个。"""
         seen: set = set()
         out: List[ToolMeta] = []
-        for pid in self._preferred_provider_order:
-            provider = self._providers.get(pid)
-            if not provider:
-                continue
-            for meta in provider.list_tools():
-                if meta.name not in seen:
-                    seen.add(meta.name)
-                    out.append(meta)
+        with self._build_lock:
+            generation = self._generation
+            for pid in self._preferred_provider_order:
+                if not self._providers.get(pid):
+                    continue
+                for meta in self._listing(pid, generation)[1].values():
+                    if meta.name not in seen:
+                        seen.add(meta.name)
+                        out.append(meta)
         return out
 
+    def _listing(self, pid: str, generation: int) -> Tuple[float, Dict[str, ToolMeta]]:
+        """provider 的工具表（带缓存）；list_tools() 抛错时直接向上抛，不缓存。调用方持有 _build_lock。"""
+        now = time.monotonic()
+        cached = self._listings.get(pid)
+        if cached is not None and now < cached[0]:
+            return cached
+        tools: Dict[str, ToolMeta] = {}
+        for meta in self._providers[pid].list_tools():
+            tools.setdefault(meta.name, meta)
+        ttl = self._ttl_sec if tools else min(self._ttl_sec, self.PARTIAL_INDEX_TTL_SEC)
+        listing = (now + ttl, tools)
+        if ttl > 0:
+            self._store(generation, self._listings, pid, listing)
+        return listing
+
+    def _store(self, generation: int, cache: Dict[str, Any], key: str, value: Any) -> None:
+        """构建期间被 invalidate 过则丢弃结果，下次重建。"""
+        if self._ttl_sec <= 0:
+            return
+        with self._lock:
+            if generation == self._generation:
+                cache[key] = value
+
     # 兼容旧用法：单 provider 时代 register(meta) / list_builtin
     def register(self, meta: ToolMeta) -> None:
         """仅当存在单 provider 且该 provider 支持 register 时有效；否则无操作。builtin/stub 由 provider 管理。"""
@@ -304,6 +386,14 @@ def _web_search_backend_from_env() -> Any:
     return StubWebSearchBackend()
 
 
+def _tool_catalog_ttl_sec() -> float:
+    """TOOL_CATALOG_TTL_SEC：工具索引有效期（秒），默认 60；<= 0 关闭缓存。"""
+    try:
+        return float(os.getenv("TOOL_CATALOG_TTL_SEC", "60"))
+    except (TypeError, ValueError):
+        return 60.0
+
+
 def _web_search_timeout_ms() -> int:
     try:
         return max(1000, int(os.getenv("WEB_SEARCH_TIMEOUT_MS", "15000")))
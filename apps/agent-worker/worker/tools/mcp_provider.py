@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from worker.task_context import TaskContext
 from worker.tools.catalog import CAPABILITY_L0, ToolMeta
@@ -13,6 +13,7 @@ logger = logging.getLogger(__name__)
 MCP_TOOL_PREFIX = "mcp."
 MCP_LIST_TOOLS_FAILED = "mcp.list_tools.failed"
 DEFAULT_MCP_TIMEOUT_MS = 30_000
+MCP_TOOLS_LIST_CHANGED = "notifications/tools/list_changed"
 
 
 class MCPProviderClosedError(ValueError):
@@ -96,6 +97,21 @@ class MCPProvider:
             self._client = MCPStdioClient(cmd=cmd, cwd=cwd, env=env)
         else:
             self._client = None
+        self._change_listener: Optional[Callable[[], None]] = None
+        set_handler = getattr(self._client, "set_notification_handler", None)
+        if callable(set_handler):
+            set_handler(self._on_notification)
+
+    def set_change_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """server 推送 notifications/tools/list_changed 时调用 listener()；ToolCatalog 注册时用于失效索引。"""
+        self._change_listener = listener
+
+    def _on_notification(self, method: str, params: Dict[str, Any]) -> None:
+        if method != MCP_TOOLS_LIST_CHANGED:
+            return
+        listener = self._change_listener
+        if listener is not None:
+            listener()
 
     def list_tools(self, timeout_ms: Optional[int] = None) -> List[ToolMeta]:
         """返回带前缀的 ToolMeta 列表；任何异常一律降级为空并打 mcp.list_tools.failed，永不抛。"""
@@ -10,19 +10,24 @@ import subprocess
 import sys
 import threading
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from worker.tools.mcp_errors import MCPConnectionError, MCPSpawnFailedError, MCPTimeoutError
 
 logger = logging.getLogger(__name__)
 
 MCP_SPAWN_FAILED = "mcp.spawn.failed"
+MCP_NOTIFICATION_HANDLER_FAILED = "mcp.notification.handler_failed"
 CLOSE_TERMINATE_WAIT_SEC = 2.0
 CLOSE_KILL_WAIT_SEC = 1.0
 
 
 class MCPStdioClient:
-    """同步外观：list_tools(timeout_ms)、call_tool(name, args, timeout_ms)、close()。内部后台线程读 stdout，按 id resolve。"""
+    """同步外观：list_tools(timeout_ms)、call_tool(name, args, timeout_ms)、close()。内部后台线程读 stdout，按 id resolve。
+
+    无 id 的消息为 server 通知（如 notifications/tools/list_changed），在 reader 线程内交给
+    set_notification_handler 注册的 handler(method, params)。
+    """
 
     def __init__(
         self,
@@ -40,6 +45,11 @@ class MCPStdioClient:
         self._pending: Dict[int, queue.Queue] = {}  # id -> Queue of single result/exception
         self._reader_thread: Optional[threading.Thread] = None
         self._reader_stop = threading.Event()
+        self._notification_handler: Optional[Callable[[str, Dict[str, Any]], None]] = None
+
+    def set_notification_handler(self, handler: Optional[Callable[[str, Dict[str, Any]], None]]) -> None:
+        """注册 server 通知回调 handler(method, params)；在 reader 线程调用，应快速返回。None 取消。"""
+        self._notification_handler = handler
 
     def _next_id(self) -> int:
         with self._lock:
@@ -89,6 +99,7 @@ class MCPStdioClient:
                     continue
                 req_id = msg.get("id")
                 if req_id is None:
+                    self._dispatch_notification(msg)
                     continue
                 with self._lock:
                     q = self._pending.pop(req_id, None)
@@ -109,6 +120,17 @@ class MCPStdioClient:
                         pass
                 self._pending.clear()
 
+    def _dispatch_notification(self, msg: Dict[str, Any]) -> None:
+        handler = self._notification_handler
+        method = msg.get("method")
+        if handler is None or not isinstance(method, str):
+            return
+        params = msg.get("params")
+        try:
+            handler(method, params if isinstance(params, dict) else {})
+        except Exception as e:
+            logger.warning("%s method=%s error=%s", MCP_NOTIFICATION_HANDLER_FAILED, method, e)
+
     def _request(self, method: str, params: Optional[Dict[str, Any]] = None, timeout_ms: int = 30_000) -> Any:
         self._ensure_process()
         req_id = self._next_id()
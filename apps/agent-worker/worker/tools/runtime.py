@@ -50,10 +50,10 @@ class ToolRuntime:
         """Run tool in one step; step name = tool.{name}; meta = args_preview, result_preview, provider_id, risk_level."""
         step_name = f"tool.{name}"
         with ctx.step(step_name) as step_meta:
-            meta = self._catalog.get(name)
-            if not meta:
+            resolved = self._catalog.resolve(name)
+            if not resolved:
                 raise ToolNotFoundError(name, "not in catalog")
-            provider = self._catalog.get_provider(meta.provider_id)
+            provider, meta = resolved
             if not provider:
                 raise ToolNotFoundError(name, f"provider {meta.provider_id} not registered")
             step_meta["args_preview"] = _preview(args)
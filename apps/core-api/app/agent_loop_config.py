@@ -63,6 +63,9 @@ AGENT_ALLOWED_RUN_TYPES = _read_list_env(
     DEFAULT_ALLOWED_RUN_TYPES
 )
 
+# Pre-LLM fast path: 寒暄/致谢/确认等 reply-only 消息跳过 Decision LLM，直接走 responder
+AGENT_DECISION_FAST_PATH = _read_bool_env("AGENT_DECISION_FAST_PATH", True)
+
 # Decision timeout (optional, in seconds)
 AGENT_DECISION_TIMEOUT_SECONDS = int(os.getenv("AGENT_DECISION_TIMEOUT_SECONDS", "30"))
 
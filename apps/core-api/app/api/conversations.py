@@ -13,9 +13,15 @@ from pydantic import BaseModel
 from sqlalchemy import desc
 from sqlalchemy.orm import Session
 
-from app.agent_loop_config import AGENT_LOOP_ENABLED, USE_ORCHESTRATION_FOR_RUN_CODE_SNIPPET
+from app.agent_loop_config import (
+    AGENT_DECISION_FAST_PATH,
+    AGENT_LOOP_ENABLED,
+    USE_ORCHESTRATION_FOR_RUN_CODE_SNIPPET,
+)
 from app.api.runs import RunCreateRequest, _create_run, _list_conversation_runs
 from app.db import ConversationModel, MessageModel, MessageRole, SessionLocal
+from app.services.conversation_summary import load_history_with_summary, maybe_schedule_rolling_summary
+from app.services.decision_fast_path import get_decision_fast_path
 
 router = APIRouter()
 
@@ -419,32 +425,17 @@ async def _create_message(
     # 2. 查询历史消息并转换为 LLM 消息格式
     history_messages: list[dict[str, str]] = []
     try:
-        # Query with limit to reduce DB load (MAX_MESSAGES + buffer for filtering)
-        # Default MAX_MESSAGES is 40 (from chat_flow), so query 60 messages to account for filtering
-        # Order by created_at DESC, then reverse to get ascending order
-        # This is more efficient than .all() for conversations with many messages
-        MAX_MESSAGES_LIMIT = 60  # MAX_MESSAGES (40) + buffer (20)
-        history_messages_query = (
-            db.query(MessageModel)
-            .filter(MessageModel.conversation_id == conversation_id)
-            .order_by(MessageModel.created_at.desc())
-            .limit(MAX_MESSAGES_LIMIT)
-            .all()
-        )
-        # Reverse to get ascending order (oldest first)
-        history_messages_query.reverse()
-        
-        # 转换为 LLM 消息格式（只包含 USER 和 ASSISTANT 角色，跳过 SYSTEM）
+        # Query with limit to reduce DB load (history cap + buffer for filtering)
+        # Default history cap is 40 (CHAT_MAX_MESSAGES, agent_worker.llm.budget), so query 60 messages to account for filtering
+        # 已被滚动摘要覆盖的旧消息由摘要替代（作为第一条 kind=summary 的 system 消息）
         # 排除刚插入的最后一条 user message（避免重复，它会在 responder 中作为 current_user_message 添加）
-        for msg in history_messages_query:
-            # Skip the last user message that was just inserted (to avoid duplication)
-            if msg.id == user_message_id:
-                continue
-            if msg.role == MessageRole.USER:
-                history_messages.append({"role": "user", "content": msg.content})
-            elif msg.role == MessageRole.ASSISTANT:
-                history_messages.append({"role": "assistant", "content": msg.content})
-            # 跳过 SYSTEM 角色的消息（错误消息等）
+        MAX_MESSAGES_LIMIT = 60  # CHAT_MAX_MESSAGES (40) + buffer (20)
+        history_messages = load_history_with_summary(
+            db,
+            conversation_id,
+            limit=MAX_MESSAGES_LIMIT,
+            exclude_message_id=user_message_id,
+        )
     except Exception as e:
         # 历史消息查询失败不影响主流程，只记录错误
         logger.warning(f"Failed to query history messages: {e}")
@@ -458,7 +449,18 @@ async def _create_message(
     worker_error = None
     assistant_content = None
     
-    if AGENT_LOOP_ENABLED and AGENT_DECISION_AVAILABLE and AgentDecision is not None:
+    decision_enabled = AGENT_LOOP_ENABLED and AGENT_DECISION_AVAILABLE and AgentDecision is not None
+
+    # 3a. Pre-LLM fast path: obvious reply-only messages skip the Decision LLM and go straight to chat_flow
+    if decision_enabled and AGENT_DECISION_FAST_PATH:
+        fast_path_hit = get_decision_fast_path().classify(request.content, history=history_messages)
+        if fast_path_hit is not None:
+            logger.info(
+                f"Decision fast path: reply-only ({fast_path_hit.reason}), conversation_id={conversation_id}"
+            )
+            decision_enabled = False
+
+    if decision_enabled:
         try:
             # Initialize Agent Decision service
             agent_decision = AgentDecision()
@@ -474,7 +476,7 @@ async def _create_message(
             
             # Make decision (active_facts will be auto-fetched inside decide() if None)
             logger.info(f"Making Agent Decision for conversation {conversation_id}")
-            decision = agent_decision.decide(
+            decision = await agent_decision.adecide(
                 user_message=request.content,
                 conversation_id=conversation_id,
                 history_messages=history_messages,
@@ -694,7 +696,7 @@ async def _create_message(
                 if _FACTS_FROM_STORE_AVAILABLE and fetch_active_facts_from_store and MemoryStore is not None:
                     store = MemoryStore()
                     active_facts_list, facts_source = await fetch_active_facts_from_store(
-                        store, conversation_id=conversation_id
+                        store, conversation_id=conversation_id, query=request.content
                     )
                     logger.warning(
                         "[FACTS_DEBUG] memory.list_facts.finish count=%s source=%s conversation_id=%s",
@@ -829,6 +831,13 @@ async def _create_message(
             status_code=500,
             detail=f"Failed to save assistant message: {str(e)}"
         )
+
+    # 7. 未总结的尾部过长时排队后台滚动摘要（失败不影响本轮回复）
+    try:
+        await maybe_schedule_rolling_summary(db, conversation_id)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Failed to schedule rolling summary: {e}")
     
     return {
         "user_message": _serialize_message(user_message),
@@ -19,8 +19,9 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.api.runs import _create_run, _list_conversation_runs
-from app.db import ConversationModel, MessageModel, MessageRole, RunModel, RunStatus, SessionLocal
+from app.db import ConversationModel, RunModel, RunStatus, SessionLocal
 from app.services.conversation_orchestrator import get_orchestration_step, run_code_snippet_loop
+from app.services.conversation_summary import load_history_with_summary
 from app.services.run_messages import emit_run_message
 
 try:
@@ -82,22 +83,11 @@ async def emit_run_completion_message(
 
 
 def _load_history_messages(db: Session, conversation_id: str, limit: int = 60) -> List[Dict[str, str]]:
-    """从对话加载历史消息，转为 LLM 格式 [{\"role\": \"user\"|\"assistant\", \"content\": ...}]"""
-    messages = (
-        db.query(MessageModel)
-        .filter(MessageModel.conversation_id == conversation_id)
-        .order_by(MessageModel.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-    messages.reverse()
-    out: List[Dict[str, str]] = []
-    for msg in messages:
-        if msg.role == MessageRole.USER:
-            out.append({"role": "user", "content": msg.content or ""})
-        elif msg.role == MessageRole.ASSISTANT:
-            out.append({"role": "assistant", "content": msg.content or ""})
-    return out
+    """从对话加载历史消息，转为 LLM 格式 [{\"role\": \"user\"|\"assistant\", \"content\": ...}]
+
+    已被滚动摘要覆盖的旧消息由摘要替代（第一条 kind=summary 的 system 消息）。
+    """
+    return load_history_with_summary(db, conversation_id, limit=limit)
 
 
 @router.post("/runs/{run_id}/execute-orchestration", response_model=Dict[str, Any])
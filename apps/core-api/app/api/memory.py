@@ -4,21 +4,26 @@ import json
 import os
 from datetime import datetime
 from functools import lru_cache
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from pydantic import BaseModel, Field
 
 from memory.audit import AuditLogger
+from memory.audit_archive import AuditArchive, event_to_record
 from memory.db import init_db, SessionLocal
-from memory.facts import MemoryStore
+from memory.facts import BatchItemError, MemoryStore
 from memory.schemas import (
     AuditEvent,
     ConflictStrategy,
     Fact,
+    FactAction,
     FactStatus,
     Proposal,
+    ProposalDecision,
     ProposalPayload,
     ProposalStatus,
     Scope,
@@ -54,6 +59,31 @@ class ProposalRejectRequest(BaseModel):
     reason: Optional[str] = None
 
 
+# 单次批量请求的最大条数
+MAX_BATCH_ITEMS = 500
+
+
+class ProposalBatchCreateRequest(BaseModel):
+    """批量创建 Proposal 请求（单事务）
+
+    atomic=False 时失败条目在结果中以 ok=false 报告，其余照常提交。
+    """
+    items: List[ProposalCreateRequest] = Field(..., max_length=MAX_BATCH_ITEMS)
+    atomic: bool = True
+
+
+class ProposalDecisionBatchRequest(BaseModel):
+    """批量接受/拒绝 Proposal 请求（单事务）"""
+    items: List[ProposalDecision] = Field(..., max_length=MAX_BATCH_ITEMS)
+    atomic: bool = True
+
+
+class FactActionBatchRequest(BaseModel):
+    """批量撤销/归档/重新激活 Fact 请求（单事务）"""
+    items: List[FactAction] = Field(..., max_length=MAX_BATCH_ITEMS)
+    atomic: bool = True
+
+
 class FactStatusFilter(str):
     """Fact 状态过滤"""
     ACTIVE = "active"
@@ -132,27 +162,8 @@ def _serialize_fact(fact: Fact) -> Dict[str, Any]:
 
 
 def _serialize_audit_event(event: AuditEvent) -> Dict[str, Any]:
-    """序列化 AuditEvent 为字典"""
-    result = {
-        "id": event.id,
-        "type": event.type.value,
-        "actor": {
-            "kind": event.actor.kind,
-            "id": event.actor.id,
-        },
-        "target": {
-            "type": event.target.type,
-            "id": event.target.id,
-        },
-        "request_id": event.request_id,
-        "created_at": event.created_at.isoformat(),
-    }
-    if event.diff:
-        result["diff"] = {
-            "before": event.diff.before,
-            "after": event.diff.after,
-        }
-    return result
+    """序列化 AuditEvent 为字典（与归档 NDJSON 记录同构）"""
+    return event_to_record(event)
 
 
 def _auto_accept_enabled() -> bool:
@@ -225,6 +236,77 @@ async def create_proposal(
     }
 
 
+def _batch_error_item(error: BatchItemError) -> Dict[str, Any]:
+    """非原子批量请求中失败条目的结果"""
+    return {"ok": False, "index": error.index, "error": error.message}
+
+
+@router.post("/proposals:batch", response_model=Dict[str, Any])
+async def create_proposals_batch(
+    request: ProposalBatchCreateRequest,
+    store: MemoryStore = Depends(_get_memory_store),
+) -> Dict[str, Any]:
+    """批量创建 Proposal：单事务写入，满足自动接受条件的条目在同一事务内接受
+
+    atomic=True 时任一条创建或自动接受失败整批回滚（400，不留下部分写入）；
+    atomic=False 时逐条返回结果，自动接受失败的条目保持 pending。
+    """
+    try:
+        created = await store.create_proposals_batch([
+            {
+                "payload": item.payload,
+                "source_ref": item.source_ref,
+                "reason": item.reason,
+                "confidence": item.confidence,
+                "scope_hint": item.scope_hint,
+            }
+            for item in request.items
+        ], atomic=request.atomic, auto_accept=[
+            _should_auto_accept(item.payload, item.confidence) for item in request.items
+        ])
+    except BatchItemError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    
+    results: List[Dict[str, Any]] = []
+    for outcome in created:
+        if isinstance(outcome, BatchItemError):
+            results.append(_batch_error_item(outcome))
+        elif isinstance(outcome, tuple):
+            accepted_proposal, fact = outcome
+            results.append({
+                "ok": True,
+                "status": accepted_proposal.status.value,
+                "proposal": _serialize_proposal(accepted_proposal),
+                "fact": _serialize_fact(fact) if fact else None,
+            })
+        else:
+            results.append({"ok": True, "status": outcome.status.value, "proposal": _serialize_proposal(outcome), "fact": None})
+    return {"items": results}
+
+
+@router.post("/proposals/decisions:batch", response_model=Dict[str, Any])
+async def decide_proposals_batch(
+    request: ProposalDecisionBatchRequest,
+    store: MemoryStore = Depends(_get_memory_store),
+) -> Dict[str, Any]:
+    """批量接受/拒绝 Proposal：atomic 时任一条失败则整批回滚"""
+    try:
+        decided = await store.decide_proposals_batch(request.items, atomic=request.atomic)
+    except BatchItemError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {
+        "items": [
+            _batch_error_item(outcome) if isinstance(outcome, BatchItemError)
+            else {
+                "ok": True,
+                "proposal": _serialize_proposal(outcome[0]),
+                "fact": _serialize_fact(outcome[1]) if outcome[1] else None,
+            }
+            for outcome in decided
+        ]
+    }
+
+
 @router.get("/proposals", response_model=Dict[str, Any])
 async def list_proposals(
     status: Optional[str] = None,
@@ -366,15 +448,20 @@ async def list_facts(
 async def list_active_facts(
     conversation_id: Optional[str] = None,
     limit: Optional[int] = None,
+    q: Optional[str] = None,
     store: MemoryStore = Depends(_get_memory_store),
 ) -> Dict[str, Any]:
-    """Active facts for worker/UI: global + session(conversation_id), ACTIVE only. Single entry point for fetch_active_facts."""
+    """Active facts for worker/UI: global + session(conversation_id), ACTIVE only. Single entry point for fetch_active_facts.
+
+    q: current user message; when given, facts are selected by relevance (see FACTS_RETRIEVAL_MODE).
+    """
     from app.services.facts import compute_facts_snapshot_id, fetch_active_facts_from_store
 
     items_list, _source = await fetch_active_facts_from_store(
         store,
         conversation_id=conversation_id,
         limit=limit,
+        query=q,
     )
     snapshot_id = compute_facts_snapshot_id(items_list) if items_list else None
     out: Dict[str, Any] = {
@@ -386,6 +473,27 @@ async def list_active_facts(
     return out
 
 
+@router.get("/facts/scoped", response_model=Dict[str, Any])
+async def list_scoped_facts(
+    session_id: Optional[str] = None,
+    status: Optional[str] = FactStatusFilter.ACTIVE,
+    store: MemoryStore = Depends(_get_memory_store),
+) -> Dict[str, Any]:
+    """一次请求返回 global 与 session(session_id) 两个 scope 的 Fact（不去重，由调用方合并）"""
+    status_filter = None
+    if status and status != FactStatusFilter.ALL:
+        try:
+            status_filter = FactStatus(status)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    
+    scoped = await store.list_scoped_facts(session_id=session_id, status=status_filter)
+    return {
+        "global": [_serialize_fact(f) for f in scoped[Scope.GLOBAL]],
+        "session": [_serialize_fact(f) for f in scoped[Scope.SESSION]],
+    }
+
+
 @router.get("/facts/{fact_id}", response_model=Dict[str, Any])
 async def get_fact(
     fact_id: str,
@@ -463,8 +571,38 @@ async def reactivate_fact(
     return _serialize_fact(fact)
 
 
+@router.post("/facts:batch", response_model=Dict[str, Any])
+async def apply_fact_actions_batch(
+    request: FactActionBatchRequest,
+    store: MemoryStore = Depends(_get_memory_store),
+) -> Dict[str, Any]:
+    """批量撤销/归档/重新激活 Fact：atomic 时任一条失败则整批回滚"""
+    try:
+        outcomes = await store.apply_fact_actions_batch(request.items, atomic=request.atomic)
+    except BatchItemError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {
+        "items": [
+            _batch_error_item(outcome) if isinstance(outcome, BatchItemError)
+            else {"ok": True, "fact": _serialize_fact(outcome)}
+            for outcome in outcomes
+        ]
+    }
+
+
 # Audit 端点
 
+def _parse_audit_event_type(event_type: Optional[str]):
+    from memory.schemas import AuditEventType
+
+    if not event_type:
+        return None
+    try:
+        return AuditEventType(event_type)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid event_type: {event_type}")
+
+
 @router.get("/audit", response_model=Dict[str, Any])
 async def list_audit_events(
     target_type: Optional[str] = None,
@@ -472,27 +610,49 @@ async def list_audit_events(
     event_type: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     store: MemoryStore = Depends(_get_memory_store),
 ) -> Dict[str, Any]:
-    """查询审计事件"""
-    from memory.schemas import AuditEventType
-    
-    event_type_enum = None
-    if event_type:
-        try:
-            event_type_enum = AuditEventType(event_type)
-        except ValueError:
-            raise HTTPException(status_code=400, detail=f"Invalid event_type: {event_type}")
-    
+    """查询审计事件（倒序）；传上一页的 next_cursor 做 keyset 翻页，offset 仅在无 cursor 时生效"""
+    event_type_enum = _parse_audit_event_type(event_type)
     audit_logger = AuditLogger()
-    events = audit_logger.get_events(
-        target_type=target_type,
-        target_id=target_id,
-        event_type=event_type_enum,
-        limit=limit,
-        offset=offset,
-    )
-    return {"items": [_serialize_audit_event(e) for e in events]}
+    try:
+        events, next_cursor = audit_logger.get_events_page(
+            target_type=target_type,
+            target_id=target_id,
+            event_type=event_type_enum,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": [_serialize_audit_event(e) for e in events], "next_cursor": next_cursor}
+
+
+@router.get("/audit/export")
+async def export_audit_events(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    target_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    include_archived: bool = True,
+) -> StreamingResponse:
+    """按时间正序导出审计事件为 NDJSON：先输出归档分段，再输出库中事件，全程流式"""
+    event_type_enum = _parse_audit_event_type(event_type)
+
+    def _lines() -> Iterator[str]:
+        if include_archived:
+            for record in AuditArchive().iter_records(
+                since=since, until=until, target_id=target_id, event_type=event_type,
+            ):
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        for event in AuditLogger().iter_events(
+            target_id=target_id, event_type=event_type_enum, since=since, until=until,
+        ):
+            yield json.dumps(_serialize_audit_event(event), ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
 
 
 # 维护端点
@@ -504,3 +664,11 @@ async def check_expired_proposals(
     """检查并过期过期的 Proposal"""
     expired_ids = await store.check_expired_proposals()
     return {"expired_ids": expired_ids}
+
+
+@router.post("/maintenance/archive-audit", response_model=Dict[str, Any])
+async def archive_audit_events(older_than_days: int = 90) -> Dict[str, Any]:
+    """把早于 older_than_days 天的审计事件移入按月分段的归档文件（SQLite 删除和文件写入放到线程池，不阻塞事件循环）"""
+    if older_than_days < 0:
+        raise HTTPException(status_code=400, detail="older_than_days must be >= 0")
+    return await run_in_threadpool(AuditArchive().archive_older_than, older_than_days)
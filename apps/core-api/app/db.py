@@ -94,6 +94,12 @@ class ConversationModel(Base):
 
     # 关系
     messages = relationship("MessageModel", back_populates="conversation", cascade="all, delete-orphan")
+    summary = relationship(
+        "ConversationSummaryModel",
+        back_populates="conversation",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
 
     # 索引：用于按 updated_at 排序查询对话列表
     __table_args__ = (
@@ -101,6 +107,25 @@ class ConversationModel(Base):
     )
 
 
+class ConversationSummaryModel(Base):
+    """对话滚动摘要（每个对话一行）
+
+    summary 覆盖 created_at <= summarized_until 的全部 user/assistant 消息；
+    加载历史时用它替代这些旧消息，只取其后的消息原文。
+    """
+    __tablename__ = "conversation_summaries"
+
+    conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text, nullable=False)
+    summarized_until = Column(DateTime, nullable=False)  # 最后一条已总结消息的 created_at（checkpoint）
+    last_message_id = Column(String, nullable=True)  # 最后一条已总结消息的 ID
+    message_count = Column(Integer, nullable=False, default=0)  # 累计已总结的消息条数
+    run_id = Column(String, nullable=True)  # 最近一次更新摘要的 summarize_conversation run
+    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+
+    conversation = relationship("ConversationModel", back_populates="summary")
+
+
 class MessageModel(Base):
     """Message 数据库模型"""
     __tablename__ = "messages"
@@ -0,0 +1,27 @@
+"""Environment variable parsing shared by core-api services."""
+
+from __future__ import annotations
+
+import os
+
+
+def read_int_env(name: str, default: int) -> int:
+    """Read an integer environment variable; unset, blank or invalid values fall back to default."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def read_float_env(name: str, default: float) -> float:
+    """Read a float environment variable; unset, blank or invalid values fall back to default."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
@@ -99,7 +99,16 @@ def _startup_sandbox_docker_log() -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     _startup_sandbox_docker_log()
+    from app.services.memory_sweeper import start_memory_sweeper, stop_memory_sweeper
+    sweeper = start_memory_sweeper()
     yield
+    await stop_memory_sweeper(sweeper)
+    # 关闭本事件循环上共享的 LLM httpx.AsyncClient（agent_worker 不可用时跳过）
+    try:
+        from agent_worker.llm.async_http import aclose_async_clients
+        await aclose_async_clients()
+    except ImportError:
+        pass
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
@@ -126,6 +135,25 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics/llm")
+async def llm_metrics() -> dict:
+    """LLM 调用指标：按调用点的 p50/p95 延迟与 token、准入控制、provider 延迟直方图、响应缓存"""
+    try:
+        from agent_worker.llm.admission import get_admission_stats
+        from agent_worker.llm.cache import get_llm_cache_stats
+        from agent_worker.llm.hedged import get_latency_stats
+        from agent_worker.llm.instrumentation import get_llm_call_stats
+    except ImportError:
+        return {"available": False}
+    return {
+        "available": True,
+        "calls": get_llm_call_stats(),
+        "admission": get_admission_stats(),
+        "provider_latency": get_latency_stats(),
+        "response_cache": get_llm_cache_stats(),
+    }
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket) -> None:
     await websocket.accept()
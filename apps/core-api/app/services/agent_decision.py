@@ -16,19 +16,27 @@ from pydantic import BaseModel, Field, ValidationError
 
 # Try to import agent_worker components, but make them optional
 try:
+    from agent_worker.llm.base import agenerate_with
     from agent_worker.llm.factory import build_gate_llm_from_env
+    from agent_worker.llm.instrumentation import llm_call_site
+    from agent_worker.llm.prompt_cache import compute_prefix_hash, prompt_prefix
     from agent_worker.memory_client import MemoryClient
     AGENT_WORKER_AVAILABLE = True
 except ImportError:
     AGENT_WORKER_AVAILABLE = False
+    agenerate_with = None  # type: ignore
     build_gate_llm_from_env = None  # type: ignore
+    llm_call_site = None  # type: ignore
+    compute_prefix_hash = None  # type: ignore
+    prompt_prefix = None  # type: ignore
     MemoryClient = None  # type: ignore
 
 from app.agent_loop_config import (
     AGENT_ALLOWED_RUN_TYPES,
     AGENT_DECISION_TIMEOUT_SECONDS,
 )
-from app.services.facts import fetch_active_facts
+from app.services.conversation_summary import SUMMARY_MESSAGE_KIND
+from app.services.facts import fetch_active_facts, order_facts_for_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -120,6 +128,67 @@ class AgentDecision:
         Raises:
             ValueError: If decision cannot be made (LLM unavailable, invalid response, etc.)
         """
+        prefix, suffix = self._prepare_prompt(
+            user_message=user_message,
+            conversation_id=conversation_id,
+            history_messages=history_messages,
+            active_facts=active_facts,
+            recent_runs=recent_runs,
+            previous_observation=previous_observation,
+        )
+        
+        # Call LLM
+        try:
+            with llm_call_site("decision"), prompt_prefix(compute_prefix_hash(prefix)):
+                raw_output = self._llm.generate(prefix + suffix)
+            if not raw_output:
+                raise ValueError("LLM returned empty response")
+        except Exception as e:
+            logger.error(f"Failed to call Decision LLM: {e}", exc_info=True)
+            raise ValueError(f"Decision LLM call failed: {e}")
+        
+        return self._finalize_decision(raw_output, conversation_id)
+    
+    async def adecide(
+        self,
+        user_message: str,
+        conversation_id: str,
+        history_messages: List[Dict[str, str]],
+        active_facts: Optional[List[Dict[str, Any]]] = None,
+        recent_runs: Optional[List[Dict[str, Any]]] = None,
+        previous_observation: Optional[Dict[str, Any]] = None,
+    ) -> Decision:
+        """Async variant of decide(): awaits the LLM's agenerate() so the event loop is not blocked."""
+        prefix, suffix = self._prepare_prompt(
+            user_message=user_message,
+            conversation_id=conversation_id,
+            history_messages=history_messages,
+            active_facts=active_facts,
+            recent_runs=recent_runs,
+            previous_observation=previous_observation,
+        )
+        
+        try:
+            with llm_call_site("decision"), prompt_prefix(compute_prefix_hash(prefix)):
+                raw_output = await agenerate_with(self._llm, prefix + suffix)
+            if not raw_output:
+                raise ValueError("LLM returned empty response")
+        except Exception as e:
+            logger.error(f"Failed to call Decision LLM: {e}", exc_info=True)
+            raise ValueError(f"Decision LLM call failed: {e}")
+        
+        return self._finalize_decision(raw_output, conversation_id)
+    
+    def _prepare_prompt(
+        self,
+        user_message: str,
+        conversation_id: str,
+        history_messages: List[Dict[str, str]],
+        active_facts: Optional[List[Dict[str, Any]]],
+        recent_runs: Optional[List[Dict[str, Any]]],
+        previous_observation: Optional[Dict[str, Any]],
+    ) -> tuple[str, str]:
+        """Fetch facts if needed and build the (stable prefix, volatile suffix) of the decision prompt."""
         if not self._llm:
             raise ValueError("Agent Decision LLM is not available")
         
@@ -134,7 +203,7 @@ class AgentDecision:
                 active_facts = []
         
         # Build decision prompt
-        prompt = self._build_decision_prompt(
+        return self._build_decision_prompt_parts(
             user_message=user_message,
             conversation_id=conversation_id,
             history_messages=history_messages,
@@ -142,16 +211,9 @@ class AgentDecision:
             recent_runs=recent_runs or [],
             previous_observation=previous_observation,
         )
-        
-        # Call LLM
-        try:
-            raw_output = self._llm.generate(prompt)
-            if not raw_output:
-                raise ValueError("LLM returned empty response")
-        except Exception as e:
-            logger.error(f"Failed to call Decision LLM: {e}", exc_info=True)
-            raise ValueError(f"Decision LLM call failed: {e}")
-        
+    
+    def _finalize_decision(self, raw_output: str, conversation_id: str) -> Decision:
+        """Parse, validate and post-process the raw Decision LLM output."""
         # Parse JSON
         try:
             decision_dict = json.loads(raw_output)
@@ -220,7 +282,31 @@ class AgentDecision:
         recent_runs: List[Dict[str, Any]],
         previous_observation: Optional[Dict[str, Any]] = None,
     ) -> str:
-        """Build decision prompt for LLM.
+        """Build decision prompt for LLM (stable prefix + volatile suffix, see _build_decision_prompt_parts)."""
+        prefix, suffix = self._build_decision_prompt_parts(
+            user_message=user_message,
+            conversation_id=conversation_id,
+            history_messages=history_messages,
+            active_facts=active_facts,
+            recent_runs=recent_runs,
+            previous_observation=previous_observation,
+        )
+        return prefix + suffix
+
+    def _build_decision_prompt_parts(
+        self,
+        user_message: str,
+        conversation_id: str,
+        history_messages: List[Dict[str, str]],
+        active_facts: List[Dict[str, Any]],
+        recent_runs: List[Dict[str, Any]],
+        previous_observation: Optional[Dict[str, Any]] = None,
+    ) -> tuple[str, str]:
+        """Build decision prompt for LLM as (stable prefix, volatile suffix).
+
+        The prefix (instructions + facts in snapshot order) is byte-identical across turns of
+        the same conversation state, so provider-side prompt/KV caches can reuse it; everything
+        that changes per turn (conversation_id, observation, history, runs, message) is in the suffix.
         
         Args:
             user_message: Current user message
@@ -231,7 +317,7 @@ class AgentDecision:
             previous_observation: If set, last code execution result (for multi-step loop)
         
         Returns:
-            Prompt string
+            (prefix, suffix) tuple; the full prompt is prefix + suffix
         """
         # System block 1: 目标 + 决策类型 + JSON schema（稳定部分）
         system_prompt_schema = """You are an AI assistant that decides how to respond to user messages.
@@ -274,7 +360,7 @@ Rules:
 - If decision="reply": must provide reply.content, must NOT provide run
 - If decision="run": must provide run, reply can be empty/null
 - If decision="reply_and_run": must provide BOTH reply and run
-- conversation_id: use "{conversation_id}" if user is in a conversation, null for system/automatic tasks
+- conversation_id: use the current conversation_id (given below) if user is in a conversation, null for system/automatic tasks
 - For research_report: run.input must include "query" with the user's lookup question (e.g. "现在估值最高的公司是哪个")
 - For run_code_snippet: run.input must include conversation_id, language ("python" or "shell"), and code (for python) or script (for shell).
 
@@ -287,15 +373,14 @@ Examples (user -> decision):
 - "你好" -> decision=reply
 """.format(
             allowed_types=", ".join(AGENT_ALLOWED_RUN_TYPES),
-            conversation_id=conversation_id,
         )
         
-        # System block 2: Facts (动态部分)
+        # System block 2: Facts（随 snapshot 变化；按 snapshot 顺序排列，同一 snapshot 前缀不变）
         # Include facts that are active or have no status (e.g. minimal test payloads)
         facts_block = ""
         if active_facts:
             facts_list = []
-            for fact in active_facts:
+            for fact in order_facts_for_snapshot(active_facts):
                 status = fact.get("status")
                 if status in ("revoked", "archived"):
                     continue
@@ -353,6 +438,13 @@ Based on the above result, either reply to the user with the outcome (use "reply
         # Context blocks (动态部分)
         context_parts = []
         
+        # Rolling summary of older messages (see app.services.conversation_summary)
+        if history_messages:
+            summaries = [m.get("content", "") for m in history_messages if m.get("kind") == SUMMARY_MESSAGE_KIND]
+            history_messages = [m for m in history_messages if m.get("kind") != SUMMARY_MESSAGE_KIND]
+            if summaries and summaries[0]:
+                context_parts.append(f"Earlier conversation summary:\n{summaries[0]}\n")
+
         # Add history messages (last 10 messages)
         if history_messages:
             recent_history = history_messages[-10:]
@@ -375,10 +467,13 @@ Based on the above result, either reply to the user with the outcome (use "reply
         # Current user message
         context_parts.append(f"\nCurrent user message:\n{user_message}")
         
-        # Combine: system blocks + observation (if any) + context
-        prompt = f"{system_prompt_schema}{facts_block}{observation_block}\n\n" + "\n".join(context_parts)
-        
-        return prompt
+        # Combine: stable prefix (system blocks) + volatile suffix (conversation_id + observation + context)
+        prefix = f"{system_prompt_schema}{facts_block}"
+        suffix = (
+            f"\n\nCurrent conversation_id: {conversation_id}"
+            f"{observation_block}\n\n" + "\n".join(context_parts)
+        )
+        return prefix, suffix
     
     def get_active_facts(self, conversation_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get active facts from memory.
@@ -0,0 +1,143 @@
+"""Rolling per-conversation summaries.
+
+长对话每轮都把最近 60 条消息原文发给 LLM，成本随对话增长。这里维护每个对话
+一份滚动摘要（ConversationSummaryModel）：
+
+- 加载历史时，checkpoint（summarized_until）之前的消息由摘要替代，只取其后的原文；
+- 未总结的尾部超过 SUMMARY_TRIGGER_MESSAGES 条时，排队一个后台
+  summarize_conversation run（input_json.rolling=True），由 worker 增量合并摘要并推进 checkpoint；
+- 摘要以 {"role": "system", "kind": "summary", "content": ...} 放在历史最前面，
+  chat_flow / AgentDecision 按 kind 识别。
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db import ConversationSummaryModel, MessageModel, MessageRole, RunModel, RunStatus
+from app.env import read_int_env
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_RUN_TYPE = "summarize_conversation"
+SUMMARY_MESSAGE_KIND = "summary"
+
+
+# 未总结的 user/assistant 消息达到此条数时触发后台摘要（<=0 关闭自动摘要）
+SUMMARY_TRIGGER_MESSAGES = read_int_env("CONVERSATION_SUMMARY_TRIGGER", 40)
+# 后台摘要时保留最近多少条消息不总结（始终以原文进入上下文）
+SUMMARY_KEEP_RECENT = read_int_env("CONVERSATION_SUMMARY_KEEP_RECENT", 10)
+# 单次后台摘要最多合并的消息条数（worker 端限制在 10~50）
+SUMMARY_BATCH_MESSAGES = read_int_env("CONVERSATION_SUMMARY_BATCH", 50)
+
+
+def get_conversation_summary(db: Session, conversation_id: str) -> Optional[ConversationSummaryModel]:
+    """读取对话的滚动摘要（不存在返回 None）"""
+    return (
+        db.query(ConversationSummaryModel)
+        .filter(ConversationSummaryModel.conversation_id == conversation_id)
+        .first()
+    )
+
+
+def summary_message(summary: str) -> Dict[str, str]:
+    """摘要在历史消息列表中的表示"""
+    return {"role": "system", "kind": SUMMARY_MESSAGE_KIND, "content": summary}
+
+
+def load_history_with_summary(
+    db: Session,
+    conversation_id: str,
+    limit: int = 60,
+    exclude_message_id: Optional[str] = None,
+) -> List[Dict[str, str]]:
+    """加载 LLM 格式的历史：[摘要] + checkpoint 之后最近 limit 条 user/assistant 消息（升序）
+
+    Args:
+        db: 数据库会话
+        conversation_id: 对话 ID
+        limit: 最多读取的消息条数（checkpoint 之后）
+        exclude_message_id: 跳过的消息（通常是刚插入的当前 user 消息）
+    """
+    summary = get_conversation_summary(db, conversation_id)
+    query = db.query(MessageModel).filter(MessageModel.conversation_id == conversation_id)
+    if summary is not None:
+        query = query.filter(MessageModel.created_at > summary.summarized_until)
+    messages = query.order_by(MessageModel.created_at.desc()).limit(limit).all()
+    messages.reverse()
+
+    out: List[Dict[str, str]] = []
+    if summary is not None and summary.summary:
+        out.append(summary_message(summary.summary))
+    for msg in messages:
+        if exclude_message_id is not None and msg.id == exclude_message_id:
+            continue
+        if msg.role == MessageRole.USER:
+            out.append({"role": "user", "content": msg.content or ""})
+        elif msg.role == MessageRole.ASSISTANT:
+            out.append({"role": "assistant", "content": msg.content or ""})
+        # 跳过 SYSTEM 角色的消息（错误消息等）
+    return out
+
+
+def count_unsummarized_messages(db: Session, conversation_id: str) -> int:
+    """checkpoint 之后的 user/assistant 消息条数"""
+    summary = get_conversation_summary(db, conversation_id)
+    query = (
+        db.query(MessageModel)
+        .filter(MessageModel.conversation_id == conversation_id)
+        .filter(MessageModel.role.in_([MessageRole.USER, MessageRole.ASSISTANT]))
+    )
+    if summary is not None:
+        query = query.filter(MessageModel.created_at > summary.summarized_until)
+    return query.count()
+
+
+def _has_pending_summary_run(db: Session, conversation_id: str) -> bool:
+    pending = (
+        db.query(RunModel)
+        .filter(
+            RunModel.conversation_id == conversation_id,
+            RunModel.type == SUMMARY_RUN_TYPE,
+            RunModel.status.in_([RunStatus.QUEUED, RunStatus.RUNNING]),
+        )
+        .all()
+    )
+    return any((run.input_json or {}).get("rolling") for run in pending)
+
+
+async def maybe_schedule_rolling_summary(db: Session, conversation_id: str) -> Optional[str]:
+    """未总结尾部超过阈值且没有在途的滚动摘要时，排队一个后台 summarize_conversation run
+
+    Returns:
+        新建 run 的 ID；未触发时返回 None
+    """
+    if SUMMARY_TRIGGER_MESSAGES <= 0:
+        return None
+    if count_unsummarized_messages(db, conversation_id) < SUMMARY_TRIGGER_MESSAGES:
+        return None
+    if _has_pending_summary_run(db, conversation_id):
+        return None
+
+    from app.api.runs import RunCreateRequest, _create_run
+
+    run = await _create_run(
+        RunCreateRequest(
+            type=SUMMARY_RUN_TYPE,
+            title="更新对话摘要",
+            conversation_id=conversation_id,
+            input={
+                "conversation_id": conversation_id,
+                "rolling": True,
+                "keep_recent": SUMMARY_KEEP_RECENT,
+                "max_messages": SUMMARY_BATCH_MESSAGES,
+            },
+        ),
+        db,
+    )
+    logger.info("Scheduled rolling summary run %s for conversation %s", run["id"], conversation_id)
+    return run["id"]
+
@@ -0,0 +1,229 @@
+"""Pre-LLM fast path for the agent decision layer.
+
+寒暄、致谢、确认这类消息只可能得到 decision == "reply"，没必要为它们调用一次 Decision LLM。
+这里在 AgentDecision 之前放一个可插拔的预分类阶段：
+
+- ReplyOnlyPatternClassifier：整条消息（去掉空白/标点/emoji 后）必须完全由已知的
+  寒暄/致谢/确认短语组成；
+- 任务关键词（总结、运行代码、搜索……）或 planner IntentDecomposer 识别出任务意图时一票否决；
+- 上一条 assistant 消息在提问或提出要做某事（"要我帮你跑这个脚本吗？"）时整轮不走 fast path：
+  此时 "好"/"可以" 是同意执行，必须交给 Decision LLM 建 run；
+- 命中后直接走 responder（chat_flow），省掉一次 LLM 往返。
+
+命中率（fast path share）按进程统计并写日志；精度用 scripts/eval_decision_fast_path.py
+对照录制的 decision 评估。
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Protocol
+
+try:
+    from planner.decomposer import IntentDecomposer, IntentType
+except ImportError:
+    IntentDecomposer = None  # type: ignore
+    IntentType = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# 超过此长度（去掉空白/标点后）的消息不走 fast path
+FAST_PATH_MAX_CHARS = 24
+
+REPLY_ONLY_PHRASES: Dict[str, List[str]] = {
+    "greeting": [
+        "hi", "hello", "hey", "hiya", "good morning", "good evening", "good night", "morning",
+        "你好", "您好", "嗨", "哈喽", "哈啰", "早上好", "早安", "中午好", "下午好", "晚上好", "晚安", "在吗", "在么",
+    ],
+    "thanks": [
+        "thanks", "thank you", "thank you so much", "thx", "ty", "cheers", "appreciate it",
+        "谢谢", "谢谢你", "谢谢您", "多谢", "感谢", "非常感谢", "辛苦了", "谢啦", "谢了",
+    ],
+    "ack": [
+        "ok", "okay", "k", "kk", "got it", "sure", "cool", "nice", "great", "yes", "yep", "no problem",
+        "好", "好的", "好滴", "好哒", "好吧", "嗯", "嗯嗯", "哦", "噢", "收到", "明白", "明白了",
+        "了解", "知道了", "懂了", "行", "可以", "没问题", "对", "是的", "不错", "太好了", "棒",
+    ],
+    "farewell": [
+        "bye", "goodbye", "see you", "see ya", "再见", "拜拜", "回头见", "下次见",
+    ],
+}
+
+# 出现即不走 fast path：可能需要创建 run 的意图
+TASK_KEYWORDS: List[str] = [
+    "总结", "摘要", "运行", "执行", "跑", "代码", "脚本", "搜索", "查一下", "查找", "调研", "报告",
+    "文档", "编辑", "修改", "删除", "写", "帮我", "请", "提醒", "计算",
+    "summar", "run", "execute", "code", "script", "python", "shell", "search", "research",
+    "report", "doc", "edit", "sleep", "please", "help", "remind", "?", "？",
+]
+
+# 上一条 assistant 消息含这些标记时视为在等用户答复（提问/提议动作），不走 fast path
+AWAITING_REPLY_MARKERS: List[str] = [
+    "?", "？", "吗", "要不要", "是否", "需不需要", "需要我", "要我", "我可以帮", "我来帮", "我帮你",
+    "shall i", "should i", "would you like", "do you want", "want me to", "let me know if",
+]
+
+_STRIP_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def _compact(text: str) -> str:
+    """小写并去掉空白、标点和 emoji，便于整串匹配"""
+    return _STRIP_RE.sub("", text.lower())
+
+
+def awaits_user_reply(history: Optional[List[Dict[str, str]]]) -> bool:
+    """上一条 assistant 消息是否在提问或提议动作（此时简短的 "好"/"可以" 是同意，不是寒暄）"""
+    for message in reversed(history or []):
+        if message.get("role") == "assistant":
+            content = (message.get("content") or "").lower()
+            return any(marker in content for marker in AWAITING_REPLY_MARKERS)
+        if message.get("role") == "user":
+            return False
+    return False
+
+
+def _alternation(phrases: List[str]) -> str:
+    compacted = {_compact(p) for p in phrases if _compact(p)}
+    # 长短语优先，避免 "好" 抢先匹配 "好的"
+    return "|".join(re.escape(p) for p in sorted(compacted, key=len, reverse=True))
+
+
+@dataclass(frozen=True)
+class FastPathHit:
+    """预分类命中结果；decision 恒为 "reply"（只回复、不建 run）"""
+    classifier: str
+    reason: str
+    confidence: float
+    decision: str = "reply"
+
+
+class PreClassifier(Protocol):
+    name: str
+
+    def classify(self, user_message: str) -> Optional[FastPathHit]:
+        """命中返回 FastPathHit，不确定时返回 None（交给 Decision LLM）"""
+        ...
+
+
+class ReplyOnlyPatternClassifier:
+    """基于预编译短语表 + 任务关键词/意图否决的 reply-only 分类器"""
+
+    name = "reply_only_patterns"
+
+    def __init__(
+        self,
+        phrases: Optional[Dict[str, List[str]]] = None,
+        task_keywords: Optional[List[str]] = None,
+        max_chars: int = FAST_PATH_MAX_CHARS,
+        use_intent_model: bool = True,
+    ) -> None:
+        phrases = phrases if phrases is not None else REPLY_ONLY_PHRASES
+        self._max_chars = max_chars
+        # 每个类别一条 ^(?:p1|p2|...)+$；整条消息可由多个短语拼成（如 "好的谢谢"）
+        self._category_res = {
+            category: re.compile(f"^(?:{_alternation(items)})+$")
+            for category, items in phrases.items()
+            if items
+        }
+        all_phrases = [p for items in phrases.values() for p in items]
+        self._reply_only_re = re.compile(f"^(?:{_alternation(all_phrases)})+$")
+        keywords = task_keywords if task_keywords is not None else TASK_KEYWORDS
+        self._task_re = re.compile("|".join(re.escape(k.lower()) for k in keywords)) if keywords else None
+        self._decomposer = IntentDecomposer() if (use_intent_model and IntentDecomposer is not None) else None
+
+    def classify(self, user_message: str) -> Optional[FastPathHit]:
+        if not user_message or not user_message.strip():
+            return None
+        lowered = user_message.lower()
+        compact = _compact(user_message)
+        if not compact or len(compact) > self._max_chars:
+            return None
+        if self._task_re is not None and self._task_re.search(lowered):
+            return None
+        if self._decomposer is not None:
+            intent = self._decomposer.decompose(user_message).intent_type
+            if intent != IntentType.UNKNOWN:
+                return None
+        if not self._reply_only_re.match(compact):
+            return None
+        category = next(
+            (name for name, pattern in self._category_res.items() if pattern.match(compact)),
+            "mixed",
+        )
+        return FastPathHit(classifier=self.name, reason=f"pattern:{category}", confidence=0.95)
+
+
+class DecisionFastPath:
+    """按顺序执行已注册的预分类器，第一个命中者生效；同时统计命中占比"""
+
+    def __init__(self, classifiers: Optional[List[PreClassifier]] = None) -> None:
+        self._classifiers: List[PreClassifier] = list(classifiers) if classifiers is not None else []
+        self._lock = threading.Lock()
+        self._turns = 0
+        self._hits = 0
+        self._hits_by_reason: Dict[str, int] = {}
+
+    def register(self, classifier: PreClassifier) -> None:
+        self._classifiers.append(classifier)
+
+    def classify(
+        self,
+        user_message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        record: bool = True,
+    ) -> Optional[FastPathHit]:
+        """history 为本轮之前的 LLM 格式历史；上一条 assistant 消息在等答复时不走 fast path"""
+        hit: Optional[FastPathHit] = None
+        classifiers = [] if awaits_user_reply(history) else self._classifiers
+        for classifier in classifiers:
+            try:
+                hit = classifier.classify(user_message)
+            except Exception as e:
+                logger.warning(f"Pre-classifier {getattr(classifier, 'name', classifier)} failed: {e}")
+                hit = None
+            if hit is not None:
+                break
+        if record:
+            self._record(hit)
+        return hit
+
+    def _record(self, hit: Optional[FastPathHit]) -> None:
+        with self._lock:
+            self._turns += 1
+            if hit is not None:
+                self._hits += 1
+                self._hits_by_reason[hit.reason] = self._hits_by_reason.get(hit.reason, 0) + 1
+            turns, hits = self._turns, self._hits
+        logger.info(
+            "decision.fast_path hit=%s reason=%s share=%.1f%% (%d/%d)",
+            hit is not None,
+            hit.reason if hit is not None else "-",
+            100.0 * hits / turns,
+            hits,
+            turns,
+        )
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "turns": self._turns,
+                "fast_path_hits": self._hits,
+                "fast_path_share": (self._hits / self._turns) if self._turns else 0.0,
+                "hits_by_reason": dict(self._hits_by_reason),
+            }
+
+
+_default_fast_path: Optional[DecisionFastPath] = None
+_default_lock = threading.Lock()
+
+
+def get_decision_fast_path() -> DecisionFastPath:
+    """进程内共享的 fast path（默认注册 ReplyOnlyPatternClassifier）"""
+    global _default_fast_path
+    with _default_lock:
+        if _default_fast_path is None:
+            _default_fast_path = DecisionFastPath([ReplyOnlyPatternClassifier()])
+        return _default_fast_path
@@ -14,6 +14,9 @@ import os
 from typing import Any, Dict, List, Optional, Tuple
 
 from agent_worker.memory_client import MemoryClient
+from agent_worker.utils.facts import list_global_and_session_facts
+
+from app.env import read_int_env
 
 # Optional: for in-process fetch (no HTTP self-call)
 try:
@@ -29,6 +32,17 @@ except ImportError:
     _memory_db_module = None  # type: ignore
     _MEMORY_STORE_AVAILABLE = False
 
+try:
+    from memory.retrieval import estimate_tokens, rank_facts
+except ImportError:
+    estimate_tokens = None  # type: ignore
+    rank_facts = None  # type: ignore
+
+try:
+    from memory.vector_store import HashingEmbedder
+except ImportError:
+    HashingEmbedder = None  # type: ignore
+
 
 def _get_db_path() -> str:
     """用于日志：当前 memory DB 路径"""
@@ -45,6 +59,18 @@ ACTIVE_FACTS_SCHEMA_VERSION = 1
 DEFAULT_ACTIVE_FACTS_LIMIT = 100
 
 
+# 带 query（当前用户消息）时的 facts 选取方式：
+# - all：全部 active facts 按 key 排序后截断到 limit（旧行为）
+# - auto：条数超过 limit 或估算 token 超过预算时才按相关性挑选，否则同 all（保持 prompt 前缀稳定）
+# - relevance：总是按相关性挑选 top_k
+FACTS_RETRIEVAL_MODES = ("all", "auto", "relevance")
+FACTS_RETRIEVAL_MODE = os.getenv("FACTS_RETRIEVAL_MODE", "auto").strip().lower()
+FACTS_RETRIEVAL_TOP_K = read_int_env("FACTS_RETRIEVAL_TOP_K", 30)
+FACTS_RETRIEVAL_TOKEN_BUDGET = read_int_env("FACTS_RETRIEVAL_TOKEN_BUDGET", 1500)
+# 1 = 额外混合 hashing 向量相似度（需要 numpy）
+FACTS_RETRIEVAL_VECTOR = os.getenv("FACTS_RETRIEVAL_VECTOR", "0").strip() in ("1", "true", "yes")
+
+
 def _ensure_json_safe(value: Any) -> Any:
     """与 memory API 一致：确保 value 可 JSON 序列化"""
     try:
@@ -97,12 +123,16 @@ async def fetch_active_facts_from_store(
     conversation_id: Optional[str] = None,
     project_id: Optional[str] = None,
     limit: Optional[int] = None,
+    query: Optional[str] = None,
+    mode: Optional[str] = None,
 ) -> Tuple[List[Dict[str, Any]], str]:
     """
     从 MemoryStore 直接获取 active facts（不经过 HTTP，避免同进程自调用阻塞/超时）。
 
     过滤逻辑与 HTTP GET /memory/facts 一致：仅 ACTIVE，global + session(conversation_id)，
     按 key 去重，session 覆盖 global；可选 limit 控制条数。
+    传入 query（当前用户消息）时按 mode（默认 FACTS_RETRIEVAL_MODE）用 BM25 相关性挑选，
+    见 select_relevant_facts；不传 query 时（如 run 的 facts_snapshot_id）始终返回全量。
 
     Returns:
         (facts_list, source_literal)
@@ -171,6 +201,16 @@ async def fetch_active_facts_from_store(
 
         # 3. 稳定排序 + limit（按 key 排序便于回归测试 byte-level 等价）
         ordered = sorted(facts_by_key.values(), key=lambda x: (x.get("key") or "", x.get("id") or ""))
+        if query:
+            selected = select_relevant_facts(ordered, query, mode=mode, limit=limit)
+            if selected is not None:
+                logger.info(
+                    "[FACTS_DEBUG] memory.list_facts.ranked total=%s selected=%s mode=%s",
+                    len(ordered),
+                    len(selected),
+                    mode or FACTS_RETRIEVAL_MODE,
+                )
+                ordered = selected
         if len(ordered) > limit:
             ordered = ordered[:limit]
             logger.info("[FACTS_DEBUG] memory.list_facts.limited total=%s limit=%s", len(facts_by_key), limit)
@@ -201,6 +241,48 @@ async def fetch_active_facts_from_store(
         return [], "fallback_zero"
 
 
+def select_relevant_facts(
+    facts: List[Dict[str, Any]],
+    query: str,
+    *,
+    mode: Optional[str] = None,
+    limit: Optional[int] = None,
+    top_k: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    按与 query 的相关性挑选 facts（BM25 over key+value，可选混合向量相似度）。
+
+    pinned key（preferred_name 等）总是保留且不占名额；其余 facts 不超过 top_k 条，且估算 token 不超过 token_budget。
+    返回 None 表示不做挑选（mode=all、auto 下未超限、或 memory.retrieval 不可用），调用方沿用全量。
+    """
+    mode = (mode or FACTS_RETRIEVAL_MODE).strip().lower()
+    if mode not in FACTS_RETRIEVAL_MODES:
+        mode = "auto"
+    if mode == "all" or rank_facts is None or not query.strip():
+        return None
+    limit = limit if limit is not None else DEFAULT_ACTIVE_FACTS_LIMIT
+    top_k = top_k if top_k is not None else FACTS_RETRIEVAL_TOP_K
+    token_budget = token_budget if token_budget is not None else FACTS_RETRIEVAL_TOKEN_BUDGET
+    if mode == "auto" and len(facts) <= limit:
+        total_tokens = estimate_tokens(json.dumps(facts, ensure_ascii=False, default=str))
+        if total_tokens <= token_budget:
+            return None
+    embedder = None
+    if FACTS_RETRIEVAL_VECTOR and HashingEmbedder is not None:
+        try:
+            embedder = HashingEmbedder()
+        except RuntimeError:
+            embedder = None
+    return rank_facts(
+        facts,
+        query,
+        top_k=min(top_k, limit) if top_k > 0 else limit,
+        token_budget=token_budget if token_budget > 0 else None,
+        embedder=embedder,
+    )
+
+
 def fetch_active_facts(
     memory_client: MemoryClient,
     *,
@@ -216,27 +298,18 @@ def fetch_active_facts(
     facts_by_key: Dict[str, Dict[str, Any]] = {}
 
     try:
-        global_facts = memory_client.list_facts(scope="global", status="active")
+        global_facts, session_facts = list_global_and_session_facts(memory_client, conversation_id)
         for fact in global_facts:
             if fact.get("status") == "active":
                 key = fact.get("key", "")
                 if key:
                     facts_by_key[key] = fact
 
-        if conversation_id:
-            try:
-                session_facts = memory_client.list_facts(
-                    scope="session",
-                    session_id=conversation_id,
-                    status="active",
-                )
-                for fact in session_facts:
-                    if fact.get("status") == "active":
-                        key = fact.get("key", "")
-                        if key:
-                            facts_by_key[key] = fact
-            except Exception:
-                pass
+        for fact in session_facts:
+            if fact.get("status") == "active":
+                key = fact.get("key", "")
+                if key:
+                    facts_by_key[key] = fact
 
         return list(facts_by_key.values())
     except Exception:
@@ -252,6 +325,15 @@ def _canonical_value_for_snapshot(value: Any) -> str:
     return str(value)
 
 
+def order_facts_for_snapshot(facts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order facts the way compute_facts_snapshot_id does: by (id or ""), then key.
+
+    Prompt builders render facts in this order so the same snapshot gives the same prompt prefix.
+    Must match agent_worker.utils.facts_format.order_facts_for_snapshot.
+    """
+    return sorted(facts, key=lambda f: (f.get("id") or "", f.get("key") or ""))
+
+
 def compute_facts_snapshot_id(active_facts: List[Dict[str, Any]]) -> str:
     """
     Compute a stable, content-based snapshot ID for a set of active facts.
@@ -263,10 +345,7 @@ def compute_facts_snapshot_id(active_facts: List[Dict[str, Any]]) -> str:
     Returns 64-char hex string (SHA-256).
     """
     active = [f for f in active_facts if f.get("status") == "active" and f.get("key")]
-    ordered = sorted(
-        active,
-        key=lambda f: (f.get("id") or "", f.get("key") or ""),
-    )
+    ordered = order_facts_for_snapshot(active)
     canonical_list = [
         {
             "id": f.get("id"),
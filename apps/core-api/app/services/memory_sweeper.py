@@ -0,0 +1,67 @@
+"""Memory 后台维护：定期把到期的 pending Proposal 置为 expired。
+
+MemoryStore.check_expired_proposals 只扫描已到期的行（索引范围扫描 + 集合 UPDATE），
+因此 sweeper 可以按较短间隔常驻运行；/memory/maintenance/check-expired 仍可手动触发。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from app.env import read_float_env
+
+try:
+    from memory.facts import MemoryStore
+except ImportError:
+    MemoryStore = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+# 清扫间隔（秒），<=0 关闭后台 sweeper
+MEMORY_SWEEP_INTERVAL_SEC = read_float_env("MEMORY_SWEEP_INTERVAL_SEC", 60.0)
+
+
+async def sweep_expired_proposals_once(store_factory: Optional[Callable[[], "MemoryStore"]] = None) -> List[str]:
+    """执行一次过期清扫，返回本次过期的 proposal id；失败时记录日志并返回空列表"""
+    factory = store_factory or MemoryStore
+    if factory is None:
+        return []
+    try:
+        expired_ids = await factory().check_expired_proposals()
+    except Exception as exc:
+        logger.warning("memory sweeper: expire proposals failed: %s", exc, exc_info=True)
+        return []
+    if expired_ids:
+        logger.info("memory sweeper: expired %s proposals", len(expired_ids))
+    return expired_ids
+
+
+async def run_memory_sweeper(
+    interval_sec: float = MEMORY_SWEEP_INTERVAL_SEC,
+    *,
+    store_factory: Optional[Callable[[], "MemoryStore"]] = None,
+) -> None:
+    """常驻循环：启动时先清扫一次（覆盖停机期间到期的），之后每 interval_sec 秒一次，直到被取消"""
+    while True:
+        await sweep_expired_proposals_once(store_factory)
+        await asyncio.sleep(interval_sec)
+
+
+def start_memory_sweeper(interval_sec: float = MEMORY_SWEEP_INTERVAL_SEC) -> Optional[asyncio.Task]:
+    """在当前事件循环上启动 sweeper；未启用（interval<=0）或 memory 包不可用时返回 None"""
+    if interval_sec <= 0 or MemoryStore is None:
+        return None
+    return asyncio.create_task(run_memory_sweeper(interval_sec), name="memory-sweeper")
+
+
+async def stop_memory_sweeper(task: Optional[asyncio.Task]) -> None:
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
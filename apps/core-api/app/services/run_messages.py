@@ -220,6 +220,10 @@ def emit_run_message(db: Session, run: RunModel) -> None:
         _wake_parent_run_if_waiting(db, run)
         return
 
+    # 后台滚动摘要（rolling=True）只更新 conversation_summaries，不向对话写消息
+    if run_type_norm == "summarize_conversation" and input_json.get("rolling"):
+        return
+
     # 幂等性检查：是否已存在相同 run 的完成消息（kind=run 或 kind=run_done）
     # 
     # 性能说明：
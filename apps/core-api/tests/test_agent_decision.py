@@ -1,5 +1,6 @@
 """Tests for Agent Decision service."""
 
+import asyncio
 import json
 import os
 import sys
@@ -189,6 +190,41 @@ def test_agent_decision_decide_reply_only():
     assert decision.run is None
 
 
+@patch("app.services.agent_decision.AGENT_WORKER_AVAILABLE", True)
+def test_agent_decision_adecide_awaits_async_llm():
+    """Test AgentDecision.adecide() uses the LLM's native agenerate()."""
+    decision_json = {
+        "decision": "run",
+        "reply": None,
+        "run": {"type": "sleep", "title": "Sleep", "input": {"seconds": 1}},
+        "confidence": 0.9,
+        "reason": "User wants to sleep",
+    }
+
+    class AsyncOnlyLLM(MockLLM):
+        def generate(self, prompt: str) -> str:
+            raise AssertionError("sync generate should not be called")
+
+        async def agenerate(self, prompt: str) -> str:
+            return self.response
+
+    agent_decision = AgentDecision()
+    agent_decision._llm = JsonOnlyLLMWrapper(AsyncOnlyLLM(json.dumps(decision_json)))
+    agent_decision._memory_client = MockMemoryClient()
+
+    decision = asyncio.run(agent_decision.adecide(
+        user_message="Sleep for 1 second",
+        conversation_id="test-conv-async",
+        history_messages=[],
+        active_facts=[],
+        recent_runs=[],
+    ))
+
+    assert decision.decision == "run"
+    assert decision.run.type == "sleep"
+    assert decision.run.conversation_id == "test-conv-async"
+
+
 @patch("app.services.agent_decision.AGENT_WORKER_AVAILABLE", True)
 def test_agent_decision_decide_run_only():
     """Test AgentDecision.decide() with run-only decision."""
@@ -426,6 +462,38 @@ def test_agent_decision_build_prompt():
     assert "sleep" in prompt
 
 
+@patch("app.services.agent_decision.AGENT_WORKER_AVAILABLE", True)
+def test_decision_prompt_stable_prefix_excludes_volatile_context():
+    """稳定前缀只含指令与按 snapshot 排序的 facts；conversation_id、历史、runs、当前消息都在后缀。"""
+    agent_decision = AgentDecision()
+    agent_decision._llm = MockLLM("")
+    facts = [
+        {"id": "b", "key": "city", "value": "Paris", "status": "active"},
+        {"id": "a", "key": "name", "value": "Alice", "status": "active"},
+    ]
+
+    first_prefix, first_suffix = agent_decision._build_decision_prompt_parts(
+        user_message="first message",
+        conversation_id="conv-1",
+        history_messages=[{"role": "user", "content": "earlier"}],
+        active_facts=facts,
+        recent_runs=[{"type": "sleep", "status": "succeeded"}],
+    )
+    second_prefix, _ = agent_decision._build_decision_prompt_parts(
+        user_message="second message",
+        conversation_id="conv-2",
+        history_messages=[],
+        active_facts=list(reversed(facts)),
+        recent_runs=[],
+    )
+
+    assert first_prefix == second_prefix
+    assert first_prefix.index("- name: Alice") < first_prefix.index("- city: Paris")
+    for volatile in ("conv-1", "first message", "earlier", "sleep (succeeded)"):
+        assert volatile not in first_prefix
+        assert volatile in first_suffix
+
+
 @patch("app.services.agent_decision.AGENT_WORKER_AVAILABLE", True)
 def test_agent_decision_prompt_includes_run_code_snippet_rule_and_example():
     """决策 prompt 包含 run_code_snippet 的规则与示例，便于 LLM 在用户要求跑代码时产出正确 run.input。"""
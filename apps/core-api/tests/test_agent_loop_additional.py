@@ -10,7 +10,7 @@ import uuid
 from datetime import UTC, datetime
 from io import StringIO
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
@@ -103,10 +103,10 @@ def test_agent_loop_idempotent_run_creation(temp_db, monkeypatch) -> None:
     monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
     monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
     
-    # Mock AgentDecision.decide directly
+    # Mock AgentDecision.adecide directly
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
@@ -243,7 +243,7 @@ def test_agent_loop_run_only_without_notify(temp_db, monkeypatch) -> None:
     
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
@@ -308,6 +308,8 @@ def test_agent_decision_prompt_includes_active_facts(temp_db, monkeypatch) -> No
     # Enable Agent Loop
     monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
     monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
+    # "Hello" 会命中 pre-LLM fast path；这里要测的是 Decision LLM 路径
+    monkeypatch.setattr(conversations, "AGENT_DECISION_FAST_PATH", False)
     
     # Mock AgentDecision to capture prompt
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
@@ -403,10 +405,10 @@ def test_agent_loop_summarize_conversation_run(temp_db, monkeypatch) -> None:
     monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
     monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
     
-    # Mock AgentDecision.decide directly
+    # Mock AgentDecision.adecide directly
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
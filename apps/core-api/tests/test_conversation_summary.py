@@ -0,0 +1,135 @@
+"""Tests for rolling conversation summaries (app.services.conversation_summary)."""
+
+import asyncio
+import os
+import tempfile
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from app.db import (
+    Base,
+    ConversationModel,
+    ConversationSummaryModel,
+    MessageModel,
+    MessageRole,
+    RunModel,
+    RunStatus,
+)
+from app.services import conversation_summary, run_messages
+from app.services.conversation_summary import (
+    count_unsummarized_messages,
+    load_history_with_summary,
+    maybe_schedule_rolling_summary,
+)
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def db():
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+    try:
+        os.unlink(db_path)
+    except OSError:
+        pass
+
+
+def _seed(db, n: int) -> list[MessageModel]:
+    now = datetime.now(UTC)
+    db.add(ConversationModel(id="c1", title="t", created_at=now, updated_at=now))
+    messages = []
+    for i in range(n):
+        msg = MessageModel(
+            id=f"m{i}",
+            conversation_id="c1",
+            role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+            content=f"msg {i}",
+            created_at=now + timedelta(seconds=i),
+        )
+        db.add(msg)
+        messages.append(msg)
+    db.commit()
+    return messages
+
+
+def test_history_without_summary_is_plain_tail(db):
+    _seed(db, 5)
+    history = load_history_with_summary(db, "c1", limit=3, exclude_message_id="m4")
+    assert history == [
+        {"role": "user", "content": "msg 2"},
+        {"role": "assistant", "content": "msg 3"},
+    ]
+
+
+def test_summary_replaces_older_messages(db):
+    messages = _seed(db, 8)
+    db.add(ConversationSummaryModel(
+        conversation_id="c1",
+        summary="用户在讨论猫",
+        summarized_until=messages[4].created_at,
+        last_message_id="m4",
+        message_count=5,
+    ))
+    db.commit()
+
+    history = load_history_with_summary(db, "c1")
+    assert history[0] == {"role": "system", "kind": "summary", "content": "用户在讨论猫"}
+    assert [m["content"] for m in history[1:]] == ["msg 5", "msg 6", "msg 7"]
+    assert count_unsummarized_messages(db, "c1") == 3
+
+
+def test_internal_history_loader_uses_summary_and_route_stays_registered(db):
+    """internal 编排读历史时走摘要；execute-orchestration 路由仍然注册。"""
+    from app.api import internal
+
+    messages = _seed(db, 4)
+    db.add(ConversationSummaryModel(
+        conversation_id="c1", summary="S", summarized_until=messages[1].created_at, message_count=2,
+    ))
+    db.commit()
+    history = internal._load_history_messages(db, "c1")
+    assert [m["content"] for m in history] == ["S", "msg 2", "msg 3"]
+    paths = {(route.path, method) for route in internal.router.routes for method in route.methods}
+    assert ("/internal/runs/{run_id}/execute-orchestration", "POST") in paths
+
+
+def test_schedules_single_rolling_run_past_threshold(db, monkeypatch):
+    _seed(db, 6)
+    monkeypatch.setattr(conversation_summary, "SUMMARY_TRIGGER_MESSAGES", 10)
+    assert asyncio.run(maybe_schedule_rolling_summary(db, "c1")) is None
+
+    monkeypatch.setattr(conversation_summary, "SUMMARY_TRIGGER_MESSAGES", 5)
+    run_id = asyncio.run(maybe_schedule_rolling_summary(db, "c1"))
+    assert run_id is not None
+    run = db.query(RunModel).filter(RunModel.id == run_id).one()
+    assert run.type == "summarize_conversation"
+    assert run.input_json["rolling"] is True
+    assert run.input_json["conversation_id"] == "c1"
+
+    # 已有在途的滚动摘要时不重复排队
+    assert asyncio.run(maybe_schedule_rolling_summary(db, "c1")) is None
+
+
+def test_rolling_summary_run_does_not_emit_message(db):
+    _seed(db, 2)
+    run = RunModel(
+        id=str(uuid.uuid4()),
+        type="summarize_conversation",
+        status=RunStatus.SUCCEEDED,
+        conversation_id="c1",
+        input_json={"conversation_id": "c1", "rolling": True},
+        output_json={"summary": "s", "message_count": 2},
+    )
+    db.add(run)
+    db.commit()
+
+    run_messages.emit_run_message(db, run)
+    assert db.query(MessageModel).filter(MessageModel.conversation_id == "c1").count() == 2
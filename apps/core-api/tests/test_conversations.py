@@ -7,7 +7,7 @@ import time
 import uuid
 from datetime import UTC, datetime
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
@@ -1460,11 +1460,13 @@ def test_agent_loop_decision_reply_only(temp_db, monkeypatch) -> None:
     # Enable Agent Loop and mock AgentDecision
     monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
     monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
+    # "Hello" 会命中 pre-LLM fast path；这里要测的是 Decision LLM 路径
+    monkeypatch.setattr(conversations, "AGENT_DECISION_FAST_PATH", False)
     
-    # Mock AgentDecision.decide directly
+    # Mock AgentDecision.adecide directly
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
@@ -1519,10 +1521,10 @@ def test_agent_loop_decision_run_only(temp_db, monkeypatch) -> None:
     monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
     monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
     
-    # Mock AgentDecision.decide directly
+    # Mock AgentDecision.adecide directly
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
@@ -1585,10 +1587,10 @@ def test_agent_loop_decision_reply_and_run(temp_db, monkeypatch) -> None:
     monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
     monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
     
-    # Mock AgentDecision.decide directly
+    # Mock AgentDecision.adecide directly
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
@@ -1644,7 +1646,7 @@ def test_agent_loop_run_code_snippet_injects_conversation_id_into_input(temp_db,
 
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
 
@@ -1688,11 +1690,11 @@ def test_agent_loop_decision_fallback_to_chat_flow(temp_db, monkeypatch) -> None
     monkeypatch.setattr(conversations, "chat_flow", mock_chat_flow)
     monkeypatch.setattr(conversations, "AGENT_WORKER_AVAILABLE", True)
     
-    # Mock AgentDecision.decide directly
+    # Mock AgentDecision.adecide directly
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
         # Make Decision raise an error
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=ValueError("Decision failed"))
+        mock_agent_decision.adecide = AsyncMock(side_effect=ValueError("Decision failed"))
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
@@ -1741,11 +1743,11 @@ def test_agent_loop_run_creation_failure(temp_db, monkeypatch) -> None:
     monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
     monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
     
-    # Mock AgentDecision.decide directly
+    # Mock AgentDecision.adecide directly
     with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class, \
          patch("app.api.conversations._create_run") as mock_create_run:
         mock_agent_decision = MagicMock()
-        mock_agent_decision.decide = MagicMock(side_effect=mock_decide)
+        mock_agent_decision.adecide = AsyncMock(side_effect=mock_decide)
         mock_agent_decision.get_active_facts = MagicMock(return_value=[])
         mock_agent_decision_class.return_value = mock_agent_decision
         
@@ -0,0 +1,133 @@
+"""Tests for the pre-LLM decision fast path (app.services.decision_fast_path)."""
+
+import asyncio
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+from app.api import conversations
+from app.db import Base
+from app.services.decision_fast_path import (
+    DecisionFastPath,
+    FastPathHit,
+    ReplyOnlyPatternClassifier,
+    awaits_user_reply,
+)
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def classifier():
+    return ReplyOnlyPatternClassifier()
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["hi", "Hello!", "谢谢", "好的，谢谢！", "OK 👍", "嗯嗯", "thank you so much", "晚安~", "收到"],
+)
+def test_reply_only_messages_hit(classifier, message):
+    hit = classifier.classify(message)
+    assert hit is not None
+    assert hit.decision == "reply"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "帮我总结一下我们的对话",
+        "帮我跑这段代码：print(1)",
+        "Sleep for 5 seconds",
+        "hello, can you fix this bug",
+        "你好，今天天气怎么样",
+        "ok?",
+        "好的，那请搜索一下最新的新闻",
+        "",
+        "   ",
+    ],
+)
+def test_task_or_open_messages_miss(classifier, message):
+    assert classifier.classify(message) is None
+
+
+def test_hit_reason_names_category(classifier):
+    assert classifier.classify("谢谢").reason == "pattern:thanks"
+    assert classifier.classify("好的谢谢").reason == "pattern:mixed"
+
+
+def test_fast_path_tracks_share_and_plugins():
+    class AlwaysReply:
+        name = "always"
+
+        def classify(self, user_message):
+            return FastPathHit(classifier=self.name, reason="always", confidence=1.0)
+
+    fast_path = DecisionFastPath([ReplyOnlyPatternClassifier()])
+    fast_path.classify("hi")
+    fast_path.classify("帮我总结一下")
+    stats = fast_path.stats()
+    assert stats["turns"] == 2
+    assert stats["fast_path_hits"] == 1
+    assert stats["fast_path_share"] == 0.5
+
+    fast_path.register(AlwaysReply())
+    assert fast_path.classify("帮我总结一下").classifier == "always"
+
+
+def test_consent_after_assistant_offer_is_not_fast_pathed():
+    fast_path = DecisionFastPath([ReplyOnlyPatternClassifier()])
+    offer = [
+        {"role": "user", "content": "这个脚本怎么用"},
+        {"role": "assistant", "content": "要我帮你跑这个脚本吗？"},
+    ]
+    statement = [
+        {"role": "user", "content": "谢谢"},
+        {"role": "assistant", "content": "不客气，随时找我。"},
+    ]
+    assert fast_path.classify("好", history=offer) is None
+    assert fast_path.classify("ok", history=[{"role": "assistant", "content": "Shall I run it now"}]) is None
+    assert fast_path.classify("好", history=statement) is not None
+    assert fast_path.classify("好") is not None
+
+
+def test_awaits_user_reply_only_looks_at_last_assistant_message():
+    assert awaits_user_reply(None) is False
+    assert awaits_user_reply([{"role": "assistant", "content": "需要我整理成表格吗"}]) is True
+    assert awaits_user_reply([{"role": "assistant", "content": "已经整理好了。"}]) is False
+    # 最后一条是用户消息（assistant 还没回），不算在等答复
+    assert awaits_user_reply([
+        {"role": "assistant", "content": "要不要继续？"},
+        {"role": "user", "content": "先不用"},
+    ]) is False
+
+
+def test_create_message_fast_path_skips_decision_llm(monkeypatch):
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        conv = asyncio.run(conversations._create_conversation(
+            conversations.ConversationCreateRequest(title="t"), db
+        ))
+        monkeypatch.setattr(conversations, "AGENT_LOOP_ENABLED", True)
+        monkeypatch.setattr(conversations, "AGENT_DECISION_AVAILABLE", True)
+        monkeypatch.setattr(conversations, "AGENT_DECISION_FAST_PATH", True)
+        chat_result = MagicMock(assistant_reply="你好呀", trace_lines=[], trace_id="t")
+        monkeypatch.setattr(conversations, "chat_flow", MagicMock(return_value=chat_result))
+        monkeypatch.setattr(conversations, "AGENT_WORKER_AVAILABLE", True)
+
+        with patch("app.api.conversations.AgentDecision") as mock_agent_decision_class:
+            result = asyncio.run(conversations._create_message(
+                conv["id"], conversations.MessageCreateRequest(content="你好"), db
+            ))
+            mock_agent_decision_class.assert_not_called()
+
+        assert result["assistant_message"]["content"] == "你好呀"
+        assert result["assistant_message"]["source_ref"]["kind"] == "chat"
+    finally:
+        db.close()
+        engine.dispose()
+        os.unlink(db_path)
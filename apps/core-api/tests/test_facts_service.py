@@ -5,11 +5,10 @@ import os
 import tempfile
 
 import pytest
+from app.services.facts import fact_to_dict, fetch_active_facts, fetch_active_facts_from_store
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.services.facts import fetch_active_facts, fetch_active_facts_from_store, fact_to_dict
-
 try:
     from memory.db import Base
     from memory.facts import MemoryStore
@@ -238,7 +237,7 @@ def test_fetch_active_facts_from_store_vs_http_equivalent_structure(temp_db):
     if not _MEMORY_AVAILABLE:
         pytest.skip("memory package not available")
     from app.api import memory as memory_api
-    from memory.schemas import ProposalPayload, SourceRef, SourceKind
+    from memory.schemas import ProposalPayload, SourceKind, SourceRef
 
     async def run():
         db, _ = temp_db
@@ -296,3 +295,53 @@ def test_fetch_active_facts_from_store_vs_http_equivalent_structure(temp_db):
                 assert s.get(k) == h.get(k), f"index {i} key {k} value mismatch"
 
     asyncio.run(run())
+
+
+def test_select_relevant_facts_modes():
+    """auto 模式在未超限时不挑选；relevance 模式按相关性取 top_k，pinned key 始终保留"""
+    from app.services.facts import select_relevant_facts
+
+    facts = [
+        {"id": "1", "key": "preferred_name", "value": "Alice", "status": "active"},
+        {"id": "2", "key": "favorite_food", "value": "noodles", "status": "active"},
+        {"id": "3", "key": "pet", "value": "cat", "status": "active"},
+    ]
+    assert select_relevant_facts(facts, "any food ideas?", mode="all") is None
+    assert select_relevant_facts(facts, "any food ideas?", mode="auto") is None
+
+    selected = select_relevant_facts(facts, "any food ideas?", mode="relevance", top_k=1)
+    assert [f["key"] for f in selected] == ["preferred_name", "favorite_food"]
+
+    many = facts + [
+        {"id": f"n{i}", "key": f"note_{i}", "value": f"misc {i}", "status": "active"} for i in range(10)
+    ]
+    selected = select_relevant_facts(many, "tell me about my cat", mode="auto", limit=5, top_k=3)
+    assert [f["key"] for f in selected][:2] == ["preferred_name", "pet"]
+    assert len(selected) == 4
+
+
+def test_fetch_active_facts_from_store_with_query_ranks(temp_db, monkeypatch):
+    """带 query 且超过 limit 时按相关性挑选，而不是按 key 截断"""
+    from app.services import facts as facts_service
+    from memory.schemas import ProposalPayload, SourceKind, SourceRef
+
+    monkeypatch.setattr(facts_service, "FACTS_RETRIEVAL_MODE", "auto")
+
+    async def run():
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+        for key, value in [("a_hobby", "chess"), ("b_job", "teacher"), ("z_pet", "a cat named Mochi")]:
+            proposal = await store.create_proposal(
+                payload=ProposalPayload(key=key, value=value, tags=[], ttl_seconds=None),
+                source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id=key, excerpt=None),
+            )
+            await store.accept_proposal(proposal.id, scope=Scope.GLOBAL)
+            _commit_db(db)
+
+        by_key, _ = await fetch_active_facts_from_store(store, limit=1)
+        assert [f["key"] for f in by_key] == ["a_hobby"]
+        ranked, source = await fetch_active_facts_from_store(store, limit=1, query="how is my cat?")
+        assert source == "store"
+        assert [f["key"] for f in ranked] == ["z_pet"]
+
+    asyncio.run(run())
@@ -1,8 +1,20 @@
 import asyncio
 
-from app.main import health
+from agent_worker.llm.instrumentation import llm_call_site
+from agent_worker.llm.stub import StubLLM
+from app.main import health, llm_metrics
 
 
 def test_health_endpoint():
     response = asyncio.run(health())
     assert response == {"status": "ok"}
+
+
+def test_llm_metrics_endpoint_reports_call_sites():
+    with llm_call_site("decision"):
+        StubLLM().generate("hello")
+    response = asyncio.run(llm_metrics())
+    assert response["available"] is True
+    assert response["calls"]["decision"]["calls"] >= 1
+    assert "latency_ms_p95" in response["calls"]["decision"]
+    assert isinstance(response["response_cache"], list)
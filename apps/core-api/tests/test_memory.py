@@ -444,3 +444,214 @@ def test_overwrite_latest_strategy(temp_db) -> None:
     # 验证只有一个 active fact
     facts = asyncio.run(memory.list_facts(scope="global", status="active", store=store))
     assert len(facts["items"]) == 1
+
+
+def test_create_proposals_batch_and_decide(temp_db) -> None:
+    db, _ = temp_db
+    store = MemoryStore(db=db)
+    request = memory.ProposalBatchCreateRequest(
+        items=[
+            memory.ProposalCreateRequest(
+                payload=ProposalPayload(key=key, value=value, tags=[], ttl_seconds=None),
+                source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="batch", excerpt=None),
+            )
+            for key, value in [("preferred_name", "Alice"), ("timezone", "UTC")]
+        ]
+    )
+    created = asyncio.run(memory.create_proposals_batch(request, store=store))
+    _commit_db(db)
+    assert [item["status"] for item in created["items"]] == ["pending", "pending"]
+    for item in created["items"]:
+        assert_proposal_schema(item["proposal"])
+    ids = [item["proposal"]["id"] for item in created["items"]]
+
+    decisions = memory.ProposalDecisionBatchRequest(
+        items=[
+            {"proposal_id": ids[0], "action": "accept", "scope": "global"},
+            {"proposal_id": ids[1], "action": "reject", "reason": "wrong"},
+        ]
+    )
+    decided = asyncio.run(memory.decide_proposals_batch(decisions, store=store))
+    _commit_db(db)
+    assert decided["items"][0]["proposal"]["status"] == "accepted"
+    assert_fact_schema(decided["items"][0]["fact"], "active")
+    assert decided["items"][1]["proposal"]["status"] == "rejected"
+    assert decided["items"][1]["fact"] is None
+
+
+def test_decide_proposals_batch_rolls_back_on_failure(temp_db) -> None:
+    db, _ = temp_db
+    store = MemoryStore(db=db)
+    request = memory.ProposalCreateRequest(
+        payload=ProposalPayload(key="preferred_name", value="Alice", tags=[], ttl_seconds=None),
+        source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="test", excerpt=None),
+    )
+    proposal_id = asyncio.run(memory.create_proposal(request, store=store))["proposal"]["id"]
+    _commit_db(db)
+
+    decisions = memory.ProposalDecisionBatchRequest(
+        items=[
+            {"proposal_id": proposal_id, "action": "accept"},
+            {"proposal_id": "missing", "action": "reject"},
+        ]
+    )
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(memory.decide_proposals_batch(decisions, store=store))
+    assert excinfo.value.status_code == 400
+    assert "item 1" in excinfo.value.detail
+    _commit_db(db)
+
+    proposal = asyncio.run(memory.get_proposal(proposal_id, store=store))
+    assert proposal["status"] == "pending"
+    assert asyncio.run(memory.list_facts(store=store)) == {"items": []}
+
+
+def test_list_scoped_facts_returns_global_and_session(temp_db) -> None:
+    db, _ = temp_db
+    store = MemoryStore(db=db)
+    for key, scope, session_id in [
+        ("preferred_name", Scope.GLOBAL, None),
+        ("current_topic", Scope.SESSION, "conv1"),
+    ]:
+        request = memory.ProposalCreateRequest(
+            payload=ProposalPayload(key=key, value="v", tags=[], ttl_seconds=None),
+            source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="test", excerpt=None),
+        )
+        proposal_id = asyncio.run(memory.create_proposal(request, store=store))["proposal"]["id"]
+        _commit_db(db)
+        accept = memory.ProposalAcceptRequest(scope=scope, session_id=session_id)
+        asyncio.run(memory.accept_proposal(proposal_id, accept, store=store))
+        _commit_db(db)
+
+    response = asyncio.run(memory.list_scoped_facts(session_id="conv1", store=store))
+    assert [f["key"] for f in response["global"]] == ["preferred_name"]
+    assert [f["key"] for f in response["session"]] == ["current_topic"]
+    assert_fact_schema(response["session"][0], "active")
+
+
+def test_fact_actions_batch_reports_per_item(temp_db) -> None:
+    db, _ = temp_db
+    store = MemoryStore(db=db)
+    request = memory.ProposalCreateRequest(
+        payload=ProposalPayload(key="likes", value="tea", tags=[], ttl_seconds=None),
+        source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="test", excerpt=None),
+    )
+    proposal_id = asyncio.run(memory.create_proposal(request, store=store))["proposal"]["id"]
+    _commit_db(db)
+    fact_id = asyncio.run(
+        memory.accept_proposal(proposal_id, memory.ProposalAcceptRequest(), store=store)
+    )["fact"]["id"]
+    _commit_db(db)
+
+    batch = memory.FactActionBatchRequest(
+        items=[
+            {"fact_id": fact_id, "action": "archive"},
+            {"fact_id": "missing", "action": "revoke"},
+        ],
+        atomic=False,
+    )
+    result = asyncio.run(memory.apply_fact_actions_batch(batch, store=store))
+    _commit_db(db)
+    assert result["items"][0]["ok"] is True
+    assert_fact_schema(result["items"][0]["fact"], "archived")
+    assert result["items"][1] == {"ok": False, "index": 1, "error": "fact missing not found"}
+
+
+def test_audit_cursor_pagination_and_ndjson_export(temp_db, tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import json
+    from datetime import datetime, timedelta
+
+    from memory import audit as audit_module
+    from memory import audit_archive as archive_module
+    from memory.db import AuditEventModel
+    from memory.schemas import AuditEventType
+
+    db, _ = temp_db
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    monkeypatch.setattr(audit_module, "SessionLocal", session_factory)
+    monkeypatch.setattr(archive_module, "SessionLocal", session_factory)
+    monkeypatch.setenv("LONELYCAT_MEMORY_AUDIT_ARCHIVE_DIR", str(tmp_path / "archive"))
+
+    start = datetime.utcnow() - timedelta(days=200)
+    for i in range(12):
+        db.add(AuditEventModel(
+            id=f"e{i:02d}", type=AuditEventType.FACT_CREATED, actor_kind="system", actor_id="system",
+            target_type="fact", target_id="f1", created_at=start + timedelta(days=20 * i),
+        ))
+    db.commit()
+
+    first = asyncio.run(memory.list_audit_events(limit=5, store=None))
+    second = asyncio.run(memory.list_audit_events(limit=5, cursor=first["next_cursor"], store=None))
+    assert [e["id"] for e in first["items"] + second["items"]] == [f"e{i:02d}" for i in range(11, 1, -1)]
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(memory.list_audit_events(cursor="bogus", store=None))
+    assert exc_info.value.status_code == 400
+
+    stats = asyncio.run(memory.archive_audit_events(older_than_days=90))
+    assert stats["archived"] == 6
+
+    async def _collect(response):
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    response = asyncio.run(memory.export_audit_events())
+    assert response.media_type == "application/x-ndjson"
+    lines = [json.loads(line) for line in asyncio.run(_collect(response)).splitlines()]
+    assert [line["id"] for line in lines] == [f"e{i:02d}" for i in range(12)]
+
+    response = asyncio.run(memory.export_audit_events(include_archived=False))
+    assert len(asyncio.run(_collect(response)).splitlines()) == 6
+
+
+def test_archive_audit_events_runs_off_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    import threading
+
+    seen = {}
+
+    def _archive(self, older_than_days):
+        seen["thread"] = threading.get_ident()
+        return {"archived": 0, "older_than_days": older_than_days}
+
+    monkeypatch.setattr(memory.AuditArchive, "archive_older_than", _archive)
+
+    async def _call():
+        seen["loop_thread"] = threading.get_ident()
+        return await memory.archive_audit_events(older_than_days=30)
+
+    assert asyncio.run(_call())["older_than_days"] == 30
+    assert seen["thread"] != seen["loop_thread"]
+
+
+def test_create_proposals_batch_auto_accept_is_all_or_nothing(temp_db, monkeypatch) -> None:
+    db, _ = temp_db
+    store = MemoryStore(db=db)
+    monkeypatch.setenv("MEMORY_AUTO_ACCEPT", "1")
+
+    def _request(atomic: bool) -> memory.ProposalBatchCreateRequest:
+        # 第二条 scope_hint=session 但没有 session_id，自动接受必然失败
+        return memory.ProposalBatchCreateRequest(
+            atomic=atomic,
+            items=[
+                memory.ProposalCreateRequest(
+                    payload=ProposalPayload(key=key, value="v", tags=[], ttl_seconds=None),
+                    source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="batch", excerpt=None),
+                    confidence=0.95,
+                    scope_hint=scope,
+                )
+                for key, scope in [("timezone", Scope.GLOBAL), ("mood", Scope.SESSION)]
+            ],
+        )
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(memory.create_proposals_batch(_request(atomic=True), store=store))
+    assert excinfo.value.status_code == 400
+    assert "item 1" in excinfo.value.detail
+    _commit_db(db)
+    # 创建与接受在同一事务内回滚：没有留下可被重试重复的 proposal/fact
+    assert asyncio.run(memory.list_proposals(status="all", store=store))["items"] == []
+    assert asyncio.run(memory.list_facts(status="all", store=store))["items"] == []
+
+    created = asyncio.run(memory.create_proposals_batch(_request(atomic=False), store=store))
+    _commit_db(db)
+    assert [item["status"] for item in created["items"]] == ["accepted", "pending"]
+    assert_fact_schema(created["items"][0]["fact"], "active")
+    assert created["items"][1]["fact"] is None
@@ -0,0 +1,46 @@
+"""Tests for the background memory sweeper."""
+
+import asyncio
+
+from app.services import memory_sweeper
+
+
+class _Store:
+    def __init__(self, calls, fail=False):
+        self._calls = calls
+        self._fail = fail
+
+    async def check_expired_proposals(self):
+        self._calls.append(1)
+        if self._fail:
+            raise RuntimeError("db locked")
+        return ["p1"]
+
+
+def test_sweep_once_returns_ids_and_swallows_errors():
+    calls = []
+    assert asyncio.run(memory_sweeper.sweep_expired_proposals_once(lambda: _Store(calls))) == ["p1"]
+    assert asyncio.run(memory_sweeper.sweep_expired_proposals_once(lambda: _Store(calls, fail=True))) == []
+    assert len(calls) == 2
+
+
+def test_sweeper_runs_periodically_until_cancelled():
+    calls = []
+
+    async def run():
+        task = asyncio.create_task(
+            memory_sweeper.run_memory_sweeper(0.01, store_factory=lambda: _Store(calls))
+        )
+        await asyncio.sleep(0.05)
+        await memory_sweeper.stop_memory_sweeper(task)
+        assert task.cancelled()
+
+    asyncio.run(run())
+    assert len(calls) >= 2
+
+
+def test_start_memory_sweeper_disabled_by_interval():
+    async def run():
+        assert memory_sweeper.start_memory_sweeper(0) is None
+
+    asyncio.run(run())
@@ -130,6 +130,7 @@ type FetchProposalsResponse = {
 
 type FetchAuditEventsResponse = {
   items: AuditEvent[];
+  next_cursor?: string | null;
 };
 
 export type ProposeFactResponse = {
@@ -339,6 +340,7 @@ export const fetchAuditEvents = async (params: {
   event_type?: string;
   limit?: number;
   offset?: number;
+  cursor?: string;
 } = {}): Promise<FetchAuditEventsResponse> => {
   const url = buildUrl("/memory/audit", {
     target_type: params.target_type,
@@ -346,6 +348,7 @@ export const fetchAuditEvents = async (params: {
     event_type: params.event_type,
     limit: params.limit?.toString(),
     offset: params.offset?.toString(),
+    cursor: params.cursor,
   });
   const response = await fetch(url);
   if (!response.ok) {
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import base64
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from memory.db import AuditEventModel, SessionLocal
@@ -97,60 +99,158 @@ class AuditLogger:
         event_type: Optional[AuditEventType] = None,
         limit: int = 100,
         offset: int = 0,
+        cursor: Optional[str] = None,
     ) -> List[AuditEvent]:
-        """查询审计事件
+        """查询审计事件（按 created_at、id 倒序）
         
         Args:
             target_type: 目标类型过滤（可选）
             target_id: 目标 ID 过滤（可选）
             event_type: 事件类型过滤（可选）
             limit: 返回数量限制
-            offset: 偏移量
+            offset: 偏移量（cursor 为空时生效；深翻页请用 cursor）
+            cursor: 上一页返回的 next_cursor（keyset 分页，可选）
             
         Returns:
             审计事件列表
         """
+        return self.get_events_page(
+            target_type=target_type,
+            target_id=target_id,
+            event_type=event_type,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )[0]
+
+    def get_events_page(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[str] = None,
+        event_type: Optional[AuditEventType] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[AuditEvent], Optional[str]]:
+        """同 get_events，额外返回下一页的 cursor（没有更多时为 None）
+        
+        keyset 条件 (created_at, id) < cursor 走 (target_id|type, created_at) 复合索引，
+        翻页开销与页数无关。
+        
+        Raises:
+            ValueError: cursor 无法解析
+        """
         db = self._get_db()
         try:
-            query = db.query(AuditEventModel)
-            
-            if target_type:
-                query = query.filter(AuditEventModel.target_type == target_type)
-            if target_id:
-                query = query.filter(AuditEventModel.target_id == target_id)
-            if event_type:
-                query = query.filter(AuditEventModel.type == event_type)
-            
-            query = query.order_by(AuditEventModel.created_at.desc())
-            query = query.limit(limit).offset(offset)
-            
-            events = query.all()
-            
-            result = []
-            for event_model in events:
-                diff = None
-                if event_model.diff_before is not None or event_model.diff_after is not None:
-                    diff = AuditEventDiff(
-                        before=event_model.diff_before,
-                        after=event_model.diff_after,
+            query = self._filtered(db, target_type, target_id, event_type)
+            if cursor:
+                created_at, event_id = decode_cursor(cursor)
+                query = query.filter(
+                    or_(
+                        AuditEventModel.created_at < created_at,
+                        and_(AuditEventModel.created_at == created_at, AuditEventModel.id < event_id),
                     )
-                
-                result.append(AuditEvent(
-                    id=event_model.id,
-                    type=event_model.type,
-                    actor=AuditActor(
-                        kind=event_model.actor_kind,
-                        id=event_model.actor_id,
-                    ),
-                    target=AuditTarget(
-                        type=event_model.target_type,
-                        id=event_model.target_id,
-                    ),
-                    request_id=event_model.request_id,
-                    diff=diff,
-                    created_at=event_model.created_at,
-                ))
+                )
+            query = query.order_by(AuditEventModel.created_at.desc(), AuditEventModel.id.desc())
+            if not cursor and offset:
+                query = query.offset(offset)
+            models = query.limit(limit + 1).all()
             
-            return result
+            next_cursor = None
+            if len(models) > limit:
+                models = models[:limit]
+                next_cursor = encode_cursor(models[-1].created_at, models[-1].id)
+            return [model_to_event(model) for model in models], next_cursor
         finally:
             self._close_db(db)
+
+    def iter_events(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[str] = None,
+        event_type: Optional[AuditEventType] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[AuditEvent]:
+        """按时间正序流式遍历审计事件：每次按 keyset 取 chunk_size 行，不一次性载入全部"""
+        db = self._get_db()
+        try:
+            last: Optional[Tuple[datetime, str]] = None
+            while True:
+                query = self._filtered(db, target_type, target_id, event_type)
+                if since is not None:
+                    query = query.filter(AuditEventModel.created_at >= since)
+                if until is not None:
+                    query = query.filter(AuditEventModel.created_at < until)
+                if last is not None:
+                    query = query.filter(
+                        or_(
+                            AuditEventModel.created_at > last[0],
+                            and_(AuditEventModel.created_at == last[0], AuditEventModel.id > last[1]),
+                        )
+                    )
+                models = query.order_by(AuditEventModel.created_at, AuditEventModel.id).limit(chunk_size).all()
+                for model in models:
+                    yield model_to_event(model)
+                if len(models) < chunk_size:
+                    return
+                last = (models[-1].created_at, models[-1].id)
+        finally:
+            self._close_db(db)
+
+    @staticmethod
+    def _filtered(
+        db: Session,
+        target_type: Optional[str],
+        target_id: Optional[str],
+        event_type: Optional[AuditEventType],
+    ):
+        query = db.query(AuditEventModel)
+        if target_type:
+            query = query.filter(AuditEventModel.target_type == target_type)
+        if target_id:
+            query = query.filter(AuditEventModel.target_id == target_id)
+        if event_type:
+            query = query.filter(AuditEventModel.type == event_type)
+        return query
+
+
+def model_to_event(event_model: AuditEventModel) -> AuditEvent:
+    """将数据库模型转换为 AuditEvent schema"""
+    diff = None
+    if event_model.diff_before is not None or event_model.diff_after is not None:
+        diff = AuditEventDiff(
+            before=event_model.diff_before,
+            after=event_model.diff_after,
+        )
+    return AuditEvent(
+        id=event_model.id,
+        type=event_model.type,
+        actor=AuditActor(
+            kind=event_model.actor_kind,
+            id=event_model.actor_id,
+        ),
+        target=AuditTarget(
+            type=event_model.target_type,
+            id=event_model.target_id,
+        ),
+        request_id=event_model.request_id,
+        diff=diff,
+        created_at=event_model.created_at,
+    )
+
+
+def encode_cursor(created_at: datetime, event_id: str) -> str:
+    """keyset 分页 cursor：(created_at, id) 的 urlsafe base64"""
+    raw = f"{created_at.isoformat()}|{event_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, event_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), event_id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"invalid cursor: {cursor}") from exc
@@ -0,0 +1,223 @@
+"""审计事件归档：把超过 N 天的事件从 audit_events 表移到按月分段的压缩 NDJSON
+
+目录结构（LONELYCAT_MEMORY_AUDIT_ARCHIVE_DIR，默认 ./lonelycat_audit_archive）：
+    audit-2025-01.ndjson.gz   每行一个事件（与 /memory/audit 的序列化一致），按 (created_at, id) 正序
+    index.json                每个分段的条数、字节数、时间范围与各类型计数
+
+归档按块进行：追加 gzip member 并 fsync → 原子更新 index.json（记录分段字节数）→ 删除已归档行并提交。
+中途崩溃时，下次归档先把分段截断到 index 记录的字节数，已写入 index 但未删除的行按水位跳过，不会重复。
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from sqlalchemy.orm import Session
+
+from memory.audit import model_to_event
+from memory.db import AuditEventModel, SessionLocal
+from memory.schemas import AuditEvent
+
+DEFAULT_ARCHIVE_DIR = "./lonelycat_audit_archive"
+INDEX_FILE = "index.json"
+ARCHIVE_CHUNK_ROWS = 5000
+
+
+def event_to_record(event: AuditEvent) -> Dict[str, Any]:
+    """AuditEvent → NDJSON 记录（结构与 /memory/audit 返回的单条事件一致）"""
+    record: Dict[str, Any] = {
+        "id": event.id,
+        "type": event.type.value,
+        "actor": {"kind": event.actor.kind, "id": event.actor.id},
+        "target": {"type": event.target.type, "id": event.target.id},
+        "request_id": event.request_id,
+        "created_at": event.created_at.isoformat(),
+    }
+    if event.diff:
+        record["diff"] = {"before": event.diff.before, "after": event.diff.after}
+    return record
+
+
+class AuditArchive:
+    """按月分段的审计归档"""
+
+    def __init__(self, root: Union[str, Path, None] = None) -> None:
+        self.root = Path(root or os.getenv("LONELYCAT_MEMORY_AUDIT_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR))
+
+    # ---- 归档 ----
+
+    def archive_older_than(
+        self,
+        days: int,
+        *,
+        db: Optional[Session] = None,
+        now: Optional[datetime] = None,
+        chunk_rows: int = ARCHIVE_CHUNK_ROWS,
+    ) -> Dict[str, Any]:
+        """把 created_at 早于 now - days 的事件移入归档
+
+        Returns:
+            {"archived": 条数, "cutoff": ISO 时间, "segments": {月份: 本次写入条数}}
+        """
+        if days < 0:
+            raise ValueError("days must be >= 0")
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=days)
+        session = db or SessionLocal()
+        archived = 0
+        touched: Dict[str, int] = {}
+        try:
+            index = self._load_index()
+            self._truncate_to_index(index)
+            while True:
+                models = (
+                    session.query(AuditEventModel)
+                    .filter(AuditEventModel.created_at < cutoff)
+                    .order_by(AuditEventModel.created_at, AuditEventModel.id)
+                    .limit(chunk_rows)
+                    .all()
+                )
+                if not models:
+                    break
+                by_month: Dict[str, List[AuditEventModel]] = {}
+                for model in models:
+                    by_month.setdefault(model.created_at.strftime("%Y-%m"), []).append(model)
+                for month, rows in by_month.items():
+                    written = self._append_segment(index, month, rows)
+                    touched[month] = touched.get(month, 0) + written
+                    archived += written
+                self._write_index(index)
+                ids = [model.id for model in models]
+                session.query(AuditEventModel).filter(AuditEventModel.id.in_(ids)).delete(synchronize_session=False)
+                session.commit()
+                if len(models) < chunk_rows:
+                    break
+        finally:
+            if db is None:
+                session.close()
+        return {"archived": archived, "cutoff": cutoff.isoformat(), "segments": touched}
+
+    # ---- 读取 ----
+
+    def segments(self) -> Dict[str, Dict[str, Any]]:
+        """index.json 中的分段信息：{月份: {file, count, bytes, first_created_at, last_created_at, types}}"""
+        return self._load_index()["segments"]
+
+    def iter_records(
+        self,
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        target_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """按时间正序流式读取归档事件；只打开与 [since, until) 有交集的月份分段"""
+        segments = self.segments()
+        for month in sorted(segments):
+            meta = segments[month]
+            if until is not None and meta["first_created_at"] >= _naive_iso(until):
+                continue
+            if since is not None and meta["last_created_at"] < _naive_iso(since):
+                continue
+            if event_type and event_type not in meta.get("types", {}):
+                continue
+            path = self.root / meta["file"]
+            with open(path, "rb") as raw:
+                # 只读到 index 记录的字节数，忽略崩溃残留的尾部
+                with gzip.GzipFile(fileobj=_Bounded(raw, meta["bytes"])) as handle:
+                    for line in handle:
+                        record = json.loads(line)
+                        created_at = record["created_at"]
+                        if since is not None and _naive_iso(created_at) < _naive_iso(since):
+                            continue
+                        if until is not None and _naive_iso(created_at) >= _naive_iso(until):
+                            continue
+                        if target_id and record["target"]["id"] != target_id:
+                            continue
+                        if event_type and record["type"] != event_type:
+                            continue
+                        yield record
+
+    # ---- 内部 ----
+
+    def _append_segment(self, index: Dict[str, Any], month: str, rows: List[AuditEventModel]) -> int:
+        meta = index["segments"].setdefault(
+            month,
+            {"file": f"audit-{month}.ndjson.gz", "count": 0, "bytes": 0, "first_created_at": None,
+             "last_created_at": None, "last_id": None, "types": {}},
+        )
+        # 水位之前的行已写入分段（上次归档在删除前中断），只需删除
+        watermark = (meta["last_created_at"], meta["last_id"])
+        fresh = [
+            row for row in rows
+            if meta["last_id"] is None or (_naive_iso(row.created_at), row.id) > watermark
+        ]
+        if not fresh:
+            return 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / meta["file"]
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as handle:
+                for row in fresh:
+                    record = event_to_record(model_to_event(row))
+                    handle.write((json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+            meta["bytes"] = raw.tell()
+        meta["count"] += len(fresh)
+        meta["first_created_at"] = meta["first_created_at"] or _naive_iso(fresh[0].created_at)
+        meta["last_created_at"] = _naive_iso(fresh[-1].created_at)
+        meta["last_id"] = fresh[-1].id
+        for row in fresh:
+            type_name = getattr(row.type, "value", str(row.type))
+            meta["types"][type_name] = meta["types"].get(type_name, 0) + 1
+        return len(fresh)
+
+    def _truncate_to_index(self, index: Dict[str, Any]) -> None:
+        for meta in index["segments"].values():
+            path = self.root / meta["file"]
+            if path.exists() and path.stat().st_size > meta["bytes"]:
+                with open(path, "r+b") as handle:
+                    handle.truncate(meta["bytes"])
+
+    def _load_index(self) -> Dict[str, Any]:
+        path = self.root / INDEX_FILE
+        if not path.exists():
+            return {"version": 1, "segments": {}}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (INDEX_FILE + ".tmp")
+        tmp.write_text(json.dumps(index, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.root / INDEX_FILE)
+
+
+class _Bounded:
+    """只暴露文件前 limit 字节的只读包装（供 GzipFile 读取）"""
+
+    def __init__(self, raw: Any, limit: int) -> None:
+        self._raw = raw
+        self._remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._raw.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+def _naive_iso(value: Union[str, datetime]) -> str:
+    """统一为无时区的 UTC ISO 字符串，便于与 SQLite 存储的 naive 时间比较"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 def _utc_now() -> datetime:
     return datetime.now(timezone.utc)
@@ -17,10 +17,13 @@ from sqlalchemy import (
     Enum as SQLEnum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     create_engine,
+    inspect,
+    text,
 )
 from sqlalchemy.orm import declarative_base, sessionmaker
 
@@ -67,6 +70,13 @@ class ProposalModel(Base):
     source_ref_excerpt = Column(Text, nullable=True)
     created_at = Column(DateTime, nullable=False, default=_utc_now)
     updated_at = Column(DateTime, nullable=False, default=_utc_now, onupdate=_utc_now)
+    # created_at + ttl_seconds（创建时写入）；无 TTL 为 NULL
+    expires_at = Column(DateTime, nullable=True)
+
+    # 过期清扫：status=pending 且 expires_at 已到期的范围扫描
+    __table_args__ = (
+        Index("ix_proposals_status_expires_at", "status", "expires_at"),
+    )
 
 
 class FactModel(Base):
@@ -88,8 +98,14 @@ class FactModel(Base):
     created_at = Column(DateTime, nullable=False, default=_utc_now)
     updated_at = Column(DateTime, nullable=False, default=_utc_now, onupdate=_utc_now)
 
-    # 复合索引：用于查询同一 scope/key 的 active facts
+    # 复合索引：
+    # - key + scope + status + session/project：accept proposal 时的冲突检测（_detect_conflict）
+    # - scope + status + session/project + created_at：list_facts / list_scoped_facts 过滤并按创建时间倒序
     __table_args__ = (
+        Index("ix_facts_conflict_session", "key", "scope", "status", "session_id"),
+        Index("ix_facts_conflict_project", "key", "scope", "status", "project_id"),
+        Index("ix_facts_list_session", "scope", "status", "session_id", "created_at"),
+        Index("ix_facts_list_project", "scope", "status", "project_id", "created_at"),
         {"sqlite_autoincrement": True},
     )
 
@@ -109,6 +125,12 @@ class AuditEventModel(Base):
     diff_after = Column(JSON, nullable=True)
     created_at = Column(DateTime, nullable=False, default=_utc_now, index=True)
 
+    # 按目标 / 类型查最近事件（keyset 分页按 created_at, id 倒序）
+    __table_args__ = (
+        Index("ix_audit_events_target_created", "target_id", "created_at", "id"),
+        Index("ix_audit_events_type_created", "type", "created_at", "id"),
+    )
+
 
 class KeyPolicyModel(Base):
     """Key Policy 数据库模型（可选，用于存储 key 的冲突解决策略）"""
@@ -121,8 +143,44 @@ class KeyPolicyModel(Base):
 
 
 def init_db() -> None:
-    """初始化数据库，创建所有表"""
+    """初始化数据库，创建所有表
+
+    create_all 不会给已存在的表补建新索引，这里对 facts 的索引单独 checkfirst 创建。
+    """
     Base.metadata.create_all(bind=engine)
+    _migrate_proposals_expires_at()
+    for model in (ProposalModel, FactModel, AuditEventModel):
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _migrate_proposals_expires_at() -> None:
+    """迁移：为 proposals 表添加 expires_at 列，并为已有的 pending + TTL proposal 回填"""
+    try:
+        inspector = inspect(engine)
+        if "proposals" not in inspector.get_table_names():
+            return
+        columns = [col["name"] for col in inspector.get_columns("proposals")]
+        if "expires_at" in columns:
+            return
+        with engine.connect() as conn:
+            conn.execute(text("ALTER TABLE proposals ADD COLUMN expires_at DATETIME"))
+            conn.commit()
+        db = SessionLocal()
+        try:
+            pending = db.query(ProposalModel).filter(
+                ProposalModel.status == ProposalStatus.PENDING,
+                # 与 facts._expires_at 一致：ttl_seconds 为 0 表示永不过期
+                ProposalModel.ttl_seconds > 0,
+            ).all()
+            for proposal in pending:
+                proposal.expires_at = proposal.created_at + timedelta(seconds=proposal.ttl_seconds)
+            db.commit()
+        finally:
+            db.close()
+    except Exception as e:
+        # 迁移失败不影响启动，只记录错误
+        print(f"Warning: Failed to migrate proposals.expires_at column: {e}")
 
 
 def get_db():
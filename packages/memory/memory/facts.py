@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import json
 import uuid
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, insert, or_, update
 from sqlalchemy.orm import Session
 
 from memory.audit import AuditLogger
-from memory.db import FactModel, KeyPolicyModel, ProposalModel, SessionLocal
+from memory.db import AuditEventModel, FactModel, KeyPolicyModel, ProposalModel, SessionLocal
+from memory.key_policy import get_key_policy_resolver
 from memory.schemas import (
     AuditActor,
     AuditEventDiff,
@@ -17,8 +19,10 @@ from memory.schemas import (
     AuditTarget,
     ConflictStrategy,
     Fact,
+    FactAction,
     FactStatus,
     Proposal,
+    ProposalDecision,
     ProposalPayload,
     ProposalStatus,
     Scope,
@@ -27,6 +31,41 @@ from memory.schemas import (
 )
 
 
+class BatchItemError(ValueError):
+    """批量操作中某一条失败（整批已回滚）"""
+
+    def __init__(self, index: int, message: str):
+        super().__init__(f"item {index}: {message}")
+        self.index = index
+        self.message = message
+
+
+# 正在执行的批量事务 (store, session)：嵌套的批量操作复用同一会话，随外层一起提交或回滚
+_active_batch: ContextVar[Optional[Tuple[Any, Session]]] = ContextVar("memory_active_batch", default=None)
+
+# 批量 fact 操作：action -> (允许的当前状态, 目标状态, 审计事件类型)
+_FACT_ACTIONS = {
+    "revoke": ((FactStatus.ACTIVE,), FactStatus.REVOKED, AuditEventType.FACT_REVOKED),
+    "archive": ((FactStatus.ACTIVE,), FactStatus.ARCHIVED, AuditEventType.FACT_ARCHIVED),
+    "reactivate": ((FactStatus.REVOKED, FactStatus.ARCHIVED), FactStatus.ACTIVE, AuditEventType.FACT_REACTIVATED),
+}
+
+
+def _conflict_key(
+    key: str,
+    scope: Scope,
+    project_id: Optional[str],
+    session_id: Optional[str],
+) -> Tuple[Any, ...]:
+    """与 _detect_conflict 相同的冲突维度：global 只看 key，project/session 再区分对应 id"""
+    return (
+        key,
+        scope,
+        project_id if scope == Scope.PROJECT else None,
+        session_id if scope == Scope.SESSION else None,
+    )
+
+
 class MemoryStore:
     """Memory 存储实现，使用 SQLite 数据库"""
 
@@ -97,7 +136,7 @@ class MemoryStore:
         )
 
     def _get_key_policy(self, key: str, db: Session) -> ConflictStrategy:
-        """获取 key 的冲突解决策略
+        """获取 key 的冲突解决策略（key_policies 表优先，其次内置单值/多值规则；结果进程内缓存）
         
         Args:
             key: 要查询的 key
@@ -106,35 +145,32 @@ class MemoryStore:
         Returns:
             冲突解决策略
         """
-        # 先查询数据库中的策略配置
-        policy = db.query(KeyPolicyModel).filter(KeyPolicyModel.key == key).first()
-        if policy:
-            return ConflictStrategy(policy.strategy)
-        
-        # 默认策略：根据 key 的特征判断
-        # 单值 key（常见模式）
-        single_valued_keys = {
-            "preferred_name", "timezone", "language", "email", "phone",
-            "project_lonelycat_goal", "project_*_goal",  # 项目目标通常是单值
-        }
-        
-        # 检查是否匹配单值 key 模式
-        for pattern in single_valued_keys:
-            if pattern.endswith("*") and key.startswith(pattern[:-1]):
-                return ConflictStrategy.OVERWRITE_LATEST
-            if key == pattern:
-                return ConflictStrategy.OVERWRITE_LATEST
-        
-        # 多值 key（常见模式）
-        multi_valued_keys = {
-            "favorite_tools", "projects", "constraints", "skills", "tags",
-        }
-        
-        if key in multi_valued_keys or key.endswith("[]") or key.endswith("_list"):
-            return ConflictStrategy.KEEP_BOTH
-        
-        # 默认使用 overwrite_latest
-        return ConflictStrategy.OVERWRITE_LATEST
+        return get_key_policy_resolver().resolve(key, db)
+
+    async def set_key_policy(self, key: str, strategy: ConflictStrategy) -> None:
+        """配置 key 的冲突解决策略（覆盖已有配置）"""
+        db = self._get_db()
+        try:
+            policy = db.query(KeyPolicyModel).filter(KeyPolicyModel.key == key).first()
+            if policy is None:
+                db.add(KeyPolicyModel(key=key, strategy=strategy.value))
+            else:
+                policy.strategy = strategy.value
+            db.flush()
+        finally:
+            self._close_db(db)
+        get_key_policy_resolver().invalidate()
+
+    async def delete_key_policy(self, key: str) -> bool:
+        """删除 key 的策略配置（回到内置规则）；不存在时返回 False"""
+        db = self._get_db()
+        try:
+            deleted = db.query(KeyPolicyModel).filter(KeyPolicyModel.key == key).delete()
+            db.flush()
+        finally:
+            self._close_db(db)
+        get_key_policy_resolver().invalidate()
+        return bool(deleted)
 
     def _detect_conflict(
         self,
@@ -218,6 +254,7 @@ class MemoryStore:
                 source_ref_excerpt=source_ref.excerpt,
                 created_at=now,
                 updated_at=now,
+                expires_at=_expires_at(now, payload.ttl_seconds),
             )
             
             db.add(proposal_model)
@@ -296,7 +333,7 @@ class MemoryStore:
         
         Args:
             proposal_id: Proposal ID
-            resolved_reason: 拒绝原因（可选）
+            resolved_reason: 拒绝原因（可选，记录在审计事件的 diff.after 中）
             actor: 执行者（可选，默认为 system）
             
         Returns:
@@ -326,6 +363,7 @@ class MemoryStore:
                 event_type=AuditEventType.PROPOSAL_REJECTED,
                 actor=actor or AuditActor(kind="system", id="system"),
                 target=AuditTarget(type="proposal", id=proposal_id),
+                diff=AuditEventDiff(after={"reason": resolved_reason}) if resolved_reason else None,
             )
             
             return self._model_to_proposal(model)
@@ -416,7 +454,7 @@ class MemoryStore:
             if final_scope == Scope.PROJECT and project_id is None:
                 raise ValueError("project_id is required when scope=project")
             if final_scope == Scope.SESSION and session_id is None:
-                raise ValueError("session_id is required when session=session")
+                raise ValueError("session_id is required when scope=session")
             
             # 确定冲突解决策略
             if strategy is None:
@@ -666,6 +704,40 @@ class MemoryStore:
         finally:
             self._close_db(db)
 
+    async def list_scoped_facts(
+        self,
+        session_id: Optional[str] = None,
+        status: Optional[FactStatus] = None,
+    ) -> Dict[Scope, List[Fact]]:
+        """一次查询获取 global + session scope 的 Fact
+        
+        Args:
+            session_id: session_id（为空时只返回 global）
+            status: 状态过滤（可选）
+            
+        Returns:
+            {Scope.GLOBAL: [...], Scope.SESSION: [...]}，各自按 created_at 倒序
+        """
+        db = self._get_db()
+        try:
+            scope_filter = FactModel.scope == Scope.GLOBAL
+            if session_id is not None:
+                scope_filter = or_(
+                    scope_filter,
+                    and_(FactModel.scope == Scope.SESSION, FactModel.session_id == session_id),
+                )
+            query = db.query(FactModel).filter(scope_filter)
+            if status:
+                query = query.filter(FactModel.status == status)
+            query = query.order_by(FactModel.created_at.desc())
+            
+            result: Dict[Scope, List[Fact]] = {Scope.GLOBAL: [], Scope.SESSION: []}
+            for model in query.all():
+                result[model.scope].append(self._model_to_fact(model))
+            return result
+        finally:
+            self._close_db(db)
+
     async def revoke_fact(
         self,
         fact_id: str,
@@ -792,37 +864,444 @@ class MemoryStore:
         finally:
             self._close_db(db)
 
-    async def check_expired_proposals(self) -> List[str]:
-        """检查并过期过期的 Proposal（基于 TTL）
+    async def _run_batch(self, operation):
+        """在单个事务中执行批量操作：全部写入后只提交一次，抛异常则整批回滚
+
+        operation 接收共享的数据库会话，返回批量结果。在另一个批量操作内部调用时直接复用外层会话，
+        由外层统一提交/回滚。
+        """
+        active = _active_batch.get()
+        if active is not None and active[0] is self:
+            return await operation(active[1])
+        if self._use_external_db:
+            # 外部会话由调用方提交；用 SAVEPOINT 保证本批次的原子性
+            self._db.expire_all()
+            savepoint = self._db.begin_nested()
+            token = _active_batch.set((self, self._db))
+            try:
+                result = await operation(self._db)
+                self._db.flush()
+            except Exception:
+                savepoint.rollback()
+                raise
+            finally:
+                _active_batch.reset(token)
+            savepoint.commit()
+            return result
+        
+        db = SessionLocal()
+        token = _active_batch.set((self, db))
+        try:
+            result = await operation(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            _active_batch.reset(token)
+            db.close()
+
+    @staticmethod
+    def _audit_row(
+        event_type: AuditEventType,
+        actor: AuditActor,
+        target_type: str,
+        target_id: str,
+        now: datetime,
+        diff: Optional[AuditEventDiff] = None,
+    ) -> Dict[str, Any]:
+        """构造一行审计事件（供批量 executemany 写入）"""
+        return {
+            "id": uuid.uuid4().hex,
+            "type": event_type,
+            "actor_kind": actor.kind,
+            "actor_id": actor.id,
+            "target_type": target_type,
+            "target_id": target_id,
+            "request_id": None,
+            "diff_before": diff.before if diff else None,
+            "diff_after": diff.after if diff else None,
+            "created_at": now,
+        }
+
+    @staticmethod
+    def _batch_failure(
+        results: List[Any],
+        index: int,
+        message: str,
+        atomic: bool,
+    ) -> None:
+        """记录单条失败：atomic 时抛出（整批回滚），否则写入该条结果继续处理其余条目"""
+        error = BatchItemError(index, message)
+        if atomic:
+            raise error
+        results[index] = error
+
+    async def create_proposals_batch(
+        self,
+        items: List[Dict[str, Any]],
+        *,
+        atomic: bool = True,
+        auto_accept: Optional[Sequence[bool]] = None,
+    ) -> List[Union[Proposal, Tuple[Proposal, Optional[Fact]], BatchItemError]]:
+        """批量创建 Proposal（单事务，proposal 与审计事件各一次 executemany）
         
+        Args:
+            items: 每项为 create_proposal 的关键字参数
+                （payload, source_ref, reason, confidence, scope_hint）
+            atomic: True 时任一条校验失败整批回滚；False 时失败条目返回 BatchItemError，其余照常提交
+            auto_accept: 与 items 等长，为 True 的条目在同一事务内按 scope_hint 立即接受。
+                atomic=True 时接受失败整批回滚（不会留下已创建的 proposal）；
+                atomic=False 时接受失败的条目保持 pending
+            
         Returns:
-            已过期的 Proposal ID 列表
+            与输入顺序一致的 Proposal 列表；已自动接受的条目为 (Proposal, Fact)，失败条目为 BatchItemError
+            
+        Raises:
+            BatchItemError: atomic=True 且任一条校验或自动接受失败
         """
-        db = self._get_db()
-        try:
+        async def operation(db: Session) -> List[Union[Proposal, BatchItemError]]:
             now = datetime.now(timezone.utc)
-            expired_ids = []
+            system = AuditActor(kind="system", id="system")
+            results: List[Any] = [None] * len(items)
+            rows: List[Dict[str, Any]] = []
+            events: List[Dict[str, Any]] = []
+            for index, item in enumerate(items):
+                payload: ProposalPayload = item["payload"]
+                source_ref: SourceRef = item["source_ref"]
+                confidence = item.get("confidence")
+                if confidence is not None and not (0 <= confidence <= 1):
+                    self._batch_failure(results, index, "confidence must be between 0 and 1", atomic)
+                    continue
+                row = {
+                    "id": uuid.uuid4().hex,
+                    "payload_key": payload.key,
+                    "payload_value": payload.value,
+                    "payload_tags": payload.tags,
+                    "ttl_seconds": payload.ttl_seconds,
+                    "status": ProposalStatus.PENDING,
+                    "reason": item.get("reason"),
+                    "confidence": confidence,
+                    "scope_hint": item.get("scope_hint"),
+                    "source_ref_kind": source_ref.kind,
+                    "source_ref_ref_id": source_ref.ref_id,
+                    "source_ref_excerpt": source_ref.excerpt,
+                    "created_at": now,
+                    "updated_at": now,
+                    "expires_at": _expires_at(now, payload.ttl_seconds),
+                }
+                rows.append(row)
+                events.append(self._audit_row(AuditEventType.PROPOSAL_CREATED, system, "proposal", row["id"], now))
+                results[index] = self._model_to_proposal(ProposalModel(**row))
+            if rows:
+                db.execute(insert(ProposalModel), rows)
+            if events:
+                db.execute(insert(AuditEventModel), events)
             
-            # 查询所有 pending 状态的 proposal
-            proposals = db.query(ProposalModel).filter(
-                ProposalModel.status == ProposalStatus.PENDING,
-                ProposalModel.ttl_seconds.isnot(None),
-            ).all()
+            accept_indexes = [
+                index for index, proposal in enumerate(results)
+                if auto_accept and auto_accept[index] and isinstance(proposal, Proposal)
+            ]
+            if accept_indexes:
+                # 复用本事务：接受失败（atomic）时连同创建一起回滚
+                try:
+                    accepted = await self.decide_proposals_batch([
+                        ProposalDecision(
+                            proposal_id=results[index].id, action="accept", scope=items[index].get("scope_hint")
+                        )
+                        for index in accept_indexes
+                    ], atomic=atomic)
+                except BatchItemError as exc:
+                    raise BatchItemError(accept_indexes[exc.index], f"auto-accept failed: {exc.message}") from None
+                for index, outcome in zip(accept_indexes, accepted):
+                    if isinstance(outcome, BatchItemError):
+                        continue
+                    results[index] = outcome
+            return results
+        
+        return await self._run_batch(operation)
+
+    async def decide_proposals_batch(
+        self,
+        decisions: List[ProposalDecision],
+        actor: Optional[AuditActor] = None,
+        *,
+        atomic: bool = True,
+    ) -> List[Union[Tuple[Proposal, Optional[Fact]], BatchItemError]]:
+        """批量接受/拒绝 Proposal（单事务）
+        
+        proposal 与冲突 facts 各用一次 IN 查询载入，新 fact 与审计事件用 executemany 写入，
+        结果与逐条调用 accept_proposal / reject_proposal 一致（同批内后面的条目能看到前面写入的 fact）。
+        
+        Args:
+            decisions: 决策列表
+            actor: 执行者（可选，默认为 system）
+            atomic: True 时任一条失败整批回滚；False 时失败条目返回 BatchItemError，其余照常提交
             
-            for proposal in proposals:
-                if proposal.ttl_seconds:
-                    expires_at = proposal.created_at + timedelta(seconds=proposal.ttl_seconds)
-                    if now >= expires_at:
-                        await self.expire_proposal(proposal.id)
-                        expired_ids.append(proposal.id)
+        Returns:
+            与输入顺序一致的 (Proposal, Fact) 列表；reject 时 Fact 为 None
             
-            if not self._use_external_db:
-                db.commit()
+        Raises:
+            BatchItemError: atomic=True 且 proposal 不存在/已处理或参数非法
+        """
+        async def operation(db: Session) -> List[Any]:
+            now = datetime.now(timezone.utc)
+            actor_ = actor or AuditActor(kind="system", id="system")
+            system = AuditActor(kind="system", id="system")
+            results: List[Any] = [None] * len(decisions)
+            events: List[Dict[str, Any]] = []
+            
+            proposal_ids = {decision.proposal_id for decision in decisions}
+            proposals = {
+                model.id: model
+                for model in db.query(ProposalModel).filter(ProposalModel.id.in_(proposal_ids)).all()
+            }
+            
+            # 1. 校验，确定每条 accept 的 scope
+            planned: List[Tuple[int, ProposalDecision, ProposalModel, Scope]] = []
+            resolved: set = set()
+            for index, decision in enumerate(decisions):
+                model = proposals.get(decision.proposal_id)
+                if model is None or model.status != ProposalStatus.PENDING or model.id in resolved:
+                    self._batch_failure(
+                        results, index, f"proposal {decision.proposal_id} not found or already resolved", atomic
+                    )
+                    continue
+                final_scope = decision.scope or model.scope_hint or Scope.GLOBAL
+                if decision.action == "accept":
+                    if final_scope == Scope.PROJECT and decision.project_id is None:
+                        self._batch_failure(results, index, "project_id is required when scope=project", atomic)
+                        continue
+                    if final_scope == Scope.SESSION and decision.session_id is None:
+                        self._batch_failure(results, index, "session_id is required when scope=session", atomic)
+                        continue
+                resolved.add(model.id)
+                planned.append((index, decision, model, final_scope))
+            
+            # 2. 一次 IN 查询载入所有相关 key 的 active facts，按冲突维度建索引
+            accept_keys = {model.payload_key for _, decision, model, _ in planned if decision.action == "accept"}
+            active: Dict[Tuple[Any, ...], Any] = {}
+            if accept_keys:
+                existing = (
+                    db.query(FactModel)
+                    .filter(FactModel.key.in_(accept_keys), FactModel.status == FactStatus.ACTIVE)
+                    .order_by(FactModel.created_at)
+                    .all()
+                )
+                for fact_model in existing:
+                    if fact_model.scope == Scope.GLOBAL and (fact_model.project_id or fact_model.session_id):
+                        continue
+                    conflict_key = _conflict_key(
+                        fact_model.key, fact_model.scope, fact_model.project_id, fact_model.session_id
+                    )
+                    active.setdefault(conflict_key, fact_model)
+            
+            # 3. 依次应用：更新已有 fact（ORM 批量 flush）或生成新 fact 行（executemany）
+            new_rows: List[Dict[str, Any]] = []
+            for index, decision, model, final_scope in planned:
+                if decision.action == "reject":
+                    model.status = ProposalStatus.REJECTED
+                    model.updated_at = now
+                    diff = AuditEventDiff(after={"reason": decision.reason}) if decision.reason else None
+                    events.append(
+                        self._audit_row(AuditEventType.PROPOSAL_REJECTED, actor_, "proposal", model.id, now, diff)
+                    )
+                    results[index] = (self._model_to_proposal(model), None)
+                    continue
+                
+                project_id = decision.project_id
+                session_id = decision.session_id
+                strategy = decision.strategy or self._get_key_policy(model.payload_key, db)
+                conflict_key = _conflict_key(model.payload_key, final_scope, project_id, session_id)
+                target = active.get(conflict_key) if strategy == ConflictStrategy.OVERWRITE_LATEST else None
+                if target is None:
+                    row = {
+                        "id": uuid.uuid4().hex,
+                        "key": model.payload_key,
+                        "value": model.payload_value,
+                        "status": FactStatus.ACTIVE,
+                        "scope": final_scope,
+                        "project_id": project_id,
+                        "session_id": session_id,
+                        "source_ref_kind": model.source_ref_kind,
+                        "source_ref_ref_id": model.source_ref_ref_id,
+                        "source_ref_excerpt": model.source_ref_excerpt,
+                        "confidence": model.confidence,
+                        "version": 1,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    new_rows.append(row)
+                    active.setdefault(conflict_key, row)
+                    events.append(self._audit_row(AuditEventType.FACT_CREATED, system, "fact", row["id"], now))
+                    fact = self._model_to_fact(FactModel(**row))
+                else:
+                    fact = self._apply_fact_update(target, model, now, events, system)
+                
+                model.status = ProposalStatus.ACCEPTED
+                model.updated_at = now
+                events.append(self._audit_row(AuditEventType.PROPOSAL_ACCEPTED, actor_, "proposal", model.id, now))
+                results[index] = (self._model_to_proposal(model), fact)
+            
+            if new_rows:
+                db.execute(insert(FactModel), new_rows)
+            if events:
+                db.execute(insert(AuditEventModel), events)
+            return results
+        
+        return await self._run_batch(operation)
+
+    def _apply_fact_update(
+        self,
+        target: Any,
+        proposal_model: ProposalModel,
+        now: datetime,
+        events: List[Dict[str, Any]],
+        system: AuditActor,
+    ) -> Fact:
+        """批量 accept 中的 overwrite_latest：更新已载入的 FactModel 或本批待插入的 fact 行"""
+        is_row = isinstance(target, dict)
+        old_value = target["value"] if is_row else target.value
+        old_version = target["version"] if is_row else target.version
+        changes = {
+            "value": proposal_model.payload_value,
+            "version": old_version + 1,
+            "source_ref_kind": proposal_model.source_ref_kind,
+            "source_ref_ref_id": proposal_model.source_ref_ref_id,
+            "source_ref_excerpt": proposal_model.source_ref_excerpt,
+            "updated_at": now,
+        }
+        if proposal_model.confidence is not None:
+            changes["confidence"] = proposal_model.confidence
+        if is_row:
+            target.update(changes)
+            fact_id = target["id"]
+            snapshot = FactModel(**target)
+        else:
+            for name, value in changes.items():
+                setattr(target, name, value)
+            fact_id = target.id
+            snapshot = target
+        diff = AuditEventDiff(
+            before={"value": old_value, "version": old_version},
+            after={"value": changes["value"], "version": changes["version"]},
+        )
+        events.append(self._audit_row(AuditEventType.FACT_UPDATED, system, "fact", fact_id, now, diff))
+        return self._model_to_fact(snapshot)
+
+    async def apply_fact_actions_batch(
+        self,
+        actions: List[FactAction],
+        actor: Optional[AuditActor] = None,
+        *,
+        atomic: bool = True,
+    ) -> List[Union[Fact, BatchItemError]]:
+        """批量撤销/归档/重新激活 Fact（单事务，一次 IN 查询，审计事件 executemany）
+        
+        状态约束与 revoke_fact / archive_fact / reactivate_fact 一致，同批内按顺序生效。
+        
+        Args:
+            actions: 操作列表
+            actor: 执行者（可选，默认为 system）
+            atomic: True 时任一条失败整批回滚；False 时失败条目返回 BatchItemError，其余照常提交
+            
+        Returns:
+            与输入顺序一致的更新后 Fact（或失败条目的 BatchItemError）列表
+            
+        Raises:
+            BatchItemError: atomic=True 且 fact 不存在或当前状态不允许该操作
+        """
+        async def operation(db: Session) -> List[Any]:
+            now = datetime.now(timezone.utc)
+            actor_ = actor or AuditActor(kind="system", id="system")
+            results: List[Any] = [None] * len(actions)
+            events: List[Dict[str, Any]] = []
+            facts = {
+                model.id: model
+                for model in db.query(FactModel).filter(FactModel.id.in_({a.fact_id for a in actions})).all()
+            }
+            for index, action in enumerate(actions):
+                model = facts.get(action.fact_id)
+                if model is None:
+                    self._batch_failure(results, index, f"fact {action.fact_id} not found", atomic)
+                    continue
+                allowed_from, new_status, event_type = _FACT_ACTIONS[action.action]
+                if model.status not in allowed_from:
+                    self._batch_failure(
+                        results,
+                        index,
+                        f"fact {action.fact_id} is {model.status.value}, cannot {action.action}",
+                        atomic,
+                    )
+                    continue
+                model.status = new_status
+                model.updated_at = now
+                events.append(self._audit_row(event_type, actor_, "fact", model.id, now))
+                results[index] = self._model_to_fact(model)
+            if events:
+                db.execute(insert(AuditEventModel), events)
+            return results
+        
+        return await self._run_batch(operation)
+
+    async def check_expired_proposals(
+        self,
+        now: Optional[datetime] = None,
+        actor: Optional[AuditActor] = None,
+    ) -> List[str]:
+        """把所有到期的 pending Proposal 置为 expired（基于 expires_at）
+        
+        走 (status, expires_at) 索引的范围扫描 + 一条集合 UPDATE，审计事件 executemany 写入，
+        开销与到期条数成正比，与 pending 总量无关。
+        
+        Args:
+            now: 判定时间（可选，默认当前 UTC 时间）
+            actor: 执行者（可选，默认为 system）
+            
+        Returns:
+            已过期的 Proposal ID 列表
+        """
+        now = now or datetime.now(timezone.utc)
+        actor = actor or AuditActor(kind="system", id="system")
+        due = and_(
+            ProposalModel.status == ProposalStatus.PENDING,
+            ProposalModel.expires_at.isnot(None),
+            ProposalModel.expires_at <= now,
+        )
+        db = self._get_db()
+        try:
+            expire = (
+                update(ProposalModel)
+                .where(due)
+                .values(status=ProposalStatus.EXPIRED, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if db.get_bind().dialect.update_returning:
+                expired_ids = [row[0] for row in db.execute(expire.returning(ProposalModel.id))]
+            else:
+                expired_ids = [row[0] for row in db.query(ProposalModel.id).filter(due)]
+                if expired_ids:
+                    db.execute(expire.where(ProposalModel.id.in_(expired_ids)))
+            if expired_ids:
+                db.execute(
+                    insert(AuditEventModel),
+                    [
+                        self._audit_row(AuditEventType.PROPOSAL_EXPIRED, actor, "proposal", proposal_id, now)
+                        for proposal_id in expired_ids
+                    ],
+                )
+                if self._use_external_db:
+                    db.expire_all()
             
             return expired_ids
         finally:
             self._close_db(db)
 
 
+def _expires_at(created_at: datetime, ttl_seconds: Optional[int]) -> Optional[datetime]:
+    return created_at + timedelta(seconds=ttl_seconds) if ttl_seconds else None
+
+
 # 向后兼容：保留 FactsStore 作为别名（已废弃）
 FactsStore = MemoryStore
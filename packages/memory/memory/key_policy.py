@@ -0,0 +1,110 @@
+"""Key 冲突策略解析（带进程内缓存）
+
+accept proposal 时需要知道 key 的冲突策略：先看 key_policies 表，再按内置的单值/多值 key 规则判断。
+原实现每次都查库并逐个遍历模式集合；这里把规则编译成一个正则，key_policies 整表（很小）
+载入内存，按 key 缓存解析结果。通过 MemoryStore 写策略时调用 invalidate()；
+其他进程写入的策略在 ttl 秒后生效。
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, Optional, Pattern
+
+from sqlalchemy.orm import Session
+
+from memory.db import KeyPolicyModel
+from memory.schemas import ConflictStrategy
+
+DEFAULT_CACHE_TTL_SECONDS = 60.0
+# 解析结果缓存上限（超出后整体清空，key 空间通常远小于此）
+MAX_CACHED_KEYS = 10000
+
+# 单值 key（常见模式），"*" 为通配
+SINGLE_VALUED_KEYS = (
+    "preferred_name", "timezone", "language", "email", "phone",
+    "project_lonelycat_goal", "project_*_goal",  # 项目目标通常是单值
+)
+# 多值 key（常见模式）
+MULTI_VALUED_KEYS = (
+    "favorite_tools", "projects", "constraints", "skills", "tags",
+    "*[]", "*_list",
+)
+
+
+def compile_key_patterns(patterns: Iterable[str]) -> Pattern[str]:
+    """把 key 模式集合（"*" 匹配任意字符）编译成一个全匹配正则"""
+    parts = [".*".join(re.escape(piece) for piece in pattern.split("*")) for pattern in patterns]
+    return re.compile("(?:" + "|".join(parts) + ")\\Z") if parts else re.compile("(?!)")
+
+
+_SINGLE_RE = compile_key_patterns(SINGLE_VALUED_KEYS)
+_MULTI_RE = compile_key_patterns(MULTI_VALUED_KEYS)
+
+
+def default_key_policy(key: str) -> ConflictStrategy:
+    """未配置策略时的内置规则：单值 → overwrite_latest，多值 → keep_both，其余 overwrite_latest"""
+    if _SINGLE_RE.match(key):
+        return ConflictStrategy.OVERWRITE_LATEST
+    if _MULTI_RE.match(key):
+        return ConflictStrategy.KEEP_BOTH
+    return ConflictStrategy.OVERWRITE_LATEST
+
+
+class _BindState:
+    def __init__(self) -> None:
+        self.configured: Optional[Dict[str, ConflictStrategy]] = None
+        self.loaded_at = 0.0
+        self.resolved: Dict[str, ConflictStrategy] = {}
+
+
+class KeyPolicyResolver:
+    """key → ConflictStrategy，按数据库 engine 分别缓存 key_policies 表与解析结果"""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS) -> None:
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._states: "weakref.WeakKeyDictionary[Any, _BindState]" = weakref.WeakKeyDictionary()
+
+    def resolve(self, key: str, db: Session) -> ConflictStrategy:
+        bind = db.get_bind()
+        with self._lock:
+            state = self._states.get(bind)
+            if state is None:
+                state = self._states[bind] = _BindState()
+            if state.configured is None or time.monotonic() - state.loaded_at > self._ttl:
+                state.configured = self._load(db)
+                state.loaded_at = time.monotonic()
+                state.resolved.clear()
+            strategy = state.resolved.get(key)
+            if strategy is None:
+                strategy = state.configured.get(key) or default_key_policy(key)
+                if len(state.resolved) >= MAX_CACHED_KEYS:
+                    state.resolved.clear()
+                state.resolved[key] = strategy
+            return strategy
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    @staticmethod
+    def _load(db: Session) -> Dict[str, ConflictStrategy]:
+        configured: Dict[str, ConflictStrategy] = {}
+        for row in db.query(KeyPolicyModel.key, KeyPolicyModel.strategy).all():
+            try:
+                configured[row.key] = ConflictStrategy(row.strategy)
+            except ValueError:
+                continue
+        return configured
+
+
+# 进程级共享（MemoryStore 通常按请求创建）
+_resolver = KeyPolicyResolver()
+
+
+def get_key_policy_resolver() -> KeyPolicyResolver:
+    return _resolver
@@ -0,0 +1,175 @@
+"""按当前用户消息挑选相关 facts（替代「全部 active facts 按 key 排序后截断」）
+
+- 词法相关性：对 key + value 文本建 BM25 索引；key 按下划线拆词，中日韩文本按字 bigram 切分；
+- 语义相关性（可选）：传入 Embedder（如 vector_store.HashingEmbedder）时，与余弦相似度按权重混合；
+- 固定保留：单值身份类 key（preferred_name 等）无论得分都排在最前，且不受 top_k / token_budget 限制；
+- 输出：其余 facts 按得分降序取 top_k，并在 token_budget 内装箱（装不下的跳过，继续尝试更短的）。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+DEFAULT_PINNED_KEYS: FrozenSet[str] = frozenset({"preferred_name", "timezone", "language"})
+DEFAULT_VECTOR_WEIGHT = 0.3
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 下划线也当分隔符（favorite_food → favorite, food）
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_CJK_RE = re.compile("[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """小写分词；连续的 CJK 片段切成字 bigram（单字片段保留单字）"""
+    tokens: List[str] = []
+    for word in _WORD_RE.findall((text or "").lower()):
+        pos = 0
+        for match in _CJK_RE.finditer(word):
+            if match.start() > pos:
+                tokens.append(word[pos : match.start()])
+            run = match.group()
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+            pos = match.end()
+        if pos < len(word):
+            tokens.append(word[pos:])
+    return tokens
+
+
+def fact_text(fact: Dict[str, Any]) -> str:
+    """用于检索的 fact 文本：key + value（dict/list 序列化为 JSON）"""
+    value = fact.get("value")
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return f"{fact.get('key') or ''} {value if value is not None else ''}"
+
+
+def estimate_tokens(text: str) -> int:
+    """近似 token 数：CJK 按 1 token/字，其余按 ~4 字符/token"""
+    if not text:
+        return 0
+    cjk = sum(len(run) for run in _CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class BM25Index:
+    """Okapi BM25（k1=1.5, b=0.75），文档为预先分好词的 token 列表"""
+
+    def __init__(self, documents: Sequence[Sequence[str]], *, k1: float = BM25_K1, b: float = BM25_B) -> None:
+        self._k1 = k1
+        self._b = b
+        self._tfs = [Counter(doc) for doc in documents]
+        self._lengths = [len(doc) for doc in documents]
+        self._avg_len = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        df: Counter = Counter()
+        for tf in self._tfs:
+            df.update(tf.keys())
+        n = len(documents)
+        self._idf = {term: math.log(1.0 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def scores(self, query: Iterable[str]) -> List[float]:
+        terms = [t for t in set(query) if t in self._idf]
+        out = [0.0] * len(self._tfs)
+        if not terms:
+            return out
+        for i, tf in enumerate(self._tfs):
+            norm = self._k1 * (1.0 - self._b + self._b * self._lengths[i] / (self._avg_len or 1.0))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self._k1 + 1.0) / (freq + norm)
+            out[i] = score
+        return out
+
+
+def rank_facts(
+    facts: Sequence[Dict[str, Any]],
+    query: str,
+    *,
+    top_k: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    pinned_keys: Iterable[str] = DEFAULT_PINNED_KEYS,
+    embedder: Any = None,
+    vector_weight: float = DEFAULT_VECTOR_WEIGHT,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> List[Dict[str, Any]]:
+    """按与 query 的相关性挑选 facts
+
+    Args:
+        facts: 候选 facts（dict，至少含 key/value）
+        query: 当前用户消息
+        top_k: pinned 之外最多返回的条数；None 不限
+        token_budget: pinned 之外的 facts 文本（JSON）估算 token 总量上限；None 不限
+        pinned_keys: 总是保留的 key（不占 top_k 与 token_budget）
+        embedder: 可选，提供 embed(texts) -> L2 归一化矩阵；与 BM25 归一化分数按 vector_weight 混合
+        count_tokens: token 计数函数
+
+    Returns:
+        选中的 facts，pinned 在前，其余按得分降序；同分时较新的（updated_at）在前，再按 key 稳定排序。
+        与 query 完全无关的 facts 只在 top_k / 预算还有余量时补位。
+    """
+    facts = list(facts)
+    if not facts:
+        return []
+    pinned = frozenset(pinned_keys)
+    lexical = BM25Index([tokenize(fact_text(f)) for f in facts]).scores(tokenize(query))
+    top = max(lexical) or 1.0
+    scores = [s / top for s in lexical]
+    if embedder is not None and query.strip():
+        matrix = embedder.embed([query] + [fact_text(f) for f in facts])
+        similarity = matrix[1:] @ matrix[0]
+        scores = [(1.0 - vector_weight) * s + vector_weight * max(float(sim), 0.0) for s, sim in zip(scores, similarity)]
+
+    def sort_key(i: int) -> tuple:
+        fact = facts[i]
+        return (
+            0 if fact.get("key") in pinned else 1,
+            -scores[i],
+            -_updated_ts(fact.get("updated_at")),
+            fact.get("key") or "",
+            fact.get("id") or "",
+        )
+
+    selected: List[Dict[str, Any]] = []
+    ranked = 0
+    used = 0
+    for i in sorted(range(len(facts)), key=sort_key):
+        # pinned 排在最前，直接收下，不占 top_k 与预算
+        if facts[i].get("key") in pinned:
+            selected.append(facts[i])
+            continue
+        if top_k is not None and ranked >= top_k:
+            break
+        if token_budget is not None:
+            cost = count_tokens(json.dumps(facts[i], ensure_ascii=False, default=str))
+            if used + cost > token_budget:
+                continue
+            used += cost
+        selected.append(facts[i])
+        ranked += 1
+    return selected
+
+
+def _updated_ts(value: Any) -> float:
+    """updated_at（datetime / ISO 字符串 / 时间戳）→ UTC 时间戳；缺失或无法解析时为 0"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return 0.0
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return 0.0
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -84,6 +84,23 @@ class Proposal(BaseModel):
     updated_at: datetime
 
 
+class ProposalDecision(BaseModel):
+    """批量决策中的单条 Proposal 决策"""
+    proposal_id: str
+    action: Literal["accept", "reject"]
+    strategy: Optional[ConflictStrategy] = None
+    scope: Optional[Scope] = None
+    project_id: Optional[str] = None
+    session_id: Optional[str] = None
+    reason: Optional[str] = None  # reject 原因，记录在 PROPOSAL_REJECTED 审计事件的 diff.after 中
+
+
+class FactAction(BaseModel):
+    """批量操作中的单条 Fact 状态变更"""
+    fact_id: str
+    action: Literal["revoke", "archive", "reactivate"]
+
+
 class Fact(BaseModel):
     """Fact 模型"""
     id: str
@@ -1,4 +1,274 @@
+"""持久化 transcript 存储：每个 session 一组只追加的分段文件
+
+目录结构（LONELYCAT_MEMORY_TRANSCRIPT_DIR，默认 ./lonelycat_transcripts）：
+    <session>/00000000000000000000.seg   记录 = <u32 长度><u32 crc32><JSON UTF-8>，首尾相接
+    <session>/00000000000000000000.idx   每条记录在 .seg 中的起始偏移（u64 LE 定长），第 i 条在 8*i 处
+
+- 分段文件名是该段首条记录的全局序号；活动分段超过 segment_bytes 后滚动到新分段，旧分段 fsync 后不再修改；
+- 有定长偏移索引，tail(n) / 按序号读取只需定位到索引中的对应位置，不用扫描整段；读取走 mmap；
+- 写入顺序为先 .seg 后 .idx；打开 session 时校验最后一个分段：补齐已写入但未进索引的完整记录，
+  截掉崩溃留下的半条记录与越界的索引项；
+- 进程内只为最近使用的 max_open_sessions 个 session 保留文件句柄与元数据（LRU），内存占用与 session 数无关。
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote
+
+DEFAULT_TRANSCRIPT_DIR = "./lonelycat_transcripts"
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_OPEN_SESSIONS = 128
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+_HEADER = struct.Struct("<II")
+_OFFSET = struct.Struct("<Q")
+
+
+@dataclass
+class _SessionState:
+    """已打开 session 的元数据与活动分段句柄"""
+
+    directory: Path
+    bases: List[int] = field(default_factory=list)  # 各分段首条记录序号（升序）
+    count: int = 0
+    seg_size: int = 0
+    seg_file: Optional[BinaryIO] = None
+    idx_file: Optional[BinaryIO] = None
+
+    def close(self) -> None:
+        for handle in (self.seg_file, self.idx_file):
+            if handle is not None:
+                handle.close()
+        self.seg_file = self.idx_file = None
+
+
 class TranscriptStore:
-    def append(self, session_id: str, message: str) -> None:
-        # TODO: persist transcripts
-        _ = (session_id, message)
+    """基于分段文件的持久化 transcript（线程安全）"""
+
+    def __init__(
+        self,
+        root: Union[str, Path, None] = None,
+        *,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_open_sessions: int = DEFAULT_MAX_OPEN_SESSIONS,
+        fsync: bool = False,
+    ) -> None:
+        """
+        Args:
+            root: 存储目录（默认读 LONELYCAT_MEMORY_TRANSCRIPT_DIR）
+            segment_bytes: 活动分段滚动阈值
+            max_open_sessions: 同时保持打开的 session 数（LRU 淘汰，淘汰只关闭句柄）
+            fsync: 每次追加后 fsync（默认只保证进程崩溃不丢数据）
+        """
+        if segment_bytes <= 0:
+            raise ValueError("segment_bytes must be positive")
+        if max_open_sessions <= 0:
+            raise ValueError("max_open_sessions must be positive")
+        self.root = Path(root or os.getenv("LONELYCAT_MEMORY_TRANSCRIPT_DIR", DEFAULT_TRANSCRIPT_DIR))
+        self.segment_bytes = segment_bytes
+        self.max_open_sessions = max_open_sessions
+        self.fsync = fsync
+        self._states: "OrderedDict[str, _SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- 写入 ----
+
+    def append(self, session_id: str, item: Any) -> int:
+        """追加一条记录（任意可 JSON 序列化的值），返回其在 session 内的序号"""
+        payload = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            state = self._state(session_id)
+            if state.seg_size and state.seg_size + len(record) > self.segment_bytes:
+                self._roll(state)
+            offset = state.seg_size
+            state.seg_file.write(record)
+            state.idx_file.write(_OFFSET.pack(offset))
+            if self.fsync:
+                os.fsync(state.seg_file.fileno())
+                os.fsync(state.idx_file.fileno())
+            state.seg_size += len(record)
+            state.count += 1
+            return state.count - 1
+
+    # ---- 读取 ----
+
+    def count(self, session_id: str) -> int:
+        """session 内的记录数"""
+        with self._lock:
+            return self._state(session_id).count
+
+    def read(self, session_id: str, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """读取序号在 [start, stop) 的记录"""
+        return list(self.iter_records(session_id, start, stop))
+
+    def get(self, session_id: str) -> List[Any]:
+        """读取 session 的全部记录"""
+        return self.read(session_id)
+
+    def tail(self, session_id: str, n: int) -> List[Any]:
+        """读取最后 n 条记录（只访问涉及的分段与索引位置）"""
+        if n <= 0:
+            return []
+        count, _, _ = self._snapshot(session_id)
+        return self.read(session_id, max(0, count - n))
+
+    def iter_records(self, session_id: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Any]:
+        """按序号正序流式读取 [start, stop) 的记录
+
+        已写入的记录不会再修改，因此只在取快照时持锁，读文件时不阻塞追加。
+        """
+        count, bases, directory = self._snapshot(session_id)
+        stop = count if stop is None else min(stop, count)
+        start = max(0, start)
+        if start >= stop:
+            return
+        first = bisect.bisect_right(bases, start) - 1
+        for position in range(first, len(bases)):
+            base = bases[position]
+            if base >= stop:
+                break
+            segment_end = bases[position + 1] if position + 1 < len(bases) else count
+            lo, hi = max(start, base), min(stop, segment_end)
+            yield from _read_segment(directory, base, lo - base, hi - base)
+
+    def sessions(self) -> List[str]:
+        """磁盘上存在的 session id"""
+        if not self.root.exists():
+            return []
+        return sorted(unquote(path.name) for path in self.root.iterdir() if path.is_dir())
+
+    def close(self) -> None:
+        """关闭所有打开的句柄（之后仍可继续使用，会按需重新打开）"""
+        with self._lock:
+            for state in self._states.values():
+                state.close()
+            self._states.clear()
+
+    def __enter__(self) -> "TranscriptStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    # ---- 内部 ----
+
+    def _snapshot(self, session_id: str) -> Tuple[int, List[int], Path]:
+        with self._lock:
+            state = self._state(session_id)
+            return state.count, list(state.bases), state.directory
+
+    def _state(self, session_id: str) -> _SessionState:
+        """取得（必要时打开并恢复）session 状态；调用方需持有 self._lock"""
+        state = self._states.get(session_id)
+        if state is not None:
+            self._states.move_to_end(session_id)
+            return state
+        state = self._open(session_id)
+        self._states[session_id] = state
+        while len(self._states) > self.max_open_sessions:
+            _, evicted = self._states.popitem(last=False)
+            evicted.close()
+        return state
+
+    def _open(self, session_id: str) -> _SessionState:
+        if not session_id:
+            raise ValueError("session_id must not be empty")
+        directory = self.root / quote(session_id, safe="").replace(".", "%2E")
+        directory.mkdir(parents=True, exist_ok=True)
+        bases = sorted(int(path.stem) for path in directory.glob("*" + SEGMENT_SUFFIX))
+        if not bases:
+            bases = [0]
+        state = _SessionState(directory=directory, bases=bases)
+        base = bases[-1]
+        seg_path, idx_path = _segment_paths(directory, base)
+        seg_path.touch(exist_ok=True)
+        state.seg_size, entries = _recover(seg_path, idx_path)
+        state.count = base + entries
+        state.seg_file = open(seg_path, "ab", buffering=0)
+        state.idx_file = open(idx_path, "ab", buffering=0)
+        return state
+
+    def _roll(self, state: _SessionState) -> None:
+        """封存活动分段并以下一条记录的序号开启新分段"""
+        os.fsync(state.seg_file.fileno())
+        os.fsync(state.idx_file.fileno())
+        state.close()
+        state.bases.append(state.count)
+        seg_path, idx_path = _segment_paths(state.directory, state.count)
+        state.seg_file = open(seg_path, "ab", buffering=0)
+        state.idx_file = open(idx_path, "ab", buffering=0)
+        state.seg_size = 0
+
+
+def _segment_paths(directory: Path, base: int) -> Tuple[Path, Path]:
+    name = f"{base:020d}"
+    return directory / (name + SEGMENT_SUFFIX), directory / (name + INDEX_SUFFIX)
+
+
+def _valid_record_end(data: Union[bytes, mmap.mmap], offset: int) -> Optional[int]:
+    """offset 处是一条完整且校验通过的记录时返回其结束位置，否则返回 None"""
+    if offset + _HEADER.size > len(data):
+        return None
+    length, checksum = _HEADER.unpack_from(data, offset)
+    end = offset + _HEADER.size + length
+    if end > len(data) or zlib.crc32(data[offset + _HEADER.size:end]) != checksum:
+        return None
+    return end
+
+
+def _recover(seg_path: Path, idx_path: Path) -> Tuple[int, int]:
+    """校验活动分段与索引，修复崩溃留下的不一致；返回 (分段有效字节数, 记录条数)"""
+    raw_index = idx_path.read_bytes() if idx_path.exists() else b""
+    offsets = [value for (value,) in _OFFSET.iter_unpack(raw_index[: len(raw_index) - len(raw_index) % _OFFSET.size])]
+    data = seg_path.read_bytes()
+
+    # 丢弃指向无效记录的索引尾部（.seg 截断或索引比数据先落盘）
+    while offsets and _valid_record_end(data, offsets[-1]) is None:
+        offsets.pop()
+    position = _valid_record_end(data, offsets[-1]) if offsets else 0
+    # 补齐已完整写入 .seg、但索引项未写入的记录
+    while True:
+        end = _valid_record_end(data, position)
+        if end is None:
+            break
+        offsets.append(position)
+        position = end
+
+    if position != len(data):
+        with open(seg_path, "r+b") as handle:
+            handle.truncate(position)
+    rebuilt = b"".join(_OFFSET.pack(offset) for offset in offsets)
+    if rebuilt != raw_index:
+        with open(idx_path, "wb") as handle:
+            handle.write(rebuilt)
+    return position, len(offsets)
+
+
+def _read_segment(directory: Path, base: int, lo: int, hi: int) -> Iterator[Any]:
+    """读取分段内第 [lo, hi) 条记录：从索引取起始偏移，再在 mmap 上逐条解析"""
+    seg_path, idx_path = _segment_paths(directory, base)
+    with open(idx_path, "rb") as idx_file:
+        idx_file.seek(lo * _OFFSET.size)
+        raw = idx_file.read((hi - lo) * _OFFSET.size)
+    offsets = [value for (value,) in _OFFSET.iter_unpack(raw)]
+    if not offsets:
+        return
+    with open(seg_path, "rb") as seg_file:
+        with mmap.mmap(seg_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for offset in offsets:
+                length, _ = _HEADER.unpack_from(view, offset)
+                start = offset + _HEADER.size
+                yield json.loads(view[start:start + length])
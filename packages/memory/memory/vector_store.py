@@ -1,4 +1,470 @@
+"""本地向量索引（facts / transcripts 的语义检索）
+
+- 向量存放在 float32 矩阵里，指定 path 时用 numpy.memmap 落盘：vectors.f32 存矩阵，
+  ids.jsonl 逐行追加 id（flush 只写新增行），live.bin 是存活行位图，meta.json 记录维度、容量、行数；
+- 压实把新矩阵/id 写进下一代文件（vectors.<n>.f32 …），最后原子替换 meta.json 切换过去，
+  中途崩溃时旧索引仍然完整；
+- 行一旦写入不再修改：更新 = 旧行打 tombstone + 追加新行，删除 = 打 tombstone；
+  tombstone 比例超过 compact_ratio 时自动压实（只保留存活行，重写矩阵）；
+- 查询对所有向量做 L2 归一化后的矩阵乘（余弦相似度），按块扫描并合并 top-k，
+  大矩阵在 memmap 下也不会一次性读进内存；
+- embedding 由可插拔的 Embedder 提供，默认 HashingEmbedder（确定性 hashing trick，无需模型/网络）。
+
+numpy 是可选依赖（pip install lonelycat-memory[vector]），未安装时构造 VectorStore 会报错。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 取决于运行环境
+    np = None  # type: ignore[assignment]
+
+
+DEFAULT_DIM = 256
+DEFAULT_COMPACT_RATIO = 0.25
+DEFAULT_INITIAL_CAPACITY = 1024
+# 查询时每次参与矩阵乘的行数（限制 memmap 下的内存占用）
+SEARCH_BLOCK_ROWS = 65536
+VECTORS_FILE = "vectors.f32"
+IDS_FILE = "ids.jsonl"
+LIVE_FILE = "live.bin"
+META_FILE = "meta.json"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(Protocol):
+    """文本 → L2 归一化的 float32 向量，形状 (len(texts), dim)"""
+
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        ...
+
+
+class HashingEmbedder:
+    """确定性的 hashing trick embedder（离线默认）
+
+    特征 = 小写单词 + 每个词的字符 trigram（带边界标记，中文等无空格文本也能产生重叠），
+    每个特征用 blake2b 映射到一个桶并带 ±1 符号，最后做 L2 归一化。
+    同一文本在任何进程、任何机器上得到相同向量，因此落盘的索引可以直接复用。
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM, ngram: int = 3) -> None:
+        _require_numpy()
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        self.dim = dim
+        self._ngram = ngram
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                bucket = digest % self.dim
+                out[row, bucket] += 1.0 if (digest >> 63) & 1 else -1.0
+        return _normalize(out)
+
+    def _features(self, text: str) -> Iterable[str]:
+        for word in _WORD_RE.findall((text or "").lower()):
+            yield "w:" + word
+            padded = f"#{word}#"
+            if len(padded) <= self._ngram:
+                continue
+            for i in range(len(padded) - self._ngram + 1):
+                yield "c:" + padded[i : i + self._ngram]
+
+
+def record_text(record: Dict[str, Any]) -> str:
+    """把 fact / transcript 记录转成用于 embedding 的文本"""
+    text = record.get("text")
+    if isinstance(text, str):
+        return text
+    value = record.get("value")
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    key = record.get("key")
+    if key:
+        return f"{key}: {value if value is not None else ''}"
+    content = record.get("content")
+    return content if isinstance(content, str) else ""
+
+
 class VectorStore:
-    def index(self, record: dict) -> None:
-        # TODO: index vectors
-        _ = record
+    """带 id 映射、tombstone 删除与压实的本地向量索引
+
+    Args:
+        path: 索引目录；None 表示纯内存（不落盘）
+        dim: 向量维度；默认取 embedder.dim，或已有索引的 meta
+        embedder: 文本向量化实现；默认 HashingEmbedder(dim)
+        compact_ratio: tombstone 行占比超过该值时自动压实（<=0 关闭自动压实）
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        *,
+        dim: Optional[int] = None,
+        embedder: Optional[Embedder] = None,
+        compact_ratio: float = DEFAULT_COMPACT_RATIO,
+        initial_capacity: int = DEFAULT_INITIAL_CAPACITY,
+    ) -> None:
+        _require_numpy()
+        self._path = Path(path) if path is not None else None
+        self._compact_ratio = compact_ratio
+        meta = self._load_meta()
+        if meta is not None:
+            dim = int(meta["dim"])
+        dim = dim or (embedder.dim if embedder is not None else DEFAULT_DIM)
+        if embedder is not None and embedder.dim != dim:
+            raise ValueError(f"embedder dim {embedder.dim} does not match index dim {dim}")
+        self.dim = dim
+        self._embedder: Embedder = embedder or HashingEmbedder(dim)
+
+        # 当前代号（压实时 +1）；已落盘的 id 行数与 ids 文件字节数，用于增量追加
+        self._generation = 0
+        self._persisted_rows = 0
+        self._ids_bytes = 0
+        if meta is not None:
+            self._generation = int(meta.get("generation", 0))
+            self._ids: List[Optional[str]] = self._load_ids(meta)
+            self._count = len(self._ids)
+            self._capacity = int(meta["capacity"])
+            self._matrix = self._open_matrix(self._capacity, mode="r+")
+        else:
+            self._ids = []
+            self._count = 0
+            self._capacity = max(1, initial_capacity)
+            self._matrix = self._open_matrix(self._capacity, mode="w+")
+        self._row_of: Dict[str, int] = {}
+        self._live = np.zeros(self._capacity, dtype=bool)
+        for row, record_id in enumerate(self._ids):
+            if record_id is not None:
+                self._row_of[record_id] = row
+                self._live[row] = True
+        self._dirty = meta is None and self._path is not None
+
+    # ---- 写入 ----
+
+    def index(self, record: Dict[str, Any]) -> None:
+        """写入/更新一条 fact 或 transcript 记录（需要 id；可带现成的 vector）"""
+        record_id = record.get("id")
+        if not record_id:
+            raise ValueError("record must have an id")
+        vector = record.get("vector")
+        if vector is not None:
+            self.upsert([str(record_id)], vectors=np.asarray([vector], dtype=np.float32))
+        else:
+            self.upsert([str(record_id)], texts=[record_text(record)])
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        *,
+        texts: Optional[Sequence[str]] = None,
+        vectors: Optional["np.ndarray"] = None,
+    ) -> None:
+        """批量写入；已存在的 id 旧行打 tombstone 后追加新行"""
+        if (texts is None) == (vectors is None):
+            raise ValueError("provide exactly one of texts or vectors")
+        matrix = self._embedder.embed(list(texts)) if texts is not None else _normalize(
+            np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        )
+        if matrix.shape != (len(ids), self.dim):
+            raise ValueError(f"expected vectors of shape ({len(ids)}, {self.dim}), got {matrix.shape}")
+        # 同一批里重复的 id 以最后一条为准
+        last: Dict[str, int] = {}
+        for i, record_id in enumerate(ids):
+            last[str(record_id)] = i
+        order = sorted(last.values())
+        for record_id in last:
+            self._tombstone(record_id)
+        self._reserve(self._count + len(order))
+        start = self._count
+        self._matrix[start : start + len(order)] = matrix[order]
+        for offset, i in enumerate(order):
+            record_id = str(ids[i])
+            row = start + offset
+            self._ids.append(record_id)
+            self._row_of[record_id] = row
+            self._live[row] = True
+        self._count += len(order)
+        self._dirty = True
+        self._maybe_compact()
+
+    def delete(self, record_id: str) -> bool:
+        removed = self._tombstone(record_id)
+        if removed:
+            self._dirty = True
+            self._maybe_compact()
+        return removed
+
+    def compact(self) -> int:
+        """只保留存活行并重写矩阵；返回回收的行数
+
+        落盘时新矩阵写进下一代文件，flush 原子替换 meta.json 之后才删除旧一代文件，
+        因此任何时刻崩溃，meta 指向的矩阵与 id 都是完整的。
+        """
+        live_rows = np.flatnonzero(self._live[: self._count])
+        reclaimed = self._count - len(live_rows)
+        if reclaimed == 0:
+            return 0
+        ids = [self._ids[row] for row in live_rows]
+        capacity = max(DEFAULT_INITIAL_CAPACITY, len(ids) * 2)
+        old_generation = self._generation
+        matrix = self._open_matrix(capacity, mode="w+", generation=old_generation + 1)
+        matrix[: len(ids)] = self._matrix[live_rows]
+        self._release_matrix()
+        self._matrix = matrix
+        self._generation = old_generation + 1
+        self._persisted_rows = 0
+        self._ids_bytes = 0
+        self._capacity = capacity
+        self._ids = list(ids)
+        self._count = len(ids)
+        self._row_of = {record_id: row for row, record_id in enumerate(ids) if record_id is not None}
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[: self._count] = True
+        self._dirty = True
+        self.flush()
+        self._remove_generation(old_generation)
+        return reclaimed
+
+    # ---- 查询 ----
+
+    def search(self, query: Union[str, Sequence[float], "np.ndarray"], k: int = 10) -> List[Tuple[str, float]]:
+        """单条查询：返回 [(id, cosine), ...]，按相似度降序"""
+        return self.search_batch([query], k=k)[0]
+
+    def search_batch(
+        self,
+        queries: Sequence[Union[str, Sequence[float], "np.ndarray"]],
+        k: int = 10,
+    ) -> List[List[Tuple[str, float]]]:
+        """批量查询：一次矩阵乘算出所有 query 的分数"""
+        if not queries:
+            return []
+        q = self._query_matrix(queries)
+        if k <= 0 or not self._row_of:
+            return [[] for _ in queries]
+        k = min(k, len(self._row_of))
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, self._count, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, self._count)
+            scores = q @ np.asarray(self._matrix[start:stop]).T
+            scores[:, ~self._live[start:stop]] = -np.inf
+            take = min(k, stop - start)
+            part = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, part + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        results: List[List[Tuple[str, float]]] = []
+        for i in range(len(queries)):
+            hits = []
+            for j in order[i]:
+                score = float(best_scores[i, j])
+                if score == -np.inf:
+                    continue
+                hits.append((self._ids[int(best_rows[i, j])], score))
+            results.append(hits)
+        return results
+
+    def get_vector(self, record_id: str) -> Optional["np.ndarray"]:
+        row = self._row_of.get(record_id)
+        if row is None:
+            return None
+        return np.array(self._matrix[row], dtype=np.float32)
+
+    # ---- 持久化 ----
+
+    def flush(self) -> None:
+        """把矩阵、新增 id、存活位图写回磁盘，最后原子替换 meta.json
+
+        ids 文件只追加上次 flush 之后的新行；meta 记录行数与 ids 文件的有效字节数，
+        未提交的尾部在重新打开时截掉。
+        """
+        if self._path is None or not self._dirty:
+            return
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        pending = self._ids[self._persisted_rows : self._count]
+        if pending or self._persisted_rows == 0:
+            data = "".join(json.dumps(record_id, ensure_ascii=False) + "\n" for record_id in pending).encode("utf-8")
+            with open(self._file(IDS_FILE), "ab" if self._ids_bytes else "wb") as handle:
+                handle.write(data)
+            self._ids_bytes += len(data)
+            self._persisted_rows = self._count
+        _write_atomic(self._file(LIVE_FILE), np.packbits(self._live[: self._count]).tobytes())
+        meta = {
+            "dim": self.dim,
+            "capacity": self._capacity,
+            "count": self._count,
+            "generation": self._generation,
+            "ids_bytes": self._ids_bytes,
+        }
+        _write_atomic(self._path / META_FILE, json.dumps(meta).encode("utf-8"))
+        self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+        self._release_matrix()
+
+    def __enter__(self) -> "VectorStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._row_of
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dim": self.dim,
+            "live": len(self._row_of),
+            "rows": self._count,
+            "tombstones": self._count - len(self._row_of),
+            "capacity": self._capacity,
+            "path": str(self._path) if self._path is not None else None,
+        }
+
+    # ---- 内部 ----
+
+    def _query_matrix(self, queries: Sequence[Any]) -> "np.ndarray":
+        texts = [q for q in queries if isinstance(q, str)]
+        if len(texts) == len(queries):
+            return self._embedder.embed(texts)
+        rows = [
+            self._embedder.embed([q])[0] if isinstance(q, str) else np.asarray(q, dtype=np.float32).reshape(-1)
+            for q in queries
+        ]
+        return _normalize(np.stack(rows))
+
+    def _tombstone(self, record_id: str) -> bool:
+        row = self._row_of.pop(record_id, None)
+        if row is None:
+            return False
+        self._ids[row] = None
+        self._live[row] = False
+        return True
+
+    def _maybe_compact(self) -> None:
+        if self._compact_ratio <= 0 or self._count < DEFAULT_INITIAL_CAPACITY:
+            return
+        if (self._count - len(self._row_of)) / self._count > self._compact_ratio:
+            self.compact()
+
+    def _reserve(self, rows: int) -> None:
+        """容量不足时按 2 倍扩容（memmap 需要先扩文件再重新映射）"""
+        if rows <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < rows:
+            capacity *= 2
+        if self._path is None:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[: self._count] = self._matrix[: self._count]
+            self._matrix = grown
+        else:
+            self._matrix.flush()
+            self._release_matrix()
+            with open(self._file(VECTORS_FILE), "r+b") as handle:
+                handle.truncate(capacity * self.dim * 4)
+            self._matrix = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        live = np.zeros(capacity, dtype=bool)
+        live[: self._capacity] = self._live
+        self._live = live
+        self._capacity = capacity
+
+    def _open_matrix(self, capacity: int, *, mode: str, generation: Optional[int] = None) -> "np.ndarray":
+        if self._path is None:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        self._path.mkdir(parents=True, exist_ok=True)
+        path = self._file(VECTORS_FILE, generation)
+        return np.memmap(path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+
+    def _file(self, name: str, generation: Optional[int] = None) -> Path:
+        """第 n 代数据文件：第 0 代沿用原文件名，之后为 vectors.<n>.f32 这样的形式"""
+        generation = self._generation if generation is None else generation
+        if generation == 0:
+            return self._path / name
+        stem, _, suffix = name.partition(".")
+        return self._path / f"{stem}.{generation}.{suffix}"
+
+    def _remove_generation(self, generation: int) -> None:
+        if self._path is None:
+            return
+        for name in (VECTORS_FILE, IDS_FILE, LIVE_FILE):
+            try:
+                self._file(name, generation).unlink()
+            except OSError:
+                # 不存在，或仍被映射（Windows）：残留文件不影响正确性，下次同代压实会覆盖
+                pass
+
+    def _load_ids(self, meta: Dict[str, Any]) -> List[Optional[str]]:
+        """按 meta 读回逐行 id（tombstone 为 None）；兼容把 ids 直接存在 meta 里的旧格式"""
+        if "ids" in meta:
+            # 旧格式：下次 flush 时整体写成 ids 文件 + 位图
+            return list(meta["ids"])
+        count = int(meta["count"])
+        self._ids_bytes = int(meta["ids_bytes"])
+        self._persisted_rows = count
+        ids_path = self._file(IDS_FILE)
+        with open(ids_path, "r+b") as handle:
+            # 截掉上次 flush 写了一半（meta 未提交）的尾部
+            handle.truncate(self._ids_bytes)
+            lines = handle.read().decode("utf-8").splitlines()
+        live = np.unpackbits(np.frombuffer(self._file(LIVE_FILE).read_bytes(), dtype=np.uint8), count=count)
+        return [json.loads(line) if live[row] else None for row, line in enumerate(lines[:count])]
+
+    def _release_matrix(self) -> None:
+        # 只 flush 并丢弃引用：映射由 GC 释放，避免在仍有视图引用时强行 close
+        matrix = getattr(self, "_matrix", None)
+        if isinstance(matrix, np.memmap):
+            matrix.flush()
+        self._matrix = None
+
+    def _load_meta(self) -> Optional[Dict[str, Any]]:
+        if self._path is None:
+            return None
+        meta_path = self._path / META_FILE
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if not self._file(VECTORS_FILE, int(meta.get("generation", 0))).exists():
+            return None
+        return meta
+
+
+def _normalize(matrix: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for the vector store (pip install lonelycat-memory[vector])")
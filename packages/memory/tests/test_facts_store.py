@@ -114,6 +114,11 @@ def test_reject_proposal(temp_db):
         _commit_db(db)
         assert rejected is not None
         assert rejected.status == ProposalStatus.REJECTED
+
+        from memory.audit import AuditLogger
+        from memory.schemas import AuditEventType
+        events = AuditLogger(db).get_events(target_id=proposal.id, event_type=AuditEventType.PROPOSAL_REJECTED)
+        assert events[0].diff.after == {"reason": "not needed"}
         
         # 验证没有创建 fact
         facts = await store.list_facts(scope=Scope.GLOBAL)
@@ -421,3 +426,392 @@ def test_list_proposals_with_status_filter(temp_db):
         assert rejected[0].id == proposal2.id
 
     asyncio.run(run())
+
+
+def test_list_scoped_facts_single_query(temp_db):
+    async def run():
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+        for key, scope, session_id in [
+            ("preferred_name", Scope.GLOBAL, None),
+            ("current_topic", Scope.SESSION, "conv1"),
+            ("current_topic", Scope.SESSION, "conv2"),
+        ]:
+            proposal = await store.create_proposal(
+                payload=ProposalPayload(key=key, value=f"{key}-{session_id}", tags=[], ttl_seconds=None),
+                source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="test", excerpt=None),
+            )
+            _commit_db(db)
+            await store.accept_proposal(proposal.id, scope=scope, session_id=session_id)
+            _commit_db(db)
+
+        scoped = await store.list_scoped_facts(session_id="conv1", status=FactStatus.ACTIVE)
+        assert [f.key for f in scoped[Scope.GLOBAL]] == ["preferred_name"]
+        assert [f.value for f in scoped[Scope.SESSION]] == ["current_topic-conv1"]
+
+        global_only = await store.list_scoped_facts(status=FactStatus.ACTIVE)
+        assert len(global_only[Scope.GLOBAL]) == 1
+        assert global_only[Scope.SESSION] == []
+
+    asyncio.run(run())
+
+
+def test_decide_proposals_batch_is_atomic(temp_db):
+    async def run():
+        from memory.audit import AuditLogger
+        from memory.facts import BatchItemError
+        from memory.schemas import AuditEventType, ProposalDecision
+
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+        proposals = await store.create_proposals_batch([
+            {
+                "payload": ProposalPayload(key=f"k{i}", value=i, tags=[], ttl_seconds=None),
+                "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id="test", excerpt=None),
+            }
+            for i in range(3)
+        ])
+        _commit_db(db)
+        assert len(proposals) == 3
+
+        # 第三条引用不存在的 proposal：整批回滚
+        with pytest.raises(BatchItemError) as excinfo:
+            await store.decide_proposals_batch([
+                ProposalDecision(proposal_id=proposals[0].id, action="accept"),
+                ProposalDecision(proposal_id=proposals[1].id, action="reject"),
+                ProposalDecision(proposal_id="missing", action="accept"),
+            ])
+        assert excinfo.value.index == 2
+        _commit_db(db)
+        assert len(await store.list_proposals(status=ProposalStatus.PENDING)) == 3
+        assert await store.list_facts() == []
+
+        with pytest.raises(BatchItemError) as excinfo:
+            await store.decide_proposals_batch([
+                ProposalDecision(proposal_id=proposals[0].id, action="accept", scope=Scope.SESSION),
+            ])
+        assert excinfo.value.message == "session_id is required when scope=session"
+
+        results = await store.decide_proposals_batch([
+            ProposalDecision(proposal_id=proposals[0].id, action="accept"),
+            ProposalDecision(proposal_id=proposals[1].id, action="reject", reason="no"),
+        ])
+        _commit_db(db)
+        assert results[0][0].status == ProposalStatus.ACCEPTED
+        assert results[0][1].key == "k0"
+        assert results[1][0].status == ProposalStatus.REJECTED
+        assert results[1][1] is None
+        assert len(await store.list_proposals(status=ProposalStatus.PENDING)) == 1
+
+        rejected_events = AuditLogger(db).get_events(event_type=AuditEventType.PROPOSAL_REJECTED)
+        assert [event.target.id for event in rejected_events] == [proposals[1].id]
+        assert rejected_events[0].diff.after == {"reason": "no"}
+
+    asyncio.run(run())
+
+
+def test_key_policy_defaults_and_cached_overrides(temp_db):
+    from memory.key_policy import default_key_policy
+
+    assert default_key_policy("preferred_name") == ConflictStrategy.OVERWRITE_LATEST
+    assert default_key_policy("project_cat_goal") == ConflictStrategy.OVERWRITE_LATEST
+    assert default_key_policy("skills") == ConflictStrategy.KEEP_BOTH
+    assert default_key_policy("books_list") == ConflictStrategy.KEEP_BOTH
+    assert default_key_policy("mood") == ConflictStrategy.OVERWRITE_LATEST
+
+    async def run():
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+
+        async def accept(value):
+            proposal = await store.create_proposal(
+                payload=ProposalPayload(key="mood", value=value),
+                source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id=value),
+            )
+            _commit_db(db)
+            await store.accept_proposal(proposal.id)
+            _commit_db(db)
+
+        await accept("happy")
+        await accept("tired")
+        assert len(await store.list_facts(status=FactStatus.ACTIVE)) == 1
+
+        # 写策略后缓存失效，立即按 keep_both 处理
+        await store.set_key_policy("mood", ConflictStrategy.KEEP_BOTH)
+        _commit_db(db)
+        await accept("calm")
+        assert len(await store.list_facts(status=FactStatus.ACTIVE)) == 2
+
+        assert await store.delete_key_policy("mood") is True
+        assert await store.delete_key_policy("mood") is False
+        assert store._get_key_policy("mood", db) == ConflictStrategy.OVERWRITE_LATEST
+
+    asyncio.run(run())
+
+
+def test_fact_composite_indexes_used_for_conflict_lookup(temp_db):
+    from sqlalchemy import text
+
+    db, _ = temp_db
+    names = {row[1] for row in db.execute(text("PRAGMA index_list('facts')"))}
+    assert {"ix_facts_conflict_session", "ix_facts_list_session"} <= names
+    plan = " ".join(
+        str(row[-1])
+        for row in db.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM facts "
+                "WHERE key = 'k' AND scope = 'SESSION' AND status = 'ACTIVE' AND session_id = 's'"
+            )
+        )
+    )
+    assert "ix_facts_conflict_session" in plan
+
+
+def test_decide_proposals_batch_bulk_conflicts_match_sequential(temp_db):
+    """同批内 overwrite_latest 逐条生效；非原子模式逐条报告失败"""
+    async def run():
+        from memory.audit import AuditLogger
+        from memory.facts import BatchItemError
+        from memory.schemas import AuditEventType, ProposalDecision
+
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+        existing = await store.create_proposal(
+            payload=ProposalPayload(key="preferred_name", value="Al"),
+            source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="seed"),
+        )
+        _, old_fact = await store.accept_proposal(existing.id)
+        _commit_db(db)
+
+        items = [("preferred_name", "Alice"), ("preferred_name", "Ally"), ("skills", "go"), ("skills", "rust")]
+        proposals = await store.create_proposals_batch([
+            {"payload": ProposalPayload(key=k, value=v), "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id=v)}
+            for k, v in items
+        ])
+        _commit_db(db)
+
+        decisions = [ProposalDecision(proposal_id=p.id, action="accept") for p in proposals]
+        decisions.append(ProposalDecision(proposal_id=proposals[0].id, action="reject"))
+        results = await store.decide_proposals_batch(decisions, atomic=False)
+        _commit_db(db)
+
+        assert results[0][1].id == old_fact.id and results[0][1].version == 2
+        assert results[1][1].id == old_fact.id and results[1][1].version == 3
+        assert results[2][1].id != results[3][1].id
+        assert isinstance(results[4], BatchItemError) and results[4].index == 4
+
+        active = await store.list_facts(status=FactStatus.ACTIVE)
+        assert sorted((f.key, f.value) for f in active) == [
+            ("preferred_name", "Ally"), ("skills", "go"), ("skills", "rust"),
+        ]
+        events = AuditLogger(db).get_events(target_type="fact", limit=50)
+        assert [e.type for e in events].count(AuditEventType.FACT_UPDATED) == 2
+        assert [e.type for e in events].count(AuditEventType.FACT_CREATED) == 3
+
+    asyncio.run(run())
+
+
+def test_create_proposals_batch_auto_accept_shares_transaction(temp_db):
+    async def run():
+        from memory.facts import BatchItemError
+
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+        items = [
+            {"payload": ProposalPayload(key="timezone", value="UTC"), "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id="a")},
+            {"payload": ProposalPayload(key="mood", value="ok"), "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id="b"),
+             "scope_hint": Scope.SESSION},
+        ]
+        # 第二条 session scope 缺 session_id，接受失败：创建一并回滚
+        with pytest.raises(BatchItemError) as excinfo:
+            await store.create_proposals_batch(items, auto_accept=[True, True])
+        assert excinfo.value.index == 1
+        _commit_db(db)
+        assert await store.list_proposals() == []
+        assert await store.list_facts() == []
+
+        results = await store.create_proposals_batch(items, auto_accept=[True, False])
+        _commit_db(db)
+        assert results[0][0].status == ProposalStatus.ACCEPTED and results[0][1].key == "timezone"
+        assert results[1].status == ProposalStatus.PENDING
+
+    asyncio.run(run())
+
+
+def test_apply_fact_actions_batch(temp_db):
+    async def run():
+        from memory.facts import BatchItemError
+        from memory.schemas import FactAction
+
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+        proposals = await store.create_proposals_batch([
+            {"payload": ProposalPayload(key=f"k{i}", value=i), "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id="t")}
+            for i in range(3)
+        ])
+        _commit_db(db)
+        for p in proposals:
+            await store.accept_proposal(p.id)
+        _commit_db(db)
+        facts = sorted(await store.list_facts(), key=lambda f: f.key)
+
+        with pytest.raises(BatchItemError):
+            await store.apply_fact_actions_batch([
+                FactAction(fact_id=facts[0].id, action="revoke"),
+                FactAction(fact_id=facts[1].id, action="reactivate"),
+            ])
+        _commit_db(db)
+        assert len(await store.list_facts(status=FactStatus.ACTIVE)) == 3
+
+        results = await store.apply_fact_actions_batch([
+            FactAction(fact_id=facts[0].id, action="revoke"),
+            FactAction(fact_id=facts[1].id, action="archive"),
+            FactAction(fact_id=facts[1].id, action="reactivate"),
+            FactAction(fact_id="missing", action="archive"),
+        ], atomic=False)
+        _commit_db(db)
+        assert results[0].status == FactStatus.REVOKED
+        assert results[2].status == FactStatus.ACTIVE
+        assert isinstance(results[3], BatchItemError)
+        assert {f.key for f in await store.list_facts(status=FactStatus.ACTIVE)} == {"k1", "k2"}
+
+    asyncio.run(run())
+
+
+def test_check_expired_proposals_uses_expires_at(temp_db):
+    async def run():
+        from datetime import datetime, timedelta, timezone
+
+        from memory.audit import AuditLogger
+        from memory.schemas import AuditEventType
+
+        db, _ = temp_db
+        store = MemoryStore(db=db)
+        short = await store.create_proposal(
+            payload=ProposalPayload(key="a", value=1, ttl_seconds=60),
+            source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id="t"),
+        )
+        batch = await store.create_proposals_batch([
+            {"payload": ProposalPayload(key="b", value=2, ttl_seconds=3600), "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id="t")},
+            {"payload": ProposalPayload(key="c", value=3), "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id="t")},
+        ])
+        _commit_db(db)
+
+        now = datetime.now(timezone.utc)
+        assert await store.check_expired_proposals(now=now) == []
+        assert await store.check_expired_proposals(now=now + timedelta(seconds=120)) == [short.id]
+        _commit_db(db)
+        assert await store.check_expired_proposals(now=now + timedelta(days=1)) == [batch[0].id]
+        _commit_db(db)
+
+        assert (await store.get_proposal(short.id)).status == ProposalStatus.EXPIRED
+        assert (await store.get_proposal(batch[1].id)).status == ProposalStatus.PENDING
+        events = AuditLogger(db).get_events(event_type=AuditEventType.PROPOSAL_EXPIRED)
+        assert {e.target.id for e in events} == {short.id, batch[0].id}
+
+    asyncio.run(run())
+
+
+def test_migrate_expires_at_treats_zero_ttl_as_never(temp_db, monkeypatch):
+    from sqlalchemy import text
+
+    from memory import db as db_module
+
+    db, _ = temp_db
+    store = MemoryStore(db=db)
+    created = asyncio.run(store.create_proposals_batch([
+        {"payload": ProposalPayload(key=f"k{ttl}", value=1, ttl_seconds=ttl), "source_ref": SourceRef(kind=SourceKind.MANUAL, ref_id="t")}
+        for ttl in (0, 60, None)
+    ]))
+    _commit_db(db)
+    # 模拟旧 schema：去掉 expires_at 列
+    bind = db.get_bind()
+    with bind.connect() as conn:
+        conn.execute(text("DROP INDEX ix_proposals_status_expires_at"))
+        conn.execute(text("ALTER TABLE proposals DROP COLUMN expires_at"))
+        conn.commit()
+
+    monkeypatch.setattr(db_module, "engine", bind)
+    monkeypatch.setattr(db_module, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=bind))
+    db_module._migrate_proposals_expires_at()
+
+    with bind.connect() as conn:
+        rows = dict(conn.execute(text("SELECT id, expires_at FROM proposals")).all())
+    assert rows[created[0].id] is None
+    assert rows[created[1].id] is not None
+    assert rows[created[2].id] is None
+
+
+def _seed_audit_events(db, count, start, step_minutes=60 * 24):
+    from datetime import timedelta
+
+    from memory.db import AuditEventModel
+    from memory.schemas import AuditEventType
+
+    for i in range(count):
+        db.add(AuditEventModel(
+            id=f"e{i:04d}",
+            type=AuditEventType.FACT_CREATED if i % 2 else AuditEventType.FACT_UPDATED,
+            actor_kind="system",
+            actor_id="system",
+            target_type="fact",
+            target_id=f"f{i % 3}",
+            created_at=start + timedelta(minutes=step_minutes * i),
+        ))
+    db.commit()
+
+
+def test_audit_keyset_pagination_and_iteration(temp_db):
+    from datetime import datetime
+
+    from memory.audit import AuditLogger
+
+    db, _ = temp_db
+    _seed_audit_events(db, 25, datetime(2025, 1, 1), step_minutes=0)  # 同一时间戳，靠 id 打破平局
+    logger = AuditLogger(db)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = logger.get_events_page(limit=10, cursor=cursor)
+        seen.extend(e.id for e in page)
+        if cursor is None:
+            break
+    assert seen == [f"e{i:04d}" for i in reversed(range(25))]
+
+    page, _ = logger.get_events_page(target_id="f1", limit=100)
+    assert [e.id for e in page] == [f"e{i:04d}" for i in reversed(range(25)) if i % 3 == 1]
+    assert [e.id for e in logger.iter_events(chunk_size=7)] == [f"e{i:04d}" for i in range(25)]
+    with pytest.raises(ValueError):
+        logger.get_events_page(cursor="not-a-cursor")
+
+
+def test_audit_archive_moves_old_events_to_monthly_segments(temp_db, tmp_path):
+    from datetime import datetime
+
+    from memory.audit import AuditLogger
+    from memory.audit_archive import AuditArchive
+
+    db, _ = temp_db
+    _seed_audit_events(db, 60, datetime(2025, 1, 1))  # 2025-01-01 起每天一条
+    archive = AuditArchive(tmp_path / "archive")
+
+    result = archive.archive_older_than(10, db=db, now=datetime(2025, 3, 1), chunk_rows=16)
+    assert result["archived"] == 49
+    assert result["segments"] == {"2025-01": 31, "2025-02": 18}
+    assert len(AuditLogger(db).get_events(limit=100)) == 11
+    segments = archive.segments()
+    assert segments["2025-02"]["count"] == 18
+    assert set(segments["2025-01"]["types"]) == {"fact.created", "fact.updated"}
+
+    records = list(archive.iter_records())
+    assert [r["id"] for r in records] == [f"e{i:04d}" for i in range(49)]
+    feb = list(archive.iter_records(since=datetime(2025, 2, 10), target_id="f0"))
+    assert all(r["created_at"] >= "2025-02-10" and r["target"]["id"] == "f0" for r in feb)
+    assert len(feb) == 3
+
+    # 再次归档只追加新到期的部分；崩溃残留的尾部按 index 截断
+    with open(tmp_path / "archive" / segments["2025-02"]["file"], "ab") as handle:
+        handle.write(b"garbage")
+    result = archive.archive_older_than(0, db=db, now=datetime(2025, 3, 2))
+    assert result["archived"] == 11
+    assert [r["id"] for r in archive.iter_records()] == [f"e{i:04d}" for i in range(60)]
@@ -0,0 +1,66 @@
+from memory.retrieval import BM25Index, rank_facts, tokenize
+
+
+def _fact(key, value, updated_at="2025-01-01T00:00:00"):
+    return {"id": f"id-{key}", "key": key, "value": value, "status": "active", "updated_at": updated_at}
+
+
+FACTS = [
+    _fact("preferred_name", "Alice"),
+    _fact("favorite_food", "spicy noodles"),
+    _fact("pet", "a cat named Mochi"),
+    _fact("job", "backend engineer"),
+    _fact("hometown", "杭州"),
+    _fact("hobby", "喜欢爬山和徒步"),
+]
+
+
+def test_tokenize_splits_keys_and_cjk_bigrams():
+    assert tokenize("favorite_food: Spicy") == ["favorite", "food", "spicy"]
+    assert tokenize("喜欢爬山") == ["喜欢", "欢爬", "爬山"]
+    assert tokenize("我在gym健身") == ["我在", "gym", "健身"]
+
+
+def test_bm25_prefers_rare_matching_terms():
+    index = BM25Index([["cat", "pet"], ["dog", "pet"], ["food"]])
+    scores = index.scores(["cat", "pet"])
+    assert scores[0] > scores[1] > scores[2] == 0.0
+
+
+def test_rank_facts_pins_and_orders_by_relevance():
+    ranked = rank_facts(FACTS, "what food should I cook tonight?", top_k=3)
+    assert [f["key"] for f in ranked][:2] == ["preferred_name", "favorite_food"]
+    assert len(ranked) == 4
+
+    ranked = rank_facts(FACTS, "周末想去爬山", top_k=1)
+    assert [f["key"] for f in ranked] == ["preferred_name", "hobby"]
+
+
+def test_pinned_facts_bypass_top_k_and_token_budget():
+    name = _fact("preferred_name", "A" * 400)
+    ranked = rank_facts([name] + FACTS[1:], "spicy noodles", top_k=1, token_budget=40)
+    assert [f["key"] for f in ranked] == ["preferred_name", "favorite_food"]
+    assert [f["key"] for f in rank_facts([name], "spicy", top_k=0, token_budget=1)] == ["preferred_name"]
+
+
+def test_rank_facts_respects_token_budget():
+    big = _fact("notes", "x" * 4000)
+    ranked = rank_facts(FACTS + [big], "notes about my cat", token_budget=200)
+    keys = [f["key"] for f in ranked]
+    assert "notes" not in keys
+    assert keys[:2] == ["preferred_name", "pet"]
+
+
+def test_rank_facts_unrelated_query_falls_back_to_recency():
+    facts = [_fact("a", "one", "2025-01-01"), _fact("b", "two", "2025-03-01")]
+    assert [f["key"] for f in rank_facts(facts, "zzz", top_k=1, pinned_keys=())] == ["b"]
+
+
+def test_rank_facts_recency_tie_break_compares_timestamps():
+    # 字符串比较会把 "2025-03-01T10:00:00" 排在 "2025-03-01T10:00:00.500000" 之后
+    facts = [
+        _fact("a", "one", "2025-03-01T10:00:00"),
+        _fact("b", "two", "2025-03-01T10:00:00.500000"),
+        _fact("c", "three", "2025-02-28T23:00:00-12:00"),
+    ]
+    assert [f["key"] for f in rank_facts(facts, "zzz", pinned_keys=())] == ["c", "b", "a"]
@@ -0,0 +1,87 @@
+import threading
+
+from memory.transcript import TranscriptStore
+
+
+def test_append_read_and_tail(tmp_path):
+    store = TranscriptStore(tmp_path)
+    items = [{"role": "user", "content": f"消息 {i}"} for i in range(20)]
+    for i, item in enumerate(items):
+        assert store.append("s1", item) == i
+
+    assert store.count("s1") == 20
+    assert store.get("s1") == items
+    assert store.tail("s1", 3) == items[-3:]
+    assert store.read("s1", 5, 8) == items[5:8]
+    assert store.tail("s1", 100) == items
+    assert store.get("other") == []
+
+
+def test_segments_roll_and_survive_reopen(tmp_path):
+    items = [{"type": "tool_result", "name": "search", "content": "x" * 50, "n": i} for i in range(100)]
+    with TranscriptStore(tmp_path, segment_bytes=512) as store:
+        for item in items:
+            store.append("s1", item)
+    segments = sorted((tmp_path / "s1").glob("*.seg"))
+    assert len(segments) > 5
+    assert all(path.stat().st_size <= 512 for path in segments)
+
+    reopened = TranscriptStore(tmp_path, segment_bytes=512)
+    assert reopened.count("s1") == 100
+    assert reopened.get("s1") == items
+    assert reopened.read("s1", 37, 63) == items[37:63]
+    assert reopened.tail("s1", 1) == items[-1:]
+    assert reopened.append("s1", {"after": "reopen"}) == 100
+
+
+def test_recovers_from_torn_writes(tmp_path):
+    with TranscriptStore(tmp_path) as store:
+        for i in range(5):
+            store.append("s1", {"n": i})
+    seg = tmp_path / "s1" / f"{0:020d}.seg"
+    idx = tmp_path / "s1" / f"{0:020d}.idx"
+
+    # 完整记录已写入 .seg，但索引项丢失；再加半条记录
+    idx.write_bytes(idx.read_bytes()[:-8 * 2])
+    with open(seg, "ab") as handle:
+        handle.write(b"\x20\x00\x00\x00garbage")
+
+    store = TranscriptStore(tmp_path)
+    assert store.get("s1") == [{"n": i} for i in range(5)]
+    assert store.append("s1", {"n": 5}) == 5
+    store.close()
+
+    # 索引整个丢失时按分段重建
+    idx.unlink()
+    assert TranscriptStore(tmp_path).get("s1") == [{"n": i} for i in range(6)]
+
+
+def test_lru_eviction_and_session_names(tmp_path):
+    store = TranscriptStore(tmp_path, max_open_sessions=2)
+    names = ["a/b", "..", "用户 1", "plain"]
+    for name in names:
+        store.append(name, {"session": name})
+    assert len(store._states) == 2
+    for name in names:
+        assert store.get(name) == [{"session": name}]
+    assert store.sessions() == sorted(names)
+    assert len(list(tmp_path.iterdir())) == 4  # ".." 与 "a/b" 不会逃出存储目录
+
+
+def test_concurrent_appends_keep_every_record(tmp_path):
+    store = TranscriptStore(tmp_path, segment_bytes=1024)
+
+    def worker(session_id):
+        for i in range(200):
+            store.append(session_id, {"n": i})
+
+    threads = [threading.Thread(target=worker, args=(f"s{i % 3}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(3):
+        records = store.get(f"s{i}")
+        assert len(records) == 400
+        assert sorted(r["n"] for r in records) == sorted(list(range(200)) * 2)
@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from memory.vector_store import HashingEmbedder, VectorStore, record_text  # noqa: E402
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed(["我喜欢绿茶", "favorite color: blue"])
+    second = HashingEmbedder(dim=64).embed(["我喜欢绿茶", "favorite color: blue"])
+    assert first.dtype == np.float32
+    assert np.allclose(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+
+def test_index_and_search_facts_by_text():
+    store = VectorStore(dim=128)
+    store.index({"id": "f1", "key": "preferred_name", "value": "Alice"})
+    store.index({"id": "f2", "key": "favorite_food", "value": "spicy noodles"})
+    store.index({"id": "t1", "text": "用户说最近在学习日语"})
+
+    assert store.search("what is my favorite food", k=1)[0][0] == "f2"
+    assert store.search("学习日语", k=1)[0][0] == "t1"
+    assert record_text({"key": "tags", "value": ["a", "b"]}) == 'tags: ["a", "b"]'
+
+
+def test_update_and_delete_use_tombstones():
+    store = VectorStore(dim=8, compact_ratio=0)
+    eye = np.eye(8, dtype=np.float32)
+    store.upsert(["a", "b"], vectors=eye[:2])
+    store.upsert(["a"], vectors=eye[2:3])
+
+    assert store.search(eye[2], k=1) == [("a", pytest.approx(1.0))]
+    assert store.search(eye[0], k=2)[0][0] != "a"
+    assert store.delete("b") is True
+    assert store.delete("b") is False
+    assert len(store) == 1
+    assert store.stats()["tombstones"] == 2
+
+    assert store.compact() == 2
+    assert store.stats()["rows"] == 1
+    assert store.search(eye[2], k=5) == [("a", pytest.approx(1.0))]
+
+
+def test_memmap_persistence_and_growth(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((3000, 16)).astype(np.float32)
+    with VectorStore(tmp_path / "idx", dim=16, initial_capacity=100) as store:
+        store.upsert([f"v{i}" for i in range(3000)], vectors=vectors)
+        store.delete("v1")
+
+    reopened = VectorStore(tmp_path / "idx")
+    assert reopened.dim == 16
+    assert len(reopened) == 2999
+    assert "v1" not in reopened
+    assert reopened.search(vectors[42], k=1)[0][0] == "v42"
+
+
+def test_search_batch_matches_single_queries_across_blocks(monkeypatch):
+    monkeypatch.setattr("memory.vector_store.SEARCH_BLOCK_ROWS", 64)
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((500, 12)).astype(np.float32)
+    store = VectorStore(dim=12)
+    store.upsert([str(i) for i in range(500)], vectors=vectors)
+
+    probes = list(vectors[:5])
+    batched = store.search_batch(probes, k=3)
+    for probe, hits in zip(probes, batched):
+        assert [h[0] for h in hits] == [h[0] for h in store.search(probe, k=3)]
+    assert [hits[0][0] for hits in batched] == ["0", "1", "2", "3", "4"]
+
+
+def test_auto_compaction_bounds_tombstones():
+    store = VectorStore(dim=4, compact_ratio=0.25)
+    vectors = np.tile(np.eye(4, dtype=np.float32), (500, 1))
+    store.upsert([str(i) for i in range(2000)], vectors=vectors)
+    for i in range(1500):
+        store.delete(str(i))
+    stats = store.stats()
+    assert stats["live"] == 500
+    # 压实过（行数回落），且小索引（< 1024 行）不再触发压实
+    assert stats["rows"] < 1024
+    hits = [h for h in store.search(vectors[3], k=500) if h[1] > 0.5]
+    assert len(hits) == 125
+    assert all(int(record_id) >= 1500 for record_id, _ in hits)
+
+
+def test_flush_appends_only_new_ids(tmp_path):
+    eye = np.eye(4, dtype=np.float32)
+    store = VectorStore(tmp_path / "idx", dim=4, compact_ratio=0)
+    store.upsert(["a", "b"], vectors=eye[:2])
+    store.flush()
+    ids_file = tmp_path / "idx" / "ids.jsonl"
+    first = ids_file.read_bytes()
+    store.upsert(["c"], vectors=eye[2:3])
+    store.delete("a")
+    store.flush()
+    assert ids_file.read_bytes() == first + b'"c"\n'
+    assert "ids" not in json.loads((tmp_path / "idx" / "meta.json").read_text(encoding="utf-8"))
+
+    # 模拟 flush 追加了 id 但 meta 未提交就崩溃：未提交的尾部在重新打开时被忽略
+    with open(ids_file, "ab") as handle:
+        handle.write(b'"ghost"\n')
+    reopened = VectorStore(tmp_path / "idx")
+    assert len(reopened) == 2 and "b" in reopened and "c" in reopened
+    reopened.upsert(["d"], vectors=eye[3:4])
+    reopened.close()
+    assert [hit[0] for hit in VectorStore(tmp_path / "idx").search(eye[3], k=1)] == ["d"]
+
+
+def test_compaction_crash_keeps_previous_index(tmp_path, monkeypatch):
+    eye = np.eye(4, dtype=np.float32)
+    with VectorStore(tmp_path / "idx", dim=4, compact_ratio=0) as store:
+        store.upsert(["a", "b", "c"], vectors=eye[:3])
+        store.delete("b")
+
+    store = VectorStore(tmp_path / "idx", compact_ratio=0)
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("memory.vector_store._write_atomic", crash)
+    with pytest.raises(OSError):
+        store.compact()
+    monkeypatch.undo()
+
+    reopened = VectorStore(tmp_path / "idx", compact_ratio=0)
+    assert len(reopened) == 2
+    assert reopened.search(eye[2], k=1)[0][0] == "c"
+    assert reopened.compact() == 1
+    assert not (tmp_path / "idx" / "vectors.f32").exists()
+    again = VectorStore(tmp_path / "idx")
+    assert again.stats()["rows"] == 2
+    assert again.search(eye[0], k=1)[0][0] == "a"
+
+
+def test_loads_legacy_meta_with_inline_ids(tmp_path):
+    path = tmp_path / "idx"
+    path.mkdir()
+    eye = np.eye(4, dtype=np.float32)
+    matrix = np.memmap(path / "vectors.f32", dtype=np.float32, mode="w+", shape=(4, 4))
+    matrix[:] = eye
+    matrix.flush()
+    del matrix
+    meta = {"dim": 4, "capacity": 4, "ids": ["a", None, "c", "d"]}
+    (path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    store = VectorStore(path)
+    assert len(store) == 3
+    store.upsert(["e"], vectors=eye[1:2])
+    store.close()
+    reopened = VectorStore(path)
+    assert len(reopened) == 4
+    assert reopened.search(eye[1], k=1)[0][0] == "e"
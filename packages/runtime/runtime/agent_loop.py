@@ -1,12 +1,25 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Protocol
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Protocol, Set, Tuple
 
+from memory.transcript import TranscriptStore as SegmentTranscriptStore
+
+from runtime.facts import FactCandidate, FactRecord, FactsStore
 from runtime.lane_queue import LaneQueue
 from runtime.memory_hook import MemoryHook
-from memory.facts import FactCandidate, FactRecord, FactsStore
+from runtime.tool_runner import run_tool_calls
+
+logger = logging.getLogger(__name__)
+
+
+class MaxStepsExceeded(RuntimeError):
+    """The LLM kept requesting tools past AgentLoop's max_steps budget."""
 
 
 class LLMProtocol(Protocol):
@@ -19,6 +32,15 @@ class ToolRunnerProtocol(Protocol):
         ...
 
 
+@dataclass
+class _SessionTranscript:
+    items: Deque[Dict[str, Any]]
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    # Items ever appended, including those the ring buffer has dropped
+    appended: int = 0
+
+
 @dataclass
 class TranscriptStore:
     """In-memory transcript storage.
@@ -28,20 +50,147 @@ class TranscriptStore:
     - Tool call: {"type": "tool_call", "name": str, "arguments": dict}
     - Tool result: {"type": "tool_result", "name": str, "content": str|None}
 
-    Concurrency semantics: guarded by an asyncio.Lock to keep per-session append
-    order deterministic when accessed concurrently.
+    Concurrency semantics: each session has its own asyncio.Lock, so appends
+    within a session stay ordered while different sessions never contend.
+
+    Memory bounds: with max_items_per_session set, each session is a ring
+    buffer that drops its oldest items; with idle_ttl_sec set, sessions not
+    touched for that long are evicted (checked lazily on append, or via
+    evict_idle()). Per-session state kept elsewhere can follow evictions by
+    registering a callback with on_evict().
+    """
+
+    max_items_per_session: Optional[int] = None
+    idle_ttl_sec: Optional[float] = None
+    _sessions: Dict[str, _SessionTranscript] = field(default_factory=dict)
+    _last_sweep: float = field(default_factory=time.monotonic)
+    _evict_callbacks: List[Callable[[str], None]] = field(default_factory=list)
+
+    async def append(self, session_id: str, item: Dict[str, Any]) -> None:
+        session = self._session(session_id)
+        async with session.lock:
+            session.items.append(item)
+            session.appended += 1
+        self._maybe_evict_idle()
+
+    async def get(self, session_id: str) -> List[Dict[str, Any]]:
+        """Return a copy of the whole session transcript."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return []
+        async with session.lock:
+            session.last_used = time.monotonic()
+            return list(session.items)
+
+    async def tail(self, session_id: str, n: int) -> List[Dict[str, Any]]:
+        """Return the last n items, copying only those n."""
+        session = self._sessions.get(session_id)
+        if session is None or n <= 0:
+            return []
+        async with session.lock:
+            session.last_used = time.monotonic()
+            newest = list(islice(reversed(session.items), n))
+        newest.reverse()
+        return newest
+
+    async def window(self, session_id: str, n: Optional[int]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (position of the first item, items) for the last n items, or all when n is None.
+
+        Positions count every item appended to the session, so they stay
+        stable when the ring buffer drops old items.
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return 0, []
+        async with session.lock:
+            session.last_used = time.monotonic()
+            if n is None:
+                items = list(session.items)
+            else:
+                items = list(islice(reversed(session.items), max(n, 0)))
+                items.reverse()
+            return session.appended - len(items), items
+
+    def iter_items(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """Iterate a session's items in order without copying.
+
+        The iterator reads the live ring buffer: consume it without awaiting
+        in between, otherwise a concurrent append makes it raise RuntimeError.
+        """
+        session = self._sessions.get(session_id)
+        return iter(session.items) if session is not None else iter(())
+
+    def count(self, session_id: str) -> int:
+        session = self._sessions.get(session_id)
+        return len(session.items) if session is not None else 0
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop sessions idle for longer than idle_ttl_sec; returns how many."""
+        if self.idle_ttl_sec is None:
+            return 0
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        expired = [
+            session_id
+            for session_id, session in self._sessions.items()
+            if now - session.last_used > self.idle_ttl_sec and not session.lock.locked()
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+            for callback in self._evict_callbacks:
+                callback(session_id)
+        return len(expired)
+
+    def on_evict(self, callback: Callable[[str], None]) -> None:
+        """Call callback(session_id) whenever an idle session is evicted."""
+        self._evict_callbacks.append(callback)
+
+    def _session(self, session_id: str) -> _SessionTranscript:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = _SessionTranscript(items=deque(maxlen=self.max_items_per_session))
+            self._sessions[session_id] = session
+        else:
+            session.last_used = time.monotonic()
+        return session
+
+    def _maybe_evict_idle(self) -> None:
+        # Amortized sweep: at most twice per TTL window
+        if self.idle_ttl_sec is not None and time.monotonic() - self._last_sweep > self.idle_ttl_sec / 2:
+            self.evict_idle()
+
+
+class PersistentTranscriptStore:
+    """Durable transcript storage backed by memory.transcript segment files.
+
+    Same async contract as TranscriptStore, but items live on disk: only a
+    bounded LRU of open sessions is kept in memory, and history survives
+    restarts. File I/O runs in a worker thread so the event loop never blocks.
     """
 
-    _items: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
-    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    def __init__(self, store: Optional[SegmentTranscriptStore] = None, root: Optional[str] = None) -> None:
+        self._store = store or SegmentTranscriptStore(root)
 
     async def append(self, session_id: str, item: Dict[str, Any]) -> None:
-        async with self._lock:
-            self._items.setdefault(session_id, []).append(item)
+        await asyncio.to_thread(self._store.append, session_id, item)
 
     async def get(self, session_id: str) -> List[Dict[str, Any]]:
-        async with self._lock:
-            return list(self._items.get(session_id, []))
+        return await asyncio.to_thread(self._store.get, session_id)
+
+    async def tail(self, session_id: str, n: int) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._store.tail, session_id, n)
+
+    async def window(self, session_id: str, n: Optional[int]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (position of the first item, items) for the last n items, or all when n is None."""
+        return await asyncio.to_thread(self._window, session_id, n)
+
+    def _window(self, session_id: str, n: Optional[int]) -> Tuple[int, List[Dict[str, Any]]]:
+        count = self._store.count(session_id)
+        start = 0 if n is None else max(0, count - max(n, 0))
+        return start, self._store.read(session_id, start, count)
+
+    def close(self) -> None:
+        self._store.close()
 
 
 class AgentLoop:
@@ -49,10 +198,14 @@ class AgentLoop:
         self,
         llm: LLMProtocol,
         tools: ToolRunnerProtocol,
-        transcript: TranscriptStore,
+        transcript: TranscriptStore | PersistentTranscriptStore,
         queue: LaneQueue,
         memory_hook: Optional[MemoryHook] = None,
         facts: Optional[FactsStore] = None,
+        memory_hook_window: Optional[int] = 64,
+        max_steps: int = 8,
+        tool_timeout_sec: Optional[float] = 30.0,
+        max_parallel_tools: int = 4,
     ) -> None:
         self._llm = llm
         self._tools = tools
@@ -60,6 +213,20 @@ class AgentLoop:
         self._queue = queue
         self._memory_hook = memory_hook
         self._facts = facts
+        # How many trailing transcript items the memory hook sees (None = all)
+        self._memory_hook_window = memory_hook_window
+        # Tool rounds per turn, per-call timeout and in-flight calls per round
+        self._max_steps = max_steps
+        self._tool_timeout_sec = tool_timeout_sec
+        self._max_parallel_tools = max_parallel_tools
+        # Background memory work: (start position, transcript snapshot) awaiting extraction per session
+        self._memory_backlog: Dict[str, List[Tuple[int, List[Dict[str, Any]]]]] = {}
+        self._memory_tasks: Set["asyncio.Task[None]"] = set()
+        # Drop the hook's per-session state when the transcript evicts the session
+        reset = getattr(memory_hook, "reset", None)
+        on_evict = getattr(transcript, "on_evict", None)
+        if reset is not None and on_evict is not None:
+            on_evict(reset)
 
     async def handle(self, session_id: str, user_text: str) -> str:
         async def run_loop() -> str:
@@ -68,51 +235,102 @@ class AgentLoop:
             await self._transcript.append(session_id, user_event)
             messages.append(user_event)
 
-            first = await self._llm.generate(messages)
-            if first.get("type") == "final":
-                assistant_event = {"role": "assistant", "content": first["content"]}
-                await self._transcript.append(session_id, assistant_event)
-                await self._run_memory_hook(session_id)
-                return first["content"]
-
-            if first.get("type") != "tool_call":
-                raise ValueError("Unexpected LLM response")
-
-            tool_call_event = {
-                "type": "tool_call",
-                "name": first["name"],
-                "arguments": first.get("arguments", {}),
-            }
-            await self._transcript.append(session_id, tool_call_event)
-            messages.append(tool_call_event)
-
-            tool_result = await self._tools.run(
-                first["name"], first.get("arguments", {}), {"session_id": session_id}
-            )
-            tool_result_event = {
-                "type": "tool_result",
-                "name": first["name"],
-                "content": tool_result.get("content"),
-            }
-            await self._transcript.append(session_id, tool_result_event)
-            messages.append(tool_result_event)
-
-            second = await self._llm.generate(messages)
-            if second.get("type") != "final":
-                raise ValueError("Unexpected LLM response")
-
-            assistant_event = {"role": "assistant", "content": second["content"]}
-            await self._transcript.append(session_id, assistant_event)
-            await self._run_memory_hook(session_id)
-            return second["content"]
+            for _ in range(self._max_steps):
+                response = await self._llm.generate(messages)
+                if response.get("type") == "final":
+                    assistant_event = {"role": "assistant", "content": response["content"]}
+                    await self._transcript.append(session_id, assistant_event)
+                    await self._schedule_memory_hook(session_id)
+                    return response["content"]
+
+                calls = self._tool_calls(response)
+                for call in calls:
+                    tool_call_event = {
+                        "type": "tool_call",
+                        "name": call["name"],
+                        "arguments": call.get("arguments", {}),
+                    }
+                    if "id" in call:
+                        tool_call_event["id"] = call["id"]
+                    await self._transcript.append(session_id, tool_call_event)
+                    messages.append(tool_call_event)
+
+                results = await run_tool_calls(
+                    self._tools,
+                    calls,
+                    {"session_id": session_id},
+                    timeout=self._tool_timeout_sec,
+                    max_concurrency=self._max_parallel_tools,
+                )
+                for call, result in zip(calls, results):
+                    tool_result_event = self._tool_result_event(call, result)
+                    await self._transcript.append(session_id, tool_result_event)
+                    messages.append(tool_result_event)
+
+            raise MaxStepsExceeded(f"No final answer after {self._max_steps} steps")
 
         return await self._queue.submit(session_id, run_loop)
 
-    async def _run_memory_hook(self, session_id: str) -> None:
+    def _tool_calls(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Normalize a single "tool_call" or a batched "tool_calls" response."""
+        if response.get("type") == "tool_call":
+            return [response]
+        if response.get("type") == "tool_calls" and response.get("calls"):
+            return list(response["calls"])
+        raise ValueError("Unexpected LLM response")
+
+    def _tool_result_event(self, call: Dict[str, Any], result: Dict[str, Any] | BaseException) -> Dict[str, Any]:
+        event: Dict[str, Any] = {"type": "tool_result", "name": call["name"]}
+        if "id" in call:
+            event["id"] = call["id"]
+        if isinstance(result, asyncio.TimeoutError):
+            # A slow tool should not sink the turn: report it and let the LLM continue
+            event["content"] = None
+            event["error"] = f"Tool '{call['name']}' timed out after {self._tool_timeout_sec}s"
+            return event
+        if isinstance(result, BaseException):
+            raise result
+        event["content"] = result.get("content")
+        return event
+
+    async def flush_memory(self) -> None:
+        """Wait until all scheduled background memory work has finished."""
+        while self._memory_tasks:
+            await asyncio.gather(*list(self._memory_tasks), return_exceptions=True)
+
+    async def _schedule_memory_hook(self, session_id: str) -> None:
+        """Queue memory extraction for this turn without waiting for it.
+
+        The transcript window is captured now, so extraction sees this turn
+        even if later turns land first. The work runs as a job on the
+        session's own lane, after the current turn, so it stays ordered with
+        the session's turns; turns that finish before it starts are drained
+        together and their facts committed in one batch.
+        """
         if self._memory_hook is None or self._facts is None:
             return
-        transcript = await self._transcript.get(session_id)
-        candidates = await self._memory_hook.extract_candidates(session_id, transcript)
+        snapshot = await self._transcript.window(session_id, self._memory_hook_window)
+        backlog = self._memory_backlog.setdefault(session_id, [])
+        backlog.append(snapshot)
+        if len(backlog) > 1:
+            return
+        task = asyncio.create_task(
+            self._queue.submit(session_id, lambda: self._run_memory_hook(session_id))
+        )
+        self._memory_tasks.add(task)
+        task.add_done_callback(self._memory_task_done)
+
+    def _memory_task_done(self, task: "asyncio.Task[None]") -> None:
+        self._memory_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background memory hook failed", exc_info=task.exception())
+
+    async def _run_memory_hook(self, session_id: str) -> None:
+        snapshots = self._memory_backlog.pop(session_id, [])
+        extracted: List[List[FactCandidate]] = []
+        for start, transcript in snapshots:
+            extracted.append(await self._memory_hook.extract_candidates(session_id, transcript, start=start))
+        candidates = [candidate for batch in extracted for candidate in batch]
         if not candidates:
             return
         for candidate in candidates:
@@ -123,9 +341,7 @@ class AgentLoop:
                     "candidate": self._candidate_summary(candidate),
                 },
             )
-        committed: List[FactRecord] = []
-        for candidate in candidates:
-            committed.append(await self._facts.create_record_direct(candidate))
+        committed = await self._commit_candidates(candidates)
         for record in committed:
             await self._transcript.append(
                 session_id,
@@ -134,7 +350,19 @@ class AgentLoop:
                     "record": self._record_summary(record),
                 },
             )
-        await self._memory_hook.on_committed(session_id, committed, transcript)
+        position = 0
+        for (_, transcript), batch in zip(snapshots, extracted):
+            if batch:
+                await self._memory_hook.on_committed(
+                    session_id, committed[position:position + len(batch)], transcript
+                )
+                position += len(batch)
+
+    async def _commit_candidates(self, candidates: List[FactCandidate]) -> List[FactRecord]:
+        create_many = getattr(self._facts, "create_records_direct", None)
+        if create_many is not None:
+            return list(await create_many(candidates))
+        return [await self._facts.create_record_direct(candidate) for candidate in candidates]
 
     def _candidate_summary(self, candidate: FactCandidate) -> Dict[str, Any]:
         return {
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ACTIVE = "active"
+SUPERSEDED = "superseded"
+
+
+@dataclass(frozen=True)
+class FactCandidate:
+    """A subject/predicate/object fact proposed by a memory hook."""
+
+    subject: str
+    predicate: str
+    object: str
+    confidence: float
+    source: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class FactRecord:
+    """A committed fact. Only the newest record per (subject, predicate) is active."""
+
+    id: str
+    subject: str
+    predicate: str
+    object: str
+    confidence: float
+    source: Dict[str, Any] = field(default_factory=dict)
+    status: str = ACTIVE
+    created_at: float = field(default_factory=time.time)
+
+
+class FactsStore:
+    """In-process fact store for the agent loop's memory hook.
+
+    Committing a fact supersedes the active record with the same subject and
+    predicate; superseded records stay listed for history. Methods are async
+    so a persistent backend can be swapped in without touching callers.
+    """
+
+    def __init__(self) -> None:
+        self._records: List[FactRecord] = []
+        self._active: Dict[Tuple[str, str], FactRecord] = {}
+
+    async def create_record_direct(self, candidate: FactCandidate) -> FactRecord:
+        return self._commit(candidate)
+
+    async def create_records_direct(self, candidates: Sequence[FactCandidate]) -> List[FactRecord]:
+        """Commit a batch in order; later candidates supersede earlier ones."""
+        return [self._commit(candidate) for candidate in candidates]
+
+    async def get_active(self, subject: str, predicate: str) -> Optional[FactRecord]:
+        return self._active.get((subject, predicate))
+
+    async def list_subject(self, subject: str) -> List[FactRecord]:
+        return [record for record in self._records if record.subject == subject]
+
+    def _commit(self, candidate: FactCandidate) -> FactRecord:
+        record = FactRecord(
+            id=uuid.uuid4().hex,
+            subject=candidate.subject,
+            predicate=candidate.predicate,
+            object=candidate.object,
+            confidence=candidate.confidence,
+            source=dict(candidate.source),
+        )
+        previous = self._active.get((record.subject, record.predicate))
+        if previous is not None:
+            previous.status = SUPERSEDED
+        self._active[(record.subject, record.predicate)] = record
+        self._records.append(record)
+        return record
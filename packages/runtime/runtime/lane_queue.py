@@ -1,52 +1,318 @@
 import asyncio
 import inspect
-from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import Any, Awaitable, Callable, Deque, Dict, Literal, Optional, TypeVar
 
 T = TypeVar("T")
 
+OverflowPolicy = Literal["reject", "block", "drop_oldest"]
+
+
+class LaneFullError(RuntimeError):
+    """Raised by submit() when the lane is full and overflow="reject"."""
+
+
+class LaneDroppedError(RuntimeError):
+    """Set on a queued job evicted by a newer submit under overflow="drop_oldest"."""
+
+
+@dataclass
+class LaneStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    dropped: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+    max_depth: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+    exec_time_total: float = 0.0
+    exec_time_max: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+@dataclass(eq=False)
+class _Job:
+    fn: Callable[[], Any]
+    future: "asyncio.Future[Any]"
+    enqueued_at: float
+    task: Optional["asyncio.Task[None]"] = None
+
+
+@dataclass(eq=False)
+class _Lane:
+    key: str
+    priority: int
+    weight: int
+    pending: Deque[_Job] = field(default_factory=deque)
+    running: Optional[_Job] = None
+    space_waiters: Deque["asyncio.Future[None]"] = field(default_factory=deque)
+    current_weight: int = 0
+    stats: LaneStats = field(default_factory=LaneStats)
+
 
 class LaneQueue:
-    def __init__(self, max_concurrency: int = 4) -> None:
-        self._lanes: Dict[str, asyncio.Queue[Tuple[Callable[[], Awaitable[T] | T], asyncio.Future[T]]]] = {}
-        self._workers: Dict[str, asyncio.Task[None]] = {}
-        self._state_lock = asyncio.Lock()
-        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+    """Per-lane serial execution with a shared concurrency limit.
+
+    Jobs in one lane run one at a time in FIFO order; different lanes run
+    concurrently up to max_concurrency. When slots are contended, the lane
+    with the highest priority wins, and lanes of equal priority share slots
+    by smooth weighted round-robin.
+
+    Backpressure: with max_lane_size set, a full lane either rejects the
+    submit (LaneFullError), blocks the submitter until space frees up, or
+    evicts its oldest queued job (LaneDroppedError). A submit timeout covers
+    both queue wait and execution; on timeout or caller cancellation the job
+    is removed from its lane or its running task is cancelled.
+
+    All scheduling state is touched only from the event loop thread, so no
+    locks are needed. Idle lanes are dropped immediately, which also drops
+    their per-lane stats; totals are kept for the queue's lifetime.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        *,
+        max_lane_size: Optional[int] = None,
+        overflow: OverflowPolicy = "block",
+        default_priority: int = 0,
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        if max_lane_size is not None and max_lane_size <= 0:
+            raise ValueError("max_lane_size must be positive")
+        if overflow not in ("reject", "block", "drop_oldest"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self._max_concurrency = max_concurrency
+        self._max_lane_size = max_lane_size
+        self._overflow = overflow
+        self._default_priority = default_priority
+        self._lanes: Dict[str, _Lane] = {}
+        self._ready: Dict[str, _Lane] = {}
+        self._lane_config: Dict[str, Dict[str, int]] = {}
+        self._running = 0
+        self._totals = LaneStats()
+
+    def configure_lane(self, lane_key: str, *, priority: Optional[int] = None, weight: Optional[int] = None) -> None:
+        """Set a lane's priority (higher runs first) and round-robin weight."""
+        if weight is not None and weight <= 0:
+            raise ValueError("weight must be positive")
+        config = self._lane_config.setdefault(lane_key, {})
+        if priority is not None:
+            config["priority"] = priority
+        if weight is not None:
+            config["weight"] = weight
+        lane = self._lanes.get(lane_key)
+        if lane is not None:
+            lane.priority = config.get("priority", lane.priority)
+            lane.weight = config.get("weight", lane.weight)
+
+    async def submit(
+        self,
+        lane_key: str,
+        fn: Callable[[], Awaitable[T] | T],
+        *,
+        timeout: Optional[float] = None,
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        lane = self._lane(lane_key)
+        self._count(lane, "submitted")
+        while self._max_lane_size is not None and len(lane.pending) >= self._max_lane_size:
+            if self._overflow == "reject":
+                self._count(lane, "rejected")
+                raise LaneFullError(f"Lane {lane_key!r} is full ({self._max_lane_size} queued)")
+            if self._overflow == "drop_oldest":
+                victim = lane.pending.popleft()
+                self._count(lane, "dropped")
+                if not victim.future.done():
+                    victim.future.set_exception(LaneDroppedError(f"Dropped from full lane {lane_key!r}"))
+                break
+            await self._wait_for_space(lane, deadline)
+            # The lane may have been collected while we were waking up
+            lane = self._lane(lane_key)
 
-    async def submit(self, lane_key: str, fn: Callable[[], Awaitable[T] | T]) -> T:
+        job = _Job(fn=fn, future=loop.create_future(), enqueued_at=loop.time())
+        lane.pending.append(job)
+        lane.stats.max_depth = max(lane.stats.max_depth, len(lane.pending))
+        self._totals.max_depth = max(self._totals.max_depth, len(lane.pending))
+        self._update_ready(lane)
+        self._dispatch()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), _remaining(loop, deadline))
+        except asyncio.TimeoutError:
+            self._abandon(lane, job, "timed_out")
+            raise
+        except asyncio.CancelledError:
+            self._abandon(lane, job, "cancelled")
+            raise
+
+    def depth(self, lane_key: str) -> int:
+        """Number of queued (not yet running) jobs in a lane."""
+        lane = self._lanes.get(lane_key)
+        return len(lane.pending) if lane is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Live per-lane counters plus lifetime totals."""
+        return {
+            "running": self._running,
+            "lanes": {
+                key: {
+                    "depth": len(lane.pending),
+                    "running": lane.running is not None,
+                    "priority": lane.priority,
+                    "weight": lane.weight,
+                    **lane.stats.as_dict(),
+                }
+                for key, lane in self._lanes.items()
+            },
+            "totals": self._totals.as_dict(),
+        }
+
+    # ---- scheduling ----
+
+    def _lane(self, lane_key: str) -> _Lane:
+        lane = self._lanes.get(lane_key)
+        if lane is None:
+            config = self._lane_config.get(lane_key, {})
+            lane = _Lane(
+                key=lane_key,
+                priority=config.get("priority", self._default_priority),
+                weight=config.get("weight", 1),
+            )
+            self._lanes[lane_key] = lane
+        return lane
+
+    def _update_ready(self, lane: _Lane) -> None:
+        if lane.pending and lane.running is None:
+            self._ready[lane.key] = lane
+        else:
+            self._ready.pop(lane.key, None)
+
+    def _pick_lane(self) -> Optional[_Lane]:
+        """Highest priority first; smooth weighted round-robin within a priority."""
+        if not self._ready:
+            return None
+        top = max(lane.priority for lane in self._ready.values())
+        candidates = [lane for lane in self._ready.values() if lane.priority == top]
+        total = 0
+        for lane in candidates:
+            lane.current_weight += lane.weight
+            total += lane.weight
+        chosen = max(candidates, key=lambda lane: lane.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._running < self._max_concurrency:
+            lane = self._pick_lane()
+            if lane is None:
+                return
+            job = lane.pending.popleft()
+            self._record_time(lane, "wait_time", loop.time() - job.enqueued_at)
+            lane.running = job
+            self._running += 1
+            self._update_ready(lane)
+            self._wake_space(lane)
+            job.task = asyncio.create_task(self._execute(lane, job))
+
+    async def _execute(self, lane: _Lane, job: _Job) -> None:
         loop = asyncio.get_running_loop()
-        future: asyncio.Future[T] = loop.create_future()
-
-        async with self._state_lock:
-            queue = self._lanes.get(lane_key)
-            if queue is None:
-                queue = asyncio.Queue()
-                self._lanes[lane_key] = queue
-                self._workers[lane_key] = asyncio.create_task(self._lane_worker(lane_key))
-
-        await queue.put((fn, future))
-        return await future
-
-    async def _lane_worker(self, lane_key: str) -> None:
-        queue = self._lanes[lane_key]
-        while True:
-            fn, future = await queue.get()
+        started = loop.time()
+        try:
+            result = job.fn()
+            if inspect.isawaitable(result):
+                result = await result
+        except asyncio.CancelledError:
+            # Cancelled through _abandon; the submitter has already been told
+            pass
+        except Exception as exc:
+            if not job.future.done():
+                self._count(lane, "failed")
+                job.future.set_exception(exc)
+        else:
+            if not job.future.done():
+                self._count(lane, "completed")
+                job.future.set_result(result)
+        finally:
+            self._record_time(lane, "exec_time", loop.time() - started)
+            lane.running = None
+            self._running -= 1
+            self._update_ready(lane)
+            self._collect(lane)
+            self._dispatch()
+
+    def _abandon(self, lane: _Lane, job: _Job, reason: str) -> None:
+        """Give up on a job whose submitter timed out or was cancelled."""
+        if job.future.done() and not job.future.cancelled():
+            return
+        self._count(lane, reason)
+        if job.task is None:
             try:
-                async with self._global_semaphore:
-                    result = fn()
-                    if inspect.isawaitable(result):
-                        result = await result
-                if not future.cancelled():
-                    future.set_result(result)
-            except Exception as exc:
-                if not future.cancelled():
-                    future.set_exception(exc)
-            finally:
-                queue.task_done()
-
-            if queue.empty():
-                async with self._state_lock:
-                    current_queue = self._lanes.get(lane_key)
-                    if current_queue is queue and queue.empty():
-                        self._lanes.pop(lane_key, None)
-                        self._workers.pop(lane_key, None)
-                        return
+                lane.pending.remove(job)
+            except ValueError:
+                pass
+            self._update_ready(lane)
+            self._wake_space(lane)
+            self._collect(lane)
+        elif not job.task.done():
+            job.task.cancel()
+        if not job.future.done():
+            job.future.cancel()
+
+    async def _wait_for_space(self, lane: _Lane, deadline: Optional[float]) -> None:
+        loop = asyncio.get_running_loop()
+        waiter: "asyncio.Future[None]" = loop.create_future()
+        lane.space_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, _remaining(loop, deadline))
+        except asyncio.TimeoutError:
+            self._count(lane, "timed_out")
+            raise
+        finally:
+            if waiter in lane.space_waiters:
+                lane.space_waiters.remove(waiter)
+            self._collect(lane)
+
+    def _wake_space(self, lane: _Lane) -> None:
+        if self._max_lane_size is None:
+            return
+        free = self._max_lane_size - len(lane.pending)
+        while free > 0 and lane.space_waiters:
+            waiter = lane.space_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _collect(self, lane: _Lane) -> None:
+        if lane.pending or lane.running is not None or lane.space_waiters:
+            return
+        if self._lanes.get(lane.key) is lane:
+            del self._lanes[lane.key]
+            self._ready.pop(lane.key, None)
+
+    # ---- metrics ----
+
+    def _count(self, lane: _Lane, name: str) -> None:
+        setattr(lane.stats, name, getattr(lane.stats, name) + 1)
+        setattr(self._totals, name, getattr(self._totals, name) + 1)
+
+    def _record_time(self, lane: _Lane, name: str, seconds: float) -> None:
+        for stats in (lane.stats, self._totals):
+            setattr(stats, f"{name}_total", getattr(stats, f"{name}_total") + seconds)
+            setattr(stats, f"{name}_max", max(getattr(stats, f"{name}_max"), seconds))
+
+
+def _remaining(loop: asyncio.AbstractEventLoop, deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return max(0.0, deadline - loop.time())
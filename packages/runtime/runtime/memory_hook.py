@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import json
 import re
-from typing import Any, Dict, List, Optional, Protocol
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Protocol, Tuple
 
-from memory.facts import FactCandidate, FactRecord
+from runtime.facts import FactCandidate, FactRecord
 
 
 class MemoryHook(Protocol):
     async def extract_candidates(
-        self, session_id: str, transcript: List[Dict[str, Any]]
+        self, session_id: str, transcript: List[Dict[str, Any]], start: int = 0
     ) -> List[FactCandidate]:
+        """transcript is a window of the session; start is the position of its first item."""
         ...
 
     async def on_committed(
@@ -21,23 +25,141 @@ class MemoryHook(Protocol):
         ...
 
 
+@dataclass(frozen=True)
+class MemoryRule:
+    """A literal trigger at the start of a user message, followed by the value.
+
+    "我喜欢猫" with trigger "我喜欢" yields (subject, predicate, "猫").
+    separator is a regex between trigger and value (e.g. r"\\s+").
+    """
+
+    trigger: str
+    predicate: str
+    subject: str = "user"
+    separator: str = ""
+    ignore_case: bool = False
+    confidence: float = 0.9
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "MemoryRule":
+        return cls(
+            trigger=data["trigger"],
+            predicate=data["predicate"],
+            subject=data.get("subject", "user"),
+            separator=data.get("separator", ""),
+            ignore_case=bool(data.get("ignore_case", False)),
+            confidence=float(data.get("confidence", 0.9)),
+        )
+
+
+# Order is precedence: the first rule whose trigger matches wins
+DEFAULT_RULES: Tuple[MemoryRule, ...] = (
+    MemoryRule(trigger="我不喜欢", predicate="dislikes"),
+    MemoryRule(trigger="我喜欢", predicate="likes"),
+    MemoryRule(trigger="call me", predicate="preferred_name", separator=r"\s+", ignore_case=True),
+    MemoryRule(trigger="叫我", predicate="preferred_name"),
+)
+
+
 class RuleBasedMemoryHook:
-    _like_pattern = re.compile(r"^我喜欢(.+)$")
-    _dislike_pattern = re.compile(r"^我不喜欢(.+)$")
-    _call_me_pattern = re.compile(r"^call me\s+(.+)$", re.IGNORECASE)
-    _call_me_cn_pattern = re.compile(r"^叫我(.+)$")
+    """Extracts facts from user messages with a rule registry.
+
+    All rules compile into one anchored alternation regex (one named group
+    per rule), so a message is matched in a single pass however many rules
+    are loaded. Per session the hook remembers the transcript position it
+    has scanned up to and only looks at user messages after it, so windows
+    re-read from a persistent store work the same as live lists. Without a
+    cursor, or when the window ends before it (the session was restarted),
+    only the latest user message is considered.
+    """
+
     _trim_chars = " \t\n\r,.;!?！？。，“”\"'（）()"
 
+    def __init__(self, rules: Optional[Iterable[MemoryRule | Mapping[str, Any]]] = None) -> None:
+        # session_id -> transcript position after the last scanned item
+        self._cursors: Dict[str, int] = {}
+        self.load_rules(DEFAULT_RULES if rules is None else rules)
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "RuleBasedMemoryHook":
+        """Load rules from a JSON file holding a list of rule objects."""
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle))
+
+    @property
+    def rules(self) -> List[MemoryRule]:
+        return list(self._rules)
+
+    def load_rules(self, rules: Iterable[MemoryRule | Mapping[str, Any]]) -> None:
+        """Replace the rule set and recompile the combined matcher."""
+        loaded = [rule if isinstance(rule, MemoryRule) else MemoryRule.from_dict(rule) for rule in rules]
+        alternatives = []
+        for index, rule in enumerate(loaded):
+            trigger = re.escape(rule.trigger)
+            if rule.ignore_case:
+                trigger = f"(?i:{trigger})"
+            alternatives.append(f"{trigger}{rule.separator}(?P<v{index}>.+)")
+        self._rules = loaded
+        self._matcher = re.compile("^(?:" + "|".join(alternatives) + ")$") if alternatives else None
+
+    def match(self, session_id: str, text: str) -> Optional[FactCandidate]:
+        """Match one user message against all rules in a single regex pass."""
+        if self._matcher is None:
+            return None
+        found = self._matcher.match(text.strip(self._trim_chars))
+        if found is None:
+            return None
+        index = int(found.lastgroup[1:])
+        rule = self._rules[index]
+        value = found.group(found.lastgroup).strip(self._trim_chars)
+        if not value:
+            return None
+        return FactCandidate(
+            subject=rule.subject,
+            predicate=rule.predicate,
+            object=value,
+            confidence=rule.confidence,
+            source={"session_id": session_id, "note": "rule_based"},
+        )
+
     async def extract_candidates(
-        self, session_id: str, transcript: List[Dict[str, Any]]
+        self, session_id: str, transcript: List[Dict[str, Any]], start: int = 0
     ) -> List[FactCandidate]:
-        latest_user_message = self._latest_user_message(transcript)
-        if not latest_user_message:
-            return []
+        messages = self._new_user_messages(session_id, transcript, start)
+        self._cursors[session_id] = start + len(transcript)
+        candidates = []
+        for text in messages:
+            candidate = self.match(session_id, text)
+            if candidate is not None:
+                candidates.append(candidate)
+        return candidates
+
+    async def extract_batch(
+        self, transcripts: Mapping[str, List[Dict[str, Any]]]
+    ) -> Dict[str, List[FactCandidate]]:
+        """Backfill: extract from every user message of many sessions.
 
-        text = latest_user_message.strip(self._trim_chars)
-        candidate = self._match_candidate(session_id, text)
-        return [candidate] if candidate else []
+        Ignores and then resets each session's cursor, so live extraction
+        resumes after the backfilled events.
+        """
+        results: Dict[str, List[FactCandidate]] = {}
+        for session_id, transcript in transcripts.items():
+            candidates = []
+            for event in transcript:
+                if event.get("role") == "user":
+                    candidate = self.match(session_id, event.get("content", ""))
+                    if candidate is not None:
+                        candidates.append(candidate)
+            results[session_id] = candidates
+            self._cursors[session_id] = len(transcript)
+        return results
+
+    def reset(self, session_id: Optional[str] = None) -> None:
+        """Forget the cursor of one session, or of all sessions."""
+        if session_id is None:
+            self._cursors.clear()
+        else:
+            self._cursors.pop(session_id, None)
 
     async def on_committed(
         self,
@@ -47,61 +169,18 @@ class RuleBasedMemoryHook:
     ) -> None:
         return None
 
-    def _latest_user_message(self, transcript: List[Dict[str, Any]]) -> Optional[str]:
-        for event in reversed(transcript):
-            if event.get("role") == "user":
-                return event.get("content", "")
-        return None
-
-    def _match_candidate(self, session_id: str, text: str) -> Optional[FactCandidate]:
-        dislike = self._dislike_pattern.match(text)
-        if dislike:
-            value = dislike.group(1).strip(self._trim_chars)
-            if value:
-                return FactCandidate(
-                    subject="user",
-                    predicate="dislikes",
-                    object=value,
-                    confidence=0.9,
-                    source={"session_id": session_id, "note": "rule_based"},
-                )
-            return None
-
-        like = self._like_pattern.match(text)
-        if like:
-            value = like.group(1).strip(self._trim_chars)
-            if value:
-                return FactCandidate(
-                    subject="user",
-                    predicate="likes",
-                    object=value,
-                    confidence=0.9,
-                    source={"session_id": session_id, "note": "rule_based"},
-                )
-            return None
-
-        call_me = self._call_me_pattern.match(text)
-        if call_me:
-            value = call_me.group(1).strip(self._trim_chars)
-            if value:
-                return FactCandidate(
-                    subject="user",
-                    predicate="preferred_name",
-                    object=value,
-                    confidence=0.9,
-                    source={"session_id": session_id, "note": "rule_based"},
-                )
-            return None
-
-        call_me_cn = self._call_me_cn_pattern.match(text)
-        if call_me_cn:
-            value = call_me_cn.group(1).strip(self._trim_chars)
-            if value:
-                return FactCandidate(
-                    subject="user",
-                    predicate="preferred_name",
-                    object=value,
-                    confidence=0.9,
-                    source={"session_id": session_id, "note": "rule_based"},
-                )
-        return None
+    def _new_user_messages(self, session_id: str, transcript: List[Dict[str, Any]], start: int) -> List[str]:
+        """User messages after the session cursor, oldest first."""
+        cursor = self._cursors.get(session_id)
+        if cursor is None or cursor > start + len(transcript):
+            # Nothing known about this session: only the latest user message is new
+            for event in reversed(transcript):
+                if event.get("role") == "user":
+                    return [event.get("content", "")]
+            return []
+        # A cursor before the window means items were missed; scan the whole window
+        return [
+            event.get("content", "")
+            for event in transcript[max(0, cursor - start) :]
+            if event.get("role") == "user"
+        ]
@@ -1,11 +1,237 @@
+from __future__ import annotations
+
+import fnmatch
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Literal, Mapping, Optional, Tuple
+
+Effect = Literal["allow", "deny"]
+
+DEFAULT_DECISION_CACHE_SIZE = 4096
+_GLOB_CHARS = "*?["
+
+
 class PolicyDenied(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class PolicyRule:
+    """One rule: a tool-name glob, optional context predicates and a priority.
+
+    when maps context keys to an expected value, or to a list/tuple/set of
+    accepted values. Among matching rules the highest priority wins; on a
+    tie, deny beats allow. Nothing matching means deny.
+    """
+
+    tool: str
+    effect: Effect = "allow"
+    when: Mapping[str, Any] = field(default_factory=dict)
+    priority: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "PolicyRule":
+        effect = data.get("effect", "allow")
+        if effect not in ("allow", "deny"):
+            raise ValueError(f"Unknown policy effect: {effect}")
+        return cls(
+            tool=data["tool"],
+            effect=effect,
+            when=dict(data.get("when") or {}),
+            priority=int(data.get("priority", 0)),
+        )
+
+
+@dataclass(frozen=True)
+class PolicyDecision:
+    allowed: bool
+    rule: Optional[PolicyRule] = None
+
+
+@dataclass
+class _CompiledRule:
+    rule: PolicyRule
+    order: int
+    pattern: Optional[re.Pattern[str]]
+    predicates: Tuple[Tuple[str, Any, bool], ...]
+
+    def matches(self, tool_name: str, ctx: Mapping[str, Any]) -> bool:
+        if self.pattern is not None and self.pattern.fullmatch(tool_name) is None:
+            return False
+        for key, expected, is_set in self.predicates:
+            value = ctx.get(key)
+            if is_set:
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+
+class _TrieNode:
+    __slots__ = ("children", "rules")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        self.rules: List[_CompiledRule] = []
+
+
 class PolicyEngine:
-    def __init__(self, allow: dict[str, bool] | None = None) -> None:
-        self._allow = dict(allow or {})
+    """Rule-based tool policy compiled for fast evaluation.
+
+    Rules are compiled once per load: exact tool names go into a dict, and
+    globs are filed in a character trie under their literal prefix (the part
+    before the first wildcard), so evaluation only looks at rules whose
+    prefix matches the tool name. Decisions are memoized in a bounded LRU
+    keyed by tool name and the context values that rules actually inspect;
+    load_rules() swaps the compiled set and clears the cache.
+
+    PolicyEngine(allow={"search": True}) keeps working: each entry becomes
+    an exact-name rule with priority 0.
+    """
+
+    def __init__(
+        self,
+        allow: dict[str, bool] | None = None,
+        rules: Iterable[PolicyRule | Mapping[str, Any]] | None = None,
+        *,
+        cache_size: int = DEFAULT_DECISION_CACHE_SIZE,
+    ) -> None:
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[Any, PolicyDecision]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._rules: List[PolicyRule] = []
+        self._exact: Dict[str, List[_CompiledRule]] = {}
+        self._trie = _TrieNode()
+        self._ctx_keys: Tuple[str, ...] = ()
+        initial = [
+            PolicyRule(tool=name, effect="allow" if allowed else "deny")
+            for name, allowed in (allow or {}).items()
+        ]
+        initial.extend(_as_rule(rule) for rule in rules or ())
+        self.load_rules(initial)
+
+    @property
+    def rules(self) -> List[PolicyRule]:
+        return list(self._rules)
+
+    def load_rules(self, rules: Iterable[PolicyRule | Mapping[str, Any]]) -> None:
+        """Replace all rules, recompile, and invalidate cached decisions."""
+        loaded = [_as_rule(rule) for rule in rules]
+        exact: Dict[str, List[_CompiledRule]] = {}
+        trie = _TrieNode()
+        ctx_keys = set()
+        for order, rule in enumerate(loaded):
+            literal = _literal_prefix(rule.tool)
+            is_glob = literal != rule.tool
+            compiled = _CompiledRule(
+                rule=rule,
+                order=order,
+                pattern=re.compile(fnmatch.translate(rule.tool)) if is_glob else None,
+                predicates=tuple(
+                    (key, frozenset(value), True) if isinstance(value, (list, tuple, set, frozenset))
+                    else (key, value, False)
+                    for key, value in rule.when.items()
+                ),
+            )
+            ctx_keys.update(rule.when)
+            if is_glob:
+                node = trie
+                for char in literal:
+                    node = node.children.setdefault(char, _TrieNode())
+                node.rules.append(compiled)
+            else:
+                exact.setdefault(rule.tool, []).append(compiled)
+
+        self._rules = loaded
+        self._exact = exact
+        self._trie = trie
+        self._ctx_keys = tuple(sorted(ctx_keys))
+        self._cache.clear()
+
+    def add_rule(self, rule: PolicyRule | Mapping[str, Any]) -> None:
+        self.load_rules([*self._rules, _as_rule(rule)])
 
     def is_allowed(self, tool_name: str, ctx: dict) -> bool:
-        _ = ctx
-        return self._allow.get(tool_name, False)
+        return self.decide(tool_name, ctx).allowed
+
+    def decide(self, tool_name: str, ctx: Mapping[str, Any]) -> PolicyDecision:
+        keys = self._ctx_keys
+        if not keys:
+            key: Any = tool_name
+        elif len(keys) == 1:
+            key = (tool_name, ctx.get(keys[0]))
+        else:
+            key = (tool_name, *[ctx.get(name) for name in keys])
+        cache = self._cache
+        try:
+            decision = cache[key]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable context value: evaluate without caching
+            return self._evaluate(tool_name, ctx)
+        else:
+            self._hits += 1
+            cache.move_to_end(key)
+            return decision
+
+        self._misses += 1
+        decision = self._evaluate(tool_name, ctx)
+        if self._cache_size > 0:
+            cache[key] = decision
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+        return decision
+
+    def cache_info(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._cache),
+            "capacity": self._cache_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+    def _evaluate(self, tool_name: str, ctx: Mapping[str, Any]) -> PolicyDecision:
+        best: Optional[_CompiledRule] = None
+        for candidate in self._candidates(tool_name):
+            if best is not None and not _outranks(candidate, best):
+                continue
+            if candidate.matches(tool_name, ctx):
+                best = candidate
+        if best is None:
+            return PolicyDecision(allowed=False)
+        return PolicyDecision(allowed=best.rule.effect == "allow", rule=best.rule)
+
+    def _candidates(self, tool_name: str) -> Iterable[_CompiledRule]:
+        yield from self._exact.get(tool_name, ())
+        node = self._trie
+        yield from node.rules
+        for char in tool_name:
+            node = node.children.get(char)
+            if node is None:
+                return
+            yield from node.rules
+
+
+def _as_rule(rule: PolicyRule | Mapping[str, Any]) -> PolicyRule:
+    return rule if isinstance(rule, PolicyRule) else PolicyRule.from_dict(rule)
+
+
+def _literal_prefix(pattern: str) -> str:
+    for index, char in enumerate(pattern):
+        if char in _GLOB_CHARS:
+            return pattern[:index]
+    return pattern
+
+
+def _outranks(candidate: _CompiledRule, best: _CompiledRule) -> bool:
+    """Higher priority wins; on equal priority deny wins, then the earlier rule."""
+    if candidate.rule.priority != best.rule.priority:
+        return candidate.rule.priority > best.rule.priority
+    if candidate.rule.effect != best.rule.effect:
+        return candidate.rule.effect == "deny"
+    return candidate.order < best.order
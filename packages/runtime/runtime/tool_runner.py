@@ -1,23 +1,130 @@
 from __future__ import annotations
 
-from typing import Awaitable, Callable
+import asyncio
+import copy
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Protocol, Sequence, Tuple
 
 from runtime.policy import PolicyDenied, PolicyEngine
 
 ToolFn = Callable[[dict, dict], Awaitable[dict] | dict]
 
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_TIMEOUT_RETRIES = 1
+
 
 class ToolNotFound(Exception):
     pass
 
 
+class _Runner(Protocol):
+    async def run(self, name: str, arguments: dict, ctx: dict) -> dict:
+        ...
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Execution metadata declared at registration.
+
+    pure: same arguments always give the same result and the call has no
+    side effects, so results may be cached (per session unless
+    cache_global). idempotent: safe to repeat, so a timed-out call is
+    retried (up to the runner's timeout_retries), but not cached.
+    """
+
+    pure: bool = False
+    idempotent: bool = False
+    cache_ttl_sec: Optional[float] = None
+    cache_global: bool = False
+    timeout_sec: Optional[float] = None
+    max_concurrency: Optional[int] = None
+
+
+@dataclass
+class _Tool:
+    fn: ToolFn
+    spec: ToolSpec
+    semaphore: Optional[asyncio.Semaphore] = None
+    calls: int = 0
+    hits: int = 0
+    misses: int = 0
+    timeouts: int = 0
+
+
+@dataclass
+class _CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+
+
+@dataclass
+class _CacheEntry:
+    result: dict
+    expires_at: Optional[float]
+
+
 class ToolRunner:
-    def __init__(self, policy: PolicyEngine) -> None:
+    """Policy-checked tool execution with per-tool timeouts, concurrency
+    limits and an LRU result cache for pure tools.
+
+    Identical concurrent calls to a pure tool share one execution, run in
+    its own task so that cancelling one caller never cancels the others.
+    Idempotent (and pure) tools are retried on timeout.
+    """
+
+    def __init__(
+        self,
+        policy: PolicyEngine,
+        *,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        default_timeout_sec: Optional[float] = None,
+        timeout_retries: int = DEFAULT_TIMEOUT_RETRIES,
+    ) -> None:
+        if timeout_retries < 0:
+            raise ValueError("timeout_retries must be >= 0")
         self._policy = policy
-        self._tools: dict[str, ToolFn] = {}
+        self._tools: dict[str, _Tool] = {}
+        self._cache_size = cache_size
+        self._default_timeout_sec = default_timeout_sec
+        self._timeout_retries = timeout_retries
+        self._cache: "OrderedDict[Tuple[str, str, str], _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str, str], "asyncio.Task[dict]"] = {}
+        self._cache_stats = _CacheStats()
+
+    def register(
+        self,
+        name: str,
+        fn: ToolFn,
+        *,
+        pure: bool = False,
+        idempotent: bool = False,
+        cache_ttl_sec: Optional[float] = None,
+        cache_global: bool = False,
+        timeout_sec: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> None:
+        if max_concurrency is not None and max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        spec = ToolSpec(
+            pure=pure,
+            idempotent=idempotent or pure,
+            cache_ttl_sec=cache_ttl_sec,
+            cache_global=cache_global,
+            timeout_sec=timeout_sec,
+            max_concurrency=max_concurrency,
+        )
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._tools[name] = _Tool(fn=fn, spec=spec, semaphore=semaphore)
+        self.invalidate(name)
 
-    def register(self, name: str, fn: ToolFn) -> None:
-        self._tools[name] = fn
+    def spec(self, name: str) -> Optional[ToolSpec]:
+        tool = self._tools.get(name)
+        return tool.spec if tool is not None else None
 
     async def run(self, name: str, arguments: dict, ctx: dict) -> dict:
         if not self._policy.is_allowed(name, ctx):
@@ -27,8 +134,160 @@ class ToolRunner:
         if tool is None:
             raise ToolNotFound(f"Tool '{name}' not registered")
 
-        result = tool(arguments, ctx)
+        tool.calls += 1
+        if not tool.spec.pure or self._cache_size <= 0:
+            return await self._execute(name, tool, arguments, ctx)
+
+        key = self._cache_key(name, tool.spec, arguments, ctx)
+        cached = self._cache_get(key)
+        if cached is not None:
+            tool.hits += 1
+            return copy.deepcopy(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            tool.hits += 1
+            self._cache_stats.hits += 1
+        else:
+            tool.misses += 1
+            self._cache_stats.misses += 1
+            inflight = asyncio.ensure_future(self._execute_shared(key, name, tool, arguments, ctx))
+            inflight.add_done_callback(_retrieve_exception)
+            self._inflight[key] = inflight
+        # shield: a cancelled caller stops waiting, the shared execution carries on
+        return copy.deepcopy(await asyncio.shield(inflight))
+
+    async def run_many(
+        self,
+        calls: Sequence[dict],
+        ctx: dict,
+        *,
+        timeout: Optional[float] = None,
+        max_concurrency: int = 4,
+    ) -> list[dict | BaseException]:
+        return await run_tool_calls(self, calls, ctx, timeout=timeout, max_concurrency=max_concurrency)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop cached results for one tool, or for all tools."""
+        if name is None:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[0] == name]:
+            del self._cache[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit rate plus per-tool call/hit/miss/timeout counters."""
+        lookups = self._cache_stats.hits + self._cache_stats.misses
+        return {
+            "cache": {
+                "size": len(self._cache),
+                "capacity": self._cache_size,
+                "hits": self._cache_stats.hits,
+                "misses": self._cache_stats.misses,
+                "hit_rate": self._cache_stats.hits / lookups if lookups else 0.0,
+                "evictions": self._cache_stats.evictions,
+                "expired": self._cache_stats.expired,
+            },
+            "tools": {
+                name: {"calls": tool.calls, "hits": tool.hits, "misses": tool.misses, "timeouts": tool.timeouts}
+                for name, tool in self._tools.items()
+            },
+        }
+
+    async def _execute_shared(
+        self, key: Tuple[str, str, str], name: str, tool: _Tool, arguments: dict, ctx: dict
+    ) -> dict:
+        try:
+            result = await self._execute(name, tool, arguments, ctx)
+            self._cache_put(key, result, tool.spec.cache_ttl_sec)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _execute(self, name: str, tool: _Tool, arguments: dict, ctx: dict) -> dict:
+        timeout = tool.spec.timeout_sec if tool.spec.timeout_sec is not None else self._default_timeout_sec
+        retries = self._timeout_retries if tool.spec.idempotent else 0
+        attempt = 0
+        while True:
+            try:
+                if tool.semaphore is None:
+                    return await self._call(name, tool, arguments, ctx, timeout)
+                async with tool.semaphore:
+                    return await self._call(name, tool, arguments, ctx, timeout)
+            except asyncio.TimeoutError:
+                if attempt >= retries:
+                    raise
+                attempt += 1
+
+    async def _call(self, name: str, tool: _Tool, arguments: dict, ctx: dict, timeout: Optional[float]) -> dict:
+        result = tool.fn(arguments, ctx)
         if hasattr(result, "__await__"):
-            result = await result
+            try:
+                result = await asyncio.wait_for(result, timeout)
+            except asyncio.TimeoutError:
+                tool.timeouts += 1
+                raise asyncio.TimeoutError(f"Tool '{name}' timed out after {timeout}s") from None
 
         return result
+
+    def _cache_key(self, name: str, spec: ToolSpec, arguments: dict, ctx: dict) -> Tuple[str, str, str]:
+        scope = "" if spec.cache_global else str(ctx.get("session_id", ""))
+        return name, scope, _canonical(arguments)
+
+    def _cache_get(self, key: Tuple[str, str, str]) -> Optional[dict]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and time.monotonic() >= entry.expires_at:
+            del self._cache[key]
+            self._cache_stats.expired += 1
+            return None
+        self._cache.move_to_end(key)
+        self._cache_stats.hits += 1
+        return entry.result
+
+    def _cache_put(self, key: Tuple[str, str, str], result: dict, ttl: Optional[float]) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._cache[key] = _CacheEntry(result=copy.deepcopy(result), expires_at=expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+            self._cache_stats.evictions += 1
+
+
+def _retrieve_exception(task: "asyncio.Task[dict]") -> None:
+    # Every caller may have been cancelled; mark the error retrieved to avoid "never retrieved" noise
+    if not task.cancelled():
+        task.exception()
+
+
+def _canonical(arguments: dict) -> str:
+    """Order-insensitive, whitespace-free JSON so equal arguments share a key."""
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+async def run_tool_calls(
+    runner: _Runner,
+    calls: Sequence[dict],
+    ctx: dict,
+    *,
+    timeout: Optional[float] = None,
+    max_concurrency: int = 4,
+) -> list[dict | BaseException]:
+    """Run {"name", "arguments"} calls concurrently through runner.run.
+
+    At most max_concurrency calls are in flight; each call gets its own
+    timeout. Results come back in call order, with a call's exception
+    (asyncio.TimeoutError on timeout) in place of its result.
+    """
+    if max_concurrency <= 0:
+        raise ValueError("max_concurrency must be positive")
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(call: dict) -> Any:
+        async with semaphore:
+            return await asyncio.wait_for(
+                runner.run(call["name"], call.get("arguments", {}), ctx), timeout
+            )
+
+    return await asyncio.gather(*(run_one(call) for call in calls), return_exceptions=True)
@@ -1,7 +1,14 @@
 import asyncio
+import time
 from typing import Any, Dict, List
 
-from runtime.agent_loop import AgentLoop, TranscriptStore
+import pytest
+from runtime.agent_loop import (
+    AgentLoop,
+    MaxStepsExceeded,
+    PersistentTranscriptStore,
+    TranscriptStore,
+)
 from runtime.lane_queue import LaneQueue
 from runtime.policy import PolicyEngine
 from runtime.tool_runner import ToolRunner
@@ -127,3 +134,140 @@ def test_agent_loop_serializes_same_session() -> None:
         ]
 
     asyncio.run(run_test())
+
+
+def test_agent_loop_persistent_transcript(tmp_path) -> None:
+    async def run_test() -> None:
+        class FinalLLM:
+            async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+                return {"type": "final", "content": "done"}
+
+        transcript = PersistentTranscriptStore(root=str(tmp_path))
+        loop = AgentLoop(
+            llm=FinalLLM(),
+            tools=ToolRunner(PolicyEngine(allow={})),
+            transcript=transcript,
+            queue=LaneQueue(),
+        )
+        assert await loop.handle("s1", "hello") == "done"
+        transcript.close()
+
+        reopened = PersistentTranscriptStore(root=str(tmp_path))
+        assert await reopened.get("s1") == [
+            {"role": "user", "content": "hello"},
+            {"role": "assistant", "content": "done"},
+        ]
+        assert await reopened.tail("s1", 1) == [{"role": "assistant", "content": "done"}]
+
+    asyncio.run(run_test())
+
+
+def test_transcript_store_ring_buffer_tail_and_idle_eviction() -> None:
+    async def run_test() -> None:
+        transcript = TranscriptStore(max_items_per_session=3, idle_ttl_sec=10.0)
+        for i in range(5):
+            await transcript.append("s1", {"role": "user", "content": str(i)})
+        await transcript.append("s2", {"role": "user", "content": "other"})
+
+        assert [item["content"] for item in await transcript.get("s1")] == ["2", "3", "4"]
+        assert [item["content"] for item in await transcript.tail("s1", 2)] == ["3", "4"]
+        assert [item["content"] for item in transcript.iter_items("s1")] == ["2", "3", "4"]
+        assert transcript.count("s1") == 3
+        assert await transcript.tail("missing", 5) == []
+
+        transcript._sessions["s2"].last_used -= 60
+        assert transcript.evict_idle() == 1
+        assert await transcript.get("s2") == []
+        assert transcript.count("s1") == 3
+
+    asyncio.run(run_test())
+
+
+def test_transcript_store_sessions_do_not_share_a_lock() -> None:
+    async def run_test() -> None:
+        transcript = TranscriptStore()
+        await transcript.append("slow", {"role": "user", "content": "a"})
+        slow_lock = transcript._sessions["slow"].lock
+        async with slow_lock:
+            await asyncio.wait_for(transcript.append("fast", {"role": "user", "content": "b"}), timeout=1)
+        assert await transcript.get("fast") == [{"role": "user", "content": "b"}]
+
+    asyncio.run(run_test())
+
+
+def test_agent_loop_runs_parallel_tool_rounds_in_order() -> None:
+    async def run_test() -> None:
+        class PlannerLLM:
+            def __init__(self) -> None:
+                self.step = 0
+
+            async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+                self.step += 1
+                if self.step == 1:
+                    return {
+                        "type": "tool_calls",
+                        "calls": [
+                            {"id": "c1", "name": "fetch", "arguments": {"url": "a", "delay": 0.1}},
+                            {"id": "c2", "name": "fetch", "arguments": {"url": "b", "delay": 0.01}},
+                            {"id": "c3", "name": "fetch", "arguments": {"url": "c", "delay": 0.1}},
+                        ],
+                    }
+                if self.step == 2:
+                    return {"type": "tool_call", "name": "fetch", "arguments": {"url": "d", "delay": 0}}
+                results = [item["content"] for item in messages if item.get("type") == "tool_result"]
+                return {"type": "final", "content": ",".join(results)}
+
+        tools = ToolRunner(PolicyEngine(allow={"fetch": True}))
+
+        async def fetch(arguments: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+            await asyncio.sleep(arguments["delay"])
+            return {"content": arguments["url"].upper()}
+
+        tools.register("fetch", fetch)
+        transcript = TranscriptStore()
+        loop = AgentLoop(llm=PlannerLLM(), tools=tools, transcript=transcript, queue=LaneQueue())
+
+        started = time.monotonic()
+        assert await loop.handle("s1", "go") == "A,B,C,D"
+        assert time.monotonic() - started < 0.18
+
+        events = await transcript.get("s1")
+        assert [event.get("type") or event.get("role") for event in events] == [
+            "user", "tool_call", "tool_call", "tool_call", "tool_result", "tool_result", "tool_result",
+            "tool_call", "tool_result", "assistant",
+        ]
+        assert [event["id"] for event in events[4:7]] == ["c1", "c2", "c3"]
+
+    asyncio.run(run_test())
+
+
+def test_agent_loop_tool_timeout_and_step_budget() -> None:
+    async def run_test() -> None:
+        class LoopingLLM:
+            async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+                return {"type": "tool_call", "name": "hang", "arguments": {}}
+
+        tools = ToolRunner(PolicyEngine(allow={"hang": True}))
+
+        async def hang(arguments: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+            await asyncio.sleep(10)
+            return {"content": "late"}
+
+        tools.register("hang", hang)
+        transcript = TranscriptStore()
+        loop = AgentLoop(
+            llm=LoopingLLM(),
+            tools=tools,
+            transcript=transcript,
+            queue=LaneQueue(),
+            max_steps=2,
+            tool_timeout_sec=0.01,
+        )
+
+        with pytest.raises(MaxStepsExceeded):
+            await loop.handle("s1", "go")
+        results = [event for event in await transcript.get("s1") if event.get("type") == "tool_result"]
+        assert len(results) == 2
+        assert all(event["content"] is None and "timed out" in event["error"] for event in results)
+
+    asyncio.run(run_test())
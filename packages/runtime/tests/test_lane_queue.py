@@ -1,8 +1,10 @@
 import asyncio
+import random
 import time
-from typing import List
+from typing import Dict, List
 
-from runtime.lane_queue import LaneQueue
+import pytest
+from runtime.lane_queue import LaneDroppedError, LaneFullError, LaneQueue
 
 
 def test_submit_interface_returns_value() -> None:
@@ -69,3 +71,151 @@ def test_different_lanes_can_overlap() -> None:
         assert max_running >= 2 or elapsed < 0.09
 
     asyncio.run(run_test())
+
+
+def test_overflow_reject_block_and_drop_oldest() -> None:
+    async def run_test() -> None:
+        gate = asyncio.Event()
+
+        async def blocker() -> str:
+            await gate.wait()
+            return "first"
+
+        queue = LaneQueue(max_concurrency=1, max_lane_size=1, overflow="reject")
+        running = asyncio.ensure_future(queue.submit("a", blocker))
+        queued = asyncio.ensure_future(queue.submit("a", lambda: "second"))
+        await asyncio.sleep(0)
+        with pytest.raises(LaneFullError):
+            await queue.submit("a", lambda: "third")
+        gate.set()
+        assert await asyncio.gather(running, queued) == ["first", "second"]
+        assert queue.stats()["totals"]["rejected"] == 1
+
+        gate.clear()
+        queue = LaneQueue(max_concurrency=1, max_lane_size=1, overflow="drop_oldest")
+        running = asyncio.ensure_future(queue.submit("a", blocker))
+        dropped = asyncio.ensure_future(queue.submit("a", lambda: "dropped"))
+        await asyncio.sleep(0)
+        newest = asyncio.ensure_future(queue.submit("a", lambda: "newest"))
+        await asyncio.sleep(0)
+        gate.set()
+        with pytest.raises(LaneDroppedError):
+            await dropped
+        assert await asyncio.gather(running, newest) == ["first", "newest"]
+
+        gate.clear()
+        queue = LaneQueue(max_concurrency=1, max_lane_size=1, overflow="block")
+        running = asyncio.ensure_future(queue.submit("a", blocker))
+        queued = asyncio.ensure_future(queue.submit("a", lambda: "second"))
+        await asyncio.sleep(0)
+        blocked = asyncio.ensure_future(queue.submit("a", lambda: "third"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done() and queue.depth("a") == 1
+        gate.set()
+        assert await asyncio.gather(running, queued, blocked) == ["first", "second", "third"]
+
+    asyncio.run(run_test())
+
+
+def test_priority_and_weighted_round_robin() -> None:
+    async def run_test() -> None:
+        queue = LaneQueue(max_concurrency=1)
+        gate = asyncio.Event()
+        order: List[str] = []
+
+        async def hold() -> None:
+            await gate.wait()
+
+        queue.configure_lane("urgent", priority=10)
+        queue.configure_lane("heavy", weight=3)
+        holder = asyncio.ensure_future(queue.submit("holder", hold))
+        await asyncio.sleep(0)
+        jobs = [queue.submit(lane, lambda lane=lane: order.append(lane)) for lane in ["light"] * 4 + ["heavy"] * 4]
+        jobs.append(queue.submit("urgent", lambda: order.append("urgent")))
+        pending = asyncio.gather(*jobs)
+        await asyncio.sleep(0)
+        gate.set()
+        await holder
+        await pending
+
+        assert order[0] == "urgent"
+        assert order[1:5].count("heavy") == 3
+
+    asyncio.run(run_test())
+
+
+def test_timeouts_and_cancellation_release_the_lane() -> None:
+    async def run_test() -> None:
+        queue = LaneQueue(max_concurrency=1)
+        cancelled = asyncio.Event()
+
+        async def slow() -> None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(asyncio.TimeoutError):
+            await queue.submit("a", slow, timeout=0.02)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+        blocker = asyncio.ensure_future(queue.submit("a", slow))
+        waiting = asyncio.ensure_future(queue.submit("a", lambda: "never"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        blocker.cancel()
+        await asyncio.gather(blocker, waiting, return_exceptions=True)
+        assert await queue.submit("a", lambda: "ok") == "ok"
+
+        totals = queue.stats()["totals"]
+        assert totals["timed_out"] == 1
+        assert totals["cancelled"] == 2
+        assert totals["completed"] == 1
+        assert queue.stats()["lanes"] == {}
+
+    asyncio.run(run_test())
+
+
+def test_stats_track_wait_and_exec_time() -> None:
+    async def run_test() -> None:
+        queue = LaneQueue(max_concurrency=1)
+
+        async def work() -> None:
+            await asyncio.sleep(0.02)
+
+        await asyncio.gather(queue.submit("a", work), queue.submit("a", work))
+        totals = queue.stats()["totals"]
+        assert totals["submitted"] == 2 and totals["completed"] == 2
+        assert totals["max_depth"] == 1  # the first job starts immediately
+        assert totals["exec_time_total"] >= 0.04
+        assert totals["wait_time_max"] >= 0.015
+
+    asyncio.run(run_test())
+
+
+def test_lane_collection_stress() -> None:
+    async def run_test() -> None:
+        queue = LaneQueue(max_concurrency=8, max_lane_size=2, overflow="block")
+        rng = random.Random(7)
+        results: Dict[str, List[int]] = {f"lane-{i}": [] for i in range(20)}
+
+        async def task(lane: str, index: int) -> int:
+            if rng.random() < 0.5:
+                await asyncio.sleep(0)
+            results[lane].append(index)
+            return index
+
+        async def producer(lane: str) -> None:
+            for index in range(50):
+                assert await queue.submit(lane, lambda index=index: task(lane, index)) == index
+                if rng.random() < 0.3:
+                    await asyncio.sleep(0)
+
+        await asyncio.wait_for(asyncio.gather(*(producer(lane) for lane in results)), timeout=10)
+        assert all(indices == list(range(50)) for indices in results.values())
+        assert queue.stats()["lanes"] == {}
+        assert queue.stats()["running"] == 0
+        assert queue.stats()["totals"]["completed"] == 1000
+
+    asyncio.run(run_test())
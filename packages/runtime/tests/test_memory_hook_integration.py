@@ -1,8 +1,15 @@
 import asyncio
+import time
 from typing import Any, Dict, List
 
-from memory.facts import FactsStore
-from runtime.agent_loop import AgentLoop, TranscriptStore
+import pytest
+from runtime.agent_loop import (
+    AgentLoop,
+    MaxStepsExceeded,
+    PersistentTranscriptStore,
+    TranscriptStore,
+)
+from runtime.facts import FactsStore
 from runtime.lane_queue import LaneQueue
 from runtime.memory_hook import RuleBasedMemoryHook
 from runtime.policy import PolicyEngine
@@ -80,6 +87,7 @@ def test_memory_hook_enabled_writes_facts_and_audit_events() -> None:
         )
 
         result = await loop.handle("s2", "我喜欢猫")
+        await loop.flush_memory()
 
         assert result == "ok"
         events = await transcript.get("s2")
@@ -124,6 +132,7 @@ def test_memory_hook_supports_preferred_name() -> None:
         )
 
         await loop.handle("s3", "叫我七海")
+        await loop.flush_memory()
 
         record = await facts.get_active("user", "preferred_name")
         assert record is not None
@@ -168,6 +177,7 @@ def test_memory_hook_session_serialization() -> None:
             loop.handle("same", "我喜欢猫"),
             loop.handle("same", "我喜欢狗"),
         )
+        await loop.flush_memory()
 
         record = await facts.get_active("user", "likes")
         assert record is not None
@@ -176,20 +186,122 @@ def test_memory_hook_session_serialization() -> None:
         assert len([item for item in all_records if item.predicate == "likes"]) == 2
 
         events = await transcript.get("same")
+        # Both turns were queued before the memory job, which then drains them in one batch
         assert [event.get("role") or event.get("type") for event in events] == [
             "user",
             "assistant",
-            "memory_candidate",
-            "memory_commit",
             "user",
             "assistant",
             "memory_candidate",
+            "memory_candidate",
+            "memory_commit",
             "memory_commit",
         ]
-        first_candidate_object = events[2]["candidate"]["object"]
-        second_candidate_object = events[6]["candidate"]["object"]
+        first_candidate_object = events[4]["candidate"]["object"]
+        second_candidate_object = events[5]["candidate"]["object"]
         assert (first_candidate_object, second_candidate_object) == ("猫", "狗")
         assert events[1]["content"] == "ok"
-        assert events[5]["content"] == "ok"
+        assert events[3]["content"] == "ok"
+
+    asyncio.run(run_test())
+
+
+def test_memory_hook_runs_off_the_response_path() -> None:
+    async def run_test() -> None:
+        class FinalLLM:
+            async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+                return {"type": "final", "content": "ok"}
+
+        class SlowHook(RuleBasedMemoryHook):
+            async def extract_candidates(self, session_id: str, transcript: List[Dict[str, Any]], start: int = 0):
+                await asyncio.sleep(0.2)
+                return await super().extract_candidates(session_id, transcript, start)
+
+        transcript = TranscriptStore()
+        facts = FactsStore()
+        loop = AgentLoop(
+            llm=FinalLLM(),
+            tools=ToolRunner(PolicyEngine()),
+            transcript=transcript,
+            queue=LaneQueue(max_concurrency=2),
+            memory_hook=SlowHook(),
+            facts=facts,
+        )
+
+        started = time.monotonic()
+        assert await loop.handle("s4", "我喜欢猫") == "ok"
+        assert time.monotonic() - started < 0.1
+        assert await facts.get_active("user", "likes") is None
+
+        await loop.flush_memory()
+        record = await facts.get_active("user", "likes")
+        assert record is not None
+        assert record.object == "猫"
+
+    asyncio.run(run_test())
+
+
+def test_memory_hook_cursor_survives_persistent_transcript(tmp_path) -> None:
+    async def run_test() -> None:
+        class FlakyLLM:
+            async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+                if messages[0]["content"] == "我喜欢狗":
+                    return {"type": "tool_call", "name": "lookup", "arguments": {}}
+                return {"type": "final", "content": "ok"}
+
+        async def lookup(arguments: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+            return {"content": None}
+
+        tools = ToolRunner(PolicyEngine(allow={"lookup": True}))
+        tools.register("lookup", lookup)
+        transcript = PersistentTranscriptStore(root=str(tmp_path))
+        facts = FactsStore()
+        loop = AgentLoop(
+            llm=FlakyLLM(),
+            tools=tools,
+            transcript=transcript,
+            queue=LaneQueue(max_concurrency=2),
+            memory_hook=RuleBasedMemoryHook(),
+            facts=facts,
+            max_steps=1,
+        )
+
+        await loop.handle("s5", "我喜欢猫")
+        await loop.flush_memory()
+        # This turn fails, so no extraction is scheduled for it; the next turn's window covers both
+        with pytest.raises(MaxStepsExceeded):
+            await loop.handle("s5", "我喜欢狗")
+        await loop.handle("s5", "叫我七海")
+        await loop.flush_memory()
+        transcript.close()
+
+        assert [record.object for record in await facts.list_subject("user")] == ["猫", "狗", "七海"]
+
+    asyncio.run(run_test())
+
+
+def test_idle_eviction_drops_memory_hook_cursor() -> None:
+    async def run_test() -> None:
+        class FinalLLM:
+            async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+                return {"type": "final", "content": "ok"}
+
+        transcript = TranscriptStore(idle_ttl_sec=10.0)
+        hook = RuleBasedMemoryHook()
+        loop = AgentLoop(
+            llm=FinalLLM(),
+            tools=ToolRunner(PolicyEngine()),
+            transcript=transcript,
+            queue=LaneQueue(max_concurrency=2),
+            memory_hook=hook,
+            facts=FactsStore(),
+        )
+        await loop.handle("s6", "我喜欢猫")
+        await loop.flush_memory()
+        assert "s6" in hook._cursors
+
+        transcript._sessions["s6"].last_used -= 60
+        assert transcript.evict_idle() == 1
+        assert "s6" not in hook._cursors
 
     asyncio.run(run_test())
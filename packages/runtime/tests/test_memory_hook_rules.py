@@ -0,0 +1,87 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from runtime.memory_hook import MemoryRule, RuleBasedMemoryHook
+
+
+def _user(text: str) -> Dict[str, Any]:
+    return {"role": "user", "content": text}
+
+
+def _assistant(text: str = "ok") -> Dict[str, Any]:
+    return {"role": "assistant", "content": text}
+
+
+def test_default_rules_match_in_one_pass() -> None:
+    hook = RuleBasedMemoryHook()
+    cases = {
+        "我喜欢猫！": ("likes", "猫"),
+        "我不喜欢香菜。": ("dislikes", "香菜"),
+        "Call Me  Nami": ("preferred_name", "Nami"),
+        "叫我七海": ("preferred_name", "七海"),
+    }
+    for text, (predicate, value) in cases.items():
+        candidate = hook.match("s", text)
+        assert (candidate.predicate, candidate.object) == (predicate, value)
+        assert candidate.source == {"session_id": "s", "note": "rule_based"}
+    assert hook.match("s", "我喜欢！") is None
+    assert hook.match("s", "今天天气不错") is None
+
+
+def test_rules_load_from_config_file(tmp_path) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text(
+        json.dumps([{"trigger": "my timezone is", "separator": r"\s+", "predicate": "timezone", "confidence": 0.8}]),
+        encoding="utf-8",
+    )
+    hook = RuleBasedMemoryHook.from_file(path)
+    candidate = hook.match("s", "my timezone is Asia/Tokyo")
+    assert (candidate.predicate, candidate.object, candidate.confidence) == ("timezone", "Asia/Tokyo", 0.8)
+    assert hook.match("s", "我喜欢猫") is None
+
+    hook.load_rules([*hook.rules, MemoryRule(trigger="我喜欢", predicate="likes")])
+    assert hook.match("s", "我喜欢猫").predicate == "likes"
+
+
+def test_cursor_only_scans_new_events() -> None:
+    async def run_test() -> None:
+        hook = RuleBasedMemoryHook()
+        transcript: List[Dict[str, Any]] = [_user("我喜欢猫"), _assistant()]
+        first = await hook.extract_candidates("s", transcript)
+        assert [c.object for c in first] == ["猫"]
+
+        # No new user message since the cursor: nothing is re-extracted
+        transcript.append({"type": "tool_result", "name": "x", "content": None})
+        assert await hook.extract_candidates("s", list(transcript)) == []
+
+        transcript += [_user("我喜欢狗"), _assistant(), _user("叫我七海"), _assistant()]
+        second = await hook.extract_candidates("s", transcript[-5:], start=2)
+        assert [c.object for c in second] == ["狗", "七海"]
+
+        # Freshly deserialized events (e.g. a persistent store) line up by position
+        transcript += [_user("我不喜欢香菜"), _user("我喜欢雨天"), _assistant()]
+        copied = [dict(event) for event in transcript[5:]]
+        assert [c.object for c in await hook.extract_candidates("s", copied, start=5)] == ["香菜", "雨天"]
+
+        # A window ending before the cursor (restarted session) falls back to the latest user message
+        assert [c.object for c in await hook.extract_candidates("s", [_user("叫我Nami")])] == ["Nami"]
+        hook.reset("s")
+        assert hook._cursors == {}
+
+    asyncio.run(run_test())
+
+
+def test_extract_batch_backfills_many_sessions() -> None:
+    async def run_test() -> None:
+        hook = RuleBasedMemoryHook()
+        transcripts = {
+            "a": [_user("我喜欢猫"), _assistant(), _user("我不喜欢雨天"), _assistant()],
+            "b": [_user("hello"), _assistant()],
+        }
+        results = await hook.extract_batch(transcripts)
+        assert [c.predicate for c in results["a"]] == ["likes", "dislikes"]
+        assert results["b"] == []
+        assert await hook.extract_candidates("a", transcripts["a"]) == []
+
+    asyncio.run(run_test())
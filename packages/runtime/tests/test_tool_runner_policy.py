@@ -1,8 +1,9 @@
 import asyncio
+import time
 
 import pytest
 
-from runtime.policy import PolicyDenied, PolicyEngine
+from runtime.policy import PolicyDenied, PolicyEngine, PolicyRule
 from runtime.tool_runner import ToolNotFound, ToolRunner
 
 
@@ -58,3 +59,199 @@ def test_async_tool_works() -> None:
         assert result == {"ok": True}
 
     asyncio.run(run_test())
+
+
+def test_run_many_bounds_concurrency_and_keeps_order() -> None:
+    async def run_test() -> None:
+        runner = ToolRunner(PolicyEngine(allow={"sleep": True}))
+        running = 0
+        peak = 0
+
+        async def sleep(args: dict, ctx: dict) -> dict:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(args["delay"])
+            running -= 1
+            return {"content": args["delay"]}
+
+        runner.register("sleep", sleep)
+        calls = [{"name": "sleep", "arguments": {"delay": d}} for d in (0.03, 0.01, 0.02, 0.5)]
+        calls.append({"name": "denied", "arguments": {}})
+
+        results = await runner.run_many(calls, {"session_id": "s"}, timeout=0.1, max_concurrency=2)
+
+        assert [r["content"] for r in results[:3]] == [0.03, 0.01, 0.02]
+        assert isinstance(results[3], asyncio.TimeoutError)
+        assert isinstance(results[4], PolicyDenied)
+        assert peak == 2
+
+    asyncio.run(run_test())
+
+
+def test_pure_tool_results_are_cached_per_session() -> None:
+    async def run_test() -> None:
+        runner = ToolRunner(PolicyEngine(allow={"lookup": True, "write": True}), cache_size=2)
+        calls: list = []
+
+        async def lookup(args: dict, ctx: dict) -> dict:
+            calls.append(args)
+            await asyncio.sleep(0.01)
+            return {"content": f"value of {args['q']}"}
+
+        runner.register("lookup", lookup, pure=True)
+        runner.register("write", lambda args, ctx: calls.append("write") or {"ok": True})
+        ctx = {"session_id": "s"}
+
+        first, second = await asyncio.gather(
+            runner.run("lookup", {"q": "a", "lang": "en"}, ctx),
+            runner.run("lookup", {"lang": "en", "q": "a"}, ctx),
+        )
+        assert first == second == {"content": "value of a"}
+        first["content"] = "mutated"
+        assert await runner.run("lookup", {"q": "a", "lang": "en"}, ctx) == {"content": "value of a"}
+        assert len(calls) == 1
+
+        await runner.run("lookup", {"q": "a", "lang": "en"}, {"session_id": "other"})
+        await runner.run("write", {}, ctx)
+        await runner.run("write", {}, ctx)
+        assert len(calls) == 4
+
+        stats = runner.stats()
+        assert stats["tools"]["lookup"] == {"calls": 4, "hits": 2, "misses": 2, "timeouts": 0}
+        assert stats["cache"]["hit_rate"] == 0.5
+        assert stats["cache"]["size"] == 2
+
+        await runner.run("lookup", {"q": "b"}, ctx)
+        assert runner.stats()["cache"]["evictions"] == 1
+
+    asyncio.run(run_test())
+
+
+def test_tool_timeout_ttl_and_concurrency_limit() -> None:
+    async def run_test() -> None:
+        runner = ToolRunner(PolicyEngine(allow={"slow": True, "clock": True, "fetch": True}))
+        running = 0
+        peak = 0
+
+        async def slow(args: dict, ctx: dict) -> dict:
+            await asyncio.sleep(1)
+            return {}
+
+        async def fetch(args: dict, ctx: dict) -> dict:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"content": args["url"]}
+
+        runner.register("slow", slow, timeout_sec=0.01)
+        runner.register("clock", lambda args, ctx: {"content": time.monotonic()}, pure=True, cache_ttl_sec=0.02)
+        runner.register("fetch", fetch, max_concurrency=2)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await runner.run("slow", {}, {})
+        assert runner.stats()["tools"]["slow"]["timeouts"] == 1
+
+        first = await runner.run("clock", {}, {})
+        assert await runner.run("clock", {}, {}) == first
+        await asyncio.sleep(0.03)
+        assert await runner.run("clock", {}, {}) != first
+
+        await asyncio.gather(*(runner.run("fetch", {"url": str(i)}, {}) for i in range(6)))
+        assert peak == 2
+
+    asyncio.run(run_test())
+
+
+def test_cancelled_caller_does_not_cancel_shared_pure_call() -> None:
+    async def run_test() -> None:
+        runner = ToolRunner(PolicyEngine(allow={"lookup": True}))
+        calls = 0
+
+        async def lookup(args: dict, ctx: dict) -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return {"content": args["q"]}
+
+        runner.register("lookup", lookup, pure=True)
+        leader = asyncio.ensure_future(runner.run("lookup", {"q": "a"}, {}))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(runner.run("lookup", {"q": "a"}, {}))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == {"content": "a"}
+        assert leader.cancelled()
+        assert calls == 1
+        assert await runner.run("lookup", {"q": "a"}, {}) == {"content": "a"}
+        assert calls == 1
+
+    asyncio.run(run_test())
+
+
+def test_idempotent_tools_retry_on_timeout() -> None:
+    async def run_test() -> None:
+        runner = ToolRunner(PolicyEngine(allow={"flaky": True, "write": True}), timeout_retries=1)
+        attempts = {"flaky": 0, "write": 0}
+
+        def make(name: str):
+            async def fn(args: dict, ctx: dict) -> dict:
+                attempts[name] += 1
+                if attempts[name] == 1:
+                    await asyncio.sleep(1)
+                return {"ok": True}
+            return fn
+
+        runner.register("flaky", make("flaky"), idempotent=True, timeout_sec=0.01)
+        runner.register("write", make("write"), timeout_sec=0.01)
+
+        assert await runner.run("flaky", {}, {}) == {"ok": True}
+        assert attempts["flaky"] == 2
+        assert runner.stats()["tools"]["flaky"]["timeouts"] == 1
+
+        with pytest.raises(asyncio.TimeoutError):
+            await runner.run("write", {}, {})
+        assert attempts["write"] == 1
+
+    asyncio.run(run_test())
+
+
+def test_policy_rules_globs_context_and_priority() -> None:
+    policy = PolicyEngine(
+        allow={"search": True},
+        rules=[
+            {"tool": "mcp.fs.*", "when": {"session_id": "trusted"}},
+            {"tool": "mcp.fs.delete", "effect": "deny", "priority": 10},
+            {"tool": "mcp.*", "when": {"role": ["admin", "owner"]}, "priority": 5},
+            PolicyRule(tool="mcp.web.fetch", effect="deny", priority=5),
+        ],
+    )
+
+    assert policy.is_allowed("search", {})
+    assert policy.is_allowed("mcp.fs.read", {"session_id": "trusted"})
+    assert not policy.is_allowed("mcp.fs.read", {"session_id": "other"})
+    assert not policy.is_allowed("mcp.fs.delete", {"session_id": "trusted", "role": "admin"})
+    assert policy.is_allowed("mcp.git.log", {"role": "owner"})
+    # Same priority: deny beats allow
+    assert not policy.is_allowed("mcp.web.fetch", {"role": "admin"})
+    assert not policy.is_allowed("other", {"session_id": "trusted"})
+    assert policy.decide("mcp.fs.delete", {}).rule.priority == 10
+
+
+def test_policy_decision_cache_is_invalidated_on_reload() -> None:
+    policy = PolicyEngine(rules=[{"tool": "mcp.fs.*", "when": {"session_id": "s1"}}], cache_size=2)
+    assert policy.is_allowed("mcp.fs.read", {"session_id": "s1", "unrelated": 1})
+    assert policy.is_allowed("mcp.fs.read", {"session_id": "s1", "unrelated": 2})
+    assert policy.cache_info()["hits"] == 1
+
+    policy.load_rules([{"tool": "mcp.fs.*", "effect": "deny"}])
+    assert policy.cache_info()["size"] == 0
+    assert not policy.is_allowed("mcp.fs.read", {"session_id": "s1"})
+
+    for name in ("a", "b", "c"):
+        policy.is_allowed(name, {})
+    assert policy.cache_info()["size"] == 2
+    assert policy.is_allowed("x", {"session_id": ["unhashable"]}) is False
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+LonelyCat AgentLoop Concurrency Benchmark
+
+用 stub LLM（每次 generate 固定 sleep 模拟网络延迟）和一个 stub 工具，让大量 session 并发
+跑多轮 AgentLoop.handle（每轮 user → tool_call → tool_result → assistant），统计总耗时、
+每轮 p50/p95 延迟，以及结束时 TranscriptStore 中保留的条目数（验证 ring buffer 上限）。
+
+Usage:
+    python scripts/bench_agent_loop.py
+    python scripts/bench_agent_loop.py --sessions 1000 --turns 5 --max-items 16
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "packages" / "memory"))
+sys.path.insert(0, str(REPO_ROOT / "packages" / "runtime"))
+
+from runtime.agent_loop import AgentLoop, TranscriptStore  # noqa: E402
+from runtime.lane_queue import LaneQueue  # noqa: E402
+from runtime.policy import PolicyEngine  # noqa: E402
+from runtime.tool_runner import ToolRunner  # noqa: E402
+
+
+class SleepyLLM:
+    """第一次调用返回 tool_call，看到 tool_result 后返回 final"""
+
+    def __init__(self, latency_sec: float) -> None:
+        self._latency = latency_sec
+
+    async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        await asyncio.sleep(self._latency)
+        if messages[-1].get("type") == "tool_result":
+            return {"type": "final", "content": f"ok {messages[-1]['content']}"}
+        return {"type": "tool_call", "name": "echo", "arguments": {"text": messages[-1]["content"]}}
+
+
+async def _run(sessions: int, turns: int, latency_sec: float, max_items: int) -> Dict[str, Any]:
+    tools = ToolRunner(PolicyEngine(allow={"echo": True}))
+
+    async def echo(arguments: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+        return {"content": arguments["text"]}
+
+    tools.register("echo", echo)
+    transcript = TranscriptStore(max_items_per_session=max_items or None)
+    loop = AgentLoop(
+        llm=SleepyLLM(latency_sec),
+        tools=tools,
+        transcript=transcript,
+        queue=LaneQueue(max_concurrency=sessions),
+    )
+    latencies: List[float] = []
+
+    async def session_worker(index: int) -> None:
+        for turn in range(turns):
+            t0 = time.perf_counter()
+            await loop.handle(f"s{index}", f"hello {turn}")
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(session_worker(i) for i in range(sessions)))
+    wall = time.perf_counter() - t0
+    ordered = sorted(latencies)
+    return {
+        "sessions": sessions,
+        "turns": turns,
+        "max_items_per_session": max_items or None,
+        "wall_sec": round(wall, 3),
+        "turns_per_sec": round(len(latencies) / wall, 1),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "retained_items": sum(transcript.count(f"s{i}") for i in range(sessions)),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent AgentLoop.handle throughput")
+    parser.add_argument("--sessions", type=int, default=1000, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Simulated LLM latency per generate call")
+    parser.add_argument("--max-items", default="0,16", help="Comma-separated per-session caps (0 = unbounded)")
+    args = parser.parse_args()
+
+    results = []
+    for max_items in (int(s) for s in args.max_items.split(",") if s.strip()):
+        results.append(asyncio.run(_run(args.sessions, args.turns, args.latency_ms / 1000.0, max_items)))
+        print(json.dumps(results[-1]), file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+LonelyCat LLM Admission Benchmark
+
+用模拟 provider（同时在途请求超过 --provider-limit 即返回 429 + Retry-After）对比：
+- 不加准入控制：调用方各自重试，429 风暴放大实际请求数，成功吞吐下降；
+- 加准入控制：max_in_flight 卡在 provider 限制上，吞吐停在上限附近，几乎没有 429。
+
+Usage:
+    python scripts/bench_llm_admission.py
+    python scripts/bench_llm_admission.py --callers 32 --calls 200 --provider-limit 4 --latency-ms 50
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "apps" / "agent-worker"))
+
+import httpx  # noqa: E402
+from agent_worker.llm.admission import AdmissionController, AdmissionLimits  # noqa: E402
+from agent_worker.llm.openai import OpenAIChatLLM  # noqa: E402
+
+
+class SimulatedProvider:
+    """并发超过 limit 时返回 429，否则按固定延迟返回"""
+
+    def __init__(self, limit: int, latency_s: float, retry_after_s: float) -> None:
+        self._limit = limit
+        self._latency_s = latency_s
+        self._retry_after_s = retry_after_s
+        self._lock = threading.Lock()
+        self._active = 0
+        self.requests = 0
+        self.rejected = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            if self._active >= self._limit:
+                self.rejected += 1
+                return httpx.Response(429, headers={"Retry-After": str(self._retry_after_s)})
+            self._active += 1
+        try:
+            time.sleep(self._latency_s)
+            return httpx.Response(
+                200,
+                json={"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": 10}},
+            )
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def run(args: argparse.Namespace, with_admission: bool) -> dict:
+    provider = SimulatedProvider(args.provider_limit, args.latency_ms / 1000.0, args.retry_after_s)
+    llm = OpenAIChatLLM(
+        api_key="bench",
+        model="bench",
+        base_url="http://bench.local",
+        max_retries=args.max_retries,
+        retry_backoff_s=0.01,
+        transport=httpx.MockTransport(provider.handler),
+    )
+    controller = None
+    if with_admission:
+        controller = AdmissionController("bench", AdmissionLimits(max_in_flight=args.provider_limit))
+        llm.attach_admission(controller)
+
+    ok = 0
+    failed = 0
+    lock = threading.Lock()
+
+    def call(_: int) -> None:
+        nonlocal ok, failed
+        try:
+            llm.generate("ping")
+            result = True
+        except (RuntimeError, ValueError):
+            result = False
+        with lock:
+            if result:
+                ok += 1
+            else:
+                failed += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        list(pool.map(call, range(args.calls)))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "admission": with_admission,
+        "succeeded": ok,
+        "failed": failed,
+        "http_requests": provider.requests,
+        "http_429": provider.rejected,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "ceiling_rps": round(args.provider_limit / (args.latency_ms / 1000.0), 2),
+    }
+    if controller is not None:
+        stats = controller.stats()
+        report["queue_s_avg"] = round(stats["queue_s_avg"], 4)
+        report["queue_s_max"] = round(stats["queue_s_max"], 4)
+        report["throttled"] = stats["throttled"]
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark LLM admission control against a rate-limited provider")
+    parser.add_argument("--callers", type=int, default=16, help="Concurrent callers")
+    parser.add_argument("--calls", type=int, default=160, help="Total LLM calls")
+    parser.add_argument("--provider-limit", type=int, default=4, help="Provider max concurrent requests")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated provider latency")
+    parser.add_argument("--retry-after-s", type=float, default=0.05, help="Retry-After sent with 429")
+    parser.add_argument("--max-retries", type=int, default=2, help="Provider client max retries")
+    args = parser.parse_args()
+
+    results = [run(args, with_admission=False), run(args, with_admission=True)]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+LonelyCat Async LLM Benchmark
+
+在同一个事件循环里并发发出 N 次 LLM 调用，对比：
+- stub：StubLLM.agenerate（纯内存，衡量协程调度本身的开销）；
+- http-async：OpenAIChatLLM.agenerate + 共享 httpx.AsyncClient，模拟 provider 延迟 --latency-ms；
+- http-sync-threads：同步 generate 放进线程池（改造前 core-api 的做法），同样的延迟。
+
+Usage:
+    python scripts/bench_llm_async.py
+    python scripts/bench_llm_async.py --calls 100 --latency-ms 50 --threads 8
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "apps" / "agent-worker"))
+
+import httpx  # noqa: E402
+from agent_worker.llm.async_http import aclose_async_clients  # noqa: E402
+from agent_worker.llm.openai import OpenAIChatLLM  # noqa: E402
+from agent_worker.llm.stub import StubLLM  # noqa: E402
+
+_REPLY = {"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": 8}}
+
+
+class _LatencyTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """同步/异步两用的模拟 provider：固定延迟后返回 200"""
+
+    def __init__(self, latency_s: float) -> None:
+        self._latency_s = latency_s
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self._latency_s)
+        return httpx.Response(200, json=_REPLY)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self._latency_s)
+        return httpx.Response(200, json=_REPLY)
+
+
+def _report(name: str, calls: int, elapsed: float) -> dict:
+    return {
+        "mode": name,
+        "calls": calls,
+        "elapsed_s": round(elapsed, 4),
+        "calls_per_s": round(calls / elapsed, 1) if elapsed else None,
+    }
+
+
+async def bench_stub(calls: int) -> dict:
+    llm = StubLLM()
+    start = time.perf_counter()
+    await asyncio.gather(*(llm.agenerate(f"message {i}") for i in range(calls)))
+    return _report("stub", calls, time.perf_counter() - start)
+
+
+async def bench_http_async(calls: int, latency_s: float) -> dict:
+    llm = OpenAIChatLLM(
+        api_key="bench",
+        model="bench",
+        base_url="http://bench.local",
+        transport=_LatencyTransport(latency_s),
+    )
+    start = time.perf_counter()
+    await asyncio.gather(*(llm.agenerate(f"message {i}") for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    await aclose_async_clients()
+    return _report("http-async", calls, elapsed)
+
+
+def bench_http_sync_threads(calls: int, latency_s: float, threads: int) -> dict:
+    llm = OpenAIChatLLM(
+        api_key="bench",
+        model="bench",
+        base_url="http://bench.local",
+        transport=_LatencyTransport(latency_s),
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(llm.generate, (f"message {i}" for i in range(calls))))
+    report = _report("http-sync-threads", calls, time.perf_counter() - start)
+    report["threads"] = threads
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent async LLM calls")
+    parser.add_argument("--calls", type=int, default=100, help="Concurrent LLM calls")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Simulated provider latency")
+    parser.add_argument("--threads", type=int, default=8, help="Thread pool size for the sync baseline")
+    args = parser.parse_args()
+
+    latency_s = args.latency_ms / 1000.0
+    results = [
+        asyncio.run(bench_stub(args.calls)),
+        asyncio.run(bench_http_async(args.calls, latency_s)),
+        bench_http_sync_threads(args.calls, latency_s, args.threads),
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
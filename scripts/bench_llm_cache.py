@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+LonelyCat LLM Response Cache Benchmark
+
+回放一组录制的 LLM 调用（gate / decision / JSON-only），对比直连与经过
+CachedLLM 的耗时与命中率。上游 LLM 用固定延迟的替身模拟，不发真实请求。
+
+录制文件为 JSONL，每行一条调用：
+    {"prompt": "..."}                                   -> generate()
+    {"messages": [{"role": "user", "content": "..."}]}  -> generate_messages()
+
+Usage:
+    python scripts/bench_llm_cache.py
+    python scripts/bench_llm_cache.py --input recorded_calls.jsonl --latency-ms 400
+    python scripts/bench_llm_cache.py --rounds 3 --cache-path /tmp/llm_cache.db
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "apps" / "agent-worker"))
+
+from agent_worker.llm.base import BaseLLM  # noqa: E402
+from agent_worker.llm.cache import CachedLLM, LLMResponseCache  # noqa: E402
+from agent_worker.llm.json_only import JsonOnlyLLMWrapper  # noqa: E402
+
+# 没有提供录制文件时使用的典型短消息（寒暄/确认/重试占多数）
+DEFAULT_USER_MESSAGES = [
+    "ok", "thanks", "好的", "谢谢", "你好", "hi", "嗯", "收到",
+    "ok", "thanks", "好的", "谢谢", "hello", "明白了", "ok", "好的",
+    "我喜欢猫", "叫我小明", "帮我总结一下这个对话", "ok",
+]
+
+
+class SimulatedLLM(BaseLLM):
+    """固定延迟、确定性输出的上游替身"""
+
+    def __init__(self, latency_s: float) -> None:
+        super().__init__()
+        self._latency_s = latency_s
+        self._model = "simulated"
+        self._base_url = "local://bench"
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(self._latency_s)
+        return json.dumps({"decision": "reply", "len": len(prompt)})
+
+    def generate_messages(self, messages: List[Dict[str, str]]) -> str:
+        self.calls += 1
+        time.sleep(self._latency_s)
+        return json.dumps({"decision": "reply", "n": len(messages)})
+
+
+def load_calls(path: Path | None) -> List[Dict[str, Any]]:
+    if path is None:
+        return [
+            {"messages": [
+                {"role": "system", "content": "Decide whether to reply or start a run."},
+                {"role": "user", "content": text},
+            ]}
+            for text in DEFAULT_USER_MESSAGES
+        ]
+    calls = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "prompt" in record or "messages" in record:
+                calls.append(record)
+    return calls
+
+
+def replay(llm: BaseLLM, calls: List[Dict[str, Any]], rounds: int) -> List[float]:
+    latencies = []
+    for _ in range(rounds):
+        for call in calls:
+            start = time.perf_counter()
+            if "messages" in call:
+                llm.generate_messages(call["messages"])
+            else:
+                llm.generate(call["prompt"])
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(name: str, latencies: List[float], upstream_calls: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "name": name,
+        "calls": len(latencies),
+        "upstream_calls": upstream_calls,
+        "total_ms": round(sum(latencies), 1),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded LLM calls through CachedLLM")
+    parser.add_argument("--input", type=Path, default=None, help="JSONL of recorded calls")
+    parser.add_argument("--rounds", type=int, default=2, help="How many times to replay the set")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Simulated upstream latency")
+    parser.add_argument("--cache-path", type=Path, default=None, help="SQLite cache file (default: temp)")
+    args = parser.parse_args()
+
+    calls = load_calls(args.input)
+    if not calls:
+        print("No calls to replay")
+        return 2
+    latency_s = args.latency_ms / 1000.0
+
+    baseline_llm = SimulatedLLM(latency_s)
+    baseline = replay(JsonOnlyLLMWrapper(baseline_llm), calls, args.rounds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = args.cache_path or Path(tmp) / "llm_cache.db"
+        cache = LLMResponseCache(cache_path)
+        cached_upstream = SimulatedLLM(latency_s)
+        cached = replay(CachedLLM(JsonOnlyLLMWrapper(cached_upstream), cache), calls, args.rounds)
+        stats = cache.stats()
+
+    report = {
+        "baseline": summarize("direct", baseline, baseline_llm.calls),
+        "cached": summarize("cached", cached, cached_upstream.calls),
+        "cache": {k: v for k, v in stats.items() if k != "path"},
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+LonelyCat Memory Proposal-Accept Benchmark
+
+在临时 SQLite 库里预置不同数量的 active facts（global + 大量 session facts，key 分布较集中），
+再测 create_proposal + accept_proposal 的 p50/p95 延迟。accept 路径包含 key policy 解析与
+_detect_conflict 查询，理想情况下延迟不随 facts 总量增长。
+
+Usage:
+    python scripts/bench_memory_accept.py
+    python scripts/bench_memory_accept.py --sizes 100,10000 --accepts 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "packages" / "memory"))
+
+from memory.db import Base, FactModel, _utc_now  # noqa: E402
+from memory.facts import MemoryStore  # noqa: E402
+from memory.schemas import FactStatus, ProposalPayload, Scope, SourceKind, SourceRef  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+SEED_KEYS = 10
+SEED_SESSIONS = 500
+
+
+def _seed(db, size: int) -> None:
+    now = _utc_now()
+    rows = []
+    for i in range(size):
+        session = i % SEED_SESSIONS
+        rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "key": f"key_{i % SEED_KEYS}",
+                "value": f"value {i}",
+                "status": FactStatus.ACTIVE if i % 5 else FactStatus.REVOKED,
+                "scope": Scope.GLOBAL if session == 0 else Scope.SESSION,
+                "project_id": None,
+                "session_id": None if session == 0 else f"s{session}",
+                "source_ref_kind": SourceKind.MANUAL,
+                "source_ref_ref_id": "seed",
+                "source_ref_excerpt": None,
+                "confidence": None,
+                "version": 1,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    db.bulk_insert_mappings(FactModel, rows)
+    db.commit()
+
+
+async def _accepts(store: MemoryStore, db, count: int) -> list[float]:
+    latencies = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        proposal = await store.create_proposal(
+            payload=ProposalPayload(key=f"key_{i % SEED_KEYS}", value=f"new {i}"),
+            source_ref=SourceRef(kind=SourceKind.MANUAL, ref_id=f"bench-{i}"),
+        )
+        await store.accept_proposal(proposal.id, scope=Scope.SESSION, session_id=f"s{1 + i % (SEED_SESSIONS - 1)}")
+        db.commit()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return latencies
+
+
+def bench_size(size: int, accepts: int) -> dict:
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    try:
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        _seed(db, size)
+        latencies = asyncio.run(_accepts(MemoryStore(db=db), db, accepts))
+        db.close()
+    finally:
+        engine.dispose()
+        os.unlink(db_path)
+    ordered = sorted(latencies)
+    return {
+        "facts": size,
+        "accepts": accepts,
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark MemoryStore proposal-accept latency vs fact count")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="Comma-separated seeded fact counts")
+    parser.add_argument("--accepts", type=int, default=200, help="Proposals accepted per size")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        results.append(bench_size(size, args.accepts))
+        print(json.dumps(results[-1]), file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
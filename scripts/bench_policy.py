@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+LonelyCat Policy Engine Micro-Benchmark
+
+生成不同数量的规则（精确名、带前缀的 glob、带 session 条件的规则混合），
+分别测量 PolicyEngine.is_allowed 在决策缓存命中（热）与关闭缓存（冷，每次走 trie + 规则匹配）
+两种情况下的单次耗时（ns/op）。
+
+Usage:
+    python scripts/bench_policy.py
+    python scripts/bench_policy.py --rules 10,100,500 --ops 200000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "packages" / "runtime"))
+
+from runtime.policy import PolicyEngine, PolicyRule  # noqa: E402
+
+NAMESPACES = ["fs", "web", "git", "db", "mail", "calendar", "shell", "search"]
+
+
+def _rules(count: int) -> list:
+    rng = random.Random(count)
+    rules = []
+    for i in range(count):
+        namespace = NAMESPACES[i % len(NAMESPACES)]
+        kind = i % 3
+        if kind == 0:
+            rules.append(PolicyRule(tool=f"mcp.{namespace}.tool_{i}"))
+        elif kind == 1:
+            rules.append(PolicyRule(tool=f"mcp.{namespace}.group_{i}.*", when={"session_id": f"s{i % 50}"}))
+        else:
+            rules.append(PolicyRule(tool=f"mcp.{namespace}.*", effect="deny", priority=rng.randint(0, 3),
+                                    when={"role": "guest"}))
+    return rules
+
+
+def _workload(count: int, size: int = 1000) -> list:
+    rng = random.Random(7)
+    calls = []
+    for _ in range(size):
+        namespace = rng.choice(NAMESPACES)
+        i = rng.randrange(count)
+        tool = rng.choice([f"mcp.{namespace}.tool_{i}", f"mcp.{namespace}.group_{i}.read", "unknown.tool"])
+        calls.append((tool, {"session_id": f"s{rng.randrange(50)}", "role": rng.choice(["guest", "user"])}))
+    return calls
+
+
+def _measure(policy: PolicyEngine, calls: list, ops: int) -> float:
+    is_allowed = policy.is_allowed
+    n = len(calls)
+    t0 = time.perf_counter_ns()
+    for i in range(ops):
+        tool, ctx = calls[i % n]
+        is_allowed(tool, ctx)
+    return (time.perf_counter_ns() - t0) / ops
+
+
+def bench(count: int, ops: int) -> dict:
+    rules = _rules(count)
+    calls = _workload(count)
+    hot = PolicyEngine(rules=rules)
+    for tool, ctx in calls:
+        hot.is_allowed(tool, ctx)
+    return {
+        "rules": count,
+        "ops": ops,
+        "cached_ns_per_op": round(_measure(hot, calls, ops), 1),
+        "uncached_ns_per_op": round(_measure(PolicyEngine(rules=rules, cache_size=0), calls, ops), 1),
+        "cache": hot.cache_info(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PolicyEngine decision latency vs rule count")
+    parser.add_argument("--rules", default="10,100,500,1000", help="Comma-separated rule counts")
+    parser.add_argument("--ops", type=int, default=200000, help="Decisions measured per configuration")
+    args = parser.parse_args()
+
+    results = []
+    for count in (int(s) for s in args.rules.split(",") if s.strip()):
+        results.append(bench(count, args.ops))
+        print(json.dumps(results[-1]), file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+LonelyCat Vector Store Benchmark
+
+在临时目录里建 memmap 向量索引（packages/memory/memory/vector_store.py），按规模测：
+- insert：分批 upsert 随机单位向量的吞吐（向量/秒）；
+- query：单条 top-k 查询的 p50/p95 延迟，以及一批 query 一次矩阵乘的平均每条延迟；
+- embed：HashingEmbedder 的文本向量化吞吐（与规模无关，只测一次）。
+
+注意 1M × 256 维 float32 约 1 GB 磁盘与页缓存。
+
+Usage:
+    python scripts/bench_vector_store.py
+    python scripts/bench_vector_store.py --sizes 10000,100000 --dim 128 --queries 200
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "packages" / "memory"))
+
+import numpy as np  # noqa: E402
+from memory.vector_store import HashingEmbedder, VectorStore  # noqa: E402
+
+INSERT_BATCH = 10000
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_size(size: int, dim: int, queries: int, batch: int, k: int) -> dict:
+    rng = np.random.default_rng(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(Path(tmp) / "index", dim=dim, initial_capacity=size)
+        start = time.perf_counter()
+        for offset in range(0, size, INSERT_BATCH):
+            count = min(INSERT_BATCH, size - offset)
+            vectors = rng.standard_normal((count, dim), dtype=np.float32)
+            store.upsert([f"v{offset + i}" for i in range(count)], vectors=vectors)
+        store.flush()
+        insert_s = time.perf_counter() - start
+
+        probes = rng.standard_normal((queries, dim), dtype=np.float32)
+        latencies = []
+        for probe in probes:
+            t0 = time.perf_counter()
+            store.search(probe, k=k)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        for offset in range(0, queries, batch):
+            store.search_batch(list(probes[offset : offset + batch]), k=k)
+        batched_ms = (time.perf_counter() - t0) * 1000.0 / queries
+        store.close()
+
+    return {
+        "size": size,
+        "dim": dim,
+        "insert_s": round(insert_s, 3),
+        "insert_per_s": round(size / insert_s, 1),
+        "query_p50_ms": round(statistics.median(latencies), 3),
+        "query_p95_ms": round(_percentile(latencies, 0.95), 3),
+        "batched_query_ms": round(batched_ms, 3),
+        "batch": batch,
+    }
+
+
+def bench_embed(dim: int, texts: int) -> dict:
+    embedder = HashingEmbedder(dim)
+    samples = [f"user fact {i}: likes item number {i % 97} and city {i % 13}" for i in range(texts)]
+    start = time.perf_counter()
+    embedder.embed(samples)
+    elapsed = time.perf_counter() - start
+    return {"embedder": "hashing", "dim": dim, "texts": texts, "texts_per_s": round(texts / elapsed, 1)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark VectorStore insert and query latency")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated index sizes")
+    parser.add_argument("--dim", type=int, default=256, help="Vector dimension")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per size")
+    parser.add_argument("--batch", type=int, default=32, help="Queries per batched matmul")
+    parser.add_argument("--k", type=int, default=10, help="Top-k")
+    args = parser.parse_args()
+
+    results = [bench_embed(args.dim, 2000)]
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        results.append(bench_size(size, args.dim, args.queries, args.batch, args.k))
+        print(json.dumps(results[-1]), file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+LonelyCat Decision Fast Path Evaluation
+
+对照录制的 Agent Decision 结果，评估 pre-LLM fast path 的精度与覆盖率：
+- precision：fast path 命中的消息中，录制 decision 确实是 "reply" 的比例（必须接近 1）
+- coverage：fast path 命中占全部消息的比例（即省掉的 Decision LLM 调用占比）
+- reply_recall：录制为 "reply" 的消息中被 fast path 拦下的比例
+
+录制来源二选一：
+    JSONL，每行 {"user_message": "...", "decision": "reply|run|reply_and_run"}
+    core-api 数据库：user 消息 + 紧随其后带 meta_json.agent_decision 的 assistant 消息
+
+Usage:
+    python scripts/eval_decision_fast_path.py
+    python scripts/eval_decision_fast_path.py --input recorded_decisions.jsonl
+    python scripts/eval_decision_fast_path.py --from-db --limit 5000
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "packages"))
+sys.path.insert(0, str(REPO_ROOT / "apps" / "core-api"))
+
+from app.services.decision_fast_path import DecisionFastPath, ReplyOnlyPatternClassifier  # noqa: E402
+
+# 没有录制数据时使用的小样本（decision 为人工标注）
+DEFAULT_SAMPLES = [
+    ("你好", "reply"), ("hi", "reply"), ("谢谢", "reply"), ("好的", "reply"), ("ok", "reply"),
+    ("收到，谢谢", "reply"), ("晚安", "reply"), ("thanks!", "reply"), ("嗯嗯", "reply"),
+    ("你好，今天天气怎么样", "reply"), ("给我讲个笑话", "reply"), ("what's your name", "reply"),
+    ("帮我总结一下我们的对话", "run"), ("帮我跑这段代码：print(1)", "run"),
+    ("Sleep for 5 seconds", "run"), ("调研一下向量数据库", "reply_and_run"),
+    ("好的，那帮我搜索一下", "run"), ("ok run it again", "run"),
+]
+
+
+def load_jsonl(path: Path) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record.get("user_message"), str) and isinstance(record.get("decision"), str):
+                records.append(record)
+    return records
+
+
+def load_from_db(limit: int) -> List[Dict[str, Any]]:
+    from app.db import MessageModel, MessageRole, SessionLocal
+
+    db = SessionLocal()
+    try:
+        messages = (
+            db.query(MessageModel)
+            .order_by(MessageModel.conversation_id, MessageModel.created_at)
+            .limit(limit)
+            .all()
+        )
+    finally:
+        db.close()
+
+    records = []
+    for prev, msg in zip(messages, messages[1:]):
+        if prev.conversation_id != msg.conversation_id:
+            continue
+        if prev.role != MessageRole.USER or msg.role != MessageRole.ASSISTANT:
+            continue
+        meta = msg.meta_json or {}
+        if not meta.get("agent_decision"):
+            continue
+        started_run = meta.get("run_id") or meta.get("run_ids_started")
+        records.append({
+            "user_message": prev.content or "",
+            "decision": "run" if started_run else "reply",
+        })
+    return records
+
+
+def evaluate(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    fast_path = DecisionFastPath([ReplyOnlyPatternClassifier()])
+    hits = 0
+    correct = 0
+    total_reply = 0
+    false_positives = []
+    for record in records:
+        recorded = record["decision"]
+        if recorded == "reply":
+            total_reply += 1
+        hit = fast_path.classify(record["user_message"], record=False)
+        if hit is None:
+            continue
+        hits += 1
+        if recorded == "reply":
+            correct += 1
+        else:
+            false_positives.append({"user_message": record["user_message"], "decision": recorded})
+    total = len(records)
+    return {
+        "messages": total,
+        "fast_path_hits": hits,
+        "precision": round(correct / hits, 4) if hits else None,
+        "coverage": round(hits / total, 4) if total else 0.0,
+        "reply_recall": round(correct / total_reply, 4) if total_reply else None,
+        "false_positives": false_positives[:20],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Evaluate decision fast path against recorded decisions")
+    parser.add_argument("--input", type=Path, default=None, help="JSONL of recorded decisions")
+    parser.add_argument("--from-db", action="store_true", help="Read recorded decisions from the core-api DB")
+    parser.add_argument("--limit", type=int, default=20000, help="Max messages to read with --from-db")
+    args = parser.parse_args()
+
+    if args.input is not None:
+        records = load_jsonl(args.input)
+    elif args.from_db:
+        records = load_from_db(args.limit)
+    else:
+        records = [{"user_message": m, "decision": d} for m, d in DEFAULT_SAMPLES]
+    if not records:
+        print("No recorded decisions to evaluate")
+        return 2
+
+    print(json.dumps(evaluate(records), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+LonelyCat LLM Call Report
+
+读取 LLM_CALL_LOG 写出的 JSONL 调用日志（每次 LLM 调用一行，见
+agent_worker/llm/instrumentation.py），按调用点（decision / responder / gate / summarize）
+汇总 p50/p95 延迟、token 用量、重试与缓存命中。
+
+Usage:
+    LLM_CALL_LOG=.lonelycat/llm_calls.jsonl python -m agent_worker.chat "hi"
+    python scripts/llm_call_report.py .lonelycat/llm_calls.jsonl
+    python scripts/llm_call_report.py .lonelycat/llm_calls.jsonl --since-hours 24 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "apps" / "agent-worker"))
+
+from agent_worker.llm.instrumentation import summarize_llm_calls  # noqa: E402
+
+_COLUMNS = (
+    ("call_site", "site", 12),
+    ("calls", "calls", 7),
+    ("errors", "err", 5),
+    ("cache_hits", "cache", 6),
+    ("retries", "retry", 6),
+    ("latency_ms_p50", "p50 ms", 9),
+    ("latency_ms_p95", "p95 ms", 9),
+    ("tokens_p50", "tok p50", 8),
+    ("tokens_p95", "tok p95", 8),
+    ("prompt_tokens", "prompt", 9),
+    ("completion_tokens", "compl", 9),
+)
+
+
+def load_records(path: Path, since_ts: float | None = None) -> list[dict]:
+    records = []
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if since_ts is not None and float(record.get("ts", 0)) < since_ts:
+                continue
+            records.append(record)
+    return records
+
+
+def render_table(summary: dict[str, dict]) -> str:
+    header = " ".join(title.rjust(width) for _, title, width in _COLUMNS)
+    lines = [header, "-" * len(header)]
+    for site, row in summary.items():
+        cells = []
+        for key, _, width in _COLUMNS:
+            value = site if key == "call_site" else row.get(key, "")
+            cells.append(str(value).rjust(width))
+        lines.append(" ".join(cells))
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Summarize LLM call latency and tokens by call site")
+    parser.add_argument("log", type=Path, help="JSONL file written via LLM_CALL_LOG")
+    parser.add_argument("--since-hours", type=float, default=None, help="Only include recent calls")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    if not args.log.exists():
+        print(f"log not found: {args.log}", file=sys.stderr)
+        return 1
+    since_ts = time.time() - args.since_hours * 3600 if args.since_hours else None
+    summary = summarize_llm_calls(load_records(args.log, since_ts))
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    elif summary:
+        print(render_table(summary))
+    else:
+        print("no LLM calls recorded")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())